@@ -15,11 +15,85 @@ The solve method of the classes returns a tuple:
     The assignment returned is a SAT assignment for SAT code and None for UNSAT.
     The assignment is returned in the form of the original formula provided
     (converting back all the dummy variables).
+
+Search statistics (decisions, propagations, conflicts, learned clauses, theory
+checks, etc.) are collected during every solve. They are accessible through
+the statistics property after the solve, or returned as a third element of the
+tuple when solve is called with return_statistics=True.
+
+The DPLL facade can run in a hybrid mode - given a LocalSearchSolver it first
+runs a stochastic local search on the CNF and seeds the saved phases of the
+SAT solver with the best assignment found. If the local search found a model,
+the CDCL search follows it without conflicts.
+
+With a vivify_interval the solver periodically vivifies (shortens) the clauses
+database at decision level 0 (see SATSolver). A pass runs after every
+vivify_interval conflicts, restarting the search to level 0 if needed. The
+interval grows geometrically after every pass so the search stays complete.
+
+The solver state can be saved to a checkpoint file (save_checkpoint, or
+periodically during the solve given a checkpoint_path) and the search can be
+resumed from it later (resume), e.g. after a preemption. The checkpoint is an
+uncompressed .npz file holding the SAT solver arrays (see SATSolver) and a
+pickled blob of the abstraction/dummy maps, the original formula and the
+theory state. The level 0 trail is replayed into the theory when resuming.
+Since the blob is unpickled, only resume from trusted checkpoint files.
+
+A formula can also be given as a stream of assertions whose conjunction is the
+formula (solve_assertions, e.g. the assertions read lazily from a file by
+Parser.parse_assertions). Every assertion is preprocessed by the theory and
+abstracted as soon as it's read, so the conjunction is never built and the
+memory scales with the abstracted CNF rather than with the formula text.
+
+With simplify=True every assertion is simplified before its abstraction (see
+bool_transforms.simplify), propagating the units of the previous assertions.
+The literals the simplification removed don't affect the truth value of the
+formula, so they're missing from the returned assignment.
+
+With incremental_abstraction=True a single Abstractor is kept between the
+solves, so a long running session maps the same literals to the same ints and
+reuses the tseitin gates of the subformulas already encoded by previous
+solves (see Abstractor.new_formula).
+
+A formula can also be given as a string (solve_text). Given a FrontendCache
+(see parsing.cache) the output of the frontend (parsing, theory preprocess
+and abstraction) is cached by a hash of the formula text, so solving a formula
+string seen before (by this process, or by another one sharing the cache
+directory) skips the whole frontend.
+
+Given a ResultCache (see solvers.ResultCache) the solver looks up the result
+of the abstracted problem by a canonical fingerprint (which is invariant to
+renaming the variables and functions and to reordering the clauses) before
+searching. A cached UNSAT is returned immediately, and a cached SAT model is
+mapped to the ints of the problem and translated to its literals as usual.
+On a hit the theory doesn't process the model, and the search statistics
+are empty.
+
+The translation of the abstraction ints back to the literals of the original
+formula (the original equalities with negated args, the dummies inside the
+functions args replaced and the dummy vars dropped) is precomputed once the
+formula is abstracted, so translating a SAT assignment is a single pass over
+it (unless the theory converts the assignment back to its pre preprocess form,
+see PropositionalTheory.to_pre_theory_assignment). With lazy_model=True the
+returned assignment is a LazyModel - a read only mapping view of the SAT
+assignment which looks up only the literals queried, for callers which mostly
+don't read the whole model.
+
+Given a PhaseTimer (see profiling.phase_timer) the solver attributes the time
+of every stage of the pipeline (theory preprocess, abstraction, clauses
+registration, BCP, decisions, theory checks, conflicts handling and the model
+translation) to nested phases.
 """
 
 from __future__ import annotations
 
-from typing import Optional, List, Set, Union, Dict, Tuple
+import os
+import pickle
+import time
+from collections.abc import Mapping
+from typing import Callable, Iterable, Optional, List, Set, Union, Dict, Tuple
+
+import numpy as np
 
 from parsing.logical_blocks import (
     Var,
@@ -28,54 +102,241 @@ from parsing.logical_blocks import (
     Geq,
     NEqual,
     Equal,
-    BinaryOp,
-    UnaryOp,
     Atom,
+    And,
+    Negate,
+    iter_subformulas,
 )
 from solvers import SATSolver
+from solvers.LocalSearchSolver import LocalSearchSolver
+from solvers.OccurrenceIndex import DLIS
+from solvers.SolverStatistics import SolverStatistics
+from solvers.ResultCache import ResultCache, canonical_form
 from constants import ResultCode
 from solvers.theories.PropositionalTheory import PropositionalTheory
+from profiling.phase_timer import PhaseTimer, get_timer
 from bool_transforms.process_cnf import (
-    to_abstract_cnf_conjunction,
+    Abstractor,
     to_equalities_with_no_negations_args,
 )
+from bool_transforms.tseitin_transform import FULL_ENCODING, TSEITIN_ENCODINGS
+from bool_transforms.simplify import Simplifier
+from parsing.cache import CachedFrontend, FrontendCache, formula_key
+from parsing.parse import Parser
+
+DEFAULT_VIVIFY_BUDGET = 2000
+# the growth factor of the conflicts interval between vivification passes
+VIVIFY_INTERVAL_GROWTH = 1.5
+DEFAULT_CHECKPOINT_INTERVAL = 1000
+
+# abstracted in place of an assertion simplified to False
+_FALSE_VAR = Var("#False")
+_CONTRADICTION = And(_FALSE_VAR, Negate(_FALSE_VAR))
+
+
+class LazyModel(Mapping):
+    """
+    A read only view of a SAT assignment as an assignment of the literals of
+    the original formula, translating only the literals looked up
+    """
+
+    def __init__(self, assignment: Set[int], literals_ints: Dict[Atom, int]) -> None:
+        """
+        :param assignment: The SAT assignment (a set of signed ints)
+        :param literals_ints: The ints of the literals of the original formula
+        """
+        self._assignment = assignment
+        self._literals_ints = literals_ints
+
+    def __getitem__(self, literal: Atom) -> bool:
+        lit_int = self._literals_ints.get(literal)
+        if lit_int is not None:
+            if lit_int in self._assignment:
+                return True
+            if -lit_int in self._assignment:
+                return False
+        raise KeyError(literal)
+
+    def __iter__(self):
+        assignment = self._assignment
+        for literal, lit_int in self._literals_ints.items():
+            if lit_int in assignment or -lit_int in assignment:
+                yield literal
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
 
 
 class DPLLT:
-    def __init__(self, theory: PropositionalTheory = None) -> None:
-        self.sat_solver = SATSolver.Solver()
+    def __init__(
+        self,
+        theory: PropositionalTheory = None,
+        timer: Optional[PhaseTimer] = None,
+        decision_heuristic: str = DLIS,
+        phase_saving: bool = False,
+        chrono_threshold: Optional[int] = None,
+        vivify_interval: Optional[int] = None,
+        vivify_budget: int = DEFAULT_VIVIFY_BUDGET,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+        tseitin_encoding: str = FULL_ENCODING,
+        simplify: bool = False,
+        incremental_abstraction: bool = False,
+        frontend_cache: Optional[FrontendCache] = None,
+        result_cache: Optional[ResultCache] = None,
+        lazy_model: bool = False,
+    ) -> None:
+        """
+        :param theory: The theory solver to combine with the SAT solver.
+        PropositionalTheory if not given.
+        :param timer: An optional PhaseTimer to attribute the solve time to
+        the stages of the pipeline
+        :param decision_heuristic: The decision heuristic of the SAT solver
+        (see SATSolver.Solver)
+        :param phase_saving: Whether the SAT solver saves the phases of
+        unassigned literals (see SATSolver.Solver)
+        :param chrono_threshold: The backjump distance above which the
+        solver backtracks chronologically after a conflict. None to always
+        backjump non-chronologically (see SATSolver.Solver)
+        :param vivify_interval: The number of conflicts before the first
+        vivification pass. None to disable vivification
+        :param vivify_budget: The propagations budget of a vivification pass
+        :param checkpoint_path: A path to periodically save checkpoints of
+        the solve to. None to disable the periodic checkpoints
+        :param checkpoint_interval: The number of conflicts between
+        periodic checkpoints
+        :param tseitin_encoding: The tseitin encoding of the abstracted
+        formulas, one of TSEITIN_ENCODINGS (see tseitin_transform)
+        :param simplify: Whether to simplify the assertions before their
+        abstraction (see bool_transforms.simplify)
+        :param incremental_abstraction: Whether to keep the abstractor
+        between the solves, reusing its literals ints and tseitin gates
+        :param frontend_cache: An optional cache of the frontend output of
+        the formulas given as strings (see solve_text)
+        :param result_cache: An optional cache of the results of the solved
+        problems (see solvers.ResultCache)
+        :param lazy_model: Whether to return the assignment of an abstracted
+        formula as a LazyModel view rather than a dict
+        """
+        if vivify_interval is not None and vivify_interval <= 0:
+            raise ValueError(f"vivify_interval must be positive, got {vivify_interval}")
+        if checkpoint_interval <= 0:
+            raise ValueError(
+                f"checkpoint_interval must be positive, got {checkpoint_interval}"
+            )
+        if tseitin_encoding not in TSEITIN_ENCODINGS:
+            raise ValueError(
+                f"Unknown tseitin encoding {tseitin_encoding},"
+                f" expected one of {TSEITIN_ENCODINGS}"
+            )
+        self.sat_solver = SATSolver.Solver(
+            decision_heuristic, phase_saving, chrono_threshold
+        )
+        self.vivify_interval = vivify_interval
+        self.vivify_budget = vivify_budget
+        self._cur_vivify_interval = None
+        self._next_vivify_conflicts = None
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self._next_checkpoint_conflicts = None
+        self.tseitin_encoding = tseitin_encoding
+        self.simplify = simplify
         if theory:
             self.theory = theory
         else:
             self.theory = PropositionalTheory()
+        self.timer = get_timer(timer)
+        self._abstractor = (
+            Abstractor(self.timer, tseitin_encoding)
+            if incremental_abstraction
+            else None
+        )
+        self.frontend_cache = frontend_cache
+        self.result_cache = result_cache
+        self.lazy_model = lazy_model
+        self._parser = Parser(timer=self.timer)
+
+    @property
+    def statistics(self) -> SolverStatistics:
+        """
+        The search statistics of the last (or currently running) solve
+        """
+        return self.sat_solver.stats
 
     def _init_case(
-        self, formula: Union[List[Set[int]], Atom], to_abstract: bool
+        self,
+        formula: Union[List[Set[int]], Atom, Iterable[Atom]],
+        to_abstract: bool,
+        is_stream: bool = False,
     ) -> None:
         """
         Init the solver case to solve
-        :param formula: Either the root of logical formula or
-        list of sets of ints representing a conjunction of clauses
+        :param formula: Either the root of logical formula,
+        list of sets of ints representing a conjunction of clauses or
+        (if is_stream) an iterable of assertions
         :param to_abstract: Boolean of whether to abstract the formula
         (transform to CNF made of ints mapped to the literals in
         the original formula)
+        :param is_stream: Whether the formula is given as an iterable of
+        assertions whose conjunction is the formula
         """
-        self.original_formula = formula
+        self.original_formula = None if is_stream else formula
         if to_abstract:
-            self.smt_formula = self.theory.preprocess(formula)
-            (
-                self.cnf_abstraction,
-                self.abstraction_map,
-                self.dummy_map,
-            ) = to_abstract_cnf_conjunction(self.smt_formula)
-            self.theory.register_abstraction_map(self.abstraction_map)
-
+            self._abstract_assertions(formula if is_stream else (formula,))
         else:
-            self.smt_formula = formula
-            self.cnf_abstraction = self.smt_formula
+            self.cnf_abstraction = formula
+        self.to_abstract = to_abstract
+        self._init_search()
 
+    def _init_search(self) -> None:
+        """
+        Reset the search state before solving the abstraction of the case
+        """
         self.sat_solver.reset()
-        self.to_abstract = to_abstract
+        self._cur_vivify_interval = self.vivify_interval
+        self._next_vivify_conflicts = self.vivify_interval
+        self._next_checkpoint_conflicts = self.checkpoint_interval
+
+    def _abstract_assertions(self, assertions: Iterable[Atom]) -> None:
+        """
+        Preprocess and abstract the assertions of the formula one at a time,
+        and register the abstraction map of their conjunction to the theory
+        :param assertions: An iterable of the roots of the assertions
+        """
+        timer = self.timer
+        theory = self.theory
+        abstractor = self._abstractor
+        if abstractor is None:
+            abstractor = Abstractor(timer, self.tseitin_encoding)
+        else:
+            abstractor.new_formula()
+        simplifier = Simplifier() if self.simplify else None
+        self.cnf_abstraction = []
+        self.original_equalities = set()
+
+        theory.reset()
+        for assertion in assertions:
+            self._get_all_original_equalities_helper(
+                assertion, self.original_equalities
+            )
+            if simplifier is not None:
+                with timer.phase("simplify"):
+                    assertion = simplifier.simplify(assertion)
+                if assertion is True:
+                    continue
+                if assertion is False:
+                    assertion = _CONTRADICTION
+            with timer.phase("theory_preprocess"):
+                smt_assertion = theory.preprocess_assertion(assertion)
+            with timer.phase("abstraction"):
+                self.cnf_abstraction.extend(abstractor.add(smt_assertion))
+
+        self.abstraction_map = abstractor.abstraction_map
+        self.dummy_map = abstractor.dummy_map
+        with timer.phase("register_abstraction_map"):
+            theory.register_abstraction_map(self.abstraction_map)
+        with timer.phase("back_translation"):
+            self._init_back_translation()
 
     def _register_clauses(self, set_clauses: List[Set[int]]) -> ResultCode:
         """
@@ -99,6 +360,7 @@ class DPLLT:
                 self._assign_literal(suggested_assignment, clause_id)
 
             elif d_result == ResultCode.CONFLICT:
+                self.sat_solver.stats.conflicts += 1
                 return ResultCode.UNSAT
         return ResultCode.UNDECIDED
 
@@ -123,18 +385,40 @@ class DPLLT:
         case the conflict is easily derived by the implication graph).
         :return: ResultCode of the solver after the conflict was handled.
         """
-        if self.sat_solver.d_level == 0:
+        sat_solver = self.sat_solver
+        sat_solver.stats.conflicts += 1
+        if sat_solver.d_level == 0:
             return ResultCode.UNSAT
 
-        new_set_clause, new_d_level = self.sat_solver.resolve_conflict(start_set_clause)
-        new_partial_assignment = self.sat_solver.backjump(new_d_level)
-        self.theory.conflict_recovery(new_partial_assignment)
+        timer = self.timer
+        with timer.phase("handle_conflict"):
+            conflict_clause = sat_solver.get_conflict_clause(start_set_clause)
+            if sat_solver.chrono_threshold is not None:
+                # with an out-of-order trail the conflict might not involve
+                # the current decision level
+                conflict_level = sat_solver.get_conflict_level(conflict_clause)
+                if conflict_level == 0:
+                    return ResultCode.UNSAT
+                if conflict_level < sat_solver.d_level:
+                    # counted with the backjump after the conflict resolution
+                    with timer.phase("backjump"):
+                        sat_solver.backjump(conflict_level, count=False)
 
-        learned_cl_id = self.sat_solver.add_clause(new_set_clause)
-        d_result, suggested_assignment = self.sat_solver.deduce(learned_cl_id)
+            with timer.phase("resolve_conflict"):
+                new_set_clause, backjump_level = sat_solver.resolve_conflict(
+                    conflict_clause
+                )
+            new_d_level = sat_solver.get_backtrack_level(backjump_level)
+            with timer.phase("backjump"):
+                sat_solver.backjump(new_d_level)
+            with timer.phase("theory_conflict_recovery"):
+                self.theory.conflict_recovery(sat_solver.get_trail())
 
-        if d_result == SATSolver.ResultCode.SAT:
-            self._assign_literal(suggested_assignment, learned_cl_id)
+            learned_cl_id = sat_solver.add_clause(new_set_clause)
+            d_result, suggested_assignment = sat_solver.deduce(learned_cl_id)
+
+            if d_result == SATSolver.ResultCode.SAT:
+                self._assign_literal(suggested_assignment, learned_cl_id)
 
         return ResultCode.UNDECIDED
 
@@ -147,8 +431,11 @@ class DPLLT:
         :return: The ResultCode of the state of the solver against the theory
         when leaving the function.
         """
+        stats = self.sat_solver.stats
+        stats.theory_checks += 1
         t_result, t_clause = self.theory.analyze_satisfiability()
         if t_result == ResultCode.UNSAT:
+            stats.theory_conflicts += 1
             if handle_conflict:
                 if self._handle_conflict(t_clause) == ResultCode.UNSAT:
                     return ResultCode.UNSAT
@@ -202,146 +489,513 @@ class DPLLT:
 
         return ResultCode.UNDECIDED
 
+    def _is_vivification_due(self) -> bool:
+        return (
+            self._next_vivify_conflicts is not None
+            and self.sat_solver.stats.conflicts >= self._next_vivify_conflicts
+        )
+
+    def _vivify(self) -> None:
+        """
+        Restart the search to decision level 0 if needed, else run a
+        vivification pass and schedule the next one
+        """
+        sat_solver = self.sat_solver
+        if sat_solver.d_level > 0:
+            # the caller runs the BCP and the theory check at level 0 before
+            # the pass itself
+            sat_solver.backjump(0)
+            self.theory.conflict_recovery(sat_solver.get_trail())
+            return
+
+        sat_solver.vivify(self.vivify_budget)
+        self._cur_vivify_interval = round(
+            self._cur_vivify_interval * VIVIFY_INTERVAL_GROWTH
+        )
+        self._next_vivify_conflicts = (
+            sat_solver.stats.conflicts + self._cur_vivify_interval
+        )
+
+    def save_checkpoint(self, path: str) -> None:
+        """
+        Save the solver state at decision level 0 to a checkpoint file.
+        The file is replaced atomically.
+        :param path: The path of the checkpoint file
+        """
+        to_abstract = self.to_abstract
+        arrays = self.sat_solver.get_checkpoint_arrays()
+        state = {
+            "to_abstract": to_abstract,
+            "original_formula": self.original_formula if to_abstract else None,
+            "original_equalities": self.original_equalities if to_abstract else None,
+            "abstraction_map": self.abstraction_map if to_abstract else None,
+            "dummy_map": self.dummy_map if to_abstract else None,
+            "theory_state": (
+                self.theory.get_checkpoint_state() if to_abstract else None
+            ),
+            "cur_vivify_interval": self._cur_vivify_interval,
+            "next_vivify_conflicts": self._next_vivify_conflicts,
+        }
+        arrays["dpllt_state"] = np.frombuffer(
+            pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8
+        )
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    def _load_checkpoint(self, path: str) -> None:
+        """
+        Load the solver and theory states from a checkpoint file
+        :param path: The path of the checkpoint file
+        """
+        with np.load(path, allow_pickle=False) as checkpoint:
+            arrays = {name: checkpoint[name] for name in checkpoint.files}
+        state = pickle.loads(arrays.pop("dpllt_state").tobytes())
+
+        self.to_abstract = state["to_abstract"]
+        self.original_formula = state["original_formula"]
+        if self.to_abstract:
+            self.original_equalities = state["original_equalities"]
+            self.abstraction_map = state["abstraction_map"]
+            self.dummy_map = state["dummy_map"]
+            self.theory.load_checkpoint_state(
+                state["theory_state"], self.abstraction_map
+            )
+            self._init_back_translation()
+        self._cur_vivify_interval = state["cur_vivify_interval"]
+        self._next_vivify_conflicts = state["next_vivify_conflicts"]
+
+        sat_solver = self.sat_solver
+        sat_solver.load_checkpoint_arrays(arrays)
+        for int_lit in sat_solver.get_trail():
+            self.theory.process_assignment(int_lit)
+        self._next_checkpoint_conflicts = (
+            sat_solver.stats.conflicts + self.checkpoint_interval
+        )
+
+    def _is_checkpoint_due(self) -> bool:
+        return (
+            self.checkpoint_path is not None
+            and self.sat_solver.stats.conflicts >= self._next_checkpoint_conflicts
+        )
+
+    def _save_periodic_checkpoint(self) -> None:
+        self.save_checkpoint(self.checkpoint_path)
+        self._next_checkpoint_conflicts = (
+            self.sat_solver.stats.conflicts + self.checkpoint_interval
+        )
+
     def _replace_dummy_helper(self, atom: Atom) -> Atom:
         """
-        Recursive helper function to replace dummy variables
+        Helper function to replace dummy variables inside functions args
         using self.dummy_map
         :param atom: The root of the formula to currently be processed
         :return: The root of the equivalent processed formula (without dummies)
         """
-        if isinstance(atom, Func):
-            new_args = []
-            for arg in atom.args:
-                if arg in self.dummy_map.keys():
-                    arg = self.dummy_map[arg]
+        if isinstance(atom, (Equal, NEqual, Geq, Less)):
+            return atom.rebuild(
+                self._replace_dummies_in_term(atom.left),
+                self._replace_dummies_in_term(atom.right),
+            )
+        return self._replace_dummies_in_term(atom)
 
-                elif isinstance(arg, Func):
-                    arg = self._replace_dummy_helper(arg)
-                new_args.append(arg)
-            return Func(atom.name, new_args)
+    def _replace_dummies_in_term(self, term):
+        """
+        Replace the dummy variables in the (nested) functions args of a term
+        :param term: The term to process
+        :return: The equivalent term without dummies
+        """
+        if not isinstance(term, Func):
+            return term
 
-        elif isinstance(atom, (Equal, NEqual, Geq, Less)):
-            atom.left = self._replace_dummy_helper(atom.left)
-            atom.right = self._replace_dummy_helper(atom.right)
+        dummy_map = self.dummy_map
+        replaced = dict()
+        stack = [term]
+        while stack:
+            func = stack[-1]
+            if func in replaced:
+                stack.pop()
+                continue
 
-        return atom
+            pending = [
+                arg
+                for arg in func.args
+                if isinstance(arg, Func) and arg not in replaced
+            ]
+            if pending:
+                stack.extend(pending)
+                continue
+
+            stack.pop()
+            replaced[func] = Func(
+                func.name,
+                [
+                    dummy_map[arg] if arg in dummy_map else replaced.get(arg, arg)
+                    for arg in func.args
+                ],
+            )
+        return replaced[term]
 
     def _get_all_original_equalities_helper(
         self, formula: Atom, equalities_set: Set[Equal]
     ) -> None:
         """
-        A recursive helper function to extract from the given formula all
+        A helper function to extract from the given formula all
         the equalities and equalities which are negations
         of NEquals in the formula, into equalities_set
         :param formula: The root of the logical formula to examine
         :param equalities_set: A set to append equalities found
         """
-        if isinstance(formula, BinaryOp):
-            self._get_all_original_equalities_helper(formula.left, equalities_set)
+        funcs = []
+        for sub_formula in iter_subformulas(formula):
+            if isinstance(sub_formula, Func):
+                funcs.append(sub_formula)
 
-            self._get_all_original_equalities_helper(formula.right, equalities_set)
+            elif isinstance(sub_formula, Equal):
+                equalities_set.add(sub_formula)
 
-        elif isinstance(formula, UnaryOp):
-            self._get_all_original_equalities_helper(formula.item, equalities_set)
+            elif isinstance(sub_formula, NEqual):
+                equalities_set.add(Equal(sub_formula.left, sub_formula.right))
 
-        elif isinstance(formula, Func):
-            for arg in formula.args:
+        visited_funcs = set()
+        while funcs:
+            func = funcs.pop()
+            if func in visited_funcs:
+                continue
+            visited_funcs.add(func)
+            for arg in func.args:
                 if isinstance(arg, Equal):
                     equalities_set.add(arg)
                 elif isinstance(arg, NEqual):
                     equalities_set.add(Equal(arg.left, arg.right))
                 elif isinstance(arg, Func):
-                    self._get_all_original_equalities_helper(arg, equalities_set)
+                    funcs.append(arg)
 
-        elif isinstance(formula, Equal):
-            equalities_set.add(formula)
+    def _init_back_translation(self) -> None:
+        """
+        Precompute the translation of the abstraction ints back to the
+        literals of the original formula, and the ints of these literals
+        """
+        self._eq_renames = dict()
+        for eq in self.original_equalities:
+            processed_eq = to_equalities_with_no_negations_args(eq)
+            if processed_eq != eq:
+                self._eq_renames[processed_eq] = eq
 
-        elif isinstance(formula, NEqual):
-            equalities_set.add(Equal(formula.left, formula.right))
+        # None for the dummy vars, which aren't a part of the original formula
+        self._back_translation: Dict[int, Optional[Atom]] = dict()
+        self._literals_ints: Dict[Atom, int] = dict()
+        for lit_int, lit in self.abstraction_map.items():
+            if lit_int > 0:
+                original_lit = self._to_original_literal(lit)
+                self._back_translation[lit_int] = original_lit
+                if original_lit is not None:
+                    self._literals_ints[original_lit] = lit_int
 
-    def _get_all_original_equalities(self):
+    def _to_original_literal(self, lit: Atom) -> Optional[Atom]:
         """
-        Get all the equalities appearing in the original formula and equalities
-        which are negations of NEquals in the original formula.
-        :return: A set of all original equalities in the original formula
+        Convert a literal of the abstraction to its form in the original formula
+        :param lit: The literal to convert
+        :return: The literal of the original formula, or None for a dummy var
         """
-        all_original_equalities = set()
-        self._get_all_original_equalities_helper(
-            self.original_formula, all_original_equalities
-        )
-        return all_original_equalities
+        # replace to original equalities with negated args
+        lit = self._eq_renames.get(lit, lit)
+        # replace Dummy vars inside functions args
+        # (were added because of negations during processing formula)
+        if self.dummy_map:
+            lit = self._replace_dummy_helper(lit)
+        if isinstance(lit, Var) and lit.name.startswith("#"):
+            return None
+        return lit
 
-    def _assignment_to_original_form(self) -> Dict[Union[Atom, int], bool]:
+    def _assignment_to_original_form(self) -> Mapping[Union[Atom, int], bool]:
         """
         Convert the assignment of ints to assignment of logical atoms
         :return: The assignment converted to assignment of the respective
-        logical atoms.
+        logical atoms (a LazyModel view of it if lazy_model is set and the
+        theory doesn't convert the assignment).
         """
         assignment_map = dict()
         cur_assignment = self.sat_solver.assignment
 
-        if self.to_abstract:
+        if not self.to_abstract:
             for lit_int in cur_assignment:
                 if lit_int > 0:
-                    assignment_map[self.abstraction_map[lit_int]] = True
+                    assignment_map[lit_int] = True
                 else:
-                    assignment_map[self.abstraction_map[-lit_int]] = False
-            assignment_map = self.theory.to_pre_theory_assignment(assignment_map)
-
-            # replace to original equalities with negated args
-            all_original_equalities = self._get_all_original_equalities()
-            for eq in all_original_equalities:
-                processed_eq = to_equalities_with_no_negations_args(eq)
-                if processed_eq in assignment_map.keys() and eq != processed_eq:
-                    assignment_map[eq] = assignment_map[processed_eq]
-                    del assignment_map[processed_eq]
-
-            # replace Dummy vars inside functions args
-            # (were added because of negations during processing formula)
-            pre_replace_lits = list(assignment_map.keys())
-            for lit in pre_replace_lits:
-                new_lit = self._replace_dummy_helper(lit)
-                if new_lit != lit:
-                    assignment_map[new_lit] = assignment_map[lit]
-                    del assignment_map[lit]
-
-            # remove dummy vars
-            pre_replace_lits = list(assignment_map.keys())
-            for lit in pre_replace_lits:
-                if isinstance(lit, Var) and lit.name.startswith("#"):
-                    del assignment_map[lit]
-
+                    assignment_map[-lit_int] = False
             return assignment_map
 
-        else:
+        if (
+            type(self.theory).to_pre_theory_assignment
+            is PropositionalTheory.to_pre_theory_assignment
+        ):
+            if self.lazy_model:
+                return LazyModel(cur_assignment, self._literals_ints)
+            back_translation = self._back_translation
             for lit_int in cur_assignment:
                 if lit_int > 0:
-                    assignment_map[lit_int] = True
+                    lit = back_translation[lit_int]
+                    if lit is not None:
+                        assignment_map[lit] = True
                 else:
-                    assignment_map[-lit_int] = False
+                    lit = back_translation[-lit_int]
+                    if lit is not None:
+                        assignment_map[lit] = False
             return assignment_map
 
+        # the literals of the theory converted assignment aren't necessarily
+        # literals of the abstraction
+        for lit_int in cur_assignment:
+            if lit_int > 0:
+                assignment_map[self.abstraction_map[lit_int]] = True
+            else:
+                assignment_map[self.abstraction_map[-lit_int]] = False
+        original_assignment_map = dict()
+        for lit, value in self.theory.to_pre_theory_assignment(assignment_map).items():
+            original_lit = self._to_original_literal(lit)
+            if original_lit is not None:
+                original_assignment_map[original_lit] = value
+        return original_assignment_map
+
     def solve(
-        self, formula: Union[List[Set[int]], Atom], to_abstract: bool = True
-    ) -> Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]]:
+        self,
+        formula: Union[List[Set[int]], Atom],
+        to_abstract: bool = True,
+        return_statistics: bool = False,
+    ) -> Union[
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]],
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]], SolverStatistics],
+    ]:
         """
         Solve the given formula using this DPLLT solver
         :param formula: Either root of logical formula or list of sets of ints
         representing a conjunction of clauses (CNF form).
         :param to_abstract: boolean of whether to abstract a logical formula
+        :param return_statistics: boolean of whether to also return the search
+        statistics of the solve
         :return: A tuple of ResultCode, satisfying assignment map in case
-        the result is SAT
+        the result is SAT (and the SolverStatistics of the solve if
+        return_statistics)
         """
-        self._init_case(formula, to_abstract)
+        return self._run(lambda: self._solve(formula, to_abstract), return_statistics)
 
-        if self._register_clauses(self.cnf_abstraction) == ResultCode.UNSAT:
-            return ResultCode.UNSAT, None
+    def solve_assertions(
+        self, assertions: Iterable[Atom], return_statistics: bool = False
+    ) -> Union[
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]],
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]], SolverStatistics],
+    ]:
+        """
+        Solve the conjunction of a stream of assertions. The assertions are
+        consumed one at a time and only their abstraction is kept.
+        :param assertions: An iterable of the roots of the assertions (for
+        example a Parser.parse_assertions generator)
+        :param return_statistics: boolean of whether to also return the search
+        statistics of the solve
+        :return: The same as solve
+        """
+        return self._run(
+            lambda: self._solve(assertions, to_abstract=True, is_stream=True),
+            return_statistics,
+        )
 
-        if self._confront_with_theory(handle_conflict=False) == ResultCode.UNSAT:
-            return ResultCode.UNSAT, None
+    def solve_text(self, formula_text: str, return_statistics: bool = False) -> Union[
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]],
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]], SolverStatistics],
+    ]:
+        """
+        Parse and solve a formula string. With a frontend_cache, the
+        frontend output of a formula string seen before is loaded from the
+        cache instead
+        :param formula_text: The formula string (see Parser.parse)
+        :param return_statistics: boolean of whether to also return the search
+        statistics of the solve
+        :return: The same as solve
+        """
+        return self._run(lambda: self._solve_text(formula_text), return_statistics)
+
+    def resume(self, checkpoint_path: str, return_statistics: bool = False) -> Union[
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]],
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]], SolverStatistics],
+    ]:
+        """
+        Resume a solve from a checkpoint file saved by save_checkpoint.
+        The search statistics continue from the checkpoint, apart from
+        the solve time which measures the resumed search only.
+        :param checkpoint_path: The path of the checkpoint file
+        :param return_statistics: boolean of whether to also return the search
+        statistics of the solve
+        :return: The same as solve
+        """
+
+        def resume_search():
+            with self.timer.phase("load_checkpoint"):
+                self._load_checkpoint(checkpoint_path)
+            return self._search()
+
+        return self._run(resume_search, return_statistics)
+
+    def _run(
+        self,
+        run: Callable[[], Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]]],
+        return_statistics: bool,
+    ) -> Union[
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]],
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]], SolverStatistics],
+    ]:
+        """
+        Run a solve under the solve phase and measure its time
+        :param run: A callable running the solve and returning its result code
+        and assignment
+        :param return_statistics: boolean of whether to also return the search
+        statistics of the solve
+        """
+        start_time = time.perf_counter()
+        with self.timer.phase("solve"):
+            result_code, assignment = run()
+        stats = self.sat_solver.stats
+        stats.solve_time = time.perf_counter() - start_time
+
+        if return_statistics:
+            return result_code, assignment, stats
+        return result_code, assignment
+
+    def _solve(
+        self,
+        formula: Union[List[Set[int]], Atom, Iterable[Atom]],
+        to_abstract: bool,
+        is_stream: bool = False,
+    ) -> Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]]:
+        """
+        Run the DPLLT search on the given formula (see solve)
+        """
+        self._init_case(formula, to_abstract, is_stream)
+        return self._register_and_search()
+
+    def _frontend_key(self, formula_text: str) -> str:
+        return formula_key(
+            formula_text,
+            type(self.theory).__name__,
+            self.tseitin_encoding,
+            f"simplify={self.simplify}",
+        )
+
+    def _solve_text(
+        self, formula_text: str
+    ) -> Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]]:
+        """
+        Run the DPLLT search on the given formula string (see solve_text)
+        """
+        timer = self.timer
+        cache = self.frontend_cache
+        if cache is None:
+            entry = None
+        else:
+            key = self._frontend_key(formula_text)
+            with timer.phase("frontend_cache"):
+                entry = cache.get(key)
+
+        if entry is not None:
+            with timer.phase("frontend_cache"):
+                (
+                    self.cnf_abstraction,
+                    self.abstraction_map,
+                    self.dummy_map,
+                    self.original_equalities,
+                    theory_state,
+                ) = entry.to_frontend()
+                self.theory.load_checkpoint_state(theory_state, self.abstraction_map)
+            with timer.phase("back_translation"):
+                self._init_back_translation()
+            self.original_formula = None
+            self.to_abstract = True
+            self._init_search()
+        else:
+            formula = self._parser.parse(formula_text)
+            if formula is None:
+                raise ValueError("Empty formula")
+            self._init_case(formula, to_abstract=True)
+            if cache is not None:
+                with timer.phase("frontend_cache"):
+                    cache.put(
+                        key,
+                        CachedFrontend.from_frontend(
+                            self.cnf_abstraction,
+                            self.abstraction_map,
+                            self.dummy_map,
+                            self.original_equalities,
+                            self.theory.get_checkpoint_state(),
+                        ),
+                    )
+        return self._register_and_search()
+
+    def _register_and_search(
+        self,
+    ) -> Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]]:
+        """
+        Register the clauses of the abstraction and run the search, through
+        the result cache if given
+        """
+        cache = self.result_cache
+        if cache is None:
+            return self._register_and_search_uncached()
+
+        timer = self.timer
+        with timer.phase("result_cache"):
+            fingerprint, canonical = canonical_form(
+                self.cnf_abstraction,
+                self.abstraction_map if self.to_abstract else None,
+                type(self.theory).__name__,
+            )
+            cached = cache.get(fingerprint)
+        if cached is not None:
+            result_code, model = cached
+            if result_code == ResultCode.UNSAT:
+                return ResultCode.UNSAT, None
+            variables = [None] + sorted(canonical, key=canonical.get)
+            self.sat_solver.assignment = {
+                variables[lit] if lit > 0 else -variables[-lit]
+                for lit in model.tolist()
+            }
+            with timer.phase("assignment_to_original_form"):
+                return ResultCode.SAT, self._assignment_to_original_form()
+
+        result_code, assignment = self._register_and_search_uncached()
+        with timer.phase("result_cache"):
+            model = None
+            if result_code == ResultCode.SAT:
+                model = [
+                    canonical[lit] if lit > 0 else -canonical[-lit]
+                    for lit in self.sat_solver.assignment
+                    if abs(lit) in canonical
+                ]
+            cache.put(fingerprint, result_code, model)
+        return result_code, assignment
+
+    def _register_and_search_uncached(
+        self,
+    ) -> Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]]:
+        timer = self.timer
+        with timer.phase("register_clauses"):
+            if self._register_clauses(self.cnf_abstraction) == ResultCode.UNSAT:
+                return ResultCode.UNSAT, None
+        return self._search()
+
+    def _search(self) -> Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]]:
+        """
+        Run the DPLLT search loop over the registered clauses
+        """
+        timer = self.timer
+        with timer.phase("theory_check"):
+            if self._confront_with_theory(handle_conflict=False) == ResultCode.UNSAT:
+                return ResultCode.UNSAT, None
 
         while self.sat_solver.has_unsat_clauses():
-            bcp_result = self._perform_bcp(handle_conflict=True)
+            with timer.phase("bcp"):
+                bcp_result = self._perform_bcp(handle_conflict=True)
 
             if bcp_result == ResultCode.UNSAT:
                 return ResultCode.UNSAT, None
@@ -350,7 +1004,8 @@ class DPLLT:
                 continue
 
             else:
-                t_confront = self._confront_with_theory(handle_conflict=True)
+                with timer.phase("theory_check"):
+                    t_confront = self._confront_with_theory(handle_conflict=True)
                 if t_confront == ResultCode.UNSAT:
                     return ResultCode.UNSAT, None
 
@@ -363,22 +1018,110 @@ class DPLLT:
                 elif bcp_result == ResultCode.UNDECIDED:
                     t_propagation = self.theory.pop_t_propagation()
                     if t_propagation is not None:
+                        self.sat_solver.stats.theory_propagations += 1
                         self._assign_literal(t_propagation, None)
 
+                    elif self._is_vivification_due():
+                        with timer.phase("vivify"):
+                            self._vivify()
+
                     else:
-                        literal_to_assign = self.sat_solver.decide()
-                        self.sat_solver.d_level += 1
-                        self._assign_literal(literal_to_assign, None)
+                        if self._is_checkpoint_due():
+                            with timer.phase("checkpoint"):
+                                self._save_periodic_checkpoint()
+                        with timer.phase("decide"):
+                            literal_to_assign = self.sat_solver.decide()
+                            self.sat_solver.d_level += 1
+                            self._assign_literal(literal_to_assign, None)
 
-        original_form_assignment = self._assignment_to_original_form()
+        with timer.phase("assignment_to_original_form"):
+            original_form_assignment = self._assignment_to_original_form()
         return ResultCode.SAT, original_form_assignment
 
 
 class DPLL(DPLLT):
-    def __init__(self) -> None:
-        super(DPLL, self).__init__()
+    def __init__(
+        self,
+        timer: Optional[PhaseTimer] = None,
+        decision_heuristic: str = DLIS,
+        phase_saving: bool = False,
+        local_search: Optional[LocalSearchSolver] = None,
+        chrono_threshold: Optional[int] = None,
+        vivify_interval: Optional[int] = None,
+        vivify_budget: int = DEFAULT_VIVIFY_BUDGET,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+        tseitin_encoding: str = FULL_ENCODING,
+        simplify: bool = False,
+        incremental_abstraction: bool = False,
+        frontend_cache: Optional[FrontendCache] = None,
+        result_cache: Optional[ResultCache] = None,
+        lazy_model: bool = False,
+    ) -> None:
+        """
+        :param timer: An optional PhaseTimer to attribute the solve time to
+        the stages of the pipeline
+        :param decision_heuristic: The decision heuristic of the SAT solver
+        :param phase_saving: Whether the SAT solver saves the phases of
+        unassigned literals
+        :param local_search: A LocalSearchSolver to run before the CDCL search
+        (hybrid mode). Its best assignment seeds the SAT solver phases
+        :param chrono_threshold: The backjump distance above which the
+        solver backtracks chronologically after a conflict
+        :param vivify_interval: The number of conflicts before the first
+        vivification pass. None to disable vivification
+        :param vivify_budget: The propagations budget of a vivification pass
+        :param checkpoint_path: A path to periodically save checkpoints of
+        the solve to. None to disable the periodic checkpoints
+        :param checkpoint_interval: The number of conflicts between
+        periodic checkpoints
+        :param tseitin_encoding: The tseitin encoding of the abstracted
+        formulas, one of TSEITIN_ENCODINGS (see tseitin_transform)
+        :param simplify: Whether to simplify the assertions before their
+        abstraction (see bool_transforms.simplify)
+        :param incremental_abstraction: Whether to keep the abstractor
+        between the solves, reusing its literals ints and tseitin gates
+        :param frontend_cache: An optional cache of the frontend output of
+        the formulas given as strings (see solve_text)
+        :param result_cache: An optional cache of the results of the solved
+        problems (see solvers.ResultCache)
+        :param lazy_model: Whether to return the assignment of an abstracted
+        formula as a LazyModel view rather than a dict
+        """
+        super(DPLL, self).__init__(
+            timer=timer,
+            decision_heuristic=decision_heuristic,
+            phase_saving=phase_saving,
+            chrono_threshold=chrono_threshold,
+            vivify_interval=vivify_interval,
+            vivify_budget=vivify_budget,
+            checkpoint_path=checkpoint_path,
+            checkpoint_interval=checkpoint_interval,
+            tseitin_encoding=tseitin_encoding,
+            simplify=simplify,
+            incremental_abstraction=incremental_abstraction,
+            frontend_cache=frontend_cache,
+            result_cache=result_cache,
+            lazy_model=lazy_model,
+        )
+        self.local_search = local_search
+
+    def _init_search(self) -> None:
+        super(DPLL, self)._init_search()
+        if self.local_search is not None:
+            with self.timer.phase("local_search"):
+                self.local_search.solve(self.cnf_abstraction)
+            phases = self.local_search.best_assignment
+            if phases:
+                self.sat_solver.set_phases(phases)
 
     def solve(
-        self, formula: Union[List[Set[int]], Atom], to_abstract: bool = True
-    ) -> Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]]:
-        return super(DPLL, self).solve(formula, to_abstract)
+        self,
+        formula: Union[List[Set[int]], Atom],
+        to_abstract: bool = True,
+        return_statistics: bool = False,
+    ) -> Union[
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]]],
+        Tuple[ResultCode, Optional[Dict[Union[int, Atom], bool]], SolverStatistics],
+    ]:
+        return super(DPLL, self).solve(formula, to_abstract, return_statistics)
@@ -0,0 +1,163 @@
+"""
+General Notes
+-------------
+Compares the benchmark results of two revisions recorded in the benchmarks
+history (see benchmarks.history).
+
+For every (instance, config) measured in both revisions, all the recorded times
+of each revision are pooled and the ratio of the medians is reported as the
+speedup (old median / new median). A change is only reported as faster/slower
+when it exceeds the noise threshold, which is the maximum between the given
+relative threshold and the relative spread of the measurements
+(median absolute deviation / median) of both revisions times noise_factor.
+
+Usage
+---------
+    python -m benchmarks.compare OLD_REVISION NEW_REVISION --threshold 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.history import DEFAULT_HISTORY_PATH, load_history
+
+FASTER = "faster"
+SLOWER = "slower"
+UNCHANGED = "unchanged"
+
+
+def _relative_spread(times: List[float]) -> float:
+    median = statistics.median(times)
+    if median == 0:
+        return 0.0
+    mad = statistics.median(abs(t - median) for t in times)
+    return mad / median
+
+
+def _group_times(
+    history: List[Dict], revision: str
+) -> Dict[Tuple[str, str], Dict[str, list]]:
+    grouped = defaultdict(lambda: {"times": [], "conflicts": [], "results": []})
+    for record in history:
+        if record["revision"] == revision:
+            group = grouped[(record["name"], record["config"])]
+            group["times"].extend(record["times"])
+            group["conflicts"].append(record.get("conflicts"))
+            group["results"].append(record.get("result"))
+    return grouped
+
+
+def compare_revisions(
+    history: List[Dict],
+    old_revision: str,
+    new_revision: str,
+    threshold: float = 0.05,
+    noise_factor: float = 2.0,
+) -> List[Dict]:
+    """
+    Compare the benchmark results of two revisions
+    :param history: The history records (see benchmarks.history.load_history)
+    :param old_revision: The baseline revision
+    :param new_revision: The revision to compare to the baseline
+    :param threshold: The minimal relative change to be considered a change
+    :param noise_factor: The multiplier of the measurements relative spread
+    which a change must exceed
+    :return: A list of per instance comparisons (instances measured in both
+    revisions only)
+    """
+    old_groups = _group_times(history, old_revision)
+    new_groups = _group_times(history, new_revision)
+
+    comparisons = []
+    for key in sorted(old_groups.keys() & new_groups.keys()):
+        old_times, new_times = old_groups[key]["times"], new_groups[key]["times"]
+        old_median, new_median = statistics.median(old_times), statistics.median(
+            new_times
+        )
+        speedup = old_median / new_median if new_median else float("inf")
+
+        noise = noise_factor * max(
+            _relative_spread(old_times), _relative_spread(new_times)
+        )
+        noise_threshold = max(threshold, noise)
+        if speedup > 1 + noise_threshold:
+            verdict = FASTER
+        elif speedup < 1 / (1 + noise_threshold):
+            verdict = SLOWER
+        else:
+            verdict = UNCHANGED
+
+        comparisons.append(
+            {
+                "name": key[0],
+                "config": key[1],
+                "old_median": old_median,
+                "new_median": new_median,
+                "speedup": speedup,
+                "noise_threshold": noise_threshold,
+                "verdict": verdict,
+                "old_conflicts": old_groups[key]["conflicts"][-1],
+                "new_conflicts": new_groups[key]["conflicts"][-1],
+                "results_match": set(old_groups[key]["results"])
+                == set(new_groups[key]["results"]),
+            }
+        )
+    return comparisons
+
+
+def format_comparisons(comparisons: List[Dict]) -> str:
+    """
+    Format comparisons as a human readable table
+    :param comparisons: The output of compare_revisions
+    :return: The table as a string
+    """
+    lines = [
+        f"{'instance':<20} {'config':<12} {'old[s]':>10} {'new[s]':>10}"
+        f" {'speedup':>8} {'noise':>7}  verdict"
+    ]
+    for c in comparisons:
+        verdict = c["verdict"] if c["results_match"] else "RESULT MISMATCH"
+        lines.append(
+            f"{c['name']:<20} {c['config']:<12} {c['old_median']:>10.4f}"
+            f" {c['new_median']:>10.4f} {c['speedup']:>7.2f}x"
+            f" {c['noise_threshold']:>6.1%}  {verdict}"
+        )
+
+    counts = {v: sum(c["verdict"] == v for c in comparisons) for v in (FASTER, SLOWER)}
+    lines.append(
+        f"{len(comparisons)} instances: {counts[FASTER]} faster,"
+        f" {counts[SLOWER]} slower"
+    )
+    return "\n".join(lines)
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Compare the benchmark results of two revisions"
+    )
+    parser.add_argument("old_revision")
+    parser.add_argument("new_revision")
+    parser.add_argument("--history", default=DEFAULT_HISTORY_PATH)
+    parser.add_argument("--threshold", type=float, default=0.05)
+    parser.add_argument("--noise-factor", type=float, default=2.0)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    comparisons = compare_revisions(
+        load_history(args.history),
+        args.old_revision,
+        args.new_revision,
+        args.threshold,
+        args.noise_factor,
+    )
+    print(format_comparisons(comparisons))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+General Notes
+-------------
+Deterministic generators of standard SAT benchmark families. Every generator
+returns a formula in the abstracted form used by the solvers - a list of sets
+of ints, where each set is a clause and -i is the negation of i.
+All the randomness comes from a random.Random seeded with the given seed, so
+the same arguments always produce the same formula.
+
+The families provided:
+* Uniform random k-SAT - num_clauses clauses of k distinct variables with random
+  polarities. For k=3 the instances are the hardest around the phase transition
+  at a clauses/variables ratio of ~4.26.
+* Pigeonhole - n + 1 pigeons in n holes (UNSAT, exponential for resolution).
+* Parity chains - two XOR chains over the same variables in different orders
+  which are forced to different parities (UNSAT unless satisfiable=True).
+* Graph coloring - k-coloring of a random G(n, p) graph.
+* Tseitin formulas on random regular graphs (expanders with high probability) -
+  the parity of the edges around every vertex is fixed by a vertex charge. The
+  formula is UNSAT iff the sum of charges is odd.
+"""
+
+import itertools
+import random
+from typing import List, Set, Tuple
+
+Formula = List[Set[int]]
+
+
+def _xor_clauses(int_lits: List[int], parity: bool) -> Formula:
+    """
+    Encode xor(int_lits) == parity directly (2^(n-1) clauses)
+    :param int_lits: The literals to xor
+    :param parity: The required value of the xor
+    :return: The clauses forbidding every assignment with the wrong parity
+    """
+    clauses = []
+    for signs in itertools.product((1, -1), repeat=len(int_lits)):
+        # the clause forbids the assignment where lit is False iff sign is 1
+        num_true = sum(1 for sign in signs if sign == -1)
+        if (num_true % 2 == 1) != parity:
+            clauses.append({sign * lit for sign, lit in zip(signs, int_lits)})
+    return clauses
+
+
+def random_k_sat(num_vars: int, num_clauses: int, k: int = 3, seed: int = 0) -> Formula:
+    """
+    Generate a uniform random k-SAT formula
+    :param num_vars: Number of variables
+    :param num_clauses: Number of clauses
+    :param k: Number of (distinct) variables in each clause
+    :param seed: Seed of the random generator
+    :return: The generated formula
+    """
+    if k > num_vars:
+        raise ValueError(f"Can't pick {k} distinct variables out of {num_vars}")
+
+    rng = random.Random(seed)
+    variables = range(1, num_vars + 1)
+    return [
+        {var if rng.random() < 0.5 else -var for var in rng.sample(variables, k)}
+        for _ in range(num_clauses)
+    ]
+
+
+def phase_transition_3_sat(
+    num_vars: int, ratios: Tuple[float, ...] = (3.0, 4.26, 5.5), seed: int = 0
+) -> List[Tuple[float, Formula]]:
+    """
+    Generate uniform random 3-SAT formulas across the phase transition
+    :param num_vars: Number of variables in each formula
+    :param ratios: The clauses/variables ratios to generate formulas for
+    :param seed: Seed of the random generator
+    :return: A list of (ratio, formula) tuples
+    """
+    return [
+        (ratio, random_k_sat(num_vars, round(ratio * num_vars), 3, seed + i))
+        for i, ratio in enumerate(ratios)
+    ]
+
+
+def pigeonhole(num_holes: int) -> Formula:
+    """
+    Generate the pigeonhole formula of num_holes + 1 pigeons in num_holes holes.
+    Variable p * num_holes + h + 1 means pigeon p sits in hole h.
+    :param num_holes: Number of holes
+    :return: The generated (UNSAT) formula
+    """
+
+    def var(pigeon: int, hole: int) -> int:
+        return pigeon * num_holes + hole + 1
+
+    num_pigeons = num_holes + 1
+    clauses = [{var(p, h) for h in range(num_holes)} for p in range(num_pigeons)]
+    for h in range(num_holes):
+        for p1, p2 in itertools.combinations(range(num_pigeons), 2):
+            clauses.append({-var(p1, h), -var(p2, h)})
+    return clauses
+
+
+def _xor_chain(order: List[int], first_aux: int, parity: bool) -> Formula:
+    """
+    Encode xor(order) == parity as a chain of ternary xors using auxiliary
+    variables first_aux, first_aux + 1, ...
+    """
+    clauses = []
+    prev = order[0]
+    for i, var in enumerate(order[1:]):
+        aux = first_aux + i
+        # aux <-> (prev xor var), i.e. xor(prev, var, aux) == False
+        clauses.extend(_xor_clauses([prev, var, aux], False))
+        prev = aux
+    clauses.append({prev} if parity else {-prev})
+    return clauses
+
+
+def parity_chains(num_vars: int, seed: int = 0, satisfiable: bool = False) -> Formula:
+    """
+    Generate two xor chains over the same variables (in different random orders)
+    :param num_vars: Number of shared variables (at least 2)
+    :param seed: Seed of the random generator
+    :param satisfiable: If False the chains are forced to different parities
+    :return: The generated formula
+    """
+    if num_vars < 2:
+        raise ValueError("Parity chains require at least 2 variables")
+
+    rng = random.Random(seed)
+    order = list(range(1, num_vars + 1))
+    shuffled = order.copy()
+    rng.shuffle(shuffled)
+
+    first_chain = _xor_chain(order, num_vars + 1, True)
+    second_chain = _xor_chain(shuffled, 2 * num_vars, satisfiable)
+    return first_chain + second_chain
+
+
+def graph_coloring(
+    num_vertices: int, edge_probability: float, num_colors: int, seed: int = 0
+) -> Formula:
+    """
+    Generate the num_colors coloring formula of a random G(n, p) graph.
+    Variable v * num_colors + c + 1 means vertex v is colored with c.
+    :param num_vertices: Number of vertices in the graph
+    :param edge_probability: Probability of each edge to be in the graph
+    :param num_colors: Number of colors
+    :param seed: Seed of the random generator
+    :return: The generated formula
+    """
+
+    def var(vertex: int, color: int) -> int:
+        return vertex * num_colors + color + 1
+
+    rng = random.Random(seed)
+    clauses = []
+    for v in range(num_vertices):
+        clauses.append({var(v, c) for c in range(num_colors)})
+        for c1, c2 in itertools.combinations(range(num_colors), 2):
+            clauses.append({-var(v, c1), -var(v, c2)})
+
+    for v1, v2 in itertools.combinations(range(num_vertices), 2):
+        if rng.random() < edge_probability:
+            for c in range(num_colors):
+                clauses.append({-var(v1, c), -var(v2, c)})
+    return clauses
+
+
+def random_regular_graph(
+    num_vertices: int, degree: int, seed: int = 0, max_tries: int = 1000
+) -> List[Tuple[int, int]]:
+    """
+    Generate a random simple degree-regular graph using the configuration model
+    :param num_vertices: Number of vertices
+    :param degree: The degree of every vertex
+    :param seed: Seed of the random generator
+    :param max_tries: Number of pairings to try before giving up
+    :return: The list of edges of the graph
+    """
+    if (num_vertices * degree) % 2 == 1 or degree >= num_vertices:
+        raise ValueError(f"No simple {degree}-regular graph on {num_vertices} vertices")
+
+    rng = random.Random(seed)
+    stubs = [v for v in range(num_vertices) for _ in range(degree)]
+    for _ in range(max_tries):
+        rng.shuffle(stubs)
+        edges = {
+            (min(u, v), max(u, v)) for u, v in zip(stubs[::2], stubs[1::2]) if u != v
+        }
+        if len(edges) == len(stubs) // 2:
+            return sorted(edges)
+    raise ValueError("Failed generating a simple regular graph")
+
+
+def tseitin_expander(
+    num_vertices: int, degree: int = 3, seed: int = 0, satisfiable: bool = False
+) -> Formula:
+    """
+    Generate a Tseitin formula on a random regular graph. Every edge is a
+    variable and the xor of the edges around each vertex equals its charge.
+    :param num_vertices: Number of vertices in the graph
+    :param degree: The degree of every vertex
+    :param seed: Seed of the random generator
+    :param satisfiable: Whether the sum of the charges is even (SAT) or odd
+    :return: The generated formula
+    """
+    rng = random.Random(seed)
+    edges = random_regular_graph(num_vertices, degree, rng.randrange(2**32))
+    incident = {v: [] for v in range(num_vertices)}
+    for edge_var, (u, v) in enumerate(edges, start=1):
+        incident[u].append(edge_var)
+        incident[v].append(edge_var)
+
+    charges = [rng.random() < 0.5 for _ in range(num_vertices)]
+    if (sum(charges) % 2 == 0) != satisfiable:
+        charges[0] = not charges[0]
+
+    clauses = []
+    for v in range(num_vertices):
+        clauses.extend(_xor_clauses(incident[v], charges[v]))
+    return clauses
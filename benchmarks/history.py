@@ -0,0 +1,102 @@
+"""
+General Notes
+-------------
+A local history of benchmark results. Every run of the benchmark runner can
+append its results to a json lines file - one record per instance with the
+config label, git revision, timestamp, times, search counters and peak memory.
+The history is later used by benchmarks.compare to report speedups and
+slowdowns between revisions.
+"""
+
+import json
+import os
+import subprocess
+import time
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_HISTORY_PATH = "bench_history.jsonl"
+UNKNOWN_REVISION = "unknown"
+
+RECORDED_FIELDS = (
+    "name",
+    "family",
+    "params",
+    "result",
+    "times",
+    "median_time",
+    "min_time",
+    "conflicts",
+    "decisions",
+    "propagations",
+    "learned_clauses",
+    "peak_memory",
+)
+
+
+def get_git_revision(repo_dir: Optional[str] = None) -> str:
+    """
+    Get the current git revision (marked dirty if there are uncommitted changes)
+    :param repo_dir: The directory of the repository, the package's one if None
+    :return: The revision string, UNKNOWN_REVISION if git isn't available
+    """
+    if repo_dir is None:
+        repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        output = subprocess.run(
+            ["git", "describe", "--always", "--dirty", "--abbrev=12"],
+            cwd=repo_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return UNKNOWN_REVISION
+    return output.stdout.strip() or UNKNOWN_REVISION
+
+
+def to_history_records(
+    suite_results: Dict, revision: str, config: str, timestamp: Optional[float] = None
+) -> List[Dict]:
+    """
+    Convert the results of a suite run into history records
+    :param suite_results: The output of benchmarks.runner.run_suite
+    :param revision: The git revision the results were measured on
+    :param config: A label of the solver configuration used
+    :param timestamp: The time of the run, now if None
+    :return: A list of history records, one per instance
+    """
+    if timestamp is None:
+        timestamp = time.time()
+
+    records = []
+    for result in suite_results["instances"]:
+        record = {
+            "revision": revision,
+            "config": config,
+            "suite": suite_results["suite"],
+            "timestamp": timestamp,
+        }
+        record.update({field: result.get(field) for field in RECORDED_FIELDS})
+        records.append(record)
+    return records
+
+
+def append_history(path: str, records: Iterable[Dict]) -> None:
+    """
+    Append records to the history file (created if it doesn't exist)
+    :param path: The path of the json lines history file
+    :param records: The records to append
+    """
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def load_history(path: str) -> List[Dict]:
+    """
+    Load all the records of a history file
+    :param path: The path of the json lines history file
+    :return: The list of records in the order they were appended
+    """
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
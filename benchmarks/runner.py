@@ -0,0 +1,372 @@
+"""
+General Notes
+-------------
+Runs the SAT benchmark suites (see benchmarks.generators) with the DPLL solver
+and reports the time, the result and the search statistics of every instance
+as json. Everything is generated from fixed seeds, so the suites are fully
+reproducible and run offline.
+
+With --history the results (together with the git revision, a config label
+and the peak memory of a solve) are also appended to a local history file
+which benchmarks.compare uses to compare revisions.
+
+Usage
+---------
+    python -m benchmarks.runner --suite default --repetitions 3 -o results.json
+    python -m benchmarks.runner --history bench_history.jsonl --config baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import generators
+from benchmarks.history import (
+    DEFAULT_HISTORY_PATH,
+    append_history,
+    get_git_revision,
+    to_history_records,
+)
+from constants import ResultCode
+from DPLLT import DPLL
+from solvers.LocalSearchSolver import LOCAL_SEARCH_ALGORITHMS, LocalSearchSolver
+from solvers.OccurrenceIndex import DECISION_HEURISTICS, DLIS
+
+
+class BenchmarkInstance:
+    def __init__(
+        self, name: str, family: str, build: Callable[[], generators.Formula], **params
+    ):
+        self.name = name
+        self.family = family
+        self.params = params
+        self._build = build
+
+    def build(self) -> generators.Formula:
+        return self._build()
+
+
+def _random_3_sat_instances(num_vars: int, seed: int) -> List[BenchmarkInstance]:
+    return [
+        BenchmarkInstance(
+            f"uf3-{num_vars}-r{ratio}",
+            "random_3_sat",
+            lambda ratio=ratio, i=i: generators.random_k_sat(
+                num_vars, round(ratio * num_vars), 3, seed + i
+            ),
+            num_vars=num_vars,
+            ratio=ratio,
+            seed=seed + i,
+        )
+        for i, ratio in enumerate((3.0, 4.26, 5.5))
+    ]
+
+
+def get_suite(suite_name: str) -> List[BenchmarkInstance]:
+    """
+    Get the instances of a benchmark suite
+    :param suite_name: One of SUITES
+    :return: The list of instances of the suite
+    """
+    if suite_name == "smoke":
+        return [
+            *_random_3_sat_instances(num_vars=10, seed=0),
+            BenchmarkInstance(
+                "php-3", "pigeonhole", lambda: generators.pigeonhole(3), num_holes=3
+            ),
+            BenchmarkInstance(
+                "parity-4",
+                "parity_chains",
+                lambda: generators.parity_chains(4, seed=0),
+                num_vars=4,
+                seed=0,
+            ),
+            BenchmarkInstance(
+                "color-8-3",
+                "graph_coloring",
+                lambda: generators.graph_coloring(8, 0.4, 3, seed=0),
+                num_vertices=8,
+                edge_probability=0.4,
+                num_colors=3,
+                seed=0,
+            ),
+            BenchmarkInstance(
+                "tseitin-6-3",
+                "tseitin_expander",
+                lambda: generators.tseitin_expander(6, 3, seed=0),
+                num_vertices=6,
+                degree=3,
+                seed=0,
+            ),
+        ]
+
+    elif suite_name == "default":
+        return [
+            *_random_3_sat_instances(num_vars=30, seed=0),
+            *_random_3_sat_instances(num_vars=50, seed=100),
+            *[
+                BenchmarkInstance(
+                    f"php-{n}",
+                    "pigeonhole",
+                    lambda n=n: generators.pigeonhole(n),
+                    num_holes=n,
+                )
+                for n in (4, 5)
+            ],
+            *[
+                BenchmarkInstance(
+                    f"parity-{n}",
+                    "parity_chains",
+                    lambda n=n: generators.parity_chains(n, seed=0),
+                    num_vars=n,
+                    seed=0,
+                )
+                for n in (8, 10)
+            ],
+            *[
+                BenchmarkInstance(
+                    f"color-{n}-3",
+                    "graph_coloring",
+                    lambda n=n: generators.graph_coloring(n, 0.25, 3, seed=0),
+                    num_vertices=n,
+                    edge_probability=0.25,
+                    num_colors=3,
+                    seed=0,
+                )
+                for n in (15, 25)
+            ],
+            *[
+                BenchmarkInstance(
+                    f"tseitin-{n}-3",
+                    "tseitin_expander",
+                    lambda n=n: generators.tseitin_expander(n, 3, seed=0),
+                    num_vertices=n,
+                    degree=3,
+                    seed=0,
+                )
+                for n in (8, 12)
+            ],
+        ]
+
+    raise ValueError(f"Unknown suite {suite_name}, expected one of {SUITES}")
+
+
+SUITES = ("smoke", "default")
+# the flips budget of the hybrid mode, kept low since on UNSAT instances the
+# whole budget is spent before the CDCL search starts
+LOCAL_SEARCH_MAX_FLIPS = 5000
+
+
+def _make_solver(decision_heuristic: str, local_search: Optional[str]) -> DPLL:
+    """
+    Create the benchmarked solver
+    :param decision_heuristic: The decision heuristic of the solver
+    :param local_search: The local search algorithm to run in hybrid mode
+    before the CDCL search. None for CDCL only
+    :return: A new DPLL solver
+    """
+    local_search_solver = None
+    if local_search is not None:
+        local_search_solver = LocalSearchSolver(
+            local_search, max_flips=LOCAL_SEARCH_MAX_FLIPS, seed=0
+        )
+    return DPLL(decision_heuristic=decision_heuristic, local_search=local_search_solver)
+
+
+def _measure_peak_memory(
+    formula: generators.Formula, decision_heuristic: str, local_search: Optional[str]
+) -> int:
+    """
+    Solve the formula once while tracing the python allocations (which slows
+    the solve down, so it's done separately from the timed repetitions)
+    :param formula: The formula to solve
+    :param decision_heuristic: The decision heuristic of the solver
+    :param local_search: The local search algorithm of the hybrid mode
+    :return: The peak traced memory in bytes
+    """
+    fresh_formula = [set(clause) for clause in formula]
+    tracemalloc.start()
+    try:
+        _make_solver(decision_heuristic, local_search).solve(
+            fresh_formula, to_abstract=False
+        )
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_memory
+
+
+def run_instance(
+    instance: BenchmarkInstance,
+    repetitions: int,
+    measure_memory: bool = False,
+    decision_heuristic: str = DLIS,
+    local_search: Optional[str] = None,
+) -> Dict:
+    """
+    Solve a benchmark instance repeatedly using the DPLL solver
+    :param instance: The instance to solve
+    :param repetitions: Number of times to solve the instance
+    :param measure_memory: Whether to also measure the peak memory of a solve
+    :param decision_heuristic: The decision heuristic of the solver
+    :param local_search: The local search algorithm to run in hybrid mode
+    (one of LOCAL_SEARCH_ALGORITHMS). None for CDCL only
+    :return: A json serializable dictionary of the run results
+    """
+    formula = instance.build()
+    num_vars = len({abs(int_lit) for clause in formula for int_lit in clause})
+    times = []
+    result_code, stats = None, None
+
+    for _ in range(repetitions):
+        solver = _make_solver(decision_heuristic, local_search)
+        fresh_formula = [set(clause) for clause in formula]
+        start_time = time.perf_counter()
+        result_code, _, stats = solver.solve(
+            fresh_formula, to_abstract=False, return_statistics=True
+        )
+        times.append(time.perf_counter() - start_time)
+
+    return {
+        "name": instance.name,
+        "family": instance.family,
+        "params": instance.params,
+        "num_vars": num_vars,
+        "num_clauses": len(formula),
+        "result": result_code.name,
+        "times": times,
+        "median_time": statistics.median(times),
+        "min_time": min(times),
+        "conflicts": stats.conflicts,
+        "decisions": stats.decisions,
+        "propagations": stats.propagations,
+        "learned_clauses": stats.learned_clauses,
+        "peak_memory": (
+            _measure_peak_memory(formula, decision_heuristic, local_search)
+            if measure_memory
+            else None
+        ),
+    }
+
+
+def run_suite(
+    suite_name: str,
+    repetitions: int = 3,
+    name_filter: Optional[str] = None,
+    log: Optional[Callable[[str], None]] = None,
+    measure_memory: bool = False,
+    decision_heuristic: str = DLIS,
+    local_search: Optional[str] = None,
+) -> Dict:
+    """
+    Run all the instances of a benchmark suite
+    :param suite_name: One of SUITES
+    :param repetitions: Number of times to solve each instance
+    :param name_filter: Only run instances with this substring in their name
+    :param log: Optional callback to report the progress to
+    :param measure_memory: Whether to also measure the peak memory of a solve
+    :param decision_heuristic: The decision heuristic of the solver
+    :param local_search: The local search algorithm to run in hybrid mode
+    :return: A json serializable dictionary of the suite results
+    """
+    results = []
+    for instance in get_suite(suite_name):
+        if name_filter and name_filter not in instance.name:
+            continue
+        result = run_instance(
+            instance, repetitions, measure_memory, decision_heuristic, local_search
+        )
+        if log is not None:
+            log(
+                f"{result['name']:<20} {result['result']:<6}"
+                f" {result['median_time']:>10.4f}s"
+                f" conflicts={result['conflicts']} decisions={result['decisions']}"
+            )
+        results.append(result)
+
+    return {
+        "suite": suite_name,
+        "repetitions": repetitions,
+        "decision_heuristic": decision_heuristic,
+        "local_search": local_search,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "instances": results,
+    }
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the SAT benchmark suites")
+    parser.add_argument("--suite", choices=SUITES, default="default")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--filter", default=None, help="instance name substring")
+    parser.add_argument("-o", "--output", default=None, help="json output path")
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        const=DEFAULT_HISTORY_PATH,
+        default=None,
+        help="append the results to this history file",
+    )
+    parser.add_argument("--heuristic", choices=DECISION_HEURISTICS, default=DLIS)
+    parser.add_argument(
+        "--local-search",
+        choices=LOCAL_SEARCH_ALGORITHMS,
+        default=None,
+        help="run a local search before the CDCL search (hybrid mode)",
+    )
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="configuration label (the heuristic and local search if not given)",
+    )
+    parser.add_argument(
+        "--revision", default=None, help="revision label (git revision if not given)"
+    )
+    return parser.parse_args(argv)
+
+
+def _log_to_stderr(line: str) -> None:
+    print(line, file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    is_recording = args.history is not None
+    suite_results = run_suite(
+        args.suite,
+        args.repetitions,
+        args.filter,
+        _log_to_stderr,
+        is_recording,
+        args.heuristic,
+        args.local_search,
+    )
+
+    if is_recording:
+        revision = args.revision or get_git_revision()
+        config = args.config or "+".join(
+            filter(None, (args.heuristic, args.local_search))
+        )
+        records = to_history_records(suite_results, revision, config)
+        append_history(args.history, records)
+        _log_to_stderr(
+            f"Appended {len(records)} records of {revision} to {args.history}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(suite_results, f, indent=2)
+    else:
+        json.dump(suite_results, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
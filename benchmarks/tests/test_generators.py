@@ -0,0 +1,81 @@
+import pytest
+
+from benchmarks import generators
+from benchmarks.runner import get_suite, run_suite, SUITES
+from constants import ResultCode
+from DPLLT import DPLL
+from tests.test_utils import verify_abstracted_assignment
+
+
+def solve(formula):
+    return DPLL().solve([set(clause) for clause in formula], to_abstract=False)
+
+
+@pytest.mark.parametrize(
+    "build",
+    [
+        lambda seed: generators.random_k_sat(20, 85, 3, seed),
+        lambda seed: generators.parity_chains(5, seed),
+        lambda seed: generators.graph_coloring(10, 0.3, 3, seed),
+        lambda seed: generators.tseitin_expander(8, 3, seed),
+    ],
+)
+def test_generators_deterministic(build):
+    assert build(7) == build(7)
+    assert build(7) != build(8)
+
+
+def test_random_k_sat_shape():
+    formula = generators.random_k_sat(10, 42, k=4, seed=3)
+    assert len(formula) == 42
+    assert all(len({abs(int_lit) for int_lit in clause}) == 4 for clause in formula)
+    assert all(1 <= abs(int_lit) <= 10 for clause in formula for int_lit in clause)
+
+
+@pytest.mark.parametrize(
+    "formula, expected_result_code",
+    [
+        (generators.pigeonhole(3), ResultCode.UNSAT),
+        (generators.parity_chains(4, seed=1), ResultCode.UNSAT),
+        (generators.parity_chains(4, seed=1, satisfiable=True), ResultCode.SAT),
+        (generators.tseitin_expander(6, 3, seed=2), ResultCode.UNSAT),
+        (generators.tseitin_expander(6, 3, seed=2, satisfiable=True), ResultCode.SAT),
+        (generators.graph_coloring(6, 1.0, 5, seed=0), ResultCode.UNSAT),
+        (generators.graph_coloring(6, 1.0, 6, seed=0), ResultCode.SAT),
+    ],
+)
+def test_structured_generators_results(formula, expected_result_code):
+    result_code, assignment = solve(formula)
+    assert result_code == expected_result_code
+    if expected_result_code == ResultCode.SAT:
+        assert verify_abstracted_assignment(formula, assignment)
+
+
+def test_random_regular_graph():
+    edges = generators.random_regular_graph(10, 3, seed=4)
+    degrees = [0] * 10
+    for u, v in edges:
+        assert u != v
+        degrees[u] += 1
+        degrees[v] += 1
+    assert len(set(edges)) == 15
+    assert degrees == [3] * 10
+
+
+def test_run_smoke_suite():
+    suite_results = run_suite("smoke", repetitions=2)
+    instances = suite_results["instances"]
+
+    assert [result["name"] for result in instances] == [
+        instance.name for instance in get_suite("smoke")
+    ]
+    for result in instances:
+        assert len(result["times"]) == 2
+        assert result["result"] in (ResultCode.SAT.name, ResultCode.UNSAT.name)
+        assert result["conflicts"] >= 0 and result["decisions"] >= 0
+
+
+def test_unknown_suite():
+    assert "smoke" in SUITES
+    with pytest.raises(ValueError):
+        get_suite("missing")
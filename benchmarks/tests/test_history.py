@@ -0,0 +1,68 @@
+import pytest
+
+from benchmarks.compare import (
+    FASTER,
+    SLOWER,
+    UNCHANGED,
+    compare_revisions,
+    format_comparisons,
+)
+from benchmarks.history import append_history, load_history, to_history_records
+from benchmarks.runner import run_suite
+
+
+def make_record(name, revision, times, config="default", result="SAT"):
+    return {
+        "name": name,
+        "revision": revision,
+        "config": config,
+        "times": times,
+        "result": result,
+        "conflicts": 3,
+    }
+
+
+def test_history_roundtrip(tmp_path):
+    history_path = str(tmp_path / "history.jsonl")
+    suite_results = run_suite("smoke", repetitions=1, measure_memory=True)
+    records = to_history_records(suite_results, "rev1", "baseline", timestamp=1.0)
+    append_history(history_path, records)
+    append_history(history_path, records)
+
+    loaded = load_history(history_path)
+    assert len(loaded) == 2 * len(suite_results["instances"])
+    assert loaded[: len(records)] == records
+    assert all(record["peak_memory"] > 0 for record in loaded)
+    assert {record["config"] for record in loaded} == {"baseline"}
+
+
+def test_compare_revisions_verdicts():
+    history = [
+        make_record("fast", "a", [1.0, 1.02, 0.98]),
+        make_record("fast", "b", [0.5, 0.51, 0.49]),
+        make_record("slow", "a", [1.0, 1.0, 1.0]),
+        make_record("slow", "b", [2.0, 2.0, 2.0]),
+        make_record("same", "a", [1.0, 1.01, 0.99]),
+        make_record("same", "b", [1.01, 1.0, 1.02]),
+        make_record("noisy", "a", [1.0, 0.5, 1.5]),
+        make_record("noisy", "b", [0.8, 0.4, 1.2]),
+        make_record("only_a", "a", [1.0]),
+    ]
+    comparisons = {c["name"]: c for c in compare_revisions(history, "a", "b")}
+
+    assert set(comparisons) == {"fast", "slow", "same", "noisy"}
+    assert comparisons["fast"]["verdict"] == FASTER
+    assert comparisons["fast"]["speedup"] == pytest.approx(2.0)
+    assert comparisons["slow"]["verdict"] == SLOWER
+    assert comparisons["same"]["verdict"] == UNCHANGED
+    assert comparisons["noisy"]["verdict"] == UNCHANGED
+
+
+def test_compare_detects_results_mismatch():
+    history = [
+        make_record("x", "a", [1.0], result="SAT"),
+        make_record("x", "b", [1.0], result="UNSAT"),
+    ]
+    comparisons = compare_revisions(history, "a", "b")
+    assert not comparisons[0]["results_match"]
+    assert "RESULT MISMATCH" in format_comparisons(comparisons)
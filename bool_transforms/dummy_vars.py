@@ -0,0 +1,24 @@
+"""
+General Notes
+-------------
+Dummy vars are the fresh variables the transformations introduce to stand for
+subformulas (or terms). Their names start with # so they can't clash with the
+variables of a parsed formula, and the solvers drop them from the models.
+
+"""
+
+from parsing.logical_blocks import Atom, Var
+
+
+class DummyVarsTracker:
+    def __init__(self, init_name: str = "#G"):
+        self.next_dummy_id = 0
+        self.dummy_map = dict()
+        self.init_name = init_name
+
+    def get_dummy(self, f: Atom) -> Var:
+        if f not in self.dummy_map.keys():
+            new_dummy = Var(self.init_name + str(self.next_dummy_id))
+            self.next_dummy_id += 1
+            self.dummy_map[f] = new_dummy
+        return self.dummy_map[f]
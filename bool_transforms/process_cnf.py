@@ -8,25 +8,47 @@ represent a literal and -i represents its negation.
 The module also provides a processing for simplifying negations in equalities
 and functions arguments.
 
+The clauses are emitted directly as sets of ints by the tseitin pass (see
+tseitin_to_int_clauses). Every distinct literal of the formula is processed
+(negations pushed into =, != and <, >=, negations removed from the equalities
+and functions arguments) and mapped to its int once, through a single table.
+
+A formula given as a stream of assertions (whose conjunction is the formula)
+can be abstracted one assertion at a time with an Abstractor, which keeps the
+literals mapping, the dummy vars and the already encoded subformulas between
+the assertions, so the conjunction itself is never built. The Abstractor can
+be reused for the next formulas of a session (new_formula) - the literals
+keep their ints and the clauses of the tseitin gates already encoded are
+emitted again without encoding them again.
+
+The tseitin encoding (see tseitin_transform) is selected by the encoding
+argument - "polarity" encodes only the directions of the dummy vars
+equivalences required by the polarities of the subformulas, which gives
+fewer clauses than the default "full" encoding.
+
 """
 
-from typing import List, Dict, Set, Union, Tuple
+from itertools import islice
+from typing import List, Dict, Set, Union, Tuple, Optional
 from parsing.logical_blocks import (
     Var,
     Atom,
-    BinaryOp,
-    UnaryOp,
-    Or,
-    And,
     Negate,
     NEqual,
     Equal,
     Func,
     Less,
     Geq,
+    iter_subformulas,
 )
 
-from bool_transforms.tseitin_transform import tseitin_transform, DummyVarsTracker
+from bool_transforms.tseitin_transform import (
+    tseitin_to_int_clauses,
+    DummyVarsTracker,
+    FULL_ENCODING,
+    TSEITIN_ENCODINGS,
+)
+from profiling.phase_timer import PhaseTimer, get_timer
 
 
 def get_nested_literals(node: Atom, output_set: Set[Atom]) -> None:
@@ -35,47 +57,29 @@ def get_nested_literals(node: Atom, output_set: Set[Atom]) -> None:
     :param node: root of formula to extract nested literals from
     :param output_set: the set to add the nested literals to
     """
-    if not node.is_literal():
-        if isinstance(node, BinaryOp):
-            get_nested_literals(node.left, output_set)
-            get_nested_literals(node.right, output_set)
-        elif isinstance(node, UnaryOp):
-            get_nested_literals(node.item, output_set)
-    else:
-        output_set.add(node)
-
-
-# Assumes only Or, And, and literals exists
-def _reformat_cnf_helper(node: Atom, out_list: List[Set[Atom]]) -> None:
-    """
-    Recursive method for extracting literals from a CNF logical formula
-    into a list where each clause in the formula is represented by a set of
-    literals which are part of it.
-    :param node: The root of the logical formula to be processed
-    :param out_list: The list to export sets of literals to
-    """
-    if not node.is_literal():
-        if isinstance(node, Or):
-            temp = set()
-            get_nested_literals(node, temp)
-            out_list.append(temp)
-        elif isinstance(node, And):
-            _reformat_cnf_helper(node.left, out_list)
-            _reformat_cnf_helper(node.right, out_list)
-    else:
-        out_list.append({node})
+    output_set.update(
+        sub_formula
+        for sub_formula in iter_subformulas(node, stop_at_literals=True)
+        if sub_formula.is_literal()
+    )
 
 
-def _create_literals_mapping(literals: Set[Atom]) -> Dict[Atom, int]:
+def _create_literals_mapping(
+    literals: Set[Atom], mapping: Optional[Dict[Atom, int]] = None
+) -> Dict[Atom, int]:
     """
     Creates a mapping of logical literals to int values. The mapping is created
     as for each literal mapped to i, its negation is mapped to -i.
     :param literals: Set of literals to be mapped
+    :param mapping: An existing mapping to extend. The literals already in it
+    keep their ints and the new literals are mapped to the following ints
     :return: A mapping of literals to ints
     """
+    if mapping is None:
+        mapping = dict()
     lits_encountered = dict()  # dict that will be used as an ordered set
     for lit in literals:
-        if isinstance(lit, Var) or isinstance(lit, Func) or isinstance(lit, Equal):
+        if isinstance(lit, (Var, Func, Equal, Geq)):
             lits_encountered[lit] = None
         elif isinstance(lit, Negate):
             if isinstance(lit.item, Less):
@@ -87,8 +91,11 @@ def _create_literals_mapping(literals: Set[Atom]) -> Dict[Atom, int]:
         elif isinstance(lit, Less):
             lits_encountered[Geq(lit.left, lit.right)] = None
 
-    lits_encountered = list(lits_encountered.keys())
-    mapping = {old_name: idx + 1 for (idx, old_name) in enumerate(lits_encountered)}
+    lits_encountered = [lit for lit in lits_encountered if lit not in mapping]
+    # every literal is mapped together with its negation
+    first_id = len(mapping) // 2 + 1
+    for idx, lit in enumerate(lits_encountered):
+        mapping[lit] = first_id + idx
     for lit in lits_encountered:
         if isinstance(lit, Var) or isinstance(lit, Func):
             mapping[Negate(lit)] = -mapping[lit]
@@ -109,90 +116,49 @@ def to_equalities_with_no_negations_args(node: Union[Equal, NEqual]) -> Atom:
     :return: The root of the converted formula
     """
     num_of_negs = 0
-    if isinstance(node.left, Negate):
-        node.left = node.left.item
+    left, right = node.left, node.right
+    if isinstance(left, Negate):
+        left = left.item
         num_of_negs += 1
-    if isinstance(node.right, Negate):
-        node.right = node.right.item
+    if isinstance(right, Negate):
+        right = right.item
         num_of_negs += 1
 
     if num_of_negs % 2 == 1:
         if isinstance(node, Equal):
-            return NEqual(node.left, node.right)
+            return NEqual(left, right)
         else:
-            return Equal(node.left, node.right)
+            return Equal(left, right)
     else:
-        return node
+        return node.rebuild(left, right)
 
 
-def _remove_negations_in_eqs_helper(node: Atom) -> Atom:
-    """
-    A recursive helper method to remove negations in =, != arguments
-    :param node: A root logical atom of the formula to be processed
-    :return: The root of the formula with no negations in =, != args
-    """
-    if isinstance(node, Equal) or isinstance(node, NEqual):
-        return to_equalities_with_no_negations_args(node)
-
-    elif node.is_literal():
-        return node
-    elif isinstance(node, BinaryOp):
-        left = _remove_negations_in_eqs_helper(node.left)
-        right = _remove_negations_in_eqs_helper(node.right)
-        node.left = left
-        node.right = right
-        return node
-    elif isinstance(node, UnaryOp):
-        return _remove_negations_in_eqs_helper(node)
-
-
-def _remove_negations_in_eqs(cnf_conjunction: List[Atom]) -> List[Atom]:
-    """
-    A method that convert a list of logical formulas root to a list of
-    clauses roots with no negations in =, != args
-    :param cnf_conjunction: A list of logical formulas roots
-    :return: A list with equivalant formulas as in the input only with no
-    negations in =, != args
-    """
-    new_clauses = []
-    for clause in cnf_conjunction:
-        new_clauses.append(_remove_negations_in_eqs_helper(clause))
-    return new_clauses
-
-
-def _remove_negations_in_func_args_helper(
-    f: Atom,
+def _remove_negations_in_func_args(
+    literal: Atom,
     to_add_neqs: Dict[NEqual, None],
     dvar_tracker: DummyVarsTracker,
     dummy_map: Dict[Var, Negate],
 ) -> Atom:
     """
-    Recursive helper for removing negations in functions arguments
-    :param f: root of logical formula to be processed
+    Replace the negated arguments of a function literal (or its negation) by
+    dummy vars, recursively in the arguments which are functions
+    :param literal: The literal to be processed
     :param to_add_neqs: A dictionary served as an ordered set of NEquals added
                         during preprocessing.
     :param dvar_tracker: DummyVarsTracker to produce dummy vars if necessary
     :param dummy_map: Mapping of dummy vars added to the original variables
-    :return: The root of the processed logical formula
+    :return: The processed literal
     """
-    if isinstance(f, BinaryOp):
-        f.left = _remove_negations_in_func_args_helper(
-            f.left, to_add_neqs, dvar_tracker, dummy_map
+    if isinstance(literal, Negate):
+        return literal.rebuild(
+            _remove_negations_in_func_args(
+                literal.item, to_add_neqs, dvar_tracker, dummy_map
+            )
         )
-        f.right = _remove_negations_in_func_args_helper(
-            f.right, to_add_neqs, dvar_tracker, dummy_map
-        )
-        return f
-
-    elif isinstance(f, UnaryOp):
-        f.item = _remove_negations_in_func_args_helper(
-            f.item, to_add_neqs, dvar_tracker, dummy_map
-        )
-        return f
 
-    elif isinstance(f, Func):
+    elif isinstance(literal, Func):
         new_args = []
-        for arg in f.args:
+        for arg in literal.args:
             if isinstance(arg, Negate):
                 new_var = dvar_tracker.get_dummy(arg)
                 dummy_map[new_var] = arg
@@ -200,77 +166,178 @@ def _remove_negations_in_func_args_helper(
                 arg = new_var
 
             elif isinstance(arg, Func):
-                arg = _remove_negations_in_func_args_helper(
+                arg = _remove_negations_in_func_args(
                     arg, to_add_neqs, dvar_tracker, dummy_map
                 )
             new_args.append(arg)
-        return Func(f.name, new_args)
+        return Func(literal.name, new_args)
 
     else:
-        return f
+        return literal
 
 
-def _remove_negations_in_func_args(
-    tseitin_clauses: List[Atom],
-) -> Tuple[List[Atom], Dict[Var, NEqual]]:
+class Abstractor:
     """
-    Removes negations from functions args in each of the given clauses
-    :param tseitin_clauses: List of roots of formulas, each representing
-    a tseitin clause
-    :return: A Tuple of the processed clauses list and a mapping of dummy vars
-    added to the original expressions they replaced.
+    Abstracts the assertions of a formula one at a time, keeping the literals
+    mapping and the dummy vars of the previous assertions. The clauses of all
+    the assertions together are the abstraction of their conjunction.
+
+    The abstractor can be reused for the next formulas of a session
+    (new_formula). The literals ints, the dummy vars and the clauses of the
+    tseitin gates are kept between the formulas, so the same literal is
+    mapped to the same int in every formula and a subformula encoded in a
+    previous formula is not encoded again. abstraction_map and dummy_map hold
+    only the entries of the current formula.
+
+    Example
+    ---------
+        abstractor = Abstractor()
+        for assertion in assertions:
+            clauses.extend(abstractor.add(assertion))
+        abstraction_map = abstractor.abstraction_map
     """
-    to_add_neqs = dict()  # used as ordered set
-    dummy_map = dict()
-    dummy_var_tracker = DummyVarsTracker(init_name="#N")
-
-    for i in range(len(tseitin_clauses)):
-        cur_cl = tseitin_clauses[i]
-        tseitin_clauses[i] = _remove_negations_in_func_args_helper(
-            cur_cl, to_add_neqs, dummy_var_tracker, dummy_map
-        )
 
-    to_add_neqs = list(to_add_neqs.keys())
-    tseitin_clauses.extend(to_add_neqs)
+    def __init__(
+        self, timer: Optional[PhaseTimer] = None, encoding: str = FULL_ENCODING
+    ) -> None:
+        """
+        :param timer: An optional PhaseTimer to attribute the time of each
+        stage to
+        :param encoding: The tseitin encoding, one of TSEITIN_ENCODINGS
+        (see tseitin_transform)
+        """
+        if encoding not in TSEITIN_ENCODINGS:
+            raise ValueError(
+                f"Unknown tseitin encoding {encoding},"
+                f" expected one of {TSEITIN_ENCODINGS}"
+            )
+        self.timer = get_timer(timer)
+        self.encoding = encoding
+        self.lit_to_int = dict()
+        # the ints mapped to the literals they're representing, of all the
+        # formulas
+        self._int_to_lit = dict()
+        self._tseitin_tracker = DummyVarsTracker()
+        # the clauses of the encoded tseitin gates of all the formulas
+        self._tseitin_definitions = dict()
+        self._func_args_tracker = DummyVarsTracker(init_name="#N")
+        # the functions arguments dummy vars mapped to the arguments they
+        # replaced, of all the formulas
+        self._func_args_dummies = dict()
+        # the literals of the assertions mapped to the ints of their
+        # processed forms
+        self._literals_ints = dict()
+        # the ints of the processed literals mapped to the ints of the
+        # NEquals of their functions arguments dummy vars
+        self._required_neqs = dict()
+        self.new_formula()
+
+    def new_formula(self) -> None:
+        """
+        Start abstracting a new formula. The next assertions are abstracted
+        as a conjunction of their own, reusing the literals ints and the
+        tseitin gates of the previous formulas
+        """
+        # the ints mapped to the literals they're representing
+        self.abstraction_map = dict()
+        # the dummy vars mapped to the atoms they replaced
+        self.dummy_map = dict()
+        # the encoded subformulas to the directions of their encoded equivalences
+        self._tseitin_encoded = dict()
+
+    def _preprocess_literal(
+        self, literal: Atom, to_add_neqs: Dict[NEqual, None]
+    ) -> Atom:
+        if isinstance(literal, Negate) and isinstance(
+            literal.item, (Equal, NEqual, Less, Geq)
+        ):
+            literal = literal.item.negate()
+        if isinstance(literal, (Equal, NEqual)):
+            return to_equalities_with_no_negations_args(literal)
+        return _remove_negations_in_func_args(
+            literal, to_add_neqs, self._func_args_tracker, self._func_args_dummies
+        )
 
-    return tseitin_clauses, dummy_map
-
-
-def _cnf_conjunction_to_ints(
-    cnf_conjunction: List[Atom],
-) -> Tuple[List[Set[int]], Dict[Atom, int]]:
-    """
-    converts a list of logical formulas' roots representing a cnf conjunction
-    into a list of sets of ints which is equivalent.
-    :param cnf_conjunction: A list of roots of logical formulas' roots
-    :return: A tuple of the ints version of the formula and the mapping
-    of logical literals to ints that was used for the conversion.
-    """
-    # First - collect literals appearing and create a mapping
-    literals = set()
-    for clause in cnf_conjunction:
-        get_nested_literals(clause, literals)
-    lit_mapping = _create_literals_mapping(literals)
-    conj_with_ints = []
-    new_conj = []
-    for root in cnf_conjunction:  # make new_conj into a list of sets of clauses
-        _reformat_cnf_helper(root, new_conj)
-    for cl in new_conj:  # translate the clauses to int format using the mapping
-        cur_clause_ints = set()
-        for lit in cl:
-            cur_clause_ints.add(lit_mapping[lit])
-        conj_with_ints.append(cur_clause_ints)
-    return conj_with_ints, lit_mapping
+    def _map_literal(self, literal: Atom) -> int:
+        if literal not in self.lit_to_int:
+            num_known_lits = len(self.lit_to_int)
+            _create_literals_mapping({literal}, self.lit_to_int)
+            self._int_to_lit.update(
+                (v, k)
+                for (k, v) in islice(self.lit_to_int.items(), num_known_lits, None)
+            )
+        return self.lit_to_int[literal]
+
+    def _literal_to_int(self, literal: Atom) -> int:
+        lit_int = self._literals_ints.get(literal)
+        if lit_int is None:
+            to_add_neqs = dict()
+            lit_int = self._map_literal(self._preprocess_literal(literal, to_add_neqs))
+            if to_add_neqs:
+                self._required_neqs[abs(lit_int)] = [
+                    self._map_literal(neq) for neq in to_add_neqs
+                ]
+            self._literals_ints[literal] = lit_int
+        return lit_int
+
+    def _register_ints(self, int_cnf_formula: List[Set[int]]) -> None:
+        """
+        Add the literals of the clauses which are new to the current formula
+        to abstraction_map, together with the unit clauses of the NEquals of
+        their functions arguments dummy vars
+        """
+        neqs_clauses = []
+        for clause in int_cnf_formula:
+            for lit_int in clause:
+                var = abs(lit_int)
+                if var in self.abstraction_map:
+                    continue
+                self.abstraction_map[var] = self._int_to_lit[var]
+                self.abstraction_map[-var] = self._int_to_lit[-var]
+                for neq_int in self._required_neqs.get(var, ()):
+                    dummy = self._int_to_lit[neq_int].right
+                    if dummy in self.dummy_map:
+                        continue
+                    self.dummy_map[dummy] = self._func_args_dummies[dummy]
+                    self.abstraction_map[neq_int] = self._int_to_lit[neq_int]
+                    self.abstraction_map[-neq_int] = self._int_to_lit[-neq_int]
+                    neqs_clauses.append({neq_int})
+        int_cnf_formula.extend(neqs_clauses)
+
+    def add(self, assertion: Atom) -> List[Set[int]]:
+        """
+        Abstract the next assertion of the formula
+        :param assertion: The root of the assertion
+        :return: The new clauses of the abstracted cnf conjunction, represented
+        as a list of sets of ints. The new literals are added to
+        abstraction_map and the new dummy vars to dummy_map
+        """
+        with self.timer.phase("tseitin_transform"):
+            int_cnf_formula = tseitin_to_int_clauses(
+                assertion,
+                self._literal_to_int,
+                self._tseitin_tracker,
+                self._tseitin_encoded,
+                self.encoding,
+                self._tseitin_definitions,
+            )
+        self._register_ints(int_cnf_formula)
+        return int_cnf_formula
 
 
 def to_abstract_cnf_conjunction(
     raw_formula: Atom,
+    timer: Optional[PhaseTimer] = None,
+    encoding: str = FULL_ENCODING,
 ) -> Tuple[List[Set[int]], Dict[int, Atom], Dict[Var, Atom]]:
     """
     Abstracts a logical formula to a CNF conjunction of clauses where each
     clause is represented by a set of int where each int representing a literal
     and its negation is the representation of the literal's negation
     :param raw_formula: The original logical formula to be processed
+    :param timer: An optional PhaseTimer to attribute the time of each stage to
+    :param encoding: The tseitin encoding, one of TSEITIN_ENCODINGS
+    (see tseitin_transform)
     :return: A tuple of 3 elements:
             - The new abstracted cnf conjunction version of raw_formula
               it's represented as a list of sets of ints where each int
@@ -278,21 +345,6 @@ def to_abstract_cnf_conjunction(
             - A dictionary mapping the ints to the literals they're representing
             - A dictionary mapping dummy variables to atoms in the raw_formula
     """
-    cnf_conjunction = tseitin_transform(raw_formula)
-
-    # preprocess negations
-    cnf_conjunction = _remove_negations_in_eqs(cnf_conjunction)
-    cnf_conjunction, dummy_map = _remove_negations_in_func_args(cnf_conjunction)
-
-    int_cnf_formula, lit_to_int = _cnf_conjunction_to_ints(cnf_conjunction)
-
-    # remove trivial clauses
-    int_cnf_formula = [
-        clause
-        for clause in int_cnf_formula
-        if len({abs(lit) for lit in clause}) == len(clause)
-    ]
-
-    abstraction_map = {v: k for (k, v) in lit_to_int.items()}
-
-    return int_cnf_formula, abstraction_map, dummy_map
+    abstractor = Abstractor(timer, encoding)
+    int_cnf_formula = abstractor.add(raw_formula)
+    return int_cnf_formula, abstractor.abstraction_map, abstractor.dummy_map
@@ -0,0 +1,231 @@
+"""
+General Notes
+-------------
+A cheap simplification of formulas before their abstraction. The rewritings:
+* flattening of nested And / Or, and Imply rewritten as an Or (so chains of
+  implications are flattened as well)
+* double negations elimination, and negations of =, != and <, >= replaced by
+  the opposite operation
+* idempotence - repeated items of an And / Or are dropped
+* complementary items - an And with an item and its negation is False, and
+  an Or with them is True
+* absorption - an Or item of an And sharing an item with the And is dropped
+  (a & (a | b) is a), and an And item of an Or sharing an item with the Or is
+  dropped (a | (a & b) is a)
+* unit propagation - the literals which are items of the top level And (the
+  units) are True in the rest of the formula, and their complements False
+* constants folding - True / False subformulas are propagated upwards
+
+The constants are represented by the python bools True and False, which are
+returned when the whole formula is simplified to a constant.
+
+A Simplifier keeps the units of the previous assertions of a stream of
+assertions (whose conjunction is the formula) and propagates them into the
+next assertions.
+
+The simplification is bottom up with an explicit stack, so it supports
+formulas of any depth. The units of the top level And are propagated in its
+items as soon as they're found, and the formula is simplified again only if
+a unit found later may simplify the items before it.
+
+"""
+
+from typing import Dict, List, Union
+
+from parsing.logical_blocks import (
+    Atom,
+    BinaryOp,
+    NaryOp,
+    Negate,
+    And,
+    Or,
+    Imply,
+    Equiv,
+    Equal,
+    NEqual,
+    Less,
+    Geq,
+)
+
+SimplifiedAtom = Union[Atom, bool]
+
+_DUAL_SIDE_TYPES = (Equal, NEqual, Less, Geq)
+
+
+def _complement(node: Atom) -> Atom:
+    if isinstance(node, Negate):
+        return node.item
+    if isinstance(node, _DUAL_SIDE_TYPES):
+        return node.negate()
+    return Negate(node)
+
+
+def _negate(item: SimplifiedAtom) -> SimplifiedAtom:
+    if isinstance(item, bool):
+        return not item
+    return _complement(item)
+
+
+def _simplify_nary(node_type: type, items: List[SimplifiedAtom]) -> SimplifiedAtom:
+    # the constant absorbing the operation (False for And, True for Or)
+    absorbing = node_type is Or
+    # a dict as an ordered set drops the repeated items
+    kept = dict()
+    for item in items:
+        if isinstance(item, bool):
+            if item is absorbing:
+                return absorbing
+        elif type(item) is node_type:
+            kept.update(dict.fromkeys(item.items))
+        else:
+            kept[item] = None
+
+    if any(_complement(item) in kept for item in kept):
+        return absorbing
+
+    dual_type = Or if node_type is And else And
+    kept = [
+        item
+        for item in kept
+        if not (
+            isinstance(item, dual_type)
+            and any(dual_item in kept for dual_item in item.items)
+        )
+    ]
+    if not kept:
+        return not absorbing
+    return node_type.from_items(kept)
+
+
+def _simplify_equiv(left: SimplifiedAtom, right: SimplifiedAtom) -> SimplifiedAtom:
+    if isinstance(left, bool):
+        left, right = right, left
+    if isinstance(right, bool):
+        if isinstance(left, bool):
+            return left is right
+        return left if right else _complement(left)
+    if left is right:
+        return True
+    if _complement(left) is right:
+        return False
+    return Equiv(left, right)
+
+
+def _items(node: Atom):
+    if isinstance(node, NaryOp):
+        return node.items
+    if isinstance(node, BinaryOp):
+        return node.left, node.right
+    return (node.item,)
+
+
+def _simplify_node(
+    root: Atom, units: Dict[Atom, None], memo: Dict[Atom, SimplifiedAtom]
+) -> SimplifiedAtom:
+    """
+    Simplify a formula given the units which are True
+    :param root: The root of the formula
+    :param units: The literals known to be True
+    :param memo: The subformulas already simplified (given these units or
+    a part of them)
+    :return: The simplified formula, or a bool if it's a constant
+    """
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        if node in memo:
+            stack.pop()
+            continue
+
+        if node.is_literal():
+            stack.pop()
+            if isinstance(node, Negate) and isinstance(node.item, _DUAL_SIDE_TYPES):
+                node_literal = node.item.negate()
+            else:
+                node_literal = node
+            if node_literal in units:
+                memo[node] = True
+            elif _complement(node_literal) in units:
+                memo[node] = False
+            else:
+                memo[node] = node_literal
+            continue
+
+        pending = [item for item in _items(node) if item not in memo]
+        if pending:
+            stack.extend(reversed(pending))
+            continue
+        stack.pop()
+
+        items = [memo[item] for item in _items(node)]
+        if isinstance(node, Negate):
+            memo[node] = _negate(items[0])
+        elif isinstance(node, (And, Or)):
+            memo[node] = _simplify_nary(type(node), items)
+        elif isinstance(node, Imply):
+            memo[node] = _simplify_nary(Or, [_negate(items[0]), items[1]])
+        elif isinstance(node, Equiv):
+            memo[node] = _simplify_equiv(*items)
+        else:
+            raise ValueError(f"Unrecognized type of node: {type(node)}")
+    return memo[root]
+
+
+class Simplifier:
+    """
+    Simplifies a stream of assertions, propagating the units of each
+    assertion into itself and into the next assertions
+    """
+
+    def __init__(self):
+        # the units of the assertions so far, a dict as an ordered set
+        self.units: Dict[Atom, None] = dict()
+
+    def simplify(self, assertion: Atom) -> SimplifiedAtom:
+        """
+        Simplify the next assertion of the stream. Its units are kept as
+        items of the result, so an assignment satisfying the simplified
+        assertions satisfies the originals on the literals they still have
+        :param assertion: The assertion to simplify
+        :return: The simplified assertion, or a bool if it's a constant
+        """
+        new_units = []
+        result = assertion
+        while True:
+            memo = dict()
+            num_units = len(self.units)
+            items = []
+            for item in result.items if isinstance(result, And) else (result,):
+                item = _simplify_node(item, self.units, memo)
+                if item is False:
+                    return False
+                if item is True:
+                    continue
+                for sub_item in item.items if isinstance(item, And) else (item,):
+                    if not sub_item.is_literal():
+                        items.append(sub_item)
+                    elif _complement(sub_item) in self.units:
+                        return False
+                    elif sub_item not in self.units:
+                        self.units[sub_item] = None
+                        new_units.append(sub_item)
+            result = _simplify_nary(And, items)
+            # simplify again only if new units were found, which may simplify
+            # the items before them
+            if isinstance(result, bool) or len(self.units) == num_units:
+                break
+
+        if result is False:
+            return False
+        if result is not True:
+            new_units.extend(result.items if isinstance(result, And) else (result,))
+        return And.from_items(new_units) if new_units else True
+
+
+def simplify(formula: Atom) -> SimplifiedAtom:
+    """
+    Simplify a formula. See the General Notes of this module
+    :param formula: The formula to simplify
+    :return: The simplified formula, or a bool if it's a constant
+    """
+    return Simplifier().simplify(formula)
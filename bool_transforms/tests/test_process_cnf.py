@@ -1,6 +1,6 @@
 import pytest
 
-from bool_transforms.process_cnf import to_abstract_cnf_conjunction
+from bool_transforms.process_cnf import Abstractor, to_abstract_cnf_conjunction
 from parsing.logical_blocks import Var, Negate, Equal, NEqual, Func
 from parsing.parse import Parser
 
@@ -166,3 +166,84 @@ def test_mapping_func_args_negations(formula_text, expected_lit_clauses):
     int_cnf_formula, abstraction_map, _ = to_abstract_cnf_conjunction(formula)
     lit_clauses = to_lit_conjunction(int_cnf_formula, abstraction_map)
     assert lit_clauses == expected_lit_clauses
+
+
+def test_abstractor_keeps_state_between_assertions():
+    abstractor = Abstractor()
+    first_clauses = abstractor.add(parser.parse("p & f(q, !r)"))
+    second_clauses = abstractor.add(parser.parse("f(q, !r) | !p"))
+
+    g1 = Var("#G1")
+    f_q_n0_lit = Negate(f_q_n0)
+    assert to_lit_conjunction(first_clauses, abstractor.abstraction_map) == [
+        {g0},
+        {neg_g0, p},
+        {neg_g0, f_q_n0},
+        {neg_p, f_q_n0_lit, g0},
+        {neq_r_n0},
+    ]
+    # the literals and dummy vars of the first assertion are reused
+    assert to_lit_conjunction(second_clauses, abstractor.abstraction_map) == [
+        {g1},
+        {neg_p, f_q_n0, Negate(g1)},
+        {f_q_n0_lit, g1},
+        {p, g1},
+    ]
+    assert abstractor.dummy_map == {n0: neg_r}
+
+
+def test_abstractor_reused_between_formulas():
+    abstractor = Abstractor()
+    first_clauses = abstractor.add(parser.parse("p & f(q, !r)"))
+    first_map = abstractor.abstraction_map
+
+    abstractor.new_formula()
+    second_clauses = abstractor.add(parser.parse("(p & f(q, !r)) | q"))
+    g1 = Var("#G1")
+
+    # the literals keep their ints and the gate of the first formula is
+    # emitted again, with the unit clause of the function argument dummy
+    assert second_clauses[-4:] == first_clauses[1:]
+    assert to_lit_conjunction(second_clauses, abstractor.abstraction_map) == [
+        {g1},
+        {Negate(g1), g0, q},
+        {neg_g0, g1},
+        {Negate(q), g1},
+        {neg_g0, p},
+        {neg_g0, f_q_n0},
+        {neg_p, Negate(f_q_n0), g0},
+        {neq_r_n0},
+    ]
+    # the maps hold only the entries of the current formula
+    assert first_map.items() < abstractor.abstraction_map.items()
+    assert len(abstractor.abstraction_map) == len(first_map) + 4
+    assert abstractor.dummy_map == {n0: neg_r}
+
+    # the cached clauses are copied
+    first_clauses[1].add(0)
+    abstractor.new_formula()
+    assert abstractor.add(parser.parse("p & f(q, !r)")) == [
+        clause - {0} for clause in first_clauses
+    ]
+
+
+def test_polarity_encoding_clauses():
+    formula = parser.parse("(p & f(q, !r)) | !(p | (q = r))")
+    full_clauses, _, _ = to_abstract_cnf_conjunction(formula)
+    int_cnf_formula, abstraction_map, _ = to_abstract_cnf_conjunction(
+        formula, encoding="polarity"
+    )
+    assert len(int_cnf_formula) < len(full_clauses)
+    assert to_lit_conjunction(int_cnf_formula, abstraction_map) == [
+        {g0},
+        {neg_g0, g1, g2},
+        {neg_g1, p},
+        {neg_g1, f_q_n0},
+        {neg_g2, neg_g3},
+        {neg_p, g3},
+        {neq_q_r, g3},
+        {neq_r_n0},
+    ]
+
+    with pytest.raises(ValueError, match="Unknown tseitin encoding"):
+        Abstractor(encoding="pg")
@@ -0,0 +1,105 @@
+from itertools import product
+
+import pytest
+from parsing.parse import Parser
+from bool_transforms.simplify import Simplifier, simplify
+from parsing.logical_blocks import And, Equiv, Imply, Negate, Or, Var, iter_subformulas
+
+parser = Parser()
+
+
+@pytest.mark.parametrize(
+    "formula_text, expected_text",
+    [
+        ("!(!x1)", "x1"),
+        ("x1 & (x2 & (x1 | x3))", "x1 & x2"),
+        ("x1 | (x2 | (x1 & x3))", "x1 | x2"),
+        ("x1 -> (x2 -> x3)", "(!x1) | ((!x2) | x3)"),
+        ("x1 & (((!x1) | x2) & ((!x2) | x3))", "x1 & (x2 & x3)"),
+        ("(x3 | x4) & (((!x3) -> x1) & (!x1))", "(!x1) & x3"),
+        ("((x1 = x2) | x3) & (!(x1 = x2))", "(x1 != x2) & x3"),
+        ("(f(x1) | x2) & ((!f(x1)) & (x3 <-> x2))", "(!f(x1)) & (x2 & x3)"),
+        ("((!([1, 2] < 3)) | x1) & ([1, 2] >= 3)", "([1, 2] >= 3)"),
+        ("(x1 <-> (!x2)) | x3", "(x1 <-> (!x2)) | x3"),
+    ],
+)
+def test_simplify(formula_text, expected_text):
+    assert simplify(parser.parse(formula_text)) == parser.parse(expected_text)
+
+
+@pytest.mark.parametrize(
+    "formula_text, expected",
+    [
+        ("x1 | (!x1)", True),
+        ("x1 & (!x1)", False),
+        ("(x1 = x2) & (x1 != x2)", False),
+        ("(x1 <-> x2) & (x1 & (!x2))", False),
+        ("(x1 -> x2) | (x2 -> x1)", True),
+        ("x1 <-> x1", True),
+        ("x1 & ((!x1) | (x2 & (!x2)))", False),
+    ],
+)
+def test_simplify_constants(formula_text, expected):
+    assert simplify(parser.parse(formula_text)) is expected
+
+
+def evaluate(formula, values):
+    if isinstance(formula, Var):
+        return values[formula]
+    if isinstance(formula, Negate):
+        return not evaluate(formula.item, values)
+    if isinstance(formula, And):
+        return all(evaluate(item, values) for item in formula.items)
+    if isinstance(formula, Or):
+        return any(evaluate(item, values) for item in formula.items)
+    left, right = evaluate(formula.left, values), evaluate(formula.right, values)
+    if isinstance(formula, Imply):
+        return (not left) or right
+    assert isinstance(formula, Equiv)
+    return left == right
+
+
+@pytest.mark.parametrize(
+    "formula_text",
+    [
+        "(x1 | (x2 & x3)) & ((!x1) -> (x2 | x4))",
+        "(x1 <-> x2) & ((x2 | x3) & ((!x3) | (x1 & x4)))",
+        "x1 & (((!x1) | (x2 <-> x3)) & ((!x2) | x4))",
+        "((x1 & x2) | (x1 & x3)) & ((!x2) | (!(x1 -> x4)))",
+        "!((x1 | x2) -> ((x1 & x3) | (!x4)))",
+    ],
+)
+def test_simplify_is_equivalent(formula_text):
+    formula = parser.parse(formula_text)
+    simplified = simplify(formula)
+    variables = [node for node in iter_subformulas(formula) if isinstance(node, Var)]
+    for values in product([False, True], repeat=len(variables)):
+        values = dict(zip(variables, values))
+        expected = evaluate(formula, values)
+        if isinstance(simplified, bool):
+            assert simplified is expected
+        else:
+            assert evaluate(simplified, values) == expected
+
+
+def test_simplifier_propagates_units_between_assertions():
+    simplifier = Simplifier()
+    assertions = ["x1", "(!x1) | x2", "x1 -> (x2 | x4)", "x1 & x3", "(!x3) | (!x2)"]
+    assert [simplifier.simplify(parser.parse(text)) for text in assertions] == [
+        Var("x1"),
+        Var("x2"),
+        True,
+        Var("x3"),
+        False,
+    ]
+
+
+def test_simplify_deep_formula():
+    depth = 3000
+    formula = Var("x0")
+    for i in range(1, depth):
+        formula = Or(Var(f"x{i}"), And(Var(f"y{i}"), formula))
+    last = depth - 1
+    assert simplify(And(Negate(Var(f"y{last}")), formula)) == And(
+        Negate(Var(f"y{last}")), Var(f"x{last}")
+    )
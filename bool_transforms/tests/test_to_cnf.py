@@ -1,6 +1,9 @@
+from itertools import product
+
 import pytest
 from parsing.parse import Parser
 from bool_transforms.to_cnf import to_nnf, to_cnf
+from parsing.logical_blocks import And, Negate, Or, Var, iter_subformulas
 
 parser = Parser()
 
@@ -10,6 +13,7 @@ formulas_texts = [
     "x1 <-> (x2 -> x3)",
     "(x1 & x2) | (x3 & x4)",
     "!((!(x1 & x2)) -> (!x3))",
+    "x1 | (!(x2 -> (x3 & !x4)))",
 ]
 
 formulas_nnf_texts = [
@@ -17,6 +21,7 @@ formulas_nnf_texts = [
     "((!x1) | ((!x2) | x3)) & ((x2 & (!x3)) | x1)",
     "(x1 & x2) | (x3 & x4)",
     "((!x1) | (!x2)) & x3",
+    "x1 | (x2 & ((!x3) | x4))",
 ]
 
 formulas_cnf_texts = [
@@ -24,6 +29,7 @@ formulas_cnf_texts = [
     "((!x1) | ((!x2) | x3))  &  ((x2 | x1) & ((!x3) | x1))",
     "(x1 | x3)  &  ((x1 | x4) & ((x2 | x3) & (x2 | x4)))",
     "((!x1) | (!x2)) & x3",
+    "(x1 | x2) & (x1 | (!x3) | x4)",
 ]
 
 
@@ -47,3 +53,100 @@ def test_to_cnf_correctness(formula_text, expected_cnf_text):
     formula = parser.parse(formula_text)
     expected_cnf = parser.parse(expected_cnf_text)
     assert to_cnf(formula) == expected_cnf
+
+
+@pytest.mark.parametrize(
+    "formula_text, expected_cnf_text",
+    [
+        ("x1 | (x2 | (x3 & x4))", "(x1 | x2 | x3) & (x1 | x2 | x4)"),
+        (
+            "x1 | (((x2 & x3) | x4) & x5)",
+            "(x1 | x2 | x4) & (x1 | x3 | x4) & (x1 | x5)",
+        ),
+        ("(x1 | x2) & (x1 | (x2 & x1))", "(x1 | x2) & (x1 | x2) & x1"),
+    ],
+    ids=repr,
+)
+def test_to_cnf_nested_distribution(formula_text, expected_cnf_text):
+    assert to_cnf(parser.parse(formula_text)) == parser.parse(expected_cnf_text)
+
+
+def test_to_cnf_deep_formula():
+    depth = 3000
+    formula = Var("x0")
+    for i in range(1, depth):
+        formula = And(Var(f"x{i}"), Negate(Negate(formula)))
+    cnf = to_cnf(formula)
+    assert cnf == And(*[Var(f"x{depth - i}") for i in range(1, depth + 1)])
+
+
+def test_to_cnf_bounded_distribution():
+    a = [Var(f"a{i}") for i in range(4)]
+    b = [Var(f"b{i}") for i in range(4)]
+    d0, d1 = Var("#D0"), Var("#D1")
+    formula = Or(*[And(a[i], b[i]) for i in range(4)])
+    # the distribution is exact unless bounded
+    assert to_cnf(formula) == to_cnf(formula, max_clauses=None)
+    assert len(to_cnf(formula).items) == 16
+
+    # the first items are replaced until the distribution gives 4 clauses
+    assert to_cnf(formula, max_clauses=4) == And(
+        Or(d0, d1, a[2], a[3]),
+        Or(d0, d1, a[2], b[3]),
+        Or(d0, d1, b[2], a[3]),
+        Or(d0, d1, b[2], b[3]),
+        Or(Negate(d0), a[0]),
+        Or(Negate(d0), b[0]),
+        Or(Negate(d1), a[1]),
+        Or(Negate(d1), b[1]),
+    )
+
+    with pytest.raises(ValueError):
+        to_cnf(formula, max_clauses=0)
+
+
+def is_satisfied(cnf, values):
+    def lit_value(lit):
+        return not values[lit.item] if isinstance(lit, Negate) else values[lit]
+
+    clauses = cnf.items if isinstance(cnf, And) else (cnf,)
+    return all(
+        any(map(lit_value, clause.items if isinstance(clause, Or) else (clause,)))
+        for clause in clauses
+    )
+
+
+@pytest.mark.parametrize(
+    "formula_text",
+    [
+        "((x1 & x2) | (x3 & !x4)) | ((x1 | (x2 & x5)) & ((!x3) | x4))",
+        "((x1 <-> x2) | (x3 <-> x4)) | ((x5 -> x1) & !(x2 | x3))",
+        "!(((x1 | x2) & (x3 | x4)) & ((x5 | !x1) & (x2 | !x3)))",
+    ],
+)
+def test_to_cnf_bounded_is_equisatisfiable(formula_text):
+    formula = parser.parse(formula_text)
+    variables = [Var(f"x{i}") for i in range(1, 6)]
+    cnf = to_cnf(formula, max_clauses=2)
+    dummies = sorted(
+        {lit for lit in iter_subformulas(cnf) if isinstance(lit, Var)} - set(variables),
+        key=str,
+    )
+    assert dummies
+
+    # a model of the formula extends to a model of the cnf, and every
+    # model of the cnf is a model of the formula
+    full_cnf = to_cnf(formula, max_clauses=None)
+    for values in product([False, True], repeat=len(variables)):
+        values = dict(zip(variables, values))
+        models = [
+            is_satisfied(cnf, {**values, **dict(zip(dummies, dummy_values))})
+            for dummy_values in product([False, True], repeat=len(dummies))
+        ]
+        assert any(models) == is_satisfied(full_cnf, values)
+
+
+def test_to_cnf_bounded_wide_formula():
+    pairs = [And(Var(f"a{i}"), Var(f"b{i}")) for i in range(40)]
+    cnf = to_cnf(Or(*pairs))
+    assert len(cnf.items) <= 2 * 40 + 256
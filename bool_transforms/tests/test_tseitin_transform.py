@@ -1,4 +1,8 @@
-from bool_transforms.tseitin_transform import tseitin_transform
+from bool_transforms.tseitin_transform import (
+    DummyVarsTracker,
+    tseitin_to_int_clauses,
+    tseitin_transform,
+)
 from parsing.logical_blocks import Var, Or, And, Negate, Equiv, Imply, Func, NEqual
 import pytest
 from parsing.parse import Parser
@@ -61,3 +65,152 @@ def test_tseitin_equivs(formula_text, expected_equivs_ands):
     formula = parser.parse(formula_text)
     expected_result = [to_cnf(equiv) for equiv in expected_equivs_ands]
     assert tseitin_transform(formula) == expected_result
+
+
+def test_tseitin_shared_subformula_encoded_once():
+    formula = parser.parse("((p & q) | r) & ((p & q) | !r)")
+    expected_equivs = [
+        g0,
+        Equiv(g0, And(g1, g2)),
+        Equiv(g1, Or(g3, r)),
+        Equiv(g3, And(p, q)),
+        Equiv(g2, Or(g3, Negate(r))),
+    ]
+    assert tseitin_transform(formula) == [to_cnf(equiv) for equiv in expected_equivs]
+
+
+def test_tseitin_deep_formula():
+    depth = 3000
+    formula = p
+    for i in range(1, depth):
+        formula = Or(Var(f"x{i}"), formula) if i % 2 else And(Var(f"x{i}"), formula)
+    # the root variable and a single equivalence for every operator
+    assert len(tseitin_transform(formula)) == depth
+
+
+def test_tseitin_nary_gates():
+    names = [f"x{i}" for i in range(10)]
+    formula = parser.parse(" | ".join(names[:5]) + " | (" + " & ".join(names[5:]) + ")")
+    items = [Var(name) for name in names]
+    expected_equivs = [
+        g0,
+        Equiv(g0, Or(*items[:5], g1)),
+        Equiv(g1, And(*items[5:])),
+    ]
+    assert tseitin_transform(formula) == [to_cnf(equiv) for equiv in expected_equivs]
+
+    # a single dummy var for a chain of binary operations as well
+    nested = Or(items[0], Or(items[1], Or(items[2], And(items[3], items[4]))))
+    assert len(tseitin_transform(nested)) == 3
+
+
+def test_tseitin_polarity_encoding():
+    formula = parser.parse("(p & q) | !(q | r)")
+    expected_gates = [
+        g0,
+        Imply(g0, Or(g1, g2)),
+        Imply(g1, And(p, q)),
+        Imply(g2, Negate(g3)),
+        Imply(Or(q, r), g3),
+    ]
+    assert tseitin_transform(formula, encoding="polarity") == [
+        to_cnf(gate) for gate in expected_gates
+    ]
+
+    # the items of an equivalence occur with both polarities
+    formula = parser.parse("(p & q) <-> !(q | r)")
+    expected_gates = [
+        g0,
+        Imply(g0, Equiv(g1, g2)),
+        Equiv(g1, And(p, q)),
+        Equiv(g2, Negate(g3)),
+        Equiv(g3, Or(q, r)),
+    ]
+    assert tseitin_transform(formula, encoding="polarity") == [
+        to_cnf(gate) for gate in expected_gates
+    ]
+
+
+def test_tseitin_polarity_encoding_incremental():
+    tracker, encoded = DummyVarsTracker(), dict()
+    first = tseitin_transform(
+        parser.parse("(p & q) | r"), tracker, encoded, encoding="polarity"
+    )
+    assert first == [
+        to_cnf(g) for g in [g0, Imply(g0, Or(g1, r)), Imply(g1, And(p, q))]
+    ]
+
+    # only the missing direction of an already encoded subformula is added
+    second = tseitin_transform(
+        parser.parse("!(p & q)"), tracker, encoded, encoding="polarity"
+    )
+    assert second == [
+        to_cnf(g) for g in [g2, Imply(g2, Negate(g1)), Imply(And(p, q), g1)]
+    ]
+    assert tseitin_transform(parser.parse("p & q"), tracker, encoded, "polarity") == [
+        g1
+    ]
+
+
+def test_tseitin_unknown_encoding():
+    with pytest.raises(ValueError, match="Unknown tseitin encoding"):
+        tseitin_transform(p, encoding="pg")
+
+
+def int_clauses_literals(f, encoding):
+    ints, literals = dict(), dict()
+
+    def literal_to_int(literal):
+        # the negations of the literals are the negations of the ints
+        if isinstance(literal, Negate):
+            return -literal_to_int(literal.item)
+        literals[ints.setdefault(literal, len(ints) + 1)] = literal
+        return ints[literal]
+
+    clauses = tseitin_to_int_clauses(f, literal_to_int, encoding=encoding)
+    return [
+        {literals[lit] if lit > 0 else Negate(literals[-lit]) for lit in clause}
+        for clause in clauses
+    ]
+
+
+def cnf_clauses_literals(cnfs):
+    clauses = []
+    for cnf in cnfs:
+        for clause in cnf.items if isinstance(cnf, And) else (cnf,):
+            clause = set(clause.items if isinstance(clause, Or) else (clause,))
+            if not any(Negate(lit) in clause for lit in clause):
+                clauses.append(clause)
+    return clauses
+
+
+@pytest.mark.parametrize("encoding", ["full", "polarity"])
+@pytest.mark.parametrize(
+    "formula_text",
+    [
+        "p",
+        "!p",
+        "(p & q) | !(q | r)",
+        "!((!(p & q)) -> !r)",
+        "(p <-> !q) -> ((q | r | p) & !(r <-> p))",
+        "!!(p -> (q & !!r))",
+    ],
+)
+def test_tseitin_to_int_clauses(formula_text, encoding):
+    formula = parser.parse(formula_text)
+    assert int_clauses_literals(formula, encoding) == cnf_clauses_literals(
+        tseitin_transform(formula, encoding=encoding)
+    )
+
+
+def test_tseitin_to_int_clauses_dedup():
+    formula = And(p, Or(q, Negate(q)), p)
+    # the repeated p is encoded once and the tautology q | !q is dropped
+    assert int_clauses_literals(formula, "full") == [
+        {g0},
+        {Negate(g0), p},
+        {Negate(g0), g1},
+        {Negate(p), Negate(g1), g0},
+        {Negate(q), g1},
+        {q, g1},
+    ]
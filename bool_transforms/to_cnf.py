@@ -5,61 +5,68 @@ Helper methods to convert a logical formula into a cnf form.
 This is done by using an nnf transformation which is also provided as public
 method.
 
+The transformations rewrite the formula with an explicit stack (see
+logical_blocks.rewrite), so they support formulas of any depth.
+
+The cnf is built bottom up as lists of clauses - the clauses of an And are the
+clauses of its items and the clauses of an Or are the unions of a clause from
+every item. The resulting clauses and conjunction are flat n-ary Or and And.
+
+Distributing an Or over its items multiplies their numbers of clauses, which
+is exponential in the worst case (e.g. a disjunction of conjunctions). The
+number of clauses of every Or is known before distributing it, and given a
+max_clauses, when it exceeds max_clauses the items with the most clauses are
+replaced by dummy vars (named #D<i>) until it doesn't. A dummy var d of an item is defined by the
+clauses (!d | c) for every clause c of the item - since the formula is in nnf,
+the item occurs only positively and d -> item is enough (the Plaisted-Greenbaum
+definition). The result is then equisatisfiable with the formula instead of
+equivalent, only if some Or was bounded. Without a max_clauses (the default)
+every Or is distributed and the result is equivalent to the formula.
+
 """
 
+from itertools import chain, product
+from typing import Dict, List, Optional, Tuple
+
 from parsing.logical_blocks import (
     Atom,
     Equiv,
     Imply,
-    BinaryOp,
-    UnaryOp,
     Negate,
+    And,
     Or,
     Equal,
     NEqual,
     Less,
     Geq,
+    flatten,
+    rewrite,
 )
+from bool_transforms.dummy_vars import DummyVarsTracker
+
+
+def _expand_complex_op(node: Atom) -> Atom:
+    if isinstance(node, Equiv) or isinstance(node, Imply):
+        return node.to_basic()
+    return node
 
 
 def _reduce_to_basic(node: Atom) -> Atom:
-    if not node.is_literal():
-        if isinstance(node, Equiv) or isinstance(node, Imply):
-            node = node.to_basic()
+    return rewrite(node, pre=_expand_complex_op)
 
-        if isinstance(node, BinaryOp):
-            node.left = _reduce_to_basic(node.left)
-            node.right = _reduce_to_basic(node.right)
 
-        elif isinstance(node, UnaryOp):
-            node.item = _reduce_to_basic(node.item)
+def _push_negation(node: Atom) -> Atom:
+    while isinstance(node, Negate) and not node.is_literal():
+        node = node.item.negate()
     return node
 
 
 def _organize_negations(node: Atom) -> Atom:
-    if not node.is_literal():
-        if isinstance(node, Negate):
-            node = node.item.negate()
-
-        if isinstance(node, BinaryOp):
-            node.left = _organize_negations(node.left)
-            node.right = _organize_negations(node.right)
-        elif isinstance(node, UnaryOp):
-            node = _organize_negations(node)
-    return node
-
+    return rewrite(node, pre=_push_negation)
 
-def _nnf_to_cnf(node: Atom) -> Atom:
-    if not node.is_literal():
-        if isinstance(node, Or):
-            node = node.cnf_distribute()
 
-        if isinstance(node, BinaryOp):
-            node.left = _nnf_to_cnf(node.left)
-            node.right = _nnf_to_cnf(node.right)
-        elif isinstance(node, UnaryOp):
-            node.item = _nnf_to_cnf(node.item)
-    elif isinstance(node, Negate):
+def _negated_literal_to_positive(node: Atom) -> Atom:
+    if isinstance(node, Negate):
         if isinstance(node.item, Equal):
             return NEqual(node.item.left, node.item.right)
         elif isinstance(node.item, NEqual):
@@ -71,9 +78,99 @@ def _nnf_to_cnf(node: Atom) -> Atom:
     return node
 
 
-def to_nnf(node: Atom) -> Atom:
-    return _organize_negations(_reduce_to_basic(node))
+def _bound_distribution(
+    items: Tuple[Atom, ...],
+    items_clauses: List[List[Tuple[Atom, ...]]],
+    max_clauses: int,
+    dummy_tracker: DummyVarsTracker,
+    definitions: Dict[Atom, List[Tuple[Atom, ...]]],
+) -> None:
+    """
+    Replace the clauses of the items of an Or with the most clauses by the
+    dummy vars of the items, until distributing the Or gives at most
+    max_clauses clauses. The clauses defining the new dummy vars are added to
+    definitions
+    """
+    sizes = [len(clauses) for clauses in items_clauses]
+    num_clauses = 1
+    for size in sizes:
+        num_clauses *= size
+    while num_clauses > max_clauses:
+        idx = max(range(len(sizes)), key=sizes.__getitem__)
+        item, dummy = items[idx], dummy_tracker.get_dummy(items[idx])
+        if item not in definitions:
+            neg_dummy = Negate(dummy)
+            definitions[item] = [(neg_dummy,) + c for c in items_clauses[idx]]
+        items_clauses[idx] = [(dummy,)]
+        num_clauses //= sizes[idx]
+        sizes[idx] = 1
+
+
+def _nnf_to_cnf(
+    node: Atom,
+    max_clauses: Optional[int] = None,
+    dummy_tracker: Optional[DummyVarsTracker] = None,
+) -> Atom:
+    clauses_of: Dict[Atom, List[Tuple[Atom, ...]]] = dict()
+    # the items replaced by dummy vars to the clauses defining them
+    definitions: Dict[Atom, List[Tuple[Atom, ...]]] = dict()
+    stack = [node]
+    while stack:
+        current = stack[-1]
+        if current in clauses_of:
+            stack.pop()
+        elif current.is_literal():
+            stack.pop()
+            clauses_of[current] = [(_negated_literal_to_positive(current),)]
+        else:
+            pending = [item for item in current.items if item not in clauses_of]
+            if pending:
+                stack.extend(reversed(pending))
+                continue
+            stack.pop()
+            items_clauses = [clauses_of[item] for item in current.items]
+            if isinstance(current, And):
+                clauses_of[current] = list(chain.from_iterable(items_clauses))
+            else:
+                if max_clauses is not None:
+                    _bound_distribution(
+                        current.items,
+                        items_clauses,
+                        max_clauses,
+                        dummy_tracker,
+                        definitions,
+                    )
+                # a dict as an ordered set drops the repeated literals
+                clauses_of[current] = [
+                    tuple(dict.fromkeys(chain.from_iterable(choice)))
+                    for choice in product(*items_clauses)
+                ]
+    clauses = chain(clauses_of[node], chain.from_iterable(definitions.values()))
+    return And.from_items(Or.from_items(clause) for clause in clauses)
 
 
-def to_cnf(node: Atom) -> Atom:
-    return _nnf_to_cnf((to_nnf(node)))
+def to_nnf(node: Atom) -> Atom:
+    return flatten(_organize_negations(_reduce_to_basic(node)))
+
+
+def to_cnf(
+    node: Atom,
+    max_clauses: Optional[int] = None,
+    dummy_tracker: Optional[DummyVarsTracker] = None,
+) -> Atom:
+    """
+    Convert a formula to cnf
+    :param node: The root of the formula
+    :param max_clauses: The max number of clauses of distributing a single Or,
+    above which its largest items are replaced by dummy vars, giving an
+    equisatisfiable cnf (see general notes). None to always distribute, giving
+    an equivalent cnf
+    :param dummy_tracker: The tracker of the dummy vars to use. Pass the same
+    tracker to convert several formulas which are part of a single conjunction
+    :return: The root of the cnf formula
+    """
+    if max_clauses is not None and max_clauses < 1:
+        raise ValueError(f"max_clauses must be positive, got {max_clauses}")
+    if dummy_tracker is None:
+        dummy_tracker = DummyVarsTracker(init_name="#D")
+    return _nnf_to_cnf(to_nnf(node), max_clauses, dummy_tracker)
@@ -6,7 +6,30 @@ arbitrary combinatorial logic circuit and transform it to cnf form where the
 length of the transformed formula is linear in the length of the original.
 
 This is done by adding dummy variables which are called #G<i> where i is the id
-of the dummy var.
+of the dummy var. Since the atoms are hash-consed, a subformula appearing more
+than once is a single object - it gets a single dummy var and its equivalence
+is encoded only once.
+
+The formula is flattened first, so an n-ary And / Or gets a single dummy var
+(and n + 1 clauses) instead of a chain of n - 1 binary gates.
+
+Encodings:
+* full - every dummy var is equivalent to its subformula (dummy <-> op).
+* polarity - the Plaisted-Greenbaum encoding. A subformula occurring only
+  positively (under an even number of negations) needs only dummy -> op, and
+  one occurring only negatively needs only op -> dummy. Both directions are
+  encoded only for a subformula occurring with both polarities (e.g. an item
+  of an <->). The result is equisatisfiable with the formula and a model of
+  it satisfies the formula, but a dummy var may differ from its subformula.
+
+tseitin_transform returns the equivalences as CNF formulas of logical blocks.
+tseitin_to_int_clauses emits the clauses of every gate directly as sets of
+ints, given the mapping of the literals to ints - no equivalences or CNF
+formulas are built. The clauses are the same as the abstraction of the
+tseitin_transform output, without tautologies and without repeated items in
+a gate. Given a definitions cache, the clauses of the gates are kept between
+calls, so a gate encoded again (e.g. in the next formula of a session sharing
+the same dummy vars and literals ints) is not recomputed.
 
 For more see
 https://en.wikipedia.org/wiki/Tseytin_transformation
@@ -15,68 +38,316 @@ https://en.wikipedia.org/wiki/Tseytin_transformation
 
 from __future__ import annotations
 
-from typing import List
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
-from parsing.logical_blocks import Var, Equiv, Imply, BinaryOp, Negate, Or, And, Atom
+from parsing.logical_blocks import (
+    Var,
+    Equiv,
+    Imply,
+    BinaryOp,
+    NaryOp,
+    Negate,
+    Or,
+    And,
+    Atom,
+    flatten,
+)
+from bool_transforms.dummy_vars import DummyVarsTracker
 from bool_transforms.to_cnf import to_cnf
 
+FULL_ENCODING = "full"
+POLARITY_ENCODING = "polarity"
+TSEITIN_ENCODINGS = (FULL_ENCODING, POLARITY_ENCODING)
+
+# the polarities of the occurrences of a subformula, as bit flags
+POSITIVE = 1
+NEGATIVE = 2
+BOTH = POSITIVE | NEGATIVE
+
 
-class DummyVarsTracker:
-    def __init__(self, init_name: str = "#G"):
-        self.next_dummy_id = 0
-        self.dummy_map = dict()
-        self.init_name = init_name
+def _flip(polarity: int) -> int:
+    return ((polarity & POSITIVE) << 1) | ((polarity & NEGATIVE) >> 1)
+
+
+def _items_polarities(f: Atom, polarity: int) -> Iterable[Tuple[Atom, int]]:
+    """
+    The items of f with the polarities of their occurrences in f, given the
+    polarity of f
+    """
+    if isinstance(f, NaryOp):
+        return ((item, polarity) for item in f.items)
+    if isinstance(f, Negate):
+        return ((f.item, _flip(polarity)),)
+    if isinstance(f, Imply):
+        return (f.left, _flip(polarity)), (f.right, polarity)
+    if isinstance(f, Equiv):
+        return (f.left, BOTH), (f.right, BOTH)
+    return ()
+
+
+def _get_polarities(f: Atom) -> Dict[Atom, int]:
+    """
+    Get the polarities of the occurrences of the subformulas of f (which
+    aren't literals), where f occurs positively
+    """
+    # a post-order of the subformulas - every subformula before the
+    # subformulas containing it
+    post_order = []
+    visited = set()
+    stack = [(f, False)]
+    while stack:
+        node, is_expanded = stack.pop()
+        if is_expanded:
+            post_order.append(node)
+        elif node not in visited:
+            visited.add(node)
+            stack.append((node, True))
+            stack.extend(
+                (item, False)
+                for item, _ in _items_polarities(node, BOTH)
+                if not item.is_literal()
+            )
 
-    def get_dummy(self, f: Atom) -> Var:
-        if f not in self.dummy_map.keys():
-            new_dummy = Var(self.init_name + str(self.next_dummy_id))
-            self.next_dummy_id += 1
-            self.dummy_map[f] = new_dummy
-        return self.dummy_map[f]
+    polarities = {f: POSITIVE}
+    for node in reversed(post_order):
+        for item, polarity in _items_polarities(node, polarities[node]):
+            if not item.is_literal():
+                polarities[item] = polarities.get(item, 0) | polarity
+    return polarities
 
 
-def _get_tseitin_equivs(f: Atom) -> List[Atom]:
+def _gate(dummy_var: Var, op: Atom, polarity: int) -> Atom:
+    # the directions of dummy_var <-> op required by the polarity
+    if polarity == BOTH:
+        return Equiv(dummy_var, op)
+    if polarity == POSITIVE:
+        return Imply(dummy_var, op)
+    return Imply(op, dummy_var)
+
+
+def _get_tseitin_equivs(
+    f: Atom,
+    dummy_tracker: DummyVarsTracker,
+    encoded: Dict[Atom, int],
+    encoding: str = FULL_ENCODING,
+) -> List[Atom]:
     equivs_conjunction = []
-    dummy_tracker = DummyVarsTracker()
     if f.is_literal():
         return [f]
-    else:
-        whole_var = dummy_tracker.get_dummy(f)
-        equivs_conjunction.append(whole_var)
-        _tseitin_helper(f, equivs_conjunction, dummy_tracker)
+
+    whole_var = dummy_tracker.get_dummy(f)
+    equivs_conjunction.append(whole_var)
+    polarities = _get_polarities(f) if encoding == POLARITY_ENCODING else None
+
+    # an explicit stack instead of recursion to support formulas of any depth
+    stack = [f]
+    while stack:
+        node = stack.pop()
+        polarity = BOTH if polarities is None else polarities[node]
+        # the directions which weren't encoded already
+        polarity &= ~encoded.get(node, 0)
+        if not polarity:
+            continue
+        encoded[node] = encoded.get(node, 0) | polarity
+        to_encode = _tseitin_helper(node, equivs_conjunction, dummy_tracker, polarity)
+        stack.extend(reversed(to_encode))
     return equivs_conjunction
 
 
 def _tseitin_helper(
-    f: Atom, equivs_conjunction: List[Atom], dummy_tracker: DummyVarsTracker
-) -> None:
-    if isinstance(f, BinaryOp):
-        is_left_lit, is_right_lit = [item.is_literal() for item in (f.left, f.right)]
-        left_rep = f.left if is_left_lit else dummy_tracker.get_dummy(f.left)
-        right_rep = f.right if is_right_lit else dummy_tracker.get_dummy(f.right)
+    f: Atom,
+    equivs_conjunction: List[Atom],
+    dummy_tracker: DummyVarsTracker,
+    polarity: int = BOTH,
+) -> List[Atom]:
+    """
+    Add the equivalence (or the directions of it required by the polarity) of
+    the dummy var of f to its operation over the representatives of its items
+    :return: The items of f which aren't literals, which should be encoded next
+    """
+    if isinstance(f, (BinaryOp, NaryOp)):
+        items = f.items if isinstance(f, NaryOp) else (f.left, f.right)
+        reps = [
+            item if item.is_literal() else dummy_tracker.get_dummy(item)
+            for item in items
+        ]
 
         if isinstance(f, (And, Or, Equiv, Imply)):
             equivs_conjunction.append(
-                Equiv(dummy_tracker.get_dummy(f), type(f)(left_rep, right_rep))
+                _gate(dummy_tracker.get_dummy(f), type(f)(*reps), polarity)
             )
         else:
             raise ValueError("Unrecognized type of f: {0}".format(type(f)))
 
-        if not is_left_lit:
-            _tseitin_helper(f.left, equivs_conjunction, dummy_tracker)
-        if not is_right_lit:
-            _tseitin_helper(f.right, equivs_conjunction, dummy_tracker)
+        return [item for item in items if not item.is_literal()]
 
     elif isinstance(f, Negate):
         if not f.item.is_literal():
             dummy_var = dummy_tracker.get_dummy(f.item)
             equivs_conjunction.append(
-                Equiv(dummy_tracker.get_dummy(f), Negate(dummy_var))
+                _gate(dummy_tracker.get_dummy(f), Negate(dummy_var), polarity)
             )
-            _tseitin_helper(f.item, equivs_conjunction, dummy_tracker)
+            return [f.item]
+        else:
+            equivs_conjunction.append(
+                _gate(dummy_tracker.get_dummy(f), Negate(f.item), polarity)
+            )
+    return []
+
+
+def _validate_encoding(encoding: str) -> None:
+    if encoding not in TSEITIN_ENCODINGS:
+        raise ValueError(
+            f"Unknown tseitin encoding {encoding}, expected one of {TSEITIN_ENCODINGS}"
+        )
+
+
+def _gate_clauses(
+    f: Atom, dummy: int, reps: List[int], polarity: int
+) -> List[Set[int]]:
+    """
+    The clauses of the directions (required by the polarity) of the
+    equivalence of the dummy var of f to its operation over the
+    representatives of its items, in the order of to_cnf of the equivalence
+    """
+    clauses = []
+    if isinstance(f, NaryOp):
+        reps = list(dict.fromkeys(reps))
+        if isinstance(f, And):
+            if polarity & POSITIVE:
+                clauses.extend({-dummy, rep} for rep in reps)
+            if polarity & NEGATIVE:
+                clauses.append({dummy, *[-rep for rep in reps]})
+        else:
+            if polarity & POSITIVE:
+                clauses.append({-dummy, *reps})
+            if polarity & NEGATIVE:
+                clauses.extend({-rep, dummy} for rep in reps)
+
+    elif isinstance(f, Imply):
+        left, right = reps
+        if polarity & POSITIVE:
+            clauses.append({-dummy, -left, right})
+        if polarity & NEGATIVE:
+            clauses.extend(({left, dummy}, {-right, dummy}))
+
+    elif isinstance(f, Equiv):
+        left, right = reps
+        if polarity & POSITIVE:
+            clauses.extend(({-dummy, -left, right}, {-dummy, -right, left}))
+        if polarity & NEGATIVE:
+            clauses.extend(({left, right, dummy}, {-right, -left, dummy}))
+
+    elif isinstance(f, Negate):
+        (item,) = reps
+        if polarity & POSITIVE:
+            clauses.append({-dummy, -item})
+        if polarity & NEGATIVE:
+            clauses.append({item, dummy})
+
+    else:
+        raise ValueError("Unrecognized type of f: {0}".format(type(f)))
+
+    # drop the tautologies
+    return [clause for clause in clauses if not any(-lit in clause for lit in clause)]
+
+
+def tseitin_to_int_clauses(
+    f: Atom,
+    literal_to_int: Callable[[Atom], int],
+    dummy_tracker: Optional[DummyVarsTracker] = None,
+    encoded: Optional[Dict[Atom, int]] = None,
+    encoding: str = FULL_ENCODING,
+    definitions: Optional[Dict[Tuple[Atom, int], List[Set[int]]]] = None,
+) -> List[Set[int]]:
+    """
+    Transform a formula directly into clauses of ints whose conjunction is
+    equisatisfiable with it
+    :param f: The root of the formula to transform
+    :param literal_to_int: Maps a literal (a literal of the formula or a dummy
+    var) to its int, where the negation of the literal is mapped to -int
+    :param dummy_tracker: The tracker of the dummy vars to use
+    (see tseitin_transform)
+    :param encoded: The subformulas which were already encoded
+    (see tseitin_transform)
+    :param encoding: The encoding, one of TSEITIN_ENCODINGS (full, polarity)
+    :param definitions: An optional cache of the clauses of the gates,
+    keyed by the subformula and the polarity of the encoded directions. It's
+    valid as long as the same dummy_tracker and literal_to_int are used
+    :return: A list of clauses, each clause a set of ints
+    """
+    _validate_encoding(encoding)
+    if dummy_tracker is None:
+        dummy_tracker = DummyVarsTracker()
+    if encoded is None:
+        encoded = dict()
+
+    f = flatten(f)
+    if f.is_literal():
+        return [{literal_to_int(f)}]
+
+    clauses = [{literal_to_int(dummy_tracker.get_dummy(f))}]
+    polarities = _get_polarities(f) if encoding == POLARITY_ENCODING else None
+    stack = [f]
+    while stack:
+        node = stack.pop()
+        polarity = BOTH if polarities is None else polarities[node]
+        polarity &= ~encoded.get(node, 0)
+        if not polarity:
+            continue
+        encoded[node] = encoded.get(node, 0) | polarity
+
+        if isinstance(node, NaryOp):
+            items = node.items
+        elif isinstance(node, Negate):
+            items = (node.item,)
+        else:
+            items = (node.left, node.right)
+        gate = None if definitions is None else definitions.get((node, polarity))
+        if gate is None:
+            reps = [
+                literal_to_int(
+                    item if item.is_literal() else dummy_tracker.get_dummy(item)
+                )
+                for item in items
+            ]
+            dummy = literal_to_int(dummy_tracker.get_dummy(node))
+            gate = _gate_clauses(node, dummy, reps, polarity)
+            if definitions is not None:
+                definitions[(node, polarity)] = gate
+        if definitions is None:
+            clauses.extend(gate)
         else:
-            equivs_conjunction.append(Equiv(dummy_tracker.get_dummy(f), Negate(f.item)))
+            # the cached clauses are copied, the returned ones may be modified
+            clauses.extend(set(clause) for clause in gate)
+        stack.extend(item for item in reversed(items) if not item.is_literal())
+    return clauses
 
 
-def tseitin_transform(f: Atom) -> List[Atom]:
-    return [to_cnf(x) for x in _get_tseitin_equivs(f)]
+def tseitin_transform(
+    f: Atom,
+    dummy_tracker: Optional[DummyVarsTracker] = None,
+    encoded: Optional[Dict[Atom, int]] = None,
+    encoding: str = FULL_ENCODING,
+) -> List[Atom]:
+    """
+    Transform a formula into a list of CNF formulas whose conjunction is
+    equisatisfiable with it
+    :param f: The root of the formula to transform
+    :param dummy_tracker: The tracker of the dummy vars to use. Pass the same
+    tracker (and encoded map) to transform several formulas which are part of
+    a single conjunction - their shared subformulas are encoded only once
+    :param encoded: The subformulas which were already encoded, mapped to the
+    polarities (bit flags) of the encoded directions of their equivalences
+    :param encoding: The encoding, one of TSEITIN_ENCODINGS (full, polarity).
+    See general notes
+    :return: A list of roots of CNF formulas
+    """
+    _validate_encoding(encoding)
+    if dummy_tracker is None:
+        dummy_tracker = DummyVarsTracker()
+    if encoded is None:
+        encoded = dict()
+    equivs = _get_tseitin_equivs(flatten(f), dummy_tracker, encoded, encoding)
+    # the cnf of a gate is linear in its number of items
+    return [to_cnf(x) for x in equivs]
@@ -0,0 +1,454 @@
+"""
+General Notes
+-------------
+Parsing and abstraction of batches of formula strings in a process pool.
+
+The frontend (Parser.parse followed by to_abstract_cnf_conjunction) of every
+formula is independent of the others, so a batch is split into chunks which
+are processed by worker processes. Sending the results back as pickled Atom
+trees costs a pickle frame per node and a recursive (deep formulas) unpickling,
+so the workers send them in a flat form instead:
+* The atoms are encoded in a TermTable - a table of nodes in a topological
+  order (the operands of a node come before it). Every node has a kind (its
+  type), its operands (the indices of its child nodes, the names indices of
+  Var / Func or the values of the ints and the coefficients arrays) in a flat
+  array indexed by an indptr array, and the names are kept once in a list.
+* The clauses of an abstraction are kept as a flat array of literals and an
+  indptr array of the clauses boundaries (a CSR layout).
+A worker sends a single TermTable and a single set of concatenated arrays for
+its whole chunk of formulas (every int array has the narrowest int type
+holding its values), which the calling process splits to views of the formulas. The
+atoms are decoded on demand and rebuilt through their constructors, so they
+are interned in the calling process as usual.
+
+Example
+---------
+    abstractions = abstract_many(formulas, max_workers=8)
+    clauses, abstraction_map, dummy_map = abstractions[0].to_abstraction()
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from math import ceil
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from bool_transforms.process_cnf import to_abstract_cnf_conjunction
+from parsing.logical_blocks import (
+    And,
+    Atom,
+    Equal,
+    Equiv,
+    Func,
+    Geq,
+    Imply,
+    Less,
+    NaryOp,
+    NEqual,
+    Negate,
+    Or,
+    Var,
+)
+from parsing.parse import Parser
+
+# the types of the nodes, a node kind is its type index
+_NODE_TYPES = (Var, Func, Negate, Equal, NEqual, Geq, Less, And, Or, Imply, Equiv)
+_INT_KIND = len(_NODE_TYPES)
+_ARRAY_KIND = _INT_KIND + 1
+_KINDS = {node_type: kind for kind, node_type in enumerate(_NODE_TYPES)}
+
+
+class TermTable:
+    """
+    A flat encoding of a set of atoms which can be transferred between
+    processes without pickling the atoms
+    """
+
+    __slots__ = ("kinds", "operands", "indptr", "names", "_nodes")
+
+    def __init__(
+        self,
+        kinds: np.ndarray,
+        operands: np.ndarray,
+        indptr: np.ndarray,
+        names: List[str],
+    ) -> None:
+        self.kinds = kinds
+        self.operands = operands
+        self.indptr = indptr
+        self.names = names
+        self._nodes = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getstate__(self):
+        return self.kinds, self.operands, self.indptr, self.names
+
+    def __setstate__(self, state) -> None:
+        self.kinds, self.operands, self.indptr, self.names = state
+        self._nodes = None
+
+    def nodes(self) -> List:
+        """
+        Decode the table (once)
+        :return: The list of the decoded nodes by their index
+        """
+        if self._nodes is not None:
+            return self._nodes
+
+        nodes = []
+        names = self.names
+        operands = self.operands.tolist()
+        indptr = self.indptr.tolist()
+        for idx, kind in enumerate(self.kinds.tolist()):
+            ops = operands[indptr[idx] : indptr[idx + 1]]
+            if kind == _INT_KIND:
+                nodes.append(ops[0])
+            elif kind == _ARRAY_KIND:
+                nodes.append(np.array(ops, dtype=np.int64))
+            elif kind == _KINDS[Var]:
+                nodes.append(Var(names[ops[0]], names[ops[1]] if ops[1] >= 0 else None))
+            elif kind == _KINDS[Func]:
+                nodes.append(Func(names[ops[0]], [nodes[i] for i in ops[1:]]))
+            else:
+                nodes.append(_NODE_TYPES[kind](*[nodes[i] for i in ops]))
+        self._nodes = nodes
+        return nodes
+
+
+class TermTableBuilder:
+    """
+    Encodes atoms into a TermTable. An atom shared by several encoded atoms is
+    encoded once.
+    """
+
+    def __init__(self) -> None:
+        self._kinds = []
+        self._operands = []
+        self._indptr = [0]
+        self._names = dict()
+        # the encoded atoms (and the keys of the ints and arrays) to their index
+        self._index = dict()
+
+    @staticmethod
+    def _key(node):
+        if isinstance(node, np.ndarray):
+            return _ARRAY_KIND, node.tobytes()
+        if isinstance(node, (int, np.integer)):
+            return _INT_KIND, int(node)
+        return node
+
+    @staticmethod
+    def _children(node) -> Sequence:
+        if isinstance(node, Func):
+            return node.args
+        if isinstance(node, Negate):
+            return (node.item,)
+        if isinstance(node, NaryOp):
+            return node.items
+        if isinstance(node, (Var, np.ndarray, int, np.integer)):
+            return ()
+        return node.left, node.right
+
+    def _name_idx(self, name: str) -> int:
+        return self._names.setdefault(name, len(self._names))
+
+    def _emit(self, node) -> None:
+        index = self._index
+        if isinstance(node, np.ndarray):
+            if node.dtype.kind not in "iu":
+                raise ValueError(f"Only integer arrays are supported, got {node.dtype}")
+            kind, ops = _ARRAY_KIND, node.tolist()
+        elif isinstance(node, (int, np.integer)):
+            kind, ops = _INT_KIND, [int(node)]
+        elif isinstance(node, Var):
+            bool_val = -1 if node.bool_val is None else self._name_idx(node.bool_val)
+            kind, ops = _KINDS[Var], [self._name_idx(node.name), bool_val]
+        else:
+            kind = _KINDS.get(type(node))
+            if kind is None:
+                raise ValueError(f"Can't encode a node of type {type(node)}")
+            ops = [index[self._key(child)] for child in self._children(node)]
+            if isinstance(node, Func):
+                ops.insert(0, self._name_idx(node.name))
+
+        index[self._key(node)] = len(self._kinds)
+        self._kinds.append(kind)
+        self._operands.extend(ops)
+        self._indptr.append(len(self._operands))
+
+    def add(self, root) -> int:
+        """
+        Encode an atom and its subformulas
+        :param root: The atom to encode
+        :return: The index of the atom in the table
+        """
+        index = self._index
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            if self._key(node) in index:
+                stack.pop()
+                continue
+            missing = [c for c in self._children(node) if self._key(c) not in index]
+            if missing:
+                stack.extend(missing)
+            else:
+                stack.pop()
+                self._emit(node)
+        return index[self._key(root)]
+
+    def build(self) -> TermTable:
+        return TermTable(
+            np.array(self._kinds, dtype=np.int8),
+            _compact_array(self._operands),
+            _compact_array(self._indptr),
+            list(self._names),
+        )
+
+
+class AbstractCNF:
+    """
+    The abstraction of a formula in a flat form - the clauses as a CSR
+    layout of int literals, and the abstraction and dummy maps as nodes of a
+    TermTable (shared by the abstractions of a chunk of formulas)
+    """
+
+    __slots__ = ("literals", "indptr", "terms", "map_nodes", "dummy_nodes")
+
+    def __init__(
+        self,
+        literals: np.ndarray,
+        indptr: np.ndarray,
+        terms: TermTable,
+        map_nodes: np.ndarray,
+        dummy_nodes: np.ndarray,
+    ) -> None:
+        """
+        :param literals: The literals of all the clauses
+        :param indptr: Clause i literals are literals[indptr[i]:indptr[i+1]]
+        :param terms: The table of the atoms of the maps
+        :param map_nodes: Row i-1 holds the nodes of the literals abstracted
+        by i and -i
+        :param dummy_nodes: The rows are the nodes of the dummy vars and the
+        atoms they replaced
+        """
+        self.literals = literals
+        self.indptr = indptr
+        self.terms = terms
+        self.map_nodes = map_nodes
+        self.dummy_nodes = dummy_nodes
+
+    @property
+    def num_clauses(self) -> int:
+        return len(self.indptr) - 1
+
+    def clauses(self) -> List[Set[int]]:
+        literals = self.literals.tolist()
+        bounds = self.indptr.tolist()
+        return [set(literals[start:end]) for start, end in zip(bounds, bounds[1:])]
+
+    def abstraction_map(self) -> Dict[int, Atom]:
+        nodes = self.terms.nodes()
+        abstraction_map = dict()
+        for lit, (node, neg_node) in enumerate(self.map_nodes.tolist(), 1):
+            abstraction_map[lit] = nodes[node]
+            abstraction_map[-lit] = nodes[neg_node]
+        return abstraction_map
+
+    def dummy_map(self) -> Dict[Var, Atom]:
+        nodes = self.terms.nodes()
+        return {nodes[var]: nodes[atom] for var, atom in self.dummy_nodes.tolist()}
+
+    def to_abstraction(
+        self,
+    ) -> Tuple[List[Set[int]], Dict[int, Atom], Dict[Var, Atom]]:
+        """
+        :return: The same tuple as to_abstract_cnf_conjunction - the clauses,
+        the abstraction map and the dummy map
+        """
+        return self.clauses(), self.abstraction_map(), self.dummy_map()
+
+
+def _compact_array(values: List[int]) -> np.ndarray:
+    # an array of the narrowest int type holding the values
+    array = np.array(values, dtype=np.int64)
+    if not len(array):
+        return array.astype(np.int8)
+    low, high = array.min(), array.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return array.astype(dtype)
+    return array
+
+
+def _parse_chunk(
+    strict: bool, start: int, formulas: List[str]
+) -> Tuple[TermTable, np.ndarray]:
+    parser = Parser(strict=strict)
+    builder = TermTableBuilder()
+    roots = []
+    for idx, formula in enumerate(formulas, start):
+        try:
+            root = parser.parse(formula)
+        except ValueError as error:
+            raise ValueError(f"Formula {idx}: {error}") from error
+        roots.append(-1 if root is None else builder.add(root))
+    return builder.build(), _compact_array(roots)
+
+
+def _abstract_chunk(strict: bool, start: int, formulas: List[str]) -> Tuple:
+    """
+    Parse and abstract a chunk of formulas
+    :return: The TermTable of the chunk atoms and the concatenated arrays of
+    the abstractions - the literals, the clauses bounds, the map nodes and the
+    dummy nodes, each followed by the bounds of every formula in it
+    """
+    parser = Parser(strict=strict)
+    builder = TermTableBuilder()
+    literals, clause_bounds, formula_clauses = [], [0], [0]
+    map_nodes, formula_maps = [], [0]
+    dummy_nodes, formula_dummies = [], [0]
+    for idx, formula in enumerate(formulas, start):
+        try:
+            root = parser.parse(formula)
+            if root is None:
+                raise ValueError("Empty formula")
+        except ValueError as error:
+            raise ValueError(f"Formula {idx}: {error}") from error
+
+        clauses, abstraction_map, dummy_map = to_abstract_cnf_conjunction(root)
+        for clause in clauses:
+            literals.extend(clause)
+            clause_bounds.append(len(literals))
+        formula_clauses.append(len(clause_bounds) - 1)
+        for lit in range(1, len(abstraction_map) // 2 + 1):
+            map_nodes.append(builder.add(abstraction_map[lit]))
+            map_nodes.append(builder.add(abstraction_map[-lit]))
+        formula_maps.append(len(map_nodes) // 2)
+        for var, atom in dummy_map.items():
+            dummy_nodes.append(builder.add(var))
+            dummy_nodes.append(builder.add(atom))
+        formula_dummies.append(len(dummy_nodes) // 2)
+
+    return (
+        builder.build(),
+        _compact_array(literals),
+        _compact_array(clause_bounds),
+        formula_clauses,
+        _compact_array(map_nodes).reshape((-1, 2)),
+        formula_maps,
+        _compact_array(dummy_nodes).reshape((-1, 2)),
+        formula_dummies,
+    )
+
+
+def _split_abstract_chunk(chunk: Tuple) -> List[AbstractCNF]:
+    (
+        terms,
+        literals,
+        clause_bounds,
+        formula_clauses,
+        map_nodes,
+        formula_maps,
+        dummy_nodes,
+        formula_dummies,
+    ) = chunk
+    abstractions = []
+    for idx in range(len(formula_clauses) - 1):
+        first_clause, end_clause = formula_clauses[idx], formula_clauses[idx + 1]
+        indptr = clause_bounds[first_clause : end_clause + 1]
+        first_lit = int(indptr[0])
+        abstractions.append(
+            AbstractCNF(
+                literals[first_lit : int(indptr[-1])],
+                indptr - first_lit,
+                terms,
+                map_nodes[formula_maps[idx] : formula_maps[idx + 1]],
+                dummy_nodes[formula_dummies[idx] : formula_dummies[idx + 1]],
+            )
+        )
+    return abstractions
+
+
+def _map_chunks(
+    worker: Callable,
+    formulas: Sequence[str],
+    strict: bool,
+    max_workers: Optional[int],
+    chunksize: Optional[int],
+) -> List:
+    formulas = list(formulas)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be positive, got {max_workers}")
+    if chunksize is None:
+        chunksize = max(1, ceil(len(formulas) / (4 * max_workers)))
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be positive, got {chunksize}")
+
+    starts = range(0, len(formulas), chunksize)
+    chunks = [formulas[start : start + chunksize] for start in starts]
+    if max_workers == 1 or len(chunks) <= 1:
+        return [worker(strict, start, chunk) for start, chunk in zip(starts, chunks)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(worker, repeat(strict), starts, chunks))
+
+
+def parse_many(
+    formulas: Sequence[str],
+    strict: bool = True,
+    max_workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> List[Optional[Atom]]:
+    """
+    Parse a batch of formula strings in a process pool
+    :param formulas: The formula strings
+    :param strict: The strict argument of the Parser
+    :param max_workers: The number of worker processes, os.cpu_count() if not
+    given. 1 to parse in the calling process
+    :param chunksize: The number of formulas sent to a worker at once. By
+    default the batch is split to 4 chunks per worker
+    :return: The parsed formulas (None for an empty formula), in the order
+    of formulas
+    """
+    parsed = []
+    for table, roots in _map_chunks(
+        _parse_chunk, formulas, strict, max_workers, chunksize
+    ):
+        nodes = table.nodes()
+        parsed.extend(None if root < 0 else nodes[root] for root in roots.tolist())
+    return parsed
+
+
+def abstract_many(
+    formulas: Sequence[str],
+    strict: bool = True,
+    max_workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> List[AbstractCNF]:
+    """
+    Parse and abstract (see to_abstract_cnf_conjunction) a batch of formula
+    strings in a process pool
+    :param formulas: The formula strings
+    :param strict: The strict argument of the Parser
+    :param max_workers: The number of worker processes, os.cpu_count() if not
+    given. 1 to work in the calling process
+    :param chunksize: The number of formulas sent to a worker at once. By
+    default the batch is split to 4 chunks per worker
+    :return: The abstractions of the formulas, in the order of formulas
+    """
+    return [
+        abstraction
+        for chunk in _map_chunks(
+            _abstract_chunk, formulas, strict, max_workers, chunksize
+        )
+        for abstraction in _split_abstract_chunk(chunk)
+    ]
@@ -0,0 +1,363 @@
+"""
+General Notes
+-------------
+A two level cache of the frontend of the solver (parsing, theory preprocess
+and abstraction) of formula strings.
+
+The entries are keyed by a content hash of the formula text together with
+everything else the frontend output depends on (the theory type, the tseitin
+encoding, etc., see formula_key). An entry holds the clauses of the abstracted
+CNF, the abstraction and dummy maps, the original equalities of the formula
+and the theory state after the preprocess (see
+PropositionalTheory.get_checkpoint_state), in the flat layout of
+parsing.batch - the atoms are nodes of a TermTable and the clauses are a CSR
+layout of int literals.
+
+The first level is an in-process LRU bounded by the total size of the
+entries arrays. The optional second level is a directory of entry files
+shared between processes. An entry file is a small JSON header followed by
+the raw arrays (8 bytes aligned), which are loaded as views of a read only
+mmap of the file, so loading an entry doesn't copy it. The files are written
+to a temporary file which is renamed, so a reader never sees a partial file.
+The theory state is kept as a pickled blob (as in the solver checkpoints), so
+only use a cache directory written by trusted processes.
+
+Example
+---------
+    cache = FrontendCache(max_bytes=2**28, directory="/tmp/dpllt_cache")
+    solver = DPLLT(UFTheory(), frontend_cache=cache)
+    solver.solve_text("(a = b) & (f(a) != f(b))")
+    solver.solve_text("(a = b) & (f(a) != f(b))")  # skips the frontend
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from parsing.batch import TermTable, TermTableBuilder, _compact_array
+from parsing.logical_blocks import Atom, Equal, Var
+
+DEFAULT_MAX_BYTES = 64 * 2**20
+ENTRY_FILE_SUFFIX = ".frontend"
+
+_MAGIC = b"DPLLTFE1"
+_HEADER_LENGTH = struct.Struct("<Q")
+_ALIGNMENT = 8
+_ARRAY_NAMES = (
+    "kinds",
+    "operands",
+    "terms_indptr",
+    "literals",
+    "indptr",
+    "map_rows",
+    "dummy_nodes",
+    "equalities",
+    "theory_state",
+)
+
+
+def formula_key(formula_text: str, *context: str) -> str:
+    """
+    A content hash of a formula text
+    :param formula_text: The formula text
+    :param context: Anything else the cached output depends on (e.g. the
+    theory type name and the solver options)
+    :return: The hex digest of the hash
+    """
+    digest = hashlib.sha256()
+    for part in context:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(formula_text.encode())
+    return digest.hexdigest()
+
+
+class CachedFrontend:
+    """
+    The output of the frontend of a single formula in a flat form
+    """
+
+    __slots__ = (
+        "terms",
+        "literals",
+        "indptr",
+        "map_rows",
+        "dummy_nodes",
+        "equalities",
+        "theory_state",
+    )
+
+    def __init__(
+        self,
+        terms: TermTable,
+        literals: np.ndarray,
+        indptr: np.ndarray,
+        map_rows: np.ndarray,
+        dummy_nodes: np.ndarray,
+        equalities: np.ndarray,
+        theory_state: np.ndarray,
+    ) -> None:
+        """
+        :param terms: The table of the atoms of the maps and the equalities
+        :param literals: The literals of all the clauses
+        :param indptr: Clause i literals are literals[indptr[i]:indptr[i+1]]
+        :param map_rows: The rows are the positive ints of the abstraction
+        map and the nodes of the literals abstracted by them and their
+        negations
+        :param dummy_nodes: The rows are the nodes of the dummy vars and the
+        atoms they replaced
+        :param equalities: The nodes of the original equalities
+        :param theory_state: The pickled theory state, as uint8
+        """
+        self.terms = terms
+        self.literals = literals
+        self.indptr = indptr
+        self.map_rows = map_rows
+        self.dummy_nodes = dummy_nodes
+        self.equalities = equalities
+        self.theory_state = theory_state
+
+    @classmethod
+    def from_frontend(
+        cls,
+        clauses: List[Set[int]],
+        abstraction_map: Dict[int, Atom],
+        dummy_map: Dict[Var, Atom],
+        original_equalities: Set[Equal],
+        theory_state: Dict,
+    ) -> CachedFrontend:
+        builder = TermTableBuilder()
+        literals, bounds = [], [0]
+        for clause in clauses:
+            literals.extend(clause)
+            bounds.append(len(literals))
+        map_rows = []
+        for lit_int, lit in abstraction_map.items():
+            if lit_int > 0:
+                map_rows.extend(
+                    (
+                        lit_int,
+                        builder.add(lit),
+                        builder.add(abstraction_map[-lit_int]),
+                    )
+                )
+        dummy_nodes = []
+        for var, atom in dummy_map.items():
+            dummy_nodes.extend((builder.add(var), builder.add(atom)))
+        equalities = [builder.add(eq) for eq in original_equalities]
+        state = pickle.dumps(theory_state, protocol=pickle.HIGHEST_PROTOCOL)
+        return cls(
+            builder.build(),
+            _compact_array(literals),
+            _compact_array(bounds),
+            _compact_array(map_rows).reshape((-1, 3)),
+            _compact_array(dummy_nodes).reshape((-1, 2)),
+            _compact_array(equalities),
+            np.frombuffer(state, dtype=np.uint8),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The size of the entry arrays
+        """
+        return sum(array.nbytes for array in self._arrays().values()) + sum(
+            len(name) for name in self.terms.names
+        )
+
+    def to_frontend(
+        self,
+    ) -> Tuple[List[Set[int]], Dict[int, Atom], Dict[Var, Atom], Set[Equal], Dict]:
+        """
+        Decode the entry. The clauses are new sets on every call
+        :return: A tuple of the clauses, the abstraction map, the dummy map,
+        the original equalities and the theory state
+        """
+        nodes = self.terms.nodes()
+        literals = self.literals.tolist()
+        bounds = self.indptr.tolist()
+        clauses = [set(literals[start:end]) for start, end in zip(bounds, bounds[1:])]
+        abstraction_map = dict()
+        for lit_int, node, neg_node in self.map_rows.tolist():
+            abstraction_map[lit_int] = nodes[node]
+            abstraction_map[-lit_int] = nodes[neg_node]
+        dummy_map = {nodes[var]: nodes[atom] for var, atom in self.dummy_nodes.tolist()}
+        equalities = {nodes[eq] for eq in self.equalities.tolist()}
+        theory_state = pickle.loads(self.theory_state.tobytes())
+        return clauses, abstraction_map, dummy_map, equalities, theory_state
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "kinds": self.terms.kinds,
+            "operands": self.terms.operands,
+            "terms_indptr": self.terms.indptr,
+            "literals": self.literals,
+            "indptr": self.indptr,
+            "map_rows": self.map_rows,
+            "dummy_nodes": self.dummy_nodes,
+            "equalities": self.equalities,
+            "theory_state": self.theory_state,
+        }
+
+    def save(self, path: str) -> None:
+        """
+        Write the entry to a file. The file is replaced atomically
+        :param path: The path of the entry file
+        """
+        arrays = self._arrays()
+        layout = dict()
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = [array.dtype.str, offset, array.size]
+            offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+        header = json.dumps({"names": self.terms.names, "arrays": layout}).encode()
+        header += b" " * (-(len(_MAGIC) + _HEADER_LENGTH.size + len(header)) % 8)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for array in arrays.values():
+                data = np.ascontiguousarray(array).tobytes()
+                f.write(data)
+                f.write(b"\0" * (-len(data) % _ALIGNMENT))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> CachedFrontend:
+        """
+        Load an entry file written by save. The arrays are views of a read
+        only mmap of the file
+        :param path: The path of the entry file
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        prefix_size = len(_MAGIC) + _HEADER_LENGTH.size
+        if buffer[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"Not a frontend cache entry file: {path}")
+        (header_size,) = _HEADER_LENGTH.unpack_from(buffer, len(_MAGIC))
+        header = json.loads(bytes(buffer[prefix_size : prefix_size + header_size]))
+
+        data_start = prefix_size + header_size
+        arrays = dict()
+        for name in _ARRAY_NAMES:
+            dtype, offset, size = header["arrays"][name]
+            arrays[name] = np.frombuffer(
+                buffer, dtype=np.dtype(dtype), count=size, offset=data_start + offset
+            )
+        return cls(
+            TermTable(
+                arrays["kinds"],
+                arrays["operands"],
+                arrays["terms_indptr"],
+                header["names"],
+            ),
+            arrays["literals"],
+            arrays["indptr"],
+            arrays["map_rows"].reshape((-1, 3)),
+            arrays["dummy_nodes"].reshape((-1, 2)),
+            arrays["equalities"],
+            arrays["theory_state"],
+        )
+
+
+class FrontendCache:
+    """
+    An in-process LRU of CachedFrontend entries bounded by their total size,
+    optionally backed by a directory of entry files
+    """
+
+    def __init__(
+        self, max_bytes: int = DEFAULT_MAX_BYTES, directory: Optional[str] = None
+    ) -> None:
+        """
+        :param max_bytes: The maximal total size of the entries kept in memory.
+        An entry larger than it is kept only in the directory
+        :param directory: A directory to keep the entries in as files, shared
+        by the processes using it. None to keep the entries only in memory
+        """
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be non negative, got {max_bytes}")
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries or (
+            self.directory is not None and os.path.exists(self._path(key))
+        )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_FILE_SUFFIX)
+
+    def _remember(self, key: str, entry: CachedFrontend) -> None:
+        size = entry.nbytes
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (entry, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.nbytes -= evicted_size
+
+    def get(self, key: str) -> Optional[CachedFrontend]:
+        """
+        :param key: The key of the entry (see formula_key)
+        :return: The entry, or None if it's not in the cache
+        """
+        item = self._entries.get(key)
+        if item is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+        if self.directory is not None:
+            try:
+                entry = CachedFrontend.load(self._path(key))
+            except FileNotFoundError:
+                pass
+            else:
+                self._remember(key, entry)
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, entry: CachedFrontend) -> None:
+        """
+        Add an entry to the cache (and to its directory)
+        :param key: The key of the entry (see formula_key)
+        :param entry: The entry
+        """
+        if key in self._entries:
+            _, size = self._entries.pop(key)
+            self.nbytes -= size
+        self._remember(key, entry)
+        if self.directory is not None:
+            entry.save(self._path(key))
+
+    def clear(self) -> None:
+        """
+        Drop the entries kept in memory (the files of the directory are kept)
+        """
+        self._entries.clear()
+        self.nbytes = 0
@@ -3,19 +3,121 @@ General Notes
 -------------
 A set of objects to represent the atoms and to be used by the solvers.
 
+The atoms are immutable - their fields are set once in the constructor and
+setting an attribute afterwards raises an AttributeError. Transformations
+build new atoms instead of modifying existing ones (see rebuild), so atoms can
+be shared between formulas and used as dictionary keys safely.
+
+The atoms are hash-consed - constructing an atom equal to an existing one
+returns the existing object (see TermFactory), so every distinct atom exists
+once, shared subformulas are a single object and the formula is a DAG.
+Equality of atoms is identity and the hash of an atom is its atom_id, a
+sequential integer id given on creation, so dictionaries keyed by atoms never
+compare or hash subtrees. The factory holds the atoms weakly, so atoms no
+longer referenced are freed. Num arrays (the left side of TQ literals) are
+compared by their values and stored as read-only views.
+
+And and Or are n-ary - a conjunction or a clause of any number of items is a
+single node over a tuple of items, so wide formulas are flat instead of deep.
+The constructors don't flatten their items, an And item of an And is kept
+as is (see flatten to merge such nested operations).
+
+The traversals of formulas (iter_subformulas, rewrite, flatten) use an explicit
+stack instead of recursion, so the depth of a formula (e.g. a long chain of ->)
+is limited only by memory and not by the recursion limit. They visit a shared
+subformula once.
+
 """
 
 from __future__ import annotations
-from abc import ABC, abstractmethod
-from typing import Union, Iterable
+import itertools
+import weakref
+from abc import ABC, ABCMeta, abstractmethod
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
 import numpy as np
 
 
-class Atom(ABC):
+def _freeze(item):
+    if isinstance(item, np.ndarray):
+        item = item.view()
+        item.flags.writeable = False
+    return item
+
+
+def _hashable(item):
+    if isinstance(item, np.ndarray):
+        return tuple(item.tolist())
+    return item
+
+
+class TermFactory:
+    """
+    Hash-consing factory of the atoms - an atom is created only if there is
+    no equal atom alive, otherwise the existing atom is returned.
+    The atom classes create their instances through TERM_FACTORY.
+    """
+
+    def __init__(self) -> None:
+        self._atoms = weakref.WeakValueDictionary()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._atoms)
+
+    def make(self, cls: type, args: Tuple, kwargs: Dict) -> Atom:
+        """
+        Get the atom of the given class and constructor arguments
+        :param cls: The atom class
+        :param args: The constructor positional arguments
+        :param kwargs: The constructor keyword arguments
+        :return: The existing equal atom if there is one, else a new atom
+        """
+        key = (cls,) + cls._intern_key(*args, **kwargs)
+        atom = self._atoms.get(key)
+        if atom is None:
+            atom = type.__call__(cls, *args, **kwargs)
+            object.__setattr__(atom, "atom_id", self._next_id)
+            self._next_id += 1
+            self._atoms[key] = atom
+        return atom
+
+
+TERM_FACTORY = TermFactory()
+
+
+class _HashConsMeta(ABCMeta):
+    def __call__(cls, *args, **kwargs):
+        return TERM_FACTORY.make(cls, args, kwargs)
+
+    # the atoms classes don't register virtual subclasses, so skip the
+    # ABCMeta registry lookups of the (very frequent) isinstance checks
+    __instancecheck__ = type.__instancecheck__
+    __subclasscheck__ = type.__subclasscheck__
+
+
+class Atom(ABC, metaclass=_HashConsMeta):
     """
     Abstract basic unit of logical formula
     """
 
+    __slots__ = ("atom_id", "__weakref__")
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _init_fields(self, **fields) -> None:
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __copy__(self) -> Atom:
+        return self
+
+    def __deepcopy__(self, memo) -> Atom:
+        return self
+
     @abstractmethod
     def is_literal(self) -> bool:
         pass
@@ -27,13 +129,11 @@ class Atom(ABC):
     def __repr__(self) -> str:
         return self.__str__()
 
-    @abstractmethod
     def __eq__(self, other) -> bool:
-        pass
+        return self is other
 
-    @abstractmethod
     def __hash__(self) -> int:
-        pass
+        return self.atom_id
 
     def negate(self) -> Atom:
         """
@@ -48,10 +148,28 @@ class DualSideLiteral(Atom, ABC):
     Abstract object of literals built of two elements - left and right
     """
 
+    __slots__ = ("left", "right", "symbol")
+
     def __init__(self, left, right, symbol: str):
-        self.left = left
-        self.right = right
-        self.symbol = symbol
+        self._init_fields(left=_freeze(left), right=_freeze(right), symbol=symbol)
+
+    @staticmethod
+    def _intern_key(left, right) -> Tuple:
+        return _hashable(left), _hashable(right)
+
+    def rebuild(self, left, right) -> DualSideLiteral:
+        """
+        Get a literal of the same type with the given sides
+        :return: self if the sides are unchanged, else a new literal
+        """
+        if left is self.left and right is self.right:
+            return self
+        return type(self)(left, right)
+
+    def __reduce__(self):
+        # rebuild through the constructor to intern the atom in the loading
+        # process
+        return type(self), (self.left, self.right)
 
     def __str__(self) -> str:
         if isinstance(self.left, np.ndarray):
@@ -72,22 +190,6 @@ class DualSideLiteral(Atom, ABC):
 
         return f"{left_side} {self.symbol} {right_side}"
 
-    def __hash__(self) -> int:
-        return hash((str(self.left), self.right, self.symbol))
-
-    def __eq__(self, other) -> bool:
-        if isinstance(other, type(self)):
-            is_same_left = self.left == other.left
-            if isinstance(is_same_left, np.ndarray):
-                is_same_left = all(is_same_left)
-
-            is_same_right = self.right == other.right
-            if isinstance(is_same_right, np.ndarray):
-                is_same_right = all(is_same_right)
-
-            return all((is_same_left, is_same_right, self.symbol == other.symbol))
-        return False
-
     def is_literal(self) -> bool:
         return True
 
@@ -101,15 +203,17 @@ class Var(Atom):
     Variable literal
     """
 
+    __slots__ = ("name", "bool_val")
+
     def __init__(self, name: str, bool_val: Union[str, None] = None):
-        self.name = name
-        self.bool_val = bool_val
+        self._init_fields(name=name, bool_val=bool_val)
 
-    def assign(self, bool_val):
-        self.bool_val = bool_val
+    @staticmethod
+    def _intern_key(name: str, bool_val: Union[str, None] = None) -> Tuple:
+        return name, bool_val
 
-    def unassign(self):
-        self.bool_val = None
+    def __reduce__(self):
+        return Var, (self.name, self.bool_val)
 
     def is_literal(self) -> bool:
         return True
@@ -120,45 +224,38 @@ class Var(Atom):
     def negate(self) -> Atom:
         return Negate(self)
 
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Var):
-            return (self.name == other.name) and (self.bool_val == other.bool_val)
-        return False
-
-    def __hash__(self) -> int:
-        return hash((self.name, self.bool_val))
-
 
 class Func(Atom):
     """
     Function literal
     """
 
+    __slots__ = ("name", "args")
+
     def __init__(
         self, name: str, args: Union[Func, Var, Iterable[Union[Func, Var, Negate]]]
     ):
-        self.name = name
+        self._init_fields(name=name, args=Func._args_tuple(args))
 
+    @staticmethod
+    def _args_tuple(args) -> Tuple:
         if isinstance(args, Iterable):
-            self.args = args
-        else:
-            self.args = [args]
+            return tuple(args)
+        return (args,)
+
+    @staticmethod
+    def _intern_key(
+        name: str, args: Union[Func, Var, Iterable[Union[Func, Var, Negate]]]
+    ) -> Tuple:
+        return name, Func._args_tuple(args)
+
+    def __reduce__(self):
+        return Func, (self.name, self.args)
 
     def __str__(self) -> str:
         args_str = ", ".join([str(arg) for arg in self.args])
         return f"{self.name}({args_str})"
 
-    def __eq__(self, other) -> bool:
-        if isinstance(other, Func) and self.name == other.name:
-            is_equal_n_args = len(self.args) == len(other.args)
-            return is_equal_n_args and (
-                all(self.args[i] == other.args[i] for i in range(len(self.args)))
-            )
-        return False
-
-    def __hash__(self) -> int:
-        return hash(tuple([self.name] + list(self.args)))
-
     def is_literal(self) -> bool:
         return True
 
@@ -171,6 +268,8 @@ class Equal(DualSideLiteral):
     Equality literal
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super(Equal, self).__init__(left, right, symbol="=")
 
@@ -183,6 +282,8 @@ class NEqual(DualSideLiteral):
     Inequality (!=) literal
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super(NEqual, self).__init__(left, right, symbol="!=")
 
@@ -195,6 +296,8 @@ class Geq(DualSideLiteral):
     Greater or Equal (>=) literal
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super(Geq, self).__init__(left, right, symbol=">=")
 
@@ -207,6 +310,8 @@ class Less(DualSideLiteral):
     Less literal
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super(Less, self).__init__(left, right, symbol="<")
 
@@ -219,7 +324,7 @@ class LogicalOp(Atom, ABC):
     Abstract object representing logical operations
     """
 
-    pass
+    __slots__ = ()
 
 
 class ComplexLogicalOp(LogicalOp, ABC):
@@ -228,6 +333,8 @@ class ComplexLogicalOp(LogicalOp, ABC):
     (basic operations are: Or, And, Negate).
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def to_basic(self) -> Atom:
         """
@@ -242,17 +349,26 @@ class ComplexLogicalOp(LogicalOp, ABC):
 
 
 class UnaryOp(LogicalOp, ABC):
+    __slots__ = ("item", "symbol")
+
     def __init__(self, item: Atom, symbol: str):
-        self.item = item
-        self.symbol = symbol
+        self._init_fields(item=item, symbol=symbol)
 
-    def __eq__(self, other) -> bool:
-        if isinstance(other, self.__class__):
-            return self.item == other.item
-        return False
+    @staticmethod
+    def _intern_key(item: Atom) -> Tuple:
+        return (item,)
 
-    def __hash__(self) -> int:
-        return hash((self.item,))
+    def rebuild(self, item: Atom) -> UnaryOp:
+        """
+        Get an operation of the same type over the given item
+        :return: self if the item is unchanged, else a new operation
+        """
+        if item is self.item:
+            return self
+        return type(self)(item)
+
+    def __reduce__(self):
+        return type(self), (self.item,)
 
     def __str__(self) -> str:
         if isinstance(self.item, TYPES_REQUIRE_SEPARATION_RIGHT):
@@ -268,6 +384,8 @@ class Negate(UnaryOp):
     Negation operator
     """
 
+    __slots__ = ()
+
     def __init__(self, item: Atom):
         super().__init__(item, symbol="!")
 
@@ -279,21 +397,29 @@ class Negate(UnaryOp):
 
 
 class BinaryOp(LogicalOp, ABC):
+    __slots__ = ("left", "right", "symbol")
+
     def __init__(self, left_item: Atom, right_item: Atom, symbol: str):
-        self.left = left_item
-        self.right = right_item
-        self.symbol = symbol
+        self._init_fields(left=left_item, right=right_item, symbol=symbol)
 
-    def is_literal(self) -> bool:
-        return False
+    @staticmethod
+    def _intern_key(left_item: Atom, right_item: Atom) -> Tuple:
+        return left_item, right_item
 
-    def __eq__(self, other) -> bool:
-        if isinstance(other, self.__class__):
-            return (self.left == other.left) and (self.right == other.right)
-        return False
+    def rebuild(self, left_item: Atom, right_item: Atom) -> BinaryOp:
+        """
+        Get an operation of the same type over the given items
+        :return: self if the items are unchanged, else a new operation
+        """
+        if left_item is self.left and right_item is self.right:
+            return self
+        return type(self)(left_item, right_item)
 
-    def __hash__(self) -> int:
-        return hash((self.left, self.right))
+    def __reduce__(self):
+        return type(self), (self.left, self.right)
+
+    def is_literal(self) -> bool:
+        return False
 
     def __str__(self) -> str:
         if isinstance(self.left, TYPES_REQUIRE_SEPARATION_LEFT):
@@ -309,65 +435,125 @@ class BinaryOp(LogicalOp, ABC):
         return f"{left_side} {self.symbol} {right_side}"
 
 
-class And(BinaryOp):
+class NaryOp(LogicalOp, ABC):
+    """
+    Abstract associative operation over 2 or more items
+    """
+
+    __slots__ = ("items", "symbol")
+
+    def __init__(self, items: Tuple[Atom, ...], symbol: str):
+        if len(items) < 2:
+            raise ValueError(
+                f"{type(self).__name__} requires at least 2 items, got {len(items)}"
+            )
+        self._init_fields(items=items, symbol=symbol)
+
+    @staticmethod
+    def _intern_key(*items: Atom) -> Tuple:
+        return items
+
+    @classmethod
+    def from_items(cls, items: Iterable[Atom]) -> Atom:
+        """
+        Get the operation over the given items, or the item itself if there
+        is a single item
+        """
+        items = tuple(items)
+        if len(items) == 1:
+            return items[0]
+        return cls(*items)
+
+    def rebuild(self, *items: Atom) -> NaryOp:
+        """
+        Get an operation of the same type over the given items
+        :return: self if the items are unchanged, else a new operation
+        """
+        if len(items) == len(self.items) and all(
+            item is own_item for item, own_item in zip(items, self.items)
+        ):
+            return self
+        return type(self)(*items)
+
+    def __reduce__(self):
+        return type(self), self.items
+
+    def is_literal(self) -> bool:
+        return False
+
+    def __str__(self) -> str:
+        # every item but the last is a left argument of the symbol after it
+        items_reps = [
+            (
+                f"({item})"
+                if isinstance(item, TYPES_REQUIRE_SEPARATION_LEFT)
+                else str(item)
+            )
+            for item in self.items[:-1]
+        ]
+        last_item = self.items[-1]
+        if isinstance(last_item, TYPES_REQUIRE_SEPARATION_RIGHT):
+            items_reps.append(f"({last_item})")
+        else:
+            items_reps.append(str(last_item))
+        return f" {self.symbol} ".join(items_reps)
+
+
+class And(NaryOp):
     """
     And operator
     """
 
-    def __init__(self, left_item: Atom, right_item: Atom):
-        super(And, self).__init__(left_item, right_item, symbol="&")
+    __slots__ = ()
+
+    def __init__(self, *items: Atom):
+        super(And, self).__init__(items, symbol="&")
 
     def negate(self) -> Atom:
-        return Or(Negate(self.left), Negate(self.right))
+        return Or(*[Negate(item) for item in self.items])
 
 
-class Or(BinaryOp):
+class Or(NaryOp):
     """
     Or operator
     """
 
-    def __init__(self, left_item: Atom, right_item: Atom):
-        super(Or, self).__init__(left_item, right_item, symbol="|")
+    __slots__ = ()
+
+    def __init__(self, *items: Atom):
+        super(Or, self).__init__(items, symbol="|")
 
     def negate(self) -> Atom:
-        return And(Negate(self.left), Negate(self.right))
+        return And(*[Negate(item) for item in self.items])
 
     def cnf_distribute(self) -> Atom:
         """
-        Distribute Or operation inwards over Ands:
-        replace p | (q & r) with the equivalent (p | q) & (p | r).
+        Distribute Or operation inwards over its And items:
+        replace p | (q & r) with the equivalent (p | q) & (p | r), and in
+        general with a conjunction of a clause for every choice of an item
+        from every And item.
         Very useful for CNF transformation
 
         :return: The distributed version of the formula
         """
-        if (isinstance(self.left, And)) and (isinstance(self.right, And)):
-            return And(
-                Or(self.left.left, self.right.left),
-                And(
-                    Or(self.left.left, self.right.right),
-                    And(
-                        Or(self.left.right, self.right.left),
-                        Or(self.left.right, self.right.right),
-                    ),
-                ),
-            )
-        elif isinstance(self.left, And):
-            inner_left, inner_right = self.left.left, self.left.right
-            return And(Or(inner_left, self.right), Or(inner_right, self.right))
-
-        elif isinstance(self.right, And):
-            inner_left, inner_right = self.right.left, self.right.right
-            return And(Or(self.left, inner_left), Or(self.left, inner_right))
-
-        else:
+        if not any(isinstance(item, And) for item in self.items):
             return self
 
+        choices = [
+            item.items if isinstance(item, And) else (item,) for item in self.items
+        ]
+        return And.from_items(
+            Or.from_items(clause) for clause in itertools.product(*choices)
+        )
+
 
 class Imply(BinaryOp, ComplexLogicalOp):
     """
     Imply operator (left -> right)
     """
 
+    __slots__ = ()
+
     def __init__(self, left_item: Atom, right_item: Atom):
         BinaryOp.__init__(self, left_item, right_item, symbol="->")
 
@@ -385,6 +571,8 @@ class Equiv(BinaryOp):
     Equivalence operator
     """
 
+    __slots__ = ()
+
     def __init__(self, left_item, right_item):
         super(Equiv, self).__init__(left_item, right_item, symbol="<->")
 
@@ -400,5 +588,123 @@ class Equiv(BinaryOp):
         return self.to_basic().negate()
 
 
-TYPES_REQUIRE_SEPARATION_LEFT = (BinaryOp, DualSideLiteral, UnaryOp)
-TYPES_REQUIRE_SEPARATION_RIGHT = (BinaryOp, DualSideLiteral)
+TYPES_REQUIRE_SEPARATION_LEFT = (BinaryOp, NaryOp, DualSideLiteral, UnaryOp)
+TYPES_REQUIRE_SEPARATION_RIGHT = (BinaryOp, NaryOp, DualSideLiteral)
+
+
+def iter_subformulas(root: Atom, stop_at_literals: bool = False) -> Iterator[Atom]:
+    """
+    Iterate over the distinct subformulas of a formula in pre-order (left to
+    right), descending into the items of the logical operations
+    :param root: The root of the formula
+    :param stop_at_literals: Whether to not descend into literals (negations
+    of literals)
+    :return: An iterator of the subformulas, starting with root
+    """
+    visited = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node in visited:
+            continue
+        visited.add(node)
+        yield node
+
+        if stop_at_literals and node.is_literal():
+            continue
+        if isinstance(node, BinaryOp):
+            stack.append(node.right)
+            stack.append(node.left)
+        elif isinstance(node, NaryOp):
+            stack.extend(reversed(node.items))
+        elif isinstance(node, UnaryOp):
+            stack.append(node.item)
+
+
+def rewrite(
+    root: Atom,
+    pre: Optional[Callable[[Atom], Atom]] = None,
+    leaf: Optional[Callable[[Atom], Atom]] = None,
+) -> Atom:
+    """
+    Rewrite a formula bottom-up. Every non literal node is first replaced by
+    pre(node), then the items of the replacement are rewritten and it is
+    rebuilt over the rewritten items. Literals are replaced by leaf(literal).
+    A shared subformula is rewritten once.
+    :param root: The root of the formula to rewrite
+    :param pre: The replacement of a non literal node before its items are
+    rewritten. None to keep the nodes
+    :param leaf: The replacement of a literal. None to keep the literals
+    :return: The root of the rewritten formula
+    """
+    rewritten = dict()
+    # pairs of a node and its replacement, None until the node is expanded
+    stack = [(root, None)]
+    while stack:
+        node, new_node = stack[-1]
+        if new_node is not None:
+            stack.pop()
+            if isinstance(new_node, BinaryOp):
+                rewritten[node] = new_node.rebuild(
+                    rewritten[new_node.left], rewritten[new_node.right]
+                )
+            elif isinstance(new_node, NaryOp):
+                rewritten[node] = new_node.rebuild(
+                    *[rewritten[item] for item in new_node.items]
+                )
+            else:
+                rewritten[node] = new_node.rebuild(rewritten[new_node.item])
+            continue
+
+        if node in rewritten:
+            stack.pop()
+        elif node.is_literal():
+            rewritten[node] = node if leaf is None else leaf(node)
+            stack.pop()
+        else:
+            new_node = node if pre is None else pre(node)
+            if isinstance(new_node, BinaryOp):
+                stack[-1] = (node, new_node)
+                stack.append((new_node.right, None))
+                stack.append((new_node.left, None))
+            elif isinstance(new_node, NaryOp):
+                stack[-1] = (node, new_node)
+                stack.extend((item, None) for item in reversed(new_node.items))
+            elif isinstance(new_node, UnaryOp) and not new_node.is_literal():
+                stack[-1] = (node, new_node)
+                stack.append((new_node.item, None))
+            else:
+                rewritten[node] = new_node
+                stack.pop()
+    return rewritten[root]
+
+
+def _flat_items(node: NaryOp) -> Iterator[Atom]:
+    # the items of node, replacing items of the same type by their items
+    stack = [iter(node.items)]
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+        elif type(item) is type(node):
+            stack.append(iter(item.items))
+        else:
+            yield item
+
+
+def _flatten_node(node: Atom) -> Atom:
+    if isinstance(node, NaryOp) and any(
+        type(item) is type(node) for item in node.items
+    ):
+        return type(node)(*_flat_items(node))
+    return node
+
+
+def flatten(root: Atom) -> Atom:
+    """
+    Merge the nested n-ary operations of the same type - (a & b) & (c & d)
+    becomes a & b & c & d, so a long chain of & or | is a single node
+    :param root: The root of the formula to flatten
+    :return: The root of the flattened formula
+    """
+    return rewrite(root, pre=_flatten_node)
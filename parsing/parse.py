@@ -21,16 +21,44 @@ The supported atoms:
 
 The string representation also usually use parenthesis () to make the formula
 unambiguous so the interpretation of the parser will be the only possible one.
+By default the parser is strict - every parenthesis (and every function
+argument) may contain a single kind of binary operation, which may be chained
+only if it's associative (& or |), and a negation can't be the left argument
+of a binary operation, so "a & b & c" is accepted while "a & b | c",
+"a -> b -> c" and "!a & b" are rejected as ambiguous. A non-strict parser
+resolves such formulas by the operators precedence, from the tightest to the
+loosest binding:
+    !, (=, !=, <, >=), &, |, (->, <-), <->
+The implications are right associative and the rest of the binary operations
+are left associative, so "a -> b -> c" is "a -> (b -> c)".
+
+And and Or are n-ary, and the parsed formula is flattened (see
+logical_blocks.flatten), so "a & b & c" and "(a & b) & c" are both the single
+conjunction And(a, b, c).
+
+The tokenizer is a single regular expression scanned once over the text, and
+the tree is built in a single pass over the tokens by an operator-precedence
+(shunting-yard) parser which keeps the operands, the pending operations and the
+open parentheses on explicit stacks. Parsing is therefore linear in the length
+of the text and the nesting depth of the formula is limited only by memory and
+not by the recursion limit. Errors are reported as ValueErrors with the
+position of the offending token in the text.
+
+A formula can also be read as a stream of assertions, one assertion per line,
+whose conjunction is the formula (see Parser.parse_assertions). The lines are
+parsed lazily, so the conjunction (or the text of all of them) is never built.
+Empty lines and lines starting with # are skipped.
 
 """
 
+import os
+import re
 from dataclasses import dataclass
 from enum import Enum
-from collections import defaultdict, deque
-from typing import Tuple, Optional
+from typing import Iterable, Iterator, List, Optional, Union
 
 from parsing.logical_blocks import *
-
+from profiling.phase_timer import PhaseTimer, get_timer
 
 BLOCKS_MAP = {
     "<->": Equiv,
@@ -45,6 +73,24 @@ BLOCKS_MAP = {
     "!=": NEqual,
 }
 
+# the binary operations which a strict parser allows to chain
+ASSOCIATIVE_OPS = {"&", "|"}
+
+# binding power of the binary operations in a non-strict parser (the negation
+# binds tighter than all of them)
+BINARY_PRECEDENCE = {
+    "<->": 1,
+    "->": 2,
+    "<-": 2,
+    "|": 3,
+    "&": 4,
+    "=": 5,
+    "!=": 5,
+    "<": 5,
+    ">=": 5,
+}
+RIGHT_ASSOCIATIVE_OPS = frozenset(("->", "<-"))
+
 
 class TokenType(Enum):
     BINARY_OP = 1
@@ -58,28 +104,39 @@ class TokenType(Enum):
     NUM_ARRAY = 9
 
 
-# Globals for valid types in Unary and Binary operations
-VALID_LEFT_INPUT_TYPES = [
-    TokenType.VAR,
-    TokenType.FUNCTION,
-    TokenType.R_PARENTHESES,
-    TokenType.NUM_ARRAY,
-    TokenType.NUM,
-]
-VALID_RIGHT_INPUT_TYPES = [
-    TokenType.VAR,
-    TokenType.FUNCTION,
-    TokenType.L_PARENTHESES,
-    TokenType.UNARY_OP,
-    TokenType.NUM_ARRAY,
-    TokenType.NUM,
-]
+_NAME = r"[^\W\d_][^\W_]*"
+_INT = r"-?\d+"
+
+# the alternatives are tried in order and the first matching one wins
+_TOKENS_REGEX = re.compile(
+    "|".join(
+        f"(?P<{group}>{pattern})"
+        for group, pattern in [
+            ("SPACE", r"\s+"),
+            ("NUM_ARRAY", rf"\[\s*{_INT}(?:\s*,\s*{_INT})*\s*\]"),
+            ("INVALID_ARRAY", r"\[[^\]]*\]?"),
+            # a function token includes its opening parenthesis
+            ("FUNCTION", rf"{_NAME}\s*\("),
+            ("VAR", _NAME),
+            # a number can't be followed by a letter (for ex. 5a)
+            ("NUM", rf"{_INT}(?![^\W_])"),
+            # <- followed by a number is less than a negative number
+            ("BINARY_OP", r"<->|<-(?!\s*\d)|->|!=|>=|[&|=<]"),
+            ("UNARY_OP", r"!"),
+            ("L_PARENTHESES", r"\("),
+            ("R_PARENTHESES", r"\)"),
+            ("ARG_DELIMITER", r","),
+            ("MISMATCH", r"."),
+        ]
+    )
+)
 
 
 @dataclass
 class Token:
     text: str
     token_type: TokenType
+    pos: int = 0
 
 
 class Tokenizer:
@@ -97,140 +154,9 @@ class Tokenizer:
 
     def __init__(self) -> None:
         self.tokens = []
-        self.text, self.len_text = "", 0
-        self.cur_i = 0
 
     def reset(self) -> None:
         self.tokens = []
-        self.text = ""
-        self.len_text = 0
-        self.cur_i = 0
-
-    def _process_var_or_function(self) -> None:
-        atom_name = self.text[self.cur_i]
-        if (self.cur_i + 1) >= self.len_text:
-            self.tokens.append(Token(atom_name, TokenType.VAR))
-
-        while (self.cur_i + 1) < self.len_text:
-            if self.text[self.cur_i + 1].isalnum():
-                atom_name += self.text[self.cur_i + 1]
-                self.cur_i += 1
-
-                if (self.cur_i + 1) >= self.len_text:
-                    self.tokens.append(Token(atom_name, TokenType.VAR))
-
-            elif self.text[self.cur_i + 1] == "(":
-                self.tokens.append(Token(atom_name, TokenType.FUNCTION))
-                break
-
-            else:
-                self.tokens.append(Token(atom_name, TokenType.VAR))
-                break
-
-    def _process_num(self) -> None:
-        num_str = self.text[self.cur_i]
-        if (self.cur_i + 1) >= self.len_text:
-            self.tokens.append(Token(num_str, TokenType.NUM))
-
-        else:
-            while (self.cur_i + 1) < self.len_text:
-                if self.text[self.cur_i + 1].isdecimal():
-                    num_str += self.text[self.cur_i + 1]
-                    self.cur_i += 1
-
-                elif self.text[self.cur_i + 1].isalpha():
-                    error_msg = (
-                        f"Invalid num followed by a letter:"
-                        f" {num_str + self.text[self.cur_i]} "
-                    )
-                    raise ValueError(error_msg)
-
-                else:
-                    break
-            self.tokens.append(Token(num_str, TokenType.NUM))
-
-    def _process_negations_or_neqs(self) -> None:
-        if ((self.cur_i + 1) < self.len_text) and (self.text[self.cur_i + 1] == "="):
-            self.cur_i += 1
-            self.tokens.append(Token("!=", TokenType.BINARY_OP))
-        else:
-            self.tokens.append(Token("!", TokenType.UNARY_OP))
-
-    def _process_right_imply_negatives(self) -> None:
-        if ((self.cur_i + 1) < self.len_text) and (self.text[self.cur_i + 1] == ">"):
-            self.cur_i += 1
-            self.tokens.append(Token("->", TokenType.BINARY_OP))
-
-        elif ((self.cur_i + 1) < self.len_text) and (
-            self.text[self.cur_i + 1].isdecimal()
-        ):
-            num_str = self.text[self.cur_i] + self.text[self.cur_i + 1]
-            self.cur_i += 1
-
-            if (self.cur_i + 1) >= self.len_text:
-                self.tokens.append(Token(num_str, TokenType.NUM))
-
-            while (self.cur_i + 1) < self.len_text:
-                if self.text[self.cur_i + 1].isdecimal():
-                    num_str += self.text[self.cur_i + 1]
-                    self.cur_i += 1
-
-                elif self.text[self.cur_i + 1].isalpha():
-                    error_msg = (
-                        f"Invalid num followed by a letter:"
-                        f" {num_str + self.text[self.cur_i]} "
-                    )
-                    raise ValueError(error_msg)
-
-                else:
-                    self.tokens.append(Token(num_str, TokenType.NUM))
-                    break
-        else:
-            error_msg = (
-                f"Illegal combination of chars: "
-                f"{self.text[self.cur_i:self.cur_i + 2]}"
-            )
-            raise ValueError(error_msg)
-
-    def _process_less_equiv_left_imply(self) -> None:
-        if ((self.cur_i + 1) < self.len_text) and (self.text[self.cur_i + 1] == "-"):
-            self.cur_i += 1
-
-            if ((self.cur_i + 1) < self.len_text) and (
-                self.text[self.cur_i + 1].isdecimal()
-            ):
-                self.tokens.append(Token("<", TokenType.BINARY_OP))
-
-            elif ((self.cur_i + 1) < self.len_text) and (
-                self.text[self.cur_i + 1] == ">"
-            ):
-                self.cur_i += 1
-                self.tokens.append(Token("<->", TokenType.BINARY_OP))
-
-            else:
-                self.tokens.append(Token("<-", TokenType.BINARY_OP))
-
-        else:
-            self.tokens.append(Token("<", TokenType.BINARY_OP))
-
-    def _process_geqs(self) -> None:
-        if ((self.cur_i + 1) < self.len_text) and (self.text[self.cur_i + 1] == "="):
-            self.cur_i += 1
-            self.tokens.append(Token(">=", TokenType.BINARY_OP))
-
-        else:
-            error_msg = (
-                f"Illegal combination of chars: "
-                f"{self.text[self.cur_i:self.cur_i + 2]}"
-            )
-
-            raise ValueError(error_msg)
-
-    def _process_num_array(self) -> None:
-        end_id = self.text.find("]", self.cur_i)
-        token_content = self.text[self.cur_i : end_id + 1]
-        self.tokens.append(Token(token_content, TokenType.NUM_ARRAY))
-        self.cur_i += len(token_content) - 1
 
     def tokenize(self, raw_text: str) -> None:
         """
@@ -238,49 +164,51 @@ class Tokenizer:
         :param raw_text: string to be tokenized
         """
         self.reset()
-        self.text = raw_text.replace(" ", "")
-        self.len_text = len(self.text)
-
-        while self.cur_i < self.len_text:
-            cur_char = self.text[self.cur_i]
-
-            if cur_char.isalpha():
-                self._process_var_or_function()
-
-            elif cur_char.isdecimal():
-                self._process_num()
-
-            elif cur_char == "(":
-                self.tokens.append(Token("(", TokenType.L_PARENTHESES))
-
-            elif cur_char == ")":
-                self.tokens.append(Token(")", TokenType.R_PARENTHESES))
-
-            elif cur_char in ["&", "|", "="]:
-                self.tokens.append(Token(cur_char, TokenType.BINARY_OP))
-
-            elif cur_char == "!":
-                self._process_negations_or_neqs()
-
-            elif cur_char == "<":
-                self._process_less_equiv_left_imply()
+        tokens = self.tokens
+        token_types = TokenType.__members__
+
+        for match in _TOKENS_REGEX.finditer(raw_text):
+            kind = match.lastgroup
+            if kind == "SPACE":
+                continue
+
+            text, pos = match.group(), match.start()
+            if kind == "FUNCTION":
+                text = text[:-1].rstrip()
+            elif kind == "NUM_ARRAY":
+                text = "".join(text.split())
+            elif kind == "INVALID_ARRAY":
+                raise ValueError(f"Invalid array {text} at position {pos}")
+            elif kind == "MISMATCH":
+                if text.isdecimal():
+                    error_msg = f"Invalid num followed by a letter at position {pos}"
+                else:
+                    error_msg = f"Unable to parse {text} to token at position {pos}"
+                raise ValueError(error_msg)
 
-            elif cur_char == ">":
-                self._process_geqs()
+            tokens.append(Token(text, token_types[kind], pos))
 
-            elif cur_char == "-":
-                self._process_right_imply_negatives()
 
-            elif cur_char == ",":
-                self.tokens.append(Token(",", TokenType.ARG_DELIMITER))
+class _Group:
+    """
+    A parenthesis (or the whole formula) which is open while building the tree
+    """
 
-            elif cur_char == "[":
-                self._process_num_array()
+    __slots__ = ("token", "ops_start", "items_start", "op")
 
-            else:
-                raise ValueError(f"Unable to parse {cur_char} to token")
+    def __init__(self, token: Optional[Token], ops_start: int, items_start: int):
+        # the opening L_PARENTHESES or FUNCTION token (None for the whole formula)
+        self.token = token
+        # the sizes of the operations and items stacks when the group was opened
+        self.ops_start = ops_start
+        self.items_start = items_start
+        # the text of the last operation seen in the group (or the function
+        # argument), None if there wasn't one
+        self.op = None
 
-            self.cur_i += 1
+    @property
+    def is_function(self) -> bool:
+        return self.token is not None and self.token.token_type == TokenType.FUNCTION
 
 
 class Parser:
@@ -295,400 +223,145 @@ class Parser:
         Are all arrays not empty and is all their elements are numbers?
     """
 
-    def __init__(self):
-        self.tokenizer = Tokenizer()
-        self.p_map = dict()
-        self.levels_map = dict()
-
-    def _check_formula_validity(self) -> None:
-        self._check_parentheses_balance()
-        self._check_delimiter_validity()
-        self._check_parentheses_validity()
-        self._check_ops_inputs_validity()
-        self._check_arrays_validity()
-
-    def _check_parentheses_balance(self) -> None:
+    def __init__(self, timer: Optional[PhaseTimer] = None, strict: bool = True):
         """
-        Are the parentheses balanced?
+        :param timer: An optional PhaseTimer to attribute the parsing time to
+        :param strict: Whether to reject formulas which are unambiguous only
+        by the operators precedence (see general notes)
         """
-        parentheses_text = "".join(
-            [x.text for x in self.tokenizer.tokens if x.text in "()"]
-        )
-
-        queue = []
-        for p in parentheses_text:
-            if p == "(":
-                queue.append(")")
-            else:
-                if not queue or p != queue.pop():
-                    raise ValueError("Parentheses aren't balanced")
-        if queue:
-            raise ValueError("Parentheses aren't balanced")
-
-    def _check_parentheses_validity(self) -> None:
+        self.tokenizer = Tokenizer()
+        self.timer = get_timer(timer)
+        self.strict = strict
+
+    @staticmethod
+    def _error(message: str, token: Token) -> ValueError:
+        return ValueError(f"{message} at position {token.pos}")
+
+    @staticmethod
+    def _make_leaf(token: Token):
+        if token.token_type == TokenType.VAR:
+            return Var(token.text)
+        elif token.token_type == TokenType.NUM:
+            return int(token.text)
+        return np.array([int(x) for x in token.text[1:-1].split(",")])
+
+    @staticmethod
+    def _flatten(item):
+        # numbers and arrays are operands too, but not formulas
+        return flatten(item) if isinstance(item, Atom) else item
+
+    @staticmethod
+    def _apply_op(op_token: Token, items: List) -> None:
         """
-        Are there no parentheses empty and is the formula unambiguous?
+        Replace the top items of the stack with the operation applied on them
         """
-        is_already_unary_op_queue, is_already_unary_op = [], False
-        is_already_binary_op_queue, is_already_binary_op = [], False
-        many_ops_error_msg = "> 1 op in a single parentheses makes term vague"
-
-        prev_token_type = None
-
-        for token in self.tokenizer.tokens:
-            cur_type = token.token_type
-            if cur_type == TokenType.L_PARENTHESES:
-
-                is_already_unary_op_queue.append(is_already_unary_op)
-                is_already_binary_op_queue.append(is_already_binary_op)
-
-                is_already_unary_op = False
-                is_already_binary_op = False
-
-            elif cur_type == TokenType.ARG_DELIMITER:
-                is_already_unary_op = False
-                is_already_binary_op = False
-
-            elif cur_type == TokenType.R_PARENTHESES:
-                if prev_token_type == TokenType.L_PARENTHESES:
-                    raise ValueError("Invalid )( adjacency found")
-
-                is_already_unary_op = is_already_unary_op_queue.pop()
-                is_already_binary_op = is_already_binary_op_queue.pop()
+        if op_token.token_type == TokenType.UNARY_OP:
+            items[-1] = BLOCKS_MAP[op_token.text](items[-1])
+            return
 
-            elif cur_type in (TokenType.BINARY_OP, TokenType.UNARY_OP):
-                if is_already_unary_op and (cur_type == TokenType.BINARY_OP):
-                    raise ValueError(many_ops_error_msg)
-                elif is_already_binary_op and (cur_type == TokenType.BINARY_OP):
-                    raise ValueError(many_ops_error_msg)
+        right_item = items.pop()
+        left_item = items[-1]
+        if op_token.text == "<-":
+            left_item, right_item = right_item, left_item
+        items[-1] = BLOCKS_MAP[op_token.text](left_item, right_item)
 
-                if cur_type == TokenType.UNARY_OP:
-                    is_already_unary_op = True
-                else:
-                    is_already_binary_op = True
+    def _apply_ops(self, ops: List[Token], items: List, ops_start: int) -> None:
+        while len(ops) > ops_start:
+            self._apply_op(ops.pop(), items)
 
-            prev_token_type = cur_type
-
-    def _check_delimiter_validity(self) -> None:
+    @staticmethod
+    def _applies_before(stacked_op: Token, op_token: Token) -> bool:
         """
-        Are the delimiters in the right place and not adding an empty element?
+        Should a stacked operation be applied before pushing a binary operation
         """
-        functions_ctxs_depth = 0
-        cur_inner_function_level = 0
-        inner_functions_levels = deque()
-        for i, token in enumerate(self.tokenizer.tokens):
-            if token.token_type == TokenType.FUNCTION:
-                inner_functions_levels.append(cur_inner_function_level)
-                functions_ctxs_depth += 1
-                cur_inner_function_level = 0
-
-            elif (
-                token.token_type == TokenType.L_PARENTHESES and functions_ctxs_depth > 0
-            ):
-                cur_inner_function_level += 1
-
-            elif (
-                token.token_type == TokenType.R_PARENTHESES and functions_ctxs_depth > 0
-            ):
-                cur_inner_function_level -= 1
-                if cur_inner_function_level == 0:
-                    functions_ctxs_depth -= 1
-                    cur_inner_function_level = inner_functions_levels.pop()
-
-            elif token.token_type == TokenType.ARG_DELIMITER:
-                if functions_ctxs_depth == 0:
-                    error_msg = f"Invalid delimiter location in: {i}"
-                    raise ValueError(error_msg)
-
-    def _check_ops_inputs_validity(self) -> None:
+        if stacked_op.token_type == TokenType.UNARY_OP:
+            return True
+
+        stacked_precedence = BINARY_PRECEDENCE[stacked_op.text]
+        precedence = BINARY_PRECEDENCE[op_token.text]
+        if stacked_precedence == precedence:
+            return op_token.text not in RIGHT_ASSOCIATIVE_OPS
+        return stacked_precedence > precedence
+
+    def _push_binary_op(self, op_token: Token, group: _Group, ops, items) -> None:
+        if self.strict and group.op is not None:
+            if group.op != op_token.text or op_token.text not in ASSOCIATIVE_OPS:
+                raise self._error(
+                    "> 1 op in a single parentheses makes term vague", op_token
+                )
+        group.op = op_token.text
+
+        while len(ops) > group.ops_start and self._applies_before(ops[-1], op_token):
+            self._apply_op(ops.pop(), items)
+        ops.append(op_token)
+
+    def _close_group(self, token: Token, groups: List[_Group], ops, items) -> None:
+        if len(groups) == 1:
+            raise self._error("Parentheses aren't balanced", token)
+
+        group = groups.pop()
+        self._apply_ops(ops, items, group.ops_start)
+        if group.is_function:
+            args = items[group.items_start :]
+            del items[group.items_start :]
+            # the arguments are leaves of the final flattening of the formula
+            items.append(Func(group.token.text, [self._flatten(arg) for arg in args]))
+
+    def _build_tree(self, tokens: List[Token]) -> Atom:
         """
-        Are the operations given valid inputs?
+        Build the formula tree of the tokens in a single pass
+        :param tokens: The (non empty) list of the formula tokens
+        :return: The parsed formula
         """
-        tokens = self.tokenizer.tokens
-        num_tokens = len(tokens)
-
-        for i, token in enumerate(tokens):
-            if token.token_type == TokenType.UNARY_OP:
-                if (i + 1) >= num_tokens:
-                    error_msg = (
-                        f"Unary Operation {token.text} at the end"
-                        f" of formula text with no item to act on"
-                    )
-                    raise ValueError(error_msg)
-
-                elif tokens[i + 1].token_type not in VALID_RIGHT_INPUT_TYPES:
-                    error_msg = f"Invalid argument to unary" f" operation {token.text}"
-                    raise ValueError(error_msg)
-
-            elif token.token_type == TokenType.BINARY_OP:
-                is_on_edge = (i + 1 >= num_tokens) or ((i - 1) < 0)
-                if is_on_edge:
-                    error_msg = (
-                        f"Binary Operation {token.text} don't have"
-                        f" an argument to his left or right "
-                    )
-                    raise ValueError(error_msg)
-
-                elif tokens[i - 1].token_type not in VALID_LEFT_INPUT_TYPES:
-                    error_msg = (
-                        f"Invalid left argument to binary" f" operation {token.text}"
-                    )
-                    raise ValueError(error_msg)
-
-                elif tokens[i + 1].token_type not in VALID_RIGHT_INPUT_TYPES:
-                    error_msg = (
-                        f"Invalid right argument to binary" f" operation {token.text}"
-                    )
-                    raise ValueError(error_msg)
-
-    def _check_arrays_validity(self) -> None:
-        """
-        Are all arrays not empty and is all their elements are numbers?
-        """
-
-        def is_number(text):
-            if text.isdecimal():
-                return True
-            elif len(text) > 1 and text[0] == "-" and text[1:].isdecimal():
-                return True
-            return False
-
-        for token in self.tokenizer.tokens:
-            if token.token_type == TokenType.NUM_ARRAY:
-                content_items = token.text[1:-1].split(",")
-
-                if len(content_items) == 0:
-                    raise ValueError("Encountered an empty array")
-
-                for c_item in content_items:
-                    if not is_number(c_item):
-                        error_msg = (
-                            f"{c_item} isn't a number in" f" array [{content_items}]"
-                        )
-                        raise ValueError(error_msg)
-
-    def _get_levels_map(self):
-        levels_ops_map = defaultdict(list)
-        levels_elements_map = defaultdict(list)
-        cur_level = 0
-        for i, token in enumerate(self.tokenizer.tokens):
-            if token.token_type == TokenType.L_PARENTHESES:
-                cur_level += 1
-            elif token.token_type == TokenType.R_PARENTHESES:
-                cur_level -= 1
-            elif token.token_type in (TokenType.BINARY_OP, TokenType.UNARY_OP):
-                levels_ops_map[cur_level].append(i)
-            else:
-                levels_elements_map[cur_level].append(i)
-        keys = set(list(levels_ops_map.keys()) + list(levels_elements_map.keys()))
-        return {
-            k: {"ops": levels_ops_map[k], "elements": levels_elements_map[k]}
-            for k in keys
-        }
-
-    def _get_parentheses_map(self):
-        # map item val structure: [id in tokens list, is_function's, partner_id]
-        parentheses_map = dict()
-        p_stack = []
-
-        for i, token in enumerate(self.tokenizer.tokens):
-            if token.token_type == TokenType.L_PARENTHESES:
-                is_function_p = (i > 0) and self.tokenizer.tokens[
-                    i - 1
-                ].token_type == TokenType.FUNCTION
-                parentheses_map[i] = [TokenType.L_PARENTHESES, is_function_p, None]
-                p_stack.append(i)
-            elif token.token_type == TokenType.R_PARENTHESES:
-                partner_id = p_stack[-1]
-                is_function_p = parentheses_map[partner_id][1]
-                parentheses_map[i] = [
-                    TokenType.R_PARENTHESES,
-                    is_function_p,
-                    partner_id,
-                ]
-                parentheses_map[partner_id][2] = i
-                p_stack.pop()
-
-        return parentheses_map
-
-    def _split_function_args(self, bounds):
-        args, cur_arg = [], []
-        i = bounds[0]
-        while i < bounds[1]:
-            cur_token = self.tokenizer.tokens[i]
-
-            if cur_token.token_type == TokenType.FUNCTION:
-                right_parenthesis_id = self.p_map[i + 1][2]
-                func_tokens = self.tokenizer.tokens[i : right_parenthesis_id + 1]
-                cur_arg.extend(func_tokens)
-                i += right_parenthesis_id - i
-
-            elif cur_token.token_type == TokenType.ARG_DELIMITER:
-                args.append(cur_arg)
-                cur_arg = []
-
-            else:
-                cur_arg.append(self.tokenizer.tokens[i])
-            i += 1
-
-        if cur_arg:
-            args.append(cur_arg)
-        return args
-
-    def _process_function(self, function_loc, function_level):
-        function_root = self.tokenizer.tokens[function_loc]
-        function_lp_loc = function_loc + 1
-        function_rp_loc = self.p_map[function_lp_loc][2]
-        args_bounds = (function_lp_loc + 1, function_rp_loc)
-        args = self._split_function_args(args_bounds)
-
-        args_atoms = []
-
-        arg_lbound = args_bounds[0]
-        for arg in args:
-            arg_rbound = arg_lbound + len(arg) - 1
-            arg_bounds = (arg_lbound, arg_rbound)
-            args_atoms.append(self._parse_rec(function_level + 1, arg_bounds))
-            arg_lbound = arg_rbound + 2
-
-        function_name = function_root.text
-        inner_item = Func(function_name, args_atoms)
-        return inner_item
-
-    def _get_next_token_loc(self, level, bounds, kind):
-        tokens_locs_in_level = self.levels_map.get(level, None)
-        if tokens_locs_in_level:
-            tokens_locs_in_level = tokens_locs_in_level.get(kind, None)
-            for token_loc in tokens_locs_in_level:
-                if (token_loc >= bounds[0]) and (token_loc <= bounds[1]):
-                    return token_loc
-        return None
-
-    def _process_right_item(
-        self, op_loc: int, level: int, bounds: Tuple[int, int]
-    ) -> Atom:
-        """
-        Processes item to the right of an operation
-        :param op_loc: index of the operation in the tokens list
-        :param level: parenthesis level of the item & operation
-        :param bounds: bounds (left index, right index) of relevant range
-        of tokens for right item processing
-        :return: The processed right item
-        """
-        next_token = self.tokenizer.tokens[op_loc]
-
-        if next_token.token_type == TokenType.VAR:
-            right_item = Var(next_token.text)
+        # the operands (sub-formulas, numbers and arrays) and the operations
+        # which weren't applied yet
+        items, ops = [], []
+        groups = [_Group(None, 0, 0)]
+        expect_operand = True
 
-        elif next_token.token_type == TokenType.FUNCTION:
-            right_item = self._process_function(op_loc, level)
+        for token in tokens:
+            token_type = token.token_type
 
-        elif next_token.token_type == TokenType.L_PARENTHESES:
-            new_bounds = (op_loc + 1, self.p_map[op_loc][2])
-            right_item = self._parse_rec(level + 1, new_bounds)
+            if expect_operand:
+                if token_type in (TokenType.VAR, TokenType.NUM, TokenType.NUM_ARRAY):
+                    items.append(self._make_leaf(token))
+                    expect_operand = False
 
-        elif next_token.token_type == TokenType.UNARY_OP:
-            new_bounds = (op_loc + 1, bounds[1])
-            inner_inner_item = self._parse_rec(level, new_bounds)
-            right_item = BLOCKS_MAP[next_token.text](inner_inner_item)
+                elif token_type in (TokenType.L_PARENTHESES, TokenType.FUNCTION):
+                    groups.append(_Group(token, len(ops), len(items)))
 
-        elif next_token.token_type == TokenType.NUM_ARRAY:
-            right_item = np.array([int(x) for x in next_token.text[1:-1].split(",")])
+                elif token_type == TokenType.UNARY_OP:
+                    groups[-1].op = token.text
+                    ops.append(token)
 
-        elif next_token.token_type == TokenType.NUM:
-            right_item = int(next_token.text)
-
-        else:
-            error_msg = (
-                f"Unexpected token {next_token.text} of type "
-                f"{next_token.token_type} to serve as a right argument"
-            )
-            raise ValueError(error_msg)
+                else:
+                    raise self._error(f"Missing argument before {token.text}", token)
 
-        return right_item
+            elif token_type == TokenType.BINARY_OP:
+                self._push_binary_op(token, groups[-1], ops, items)
+                expect_operand = True
 
-    def _process_left_item(self, op_loc: int, level: int) -> Atom:
-        """
-        Processes item to the left of an operation
-        :param op_loc: index of the operation in the tokens list
-        :param level: parenthesis level of the item & operation
-        :return: The processed right item
-        """
-        prev_token = self.tokenizer.tokens[op_loc]
+            elif token_type == TokenType.R_PARENTHESES:
+                self._close_group(token, groups, ops, items)
 
-        if prev_token.token_type == TokenType.VAR:
-            left_item = Var(prev_token.text)
+            elif token_type == TokenType.ARG_DELIMITER:
+                group = groups[-1]
+                if not group.is_function:
+                    raise self._error("Invalid delimiter location", token)
+                self._apply_ops(ops, items, group.ops_start)
+                group.op = None
+                expect_operand = True
 
-        elif prev_token.token_type == TokenType.R_PARENTHESES:
-            if self.p_map[op_loc][1]:
-                # function processing
-                function_root_loc = self.p_map[op_loc][2] - 1
-                left_item = self._process_function(function_root_loc, level)
             else:
-                # process regular ()
-                new_bounds = (self.p_map[op_loc][2] + 1, op_loc)
-                left_item = self._parse_rec(level + 1, new_bounds)
-
-        elif prev_token.token_type == TokenType.NUM_ARRAY:
-            left_item = np.array([int(x) for x in prev_token.text[1:-1].split(",")])
-
-        elif prev_token.token_type == TokenType.NUM:
-            left_item = int(prev_token.text)
-
-        else:
-            raise ValueError(f"Invalid left item: {prev_token.text}")
-
-        return left_item
-
-    def _process_op(
-        self, op_loc: int, op_level: int, cur_bounds: Tuple[int, int]
-    ) -> Atom:
-        """
-        Processing operation located in the tokens list in op_loc index
-        :param op_loc:  index of the operation in the tokens list
-        :param op_level: parenthesis level of the operation
-        :param cur_bounds: bounds (left index, right index) of relevant range
-        of tokens for the operation processing
-        :return: The processed operation
-        """
-        op_token = self.tokenizer.tokens[op_loc]
-        if op_token.token_type == TokenType.UNARY_OP:
-            inner_item = self._process_right_item(op_loc + 1, op_level, cur_bounds)
-            return BLOCKS_MAP[op_token.text](inner_item)
-
-        else:  # Binary op which isn't an inequality
-            right_item = self._process_right_item(op_loc + 1, op_level, cur_bounds)
-            left_item = self._process_left_item(op_loc - 1, op_level)
+                raise self._error(f"Missing operation before {token.text}", token)
 
-            if op_token.text == "<-":
-                left_item, right_item = right_item, left_item
+        if expect_operand:
+            raise self._error("Missing argument after the last token", tokens[-1])
+        if len(groups) > 1:
+            raise self._error("Parentheses aren't balanced", groups[-1].token)
 
-            return BLOCKS_MAP[op_token.text](left_item, right_item)
-
-    def _parse_rec(self, cur_level: int, bounds: Tuple[int, int]) -> Atom:
-        """
-        Helper recursive function for parsing the sub-token range of bounds
-        in the level cur_level
-        :param cur_level: parenthesis level of the sub-token range
-        :param bounds: bounds (left index, right index) of relevant range
-        of tokens for the operation processing
-        :return: The parsed logical formula represented in the sub-tokens range
-        """
-        chosen_op_loc = self._get_next_token_loc(cur_level, bounds, kind="ops")
-
-        if chosen_op_loc is not None:
-            return self._process_op(chosen_op_loc, cur_level, bounds)
-
-        else:  # process non-op
-            token_loc = self._get_next_token_loc(cur_level, bounds, kind="elements")
-            if token_loc is not None:
-                cur_token = self.tokenizer.tokens[token_loc]
-                if cur_token.token_type == TokenType.FUNCTION:
-                    return self._process_function(token_loc, cur_level)
-                else:
-                    return Var(cur_token.text)
-            else:
-                return self._parse_rec(cur_level + 1, bounds)
+        self._apply_ops(ops, items, 0)
+        return self._flatten(items[0])
 
     def parse(self, raw_text: str) -> Optional[Atom]:
         """
@@ -696,16 +369,38 @@ class Parser:
         :param raw_text: string to be parsed
         :return: The parsed formula represented by logical blocks
         """
-        self.tokenizer.tokenize(raw_text)
-
-        self._check_formula_validity()
-        self.p_map = self._get_parentheses_map()
-        self.levels_map = self._get_levels_map()
+        timer = self.timer
+        with timer.phase("parse"):
+            with timer.phase("tokenize"):
+                self.tokenizer.tokenize(raw_text)
 
-        if not self.tokenizer.tokens:
-            return None
+            if not self.tokenizer.tokens:
+                return None
 
-        cur_level = 0
-        bounds = (0, len(self.tokenizer.tokens) - 1)
+            with timer.phase("build_tree"):
+                return self._build_tree(self.tokenizer.tokens)
 
-        return self._parse_rec(cur_level, bounds)
+    def parse_assertions(
+        self, source: Union[str, os.PathLike, Iterable[str]]
+    ) -> Iterator[Atom]:
+        """
+        Lazily parses a stream of assertions, one assertion per line, whose
+        conjunction is the formula
+        :param source: A path of a text file or an iterable of lines
+        :return: A generator of the parsed assertions represented by logical
+        blocks
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source) as lines:
+                yield from self.parse_assertions(lines)
+            return
+
+        for line_num, line in enumerate(source, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                assertion = self.parse(line)
+            except ValueError as error:
+                raise ValueError(f"Line {line_num}: {error}") from error
+            yield assertion
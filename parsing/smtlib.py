@@ -0,0 +1,897 @@
+"""
+General Notes
+-------------
+A frontend for scripts in the SMT-LIB v2 language, supporting the QF_UF
+(uninterpreted functions) and QF_LRA (linear real arithmetic) logics.
+
+The script is read as a stream - the input is tokenized chunk by chunk (for
+example line by line from a file) and every command is executed as soon as its
+closing parenthesis is read, so the outputs of a long script are available
+before it's fully read.
+
+The supported commands: set-logic, set-info, set-option, declare-sort (of arity
+0), declare-fun, declare-const, define-fun, assert, check-sat, push, pop,
+get-model, reset-assertions, reset, echo and exit.
+
+The terms are translated to the logical blocks of the solver:
+* The Bool connectives (not, and, or, =>, xor, = and distinct over Bools and
+  ite over Bools) - to Negate, And, Or, Imply and Equiv.
+* QF_UF - the constants of an uninterpreted sort to Var, the applications of
+  uninterpreted functions to Func and = / distinct to Equal / NEqual. An
+  application of a Bool valued function f(x) is translated to f(x) = $True,
+  the representation UFTheory uses for Bool literals.
+* QF_LRA - every (in)equality is normalized to a * x (op) b, where x are the
+  declared Real constants in their declaration order, and scaled to integer
+  coefficients. It's translated to the Geq / Less / Equal / NEqual of TQTheory.
+* true / false - to #T / !#T, where #T is a dummy variable asserted in every
+  check-sat.
+The let bindings, the define-fun macros and the ! annotations are expanded
+during the translation, which uses an explicit stack so deeply nested terms
+(such as the long let chains common in benchmarks) don't hit the recursion
+limit. A let bound term is translated once and shared by all its occurrences.
+
+The assertions and declarations are scoped by push / pop. check-sat solves the
+assertions of all the open scopes with DPLLT.solve_assertions, using UFTheory
+for QF_UF and TQTheory for QF_LRA (if no logic was set, it's inferred from the
+declarations). get-model prints the model of the last satisfiable check-sat:
+the values of an uninterpreted sort are abstract values (@U_0, @U_1, ...) of
+the congruence classes of the terms, and the Real values are found by the LP
+solver of TQTheory.
+
+Not supported: quantifiers, ite over non Bool terms, indexed identifiers and
+sorts, Int arithmetic and mixing uninterpreted functions with arithmetic.
+
+Usage
+---------
+    python -m parsing.smtlib script.smt2
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+from fractions import Fraction
+from functools import reduce
+from math import lcm
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from DPLLT import DPLLT
+from constants import ResultCode
+from parsing.logical_blocks import (
+    And,
+    Atom,
+    Equal,
+    Equiv,
+    Func,
+    Geq,
+    Imply,
+    Less,
+    NEqual,
+    Negate,
+    Or,
+    Var,
+    rewrite,
+)
+from profiling.phase_timer import PhaseTimer
+from solvers.theories.TQTheory import TQTheory
+from solvers.theories.UFTheory import UFTheory
+
+QF_UF = "QF_UF"
+QF_LRA = "QF_LRA"
+SUPPORTED_LOGICS = (QF_UF, QF_LRA)
+
+BOOL_SORT = "Bool"
+REAL_SORT = "Real"
+
+SAT_OUTPUT = "sat"
+UNSAT_OUTPUT = "unsat"
+
+SExpr = Union[str, List["SExpr"]]
+# a linear term - the coefficients of the Real constants (by their index) and
+# the constant part
+Linear = Tuple[Dict[int, Fraction], Fraction]
+# a translated term - its sort and its value (an Atom for Bool and uninterpreted
+# sorts, a Linear for Real)
+Typed = Tuple[str, Union[Atom, Linear]]
+
+_SEXPR_TOKENS_REGEX = re.compile(
+    r"""\s+|;[^\n]*"""
+    r"""|(?P<PAREN>[()])"""
+    r"""|(?P<STRING>"(?:[^"]|"")*")"""
+    r"""|(?P<QUOTED>\|[^|]*\|)"""
+    r"""|(?P<INCOMPLETE>["|].*)"""
+    r"""|(?P<SYMBOL>[^\s()";|]+)""",
+    re.DOTALL,
+)
+_NUMERAL_REGEX = re.compile(r"\d+(?:\.\d+)?")
+
+_TRUE_VAR = Var("#True")
+_TRUE = _TRUE_VAR
+_FALSE = Negate(_TRUE_VAR)
+_UF_TRUE = Var("$True")
+
+# commands which don't invalidate the model of the last check-sat
+_MODEL_PRESERVING_COMMANDS = {"get-model", "echo", "set-info", "set-option"}
+
+
+def read_sexprs(source: Union[str, os.PathLike, Iterable[str]]) -> Iterator[SExpr]:
+    """
+    Read the top level s-expressions of an SMT-LIB script one at a time.
+    The lists are read with an explicit stack, quoted symbols are unquoted and
+    string literals keep their quotes (to tell them apart from symbols).
+    :param source: A path of a script file or an iterable of text chunks
+    (for example the lines of an open file)
+    :return: A generator of the s-expressions - nested lists of str
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source) as lines:
+            yield from read_sexprs(lines)
+        return
+
+    stack = []
+    pending = ""
+    for chunk in source:
+        text = pending + chunk
+        pending = ""
+        for match in _SEXPR_TOKENS_REGEX.finditer(text):
+            kind = match.lastgroup
+            if kind is None:
+                continue
+            token = match.group()
+            if kind == "INCOMPLETE":
+                # a string or a quoted symbol continuing in the next chunk
+                pending = token
+                break
+
+            if token == "(" and kind == "PAREN":
+                stack.append([])
+                continue
+            if kind == "PAREN":
+                if not stack:
+                    raise ValueError("Unbalanced ')' in the SMT-LIB script")
+                sexpr = stack.pop()
+            elif kind == "QUOTED":
+                sexpr = token[1:-1]
+            else:
+                sexpr = token
+
+            if stack:
+                stack[-1].append(sexpr)
+            else:
+                yield sexpr
+
+    if pending or stack:
+        raise ValueError("Unexpected end of the SMT-LIB script")
+
+
+def _format_real(value: Fraction) -> str:
+    if value < 0:
+        return f"(- {_format_real(-value)})"
+    if value.denominator == 1:
+        return f"{value.numerator}.0"
+    return f"(/ {value.numerator} {value.denominator})"
+
+
+def _linear_combination(terms: Iterable[Tuple[Linear, Fraction]]) -> Linear:
+    coeffs = dict()
+    const = Fraction(0)
+    for (term_coeffs, term_const), factor in terms:
+        for var_idx, coeff in term_coeffs.items():
+            coeffs[var_idx] = coeffs.get(var_idx, 0) + coeff * factor
+        const += term_const * factor
+    return {i: c for i, c in coeffs.items() if c}, const
+
+
+def _compare_constants(op: str, value: Fraction) -> bool:
+    # the result of (value op 0)
+    if op == ">=":
+        return value >= 0
+    if op == "<=":
+        return value <= 0
+    if op == ">":
+        return value > 0
+    if op == "<":
+        return value < 0
+    if op == "=":
+        return value == 0
+    return value != 0
+
+
+class _Scope:
+    __slots__ = ("sorts", "functions", "macros", "assertions", "num_reals")
+
+    def __init__(self, num_reals: int) -> None:
+        self.sorts = set()
+        # name -> (arguments sorts, result sort)
+        self.functions = dict()
+        # name -> (parameters names, parameters sorts, result sort, body)
+        self.macros = dict()
+        self.assertions = []
+        # the number of Real constants declared before the scope was opened
+        self.num_reals = num_reals
+
+
+class SMTLibInterpreter:
+    _COMMANDS = {
+        "set-logic": "_set_logic",
+        "set-info": "_ignore",
+        "set-option": "_ignore",
+        "declare-sort": "_declare_sort",
+        "declare-fun": "_declare_fun",
+        "declare-const": "_declare_const",
+        "define-fun": "_define_fun",
+        "assert": "_assert",
+        "check-sat": "_check_sat",
+        "push": "_push",
+        "pop": "_pop",
+        "get-model": "_get_model",
+        "reset-assertions": "_reset_assertions",
+        "reset": "_reset",
+        "echo": "_echo",
+        "exit": "_exit",
+    }
+
+    def __init__(self, timer: Optional[PhaseTimer] = None) -> None:
+        """
+        :param timer: An optional PhaseTimer passed to the DPLLT solver of
+        every check-sat
+        """
+        self.timer = timer
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Reset the interpreter to its initial state - no logic, declarations
+        or assertions
+        """
+        self.logic = None
+        self.exited = False
+        self._scopes = [_Scope(0)]
+        # Real constant name -> its index in the coefficients arrays
+        self._real_vars = dict()
+        # the theory and the assignment of the last satisfiable check-sat
+        self._model = None
+
+    def run(self, source: Union[str, os.PathLike, Iterable[str]]) -> Iterator[str]:
+        """
+        Execute the commands of a script as they are read
+        :param source: A path of a script file or an iterable of text chunks
+        :return: A generator of the outputs of the commands
+        """
+        for command in read_sexprs(source):
+            output = self.execute(command)
+            if output is not None:
+                yield output
+            if self.exited:
+                return
+
+    def execute(self, command: SExpr) -> Optional[str]:
+        """
+        Execute a single command
+        :param command: The s-expression of the command
+        :return: The output of the command, None if it has no output
+        """
+        if not isinstance(command, list) or not command:
+            raise ValueError(f"Invalid command {command}")
+        name, args = command[0], command[1:]
+        method_name = self._COMMANDS.get(name) if isinstance(name, str) else None
+        if method_name is None:
+            raise ValueError(f"Unsupported command {name}")
+        if name not in _MODEL_PRESERVING_COMMANDS:
+            self._model = None
+        return getattr(self, method_name)(args)
+
+    # --- symbols lookup ---
+
+    def _lookup(self, table: str, name: str):
+        for scope in reversed(self._scopes):
+            entry = getattr(scope, table).get(name)
+            if entry is not None:
+                return entry
+        return None
+
+    def _is_sort(self, sort: SExpr) -> bool:
+        if sort in (BOOL_SORT, REAL_SORT):
+            return True
+        return any(sort in scope.sorts for scope in self._scopes)
+
+    def _check_new_symbol(self, name: SExpr) -> None:
+        if not isinstance(name, str) or name.startswith('"'):
+            raise ValueError(f"Invalid symbol {name}")
+        if name.startswith("#") or name == _UF_TRUE.name:
+            raise ValueError(f"The symbol {name} is reserved")
+        if self._lookup("functions", name) or self._lookup("macros", name):
+            raise ValueError(f"The symbol {name} is already declared")
+
+    def _check_sort(self, sort: SExpr) -> None:
+        if not isinstance(sort, str) or not self._is_sort(sort):
+            raise ValueError(f"Unknown sort {sort}")
+        if sort == REAL_SORT and self.logic == QF_UF:
+            raise ValueError("Real isn't supported in QF_UF")
+        if sort not in (BOOL_SORT, REAL_SORT) and self.logic == QF_LRA:
+            raise ValueError("Uninterpreted sorts aren't supported in QF_LRA")
+
+    # --- commands ---
+
+    def _ignore(self, args: List[SExpr]) -> None:
+        return None
+
+    def _set_logic(self, args: List[SExpr]) -> None:
+        if len(args) != 1 or args[0] not in SUPPORTED_LOGICS:
+            raise ValueError(
+                f"Unsupported logic {args}, expected one of {SUPPORTED_LOGICS}"
+            )
+        self.logic = args[0]
+
+    def _declare_sort(self, args: List[SExpr]) -> None:
+        if len(args) not in (1, 2):
+            raise ValueError(f"Invalid declare-sort arguments {args}")
+        name = args[0]
+        if len(args) == 2 and args[1] != "0":
+            raise ValueError("Only sorts of arity 0 are supported")
+        if self.logic == QF_LRA:
+            raise ValueError("Uninterpreted sorts aren't supported in QF_LRA")
+        if not isinstance(name, str) or self._is_sort(name):
+            raise ValueError(f"Invalid or already declared sort {name}")
+        self._scopes[-1].sorts.add(name)
+
+    def _declare_fun(self, args: List[SExpr]) -> None:
+        if len(args) != 3 or not isinstance(args[1], list):
+            raise ValueError(f"Invalid declare-fun arguments {args}")
+        name, args_sorts, sort = args
+        self._check_new_symbol(name)
+        for arg_sort in args_sorts:
+            self._check_sort(arg_sort)
+            if arg_sort == REAL_SORT:
+                raise ValueError("Functions over Real arguments aren't supported")
+        self._check_sort(sort)
+        if args_sorts and sort == REAL_SORT:
+            raise ValueError("Real valued functions aren't supported")
+        if args_sorts and self.logic == QF_LRA:
+            raise ValueError("Uninterpreted functions aren't supported in QF_LRA")
+
+        self._scopes[-1].functions[name] = (tuple(args_sorts), sort)
+        if sort == REAL_SORT:
+            self._real_vars[name] = len(self._real_vars)
+
+    def _declare_const(self, args: List[SExpr]) -> None:
+        if len(args) != 2:
+            raise ValueError(f"Invalid declare-const arguments {args}")
+        self._declare_fun([args[0], [], args[1]])
+
+    def _define_fun(self, args: List[SExpr]) -> None:
+        if len(args) != 4 or not isinstance(args[1], list):
+            raise ValueError(f"Invalid define-fun arguments {args}")
+        name, params, sort, body = args
+        self._check_new_symbol(name)
+        params_names, params_sorts = [], []
+        for param in params:
+            if not isinstance(param, list) or len(param) != 2:
+                raise ValueError(f"Invalid define-fun parameter {param}")
+            self._check_sort(param[1])
+            params_names.append(param[0])
+            params_sorts.append(param[1])
+        self._check_sort(sort)
+        self._scopes[-1].macros[name] = (params_names, params_sorts, sort, body)
+
+    def _assert(self, args: List[SExpr]) -> None:
+        if len(args) != 1:
+            raise ValueError(f"Invalid assert arguments {args}")
+        sort, assertion = self.translate(args[0])
+        if sort != BOOL_SORT:
+            raise ValueError(f"An assertion must be of sort Bool, got {sort}")
+        self._scopes[-1].assertions.append(assertion)
+
+    def _push(self, args: List[SExpr]) -> None:
+        for _ in range(self._scopes_count(args)):
+            self._scopes.append(_Scope(len(self._real_vars)))
+
+    def _pop(self, args: List[SExpr]) -> None:
+        count = self._scopes_count(args)
+        if count >= len(self._scopes):
+            raise ValueError(
+                f"Can't pop {count} scopes, only {len(self._scopes) - 1} are open"
+            )
+        for _ in range(count):
+            scope = self._scopes.pop()
+            # the Real constants of the scope are the last ones declared
+            for name in list(self._real_vars)[scope.num_reals :]:
+                del self._real_vars[name]
+
+    @staticmethod
+    def _scopes_count(args: List[SExpr]) -> int:
+        if not args:
+            return 1
+        if len(args) != 1 or not isinstance(args[0], str) or not args[0].isdigit():
+            raise ValueError(f"Invalid number of scopes {args}")
+        return int(args[0])
+
+    def _reset_assertions(self, args: List[SExpr]) -> None:
+        self._pop([str(len(self._scopes) - 1)])
+        self._scopes[0].assertions = []
+
+    def _reset(self, args: List[SExpr]) -> None:
+        self.reset()
+
+    def _echo(self, args: List[SExpr]) -> str:
+        if len(args) != 1 or not isinstance(args[0], str) or args[0][:1] != '"':
+            raise ValueError(f"Invalid echo arguments {args}")
+        return args[0][1:-1].replace('""', '"')
+
+    def _exit(self, args: List[SExpr]) -> None:
+        self.exited = True
+
+    def _infer_logic(self) -> str:
+        if self.logic is not None:
+            return self.logic
+        has_uf = any(
+            scope.sorts or any(args for args, _ in scope.functions.values())
+            for scope in self._scopes
+        )
+        if has_uf and self._real_vars:
+            raise ValueError(
+                "Mixing uninterpreted functions with Real arithmetic" " isn't supported"
+            )
+        return QF_LRA if self._real_vars else QF_UF
+
+    def _pad_literal(self, literal: Atom) -> Atom:
+        # extend the coefficients arrays to the Real constants declared after
+        # the literal was created
+        item = literal.item if isinstance(literal, Negate) else literal
+        if not isinstance(item, (Geq, Less, Equal, NEqual)) or not isinstance(
+            item.left, np.ndarray
+        ):
+            return literal
+        missing = len(self._real_vars) - len(item.left)
+        if not missing:
+            return literal
+        padded = type(item)(np.pad(item.left, (0, missing)), item.right)
+        return Negate(padded) if item is not literal else padded
+
+    def _check_sat(self, args: List[SExpr]) -> str:
+        if args:
+            raise ValueError("check-sat doesn't take arguments")
+        logic = self._infer_logic()
+        theory = TQTheory() if logic == QF_LRA else UFTheory()
+
+        assertions = [_TRUE_VAR]
+        for scope in self._scopes:
+            assertions.extend(scope.assertions)
+        if logic == QF_LRA:
+            assertions = (
+                rewrite(assertion, leaf=self._pad_literal) for assertion in assertions
+            )
+
+        result, assignment = DPLLT(theory, timer=self.timer).solve_assertions(
+            assertions
+        )
+        if result != ResultCode.SAT:
+            return UNSAT_OUTPUT
+        self._model = (logic, theory, assignment)
+        return SAT_OUTPUT
+
+    # --- terms translation ---
+
+    def translate(self, term: SExpr) -> Typed:
+        """
+        Translate a term to a logical block in the context of the current
+        declarations
+        :param term: The s-expression of the term
+        :return: A tuple of the sort of the term and its value - an Atom for
+        Bool and uninterpreted sorts, a Linear for Real
+        """
+        # the tasks are tuples of a kind and its arguments, and the translated
+        # terms are pushed to values
+        tasks = [("eval", term, dict())]
+        values = []
+        while tasks:
+            task = tasks.pop()
+            kind = task[0]
+            if kind == "eval":
+                self._eval(task[1], task[2], tasks, values)
+
+            elif kind == "apply":
+                _, head, num_args = task
+                args = values[len(values) - num_args :]
+                del values[len(values) - num_args :]
+                macro = self._lookup("macros", head)
+                if macro is not None:
+                    params_names, params_sorts, sort, body = macro
+                    self._check_args(head, args, params_sorts)
+                    tasks.append(("check", head, sort))
+                    tasks.append(("eval", body, dict(zip(params_names, args))))
+                else:
+                    values.append(self._apply(head, args))
+
+            elif kind == "bind":
+                _, body, env, names = task
+                bound = values[len(values) - len(names) :]
+                del values[len(values) - len(names) :]
+                saved = [(name, env.get(name)) for name in names]
+                env.update(zip(names, bound))
+                tasks.append(("unbind", env, saved))
+                tasks.append(("eval", body, env))
+
+            elif kind == "unbind":
+                _, env, saved = task
+                for name, value in saved:
+                    if value is None:
+                        del env[name]
+                    else:
+                        env[name] = value
+
+            else:  # check
+                _, head, sort = task
+                if values[-1][0] != sort:
+                    raise ValueError(f"{head} should be of sort {sort}")
+        return values[0]
+
+    def _eval(self, term: SExpr, env: Dict[str, Typed], tasks: List, values: List):
+        if isinstance(term, str):
+            if term in env:
+                values.append(env[term])
+                return
+            macro = self._lookup("macros", term)
+            if macro is not None:
+                tasks.append(("apply", term, 0))
+                return
+            values.append(self._symbol_value(term))
+            return
+
+        if not term or not isinstance(term[0], str):
+            raise ValueError(f"Unsupported term {term}")
+        head, args = term[0], term[1:]
+        if head == "let":
+            if len(args) != 2 or not isinstance(args[0], list):
+                raise ValueError(f"Invalid let term {term}")
+            bindings, body = args
+            if not all(
+                isinstance(binding, list) and len(binding) == 2 for binding in bindings
+            ):
+                raise ValueError(f"Invalid let bindings {bindings}")
+            tasks.append(("bind", body, env, [binding[0] for binding in bindings]))
+            for binding in reversed(bindings):
+                tasks.append(("eval", binding[1], env))
+        elif head == "!":
+            # annotations don't change the meaning of the term
+            tasks.append(("eval", args[0], env))
+        elif head in ("forall", "exists", "_", "as", "match"):
+            raise ValueError(f"{head} terms aren't supported")
+        else:
+            tasks.append(("apply", head, len(args)))
+            for arg in reversed(args):
+                tasks.append(("eval", arg, env))
+
+    def _symbol_value(self, symbol: str) -> Typed:
+        if symbol == "true":
+            return BOOL_SORT, _TRUE
+        if symbol == "false":
+            return BOOL_SORT, _FALSE
+        if _NUMERAL_REGEX.fullmatch(symbol):
+            return REAL_SORT, (dict(), Fraction(symbol))
+
+        function = self._lookup("functions", symbol)
+        if function is None:
+            raise ValueError(f"Unknown symbol {symbol}")
+        args_sorts, sort = function
+        if args_sorts:
+            raise ValueError(f"The function {symbol} expects {len(args_sorts)} args")
+        if sort == REAL_SORT:
+            return sort, ({self._real_vars[symbol]: Fraction(1)}, Fraction(0))
+        return sort, Var(symbol)
+
+    @staticmethod
+    def _check_args(head: str, args: List[Typed], sorts: Iterable[str]) -> None:
+        sorts = list(sorts)
+        if len(args) != len(sorts):
+            raise ValueError(f"{head} expects {len(sorts)} args, got {len(args)}")
+        for (arg_sort, _), sort in zip(args, sorts):
+            if arg_sort != sort:
+                raise ValueError(f"{head} expects {sort} args, got {arg_sort}")
+
+    def _apply(self, head: str, args: List[Typed]) -> Typed:
+        if not args:
+            raise ValueError(f"{head} expects arguments")
+        items = [value for _, value in args]
+
+        if head in ("not", "and", "or", "=>", "xor"):
+            self._check_args(head, args, [BOOL_SORT] * len(args))
+            if head == "not":
+                if len(items) != 1:
+                    raise ValueError("not expects a single argument")
+                return BOOL_SORT, Negate(items[0])
+            if head == "and":
+                return BOOL_SORT, And.from_items(items)
+            if head == "or":
+                return BOOL_SORT, Or.from_items(items)
+            if head == "=>":
+                return BOOL_SORT, reduce(lambda r, l: Imply(l, r), reversed(items))
+            return BOOL_SORT, reduce(lambda l, r: Negate(Equiv(l, r)), items)
+
+        if head == "ite":
+            if len(args) != 3:
+                raise ValueError("ite expects 3 arguments")
+            self._check_args(head, args, [BOOL_SORT] * 3)
+            cond, then_item, else_item = items
+            return BOOL_SORT, And(
+                Imply(cond, then_item), Imply(Negate(cond), else_item)
+            )
+
+        if head in ("=", "distinct", "<=", "<", ">=", ">"):
+            sort = args[0][0]
+            if head not in ("=", "distinct"):
+                sort = REAL_SORT
+            self._check_args(head, args, [sort] * len(args))
+            if head == "distinct":
+                pairs = [
+                    (items[i], items[j])
+                    for i in range(len(items))
+                    for j in range(i + 1, len(items))
+                ]
+            else:
+                pairs = list(zip(items, items[1:]))
+            if not pairs:
+                raise ValueError(f"{head} expects at least 2 arguments")
+            atoms = [self._compare(head, sort, left, right) for left, right in pairs]
+            return BOOL_SORT, And.from_items(atoms)
+
+        if head in ("+", "-", "*", "/"):
+            self._check_args(head, args, [REAL_SORT] * len(args))
+            return REAL_SORT, self._arithmetic(head, items)
+
+        function = self._lookup("functions", head)
+        if function is None:
+            raise ValueError(f"Unknown function {head}")
+        args_sorts, sort = function
+        self._check_args(head, args, args_sorts)
+        for item in items:
+            if not isinstance(item, (Var, Func)) and not (
+                isinstance(item, Negate) and isinstance(item.item, Var)
+            ):
+                raise ValueError(
+                    f"The arguments of {head} must be terms or Bool constants"
+                )
+        if sort == BOOL_SORT:
+            return sort, Equal(Func(head, items), _UF_TRUE)
+        return sort, Func(head, items)
+
+    def _compare(self, op: str, sort: str, left, right) -> Atom:
+        if sort == BOOL_SORT:
+            equiv = Equiv(left, right)
+            return equiv if op == "=" else Negate(equiv)
+        if sort != REAL_SORT:
+            return Equal(left, right) if op == "=" else NEqual(left, right)
+
+        coeffs, const = _linear_combination(
+            [(left, Fraction(1)), (right, Fraction(-1))]
+        )
+        if not coeffs:
+            return _TRUE if _compare_constants(op, const) else _FALSE
+
+        # (coeffs * x + const) op 0, scaled to integers
+        scale = lcm(const.denominator, *(c.denominator for c in coeffs.values()))
+        a = np.zeros(len(self._real_vars), dtype=np.int64)
+        for var_idx, coeff in coeffs.items():
+            a[var_idx] = int(coeff * scale)
+        b = int(-const * scale)
+        if op == ">=":
+            return Geq(a, b)
+        if op == "<":
+            return Less(a, b)
+        if op == "<=":
+            return Geq(-a, -b)
+        if op == ">":
+            return Less(-a, -b)
+        if op == "=":
+            return Equal(a, b)
+        return NEqual(a, b)
+
+    @staticmethod
+    def _arithmetic(op: str, items: List[Linear]) -> Linear:
+        if op == "+":
+            return _linear_combination((item, Fraction(1)) for item in items)
+        if op == "-":
+            if len(items) == 1:
+                return _linear_combination([(items[0], Fraction(-1))])
+            return _linear_combination(
+                [(items[0], Fraction(1))] + [(item, Fraction(-1)) for item in items[1:]]
+            )
+
+        if op == "*":
+            factor = Fraction(1)
+            linear = None
+            for coeffs, const in items:
+                if not coeffs:
+                    factor *= const
+                elif linear is None:
+                    linear = (coeffs, const)
+                else:
+                    raise ValueError("Non linear multiplication isn't supported")
+            if linear is None:
+                return dict(), factor
+            return _linear_combination([(linear, factor)])
+
+        divisor = Fraction(1)
+        for coeffs, const in items[1:]:
+            if coeffs or not const:
+                raise ValueError("Division is only supported by non zero constants")
+            divisor *= const
+        return _linear_combination([(items[0], 1 / divisor)])
+
+    # --- models ---
+
+    def _get_model(self, args: List[SExpr]) -> str:
+        if self._model is None:
+            raise ValueError(
+                "No model available, get-model must follow a sat check-sat"
+            )
+        logic, theory, assignment = self._model
+
+        functions = [
+            (name, args_sorts, sort)
+            for scope in self._scopes
+            for name, (args_sorts, sort) in scope.functions.items()
+        ]
+        if logic == QF_LRA:
+            values = theory.get_model_values()
+            if values is None:
+                values = np.zeros(len(self._real_vars))
+            definitions = []
+            for name, _, sort in functions:
+                if sort == REAL_SORT:
+                    value = Fraction(float(values[self._real_vars[name]]))
+                    value = _format_real(value.limit_denominator(10**6))
+                else:
+                    value = "true" if assignment.get(Var(name), False) else "false"
+                definitions.append(f"(define-fun {name} () {sort} {value})")
+        else:
+            definitions = _UFModel(assignment, functions).definitions()
+        return "\n".join(["("] + [f"  {d}" for d in definitions] + [")"])
+
+
+class _UFModel:
+    """
+    A model of the uninterpreted functions built from an assignment of the
+    Equal atoms - the congruence closure of the true equalities
+    """
+
+    def __init__(
+        self,
+        assignment: Dict[Atom, bool],
+        functions: List[Tuple[str, Tuple[str, ...], str]],
+    ) -> None:
+        self.assignment = assignment
+        self.sorts = {name: sort for name, _, sort in functions}
+        self.functions = functions
+        self._parent = dict()
+        # sort -> (class root -> abstract value)
+        self._sort_values = dict()
+
+        terms = [_UF_TRUE] + [Var(name) for name, args, _ in functions if not args]
+        for atom in assignment:
+            if isinstance(atom, (Equal, NEqual)):
+                terms.extend((atom.left, atom.right))
+        # the terms and their sub terms (the arguments of the applications)
+        self.terms = dict()
+        while terms:
+            term = terms.pop()
+            if isinstance(term, Negate):
+                term = term.item
+            if term not in self.terms:
+                self.terms[term] = None
+                self._parent[term] = term
+                if isinstance(term, Func):
+                    terms.extend(term.args)
+
+        for atom, value in assignment.items():
+            if isinstance(atom, Equal) and value:
+                self._union(atom.left, atom.right)
+            elif isinstance(atom, Var) and value and atom in self._parent:
+                self._union(atom, _UF_TRUE)
+        self._close()
+
+    def _find(self, term: Atom) -> Atom:
+        parent = self._parent
+        while parent[term] is not term:
+            parent[term] = parent[parent[term]]
+            term = parent[term]
+        return term
+
+    def _union(self, left: Atom, right: Atom) -> bool:
+        left_root, right_root = self._find(left), self._find(right)
+        if left_root is right_root:
+            return False
+        self._parent[left_root] = right_root
+        return True
+
+    def _arg_key(self, arg: Atom):
+        if isinstance(arg, Negate):
+            return "not", self._find(arg.item)
+        return self._find(arg)
+
+    def _close(self) -> None:
+        # merge the applications with congruent arguments until a fixpoint
+        funcs = [term for term in self.terms if isinstance(term, Func)]
+        changed = True
+        while changed:
+            changed = False
+            signatures = dict()
+            for func in funcs:
+                signature = (func.name, tuple(self._arg_key(a) for a in func.args))
+                other = signatures.setdefault(signature, func)
+                if other is not func:
+                    changed |= self._union(func, other)
+
+    def _bool_value(self, term: Atom) -> str:
+        if isinstance(term, Negate):
+            return "false" if self._bool_value(term.item) == "true" else "true"
+        return "true" if self._find(term) is self._find(_UF_TRUE) else "false"
+
+    def _value(self, term: Atom, sort: str) -> str:
+        if sort == BOOL_SORT:
+            return self._bool_value(term)
+        values = self._sort_values.setdefault(sort, dict())
+        root = self._find(term)
+        if root not in values:
+            values[root] = f"@{sort}_{len(values)}"
+        return values[root]
+
+    def _default_value(self, sort: str) -> str:
+        if sort == BOOL_SORT:
+            return "false"
+        values = self._sort_values.get(sort, dict())
+        return next(iter(values.values()), f"@{sort}_0")
+
+    def definitions(self) -> List[str]:
+        """
+        :return: The define-fun commands of the values of the functions
+        """
+        definitions = []
+        for name, args_sorts, sort in self.functions:
+            if not args_sorts:
+                value = self._value(Var(name), sort)
+                definitions.append(f"(define-fun {name} () {sort} {value})")
+                continue
+
+            params = [f"x!{i}" for i in range(len(args_sorts))]
+            entries = dict()
+            for term in self.terms:
+                if isinstance(term, Func) and term.name == name:
+                    key = tuple(
+                        self._value(arg, arg_sort)
+                        for arg, arg_sort in zip(term.args, args_sorts)
+                    )
+                    entries.setdefault(key, self._value(term, sort))
+            body = self._default_value(sort)
+            for key, value in reversed(list(entries.items())):
+                conditions = [f"(= {p} {v})" for p, v in zip(params, key)]
+                condition = (
+                    conditions[0]
+                    if len(conditions) == 1
+                    else f"(and {' '.join(conditions)})"
+                )
+                body = f"(ite {condition} {value} {body})"
+            params_str = " ".join(f"({p} {s})" for p, s in zip(params, args_sorts))
+            definitions.append(f"(define-fun {name} ({params_str}) {sort} {body})")
+        return definitions
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run an SMT-LIB v2 script in the QF_UF or QF_LRA logic"
+    )
+    parser.add_argument("path")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    for output in SMTLibInterpreter().run(args.path):
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from bool_transforms.process_cnf import to_abstract_cnf_conjunction
+from parsing.batch import TermTableBuilder, abstract_many, parse_many
+from parsing.logical_blocks import *
+from parsing.parse import Parser
+
+
+FORMULAS = [
+    "((a & b) | !f(a, !c)) -> (x = g(y))",
+    "(f(a) != b) <-> !(c | d)",
+    "([1, -2] >= 3) & !([2, 0] < -1)",
+    "a | !a",
+]
+
+parser = Parser()
+
+
+def canonical_abstraction(abstraction):
+    # the ints of the literals may differ between runs
+    clauses, abstraction_map, dummy_map = abstraction
+    return (
+        {frozenset(abstraction_map[lit] for lit in clause) for clause in clauses},
+        set(abstraction_map.values()),
+        dummy_map,
+    )
+
+
+def test_term_table_round_trip():
+    atoms = [parser.parse(formula) for formula in FORMULAS] + [
+        Var("t", "True"),
+        Geq(np.array([3 * 10**12, -1]), -(10**12)),
+    ]
+    builder = TermTableBuilder()
+    indices = [builder.add(atom) for atom in atoms]
+    table = pickle.loads(pickle.dumps(builder.build()))
+    assert [table.nodes()[idx] for idx in indices] == atoms
+
+    # shared subformulas are encoded once
+    assert builder.add(Var("a")) < len(table)
+    assert len(table) == len(builder.build())
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_parse_many(max_workers):
+    formulas = FORMULAS + ["", "a & !b"]
+    assert parse_many(formulas, max_workers=max_workers, chunksize=2) == [
+        parser.parse(formula) for formula in formulas
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_abstract_many(max_workers):
+    abstractions = abstract_many(FORMULAS, max_workers=max_workers, chunksize=3)
+    assert len(abstractions) == len(FORMULAS)
+    for formula, abstraction in zip(FORMULAS, abstractions):
+        expected = to_abstract_cnf_conjunction(parser.parse(formula))
+        assert abstraction.num_clauses == len(expected[0])
+        assert canonical_abstraction(
+            abstraction.to_abstraction()
+        ) == canonical_abstraction(expected)
+
+
+def test_parse_many_deep_formula():
+    depth = 3000
+    formula = "a"
+    for i in range(depth):
+        formula = f"(x{i} & {formula})"
+    parsed = parse_many([formula, "a"], max_workers=2, chunksize=1)
+    assert parsed == [parser.parse(formula), Var("a")]
+
+
+def test_batch_error_index():
+    with pytest.raises(ValueError, match="^Formula 2: "):
+        parse_many(["a", "b", "(c &"], max_workers=2, chunksize=1)
+    with pytest.raises(ValueError, match="^Formula 1: Empty formula"):
+        abstract_many(["a", ""], max_workers=1)
+    with pytest.raises(ValueError, match="max_workers"):
+        abstract_many(["a"], max_workers=0)
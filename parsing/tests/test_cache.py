@@ -0,0 +1,136 @@
+import os
+
+import numpy as np
+import pytest
+
+from DPLLT import DPLLT
+from bool_transforms.process_cnf import to_abstract_cnf_conjunction
+from constants import ResultCode
+from parsing.cache import CachedFrontend, FrontendCache, formula_key
+from parsing.logical_blocks import *
+from parsing.parse import Parser
+from profiling.phase_timer import PhaseTimer
+from solvers.theories.TQTheory import TQTheory
+from solvers.theories.UFTheory import UFTheory
+from tests.test_utils import verify_unabstracted_assignment
+
+
+parser = Parser()
+
+UF_FORMULAS = [
+    "(a = b) & ((f(a) != f(b)) | (g(!c) = a))",
+    "(f(a) = a) & (f(f(a)) != a)",
+]
+
+
+def make_entry(formula_text, theory_state=None):
+    formula = parser.parse(formula_text)
+    clauses, abstraction_map, dummy_map = to_abstract_cnf_conjunction(formula)
+    equalities = {node for node in iter_subformulas(formula) if isinstance(node, Equal)}
+    theory_state = {"state": theory_state}
+    expected = (clauses, abstraction_map, dummy_map, equalities, theory_state)
+    return CachedFrontend.from_frontend(*expected), expected
+
+
+def test_formula_key():
+    assert formula_key("a & b", "UFTheory") == formula_key("a & b", "UFTheory")
+    assert formula_key("a & b", "UFTheory") != formula_key("a & b", "TQTheory")
+    assert formula_key("a & b", "x", "y") != formula_key("a & b", "xy")
+
+
+def test_entry_file_round_trip(tmp_path):
+    theory_state = {Geq(np.array([3 * 10**12, -1]), 2)}
+    entry, expected = make_entry(UF_FORMULAS[0], theory_state)
+    assert entry.to_frontend() == expected
+
+    path = str(tmp_path / "entry")
+    entry.save(path)
+    loaded = CachedFrontend.load(path)
+    assert not loaded.literals.flags.writeable
+    assert loaded.nbytes == entry.nbytes
+    assert loaded.to_frontend() == expected
+
+    # the clauses are new sets on every decode
+    loaded.to_frontend()[0][0].add(0)
+    assert loaded.to_frontend() == expected
+
+    (tmp_path / "other").write_bytes(b"not an entry file")
+    with pytest.raises(ValueError, match="Not a frontend cache entry"):
+        CachedFrontend.load(str(tmp_path / "other"))
+
+
+def test_lru_eviction_by_size():
+    entries = [make_entry(formula)[0] for formula in UF_FORMULAS + ["a | b"]]
+    cache = FrontendCache(max_bytes=entries[0].nbytes + entries[1].nbytes)
+    cache.put("first", entries[0])
+    cache.put("second", entries[1])
+    assert cache.get("first") is entries[0]
+
+    # the least recently used entry is evicted
+    cache.put("third", entries[2])
+    assert "second" not in cache
+    assert cache.get("first") is entries[0]
+    assert cache.get("second") is None
+    assert cache.nbytes == entries[0].nbytes + entries[2].nbytes
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    # an entry larger than the cache isn't kept
+    small_cache = FrontendCache(max_bytes=entries[2].nbytes - 1)
+    small_cache.put("third", entries[2])
+    assert len(small_cache) == 0
+
+    with pytest.raises(ValueError, match="max_bytes"):
+        FrontendCache(max_bytes=-1)
+
+
+def test_directory_shared_between_caches(tmp_path):
+    entry, expected = make_entry(UF_FORMULAS[1])
+    FrontendCache(directory=str(tmp_path)).put("key", entry)
+    assert os.listdir(tmp_path) == ["key.frontend"]
+
+    other_cache = FrontendCache(directory=str(tmp_path))
+    assert "key" in other_cache
+    assert other_cache.get("key").to_frontend() == expected
+    assert len(other_cache) == 1
+    assert other_cache.get("missing") is None
+
+
+@pytest.mark.parametrize(
+    "theory_type, formula_text, expected_result_code",
+    [
+        (UFTheory, UF_FORMULAS[0], ResultCode.SAT),
+        (UFTheory, UF_FORMULAS[1], ResultCode.UNSAT),
+        (TQTheory, "([1, 1] = 2) & (([1, -1] >= 0) | c)", ResultCode.SAT),
+        (TQTheory, "([1, 0] < 0) & (!([1, 0] < -1))", ResultCode.SAT),
+    ],
+)
+def test_solve_text_with_cache(
+    tmp_path, theory_type, formula_text, expected_result_code
+):
+    formula = parser.parse(formula_text)
+    cache = FrontendCache(directory=str(tmp_path))
+    timer = PhaseTimer()
+    solver = DPLLT(theory_type(), timer=timer, frontend_cache=cache)
+    results = [solver.solve_text(formula_text) for _ in range(2)]
+    assert "solve/abstraction" in timer.summary()
+    assert timer.summary()["solve/theory_preprocess"]["calls"] == 1
+
+    # a new process sharing the directory
+    cache.clear()
+    results.append(solver.solve_text(formula_text))
+    assert timer.summary()["solve/theory_preprocess"]["calls"] == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    assert results[0] == solver.solve(formula)
+    for result_code, assignment in results:
+        assert result_code == expected_result_code
+        assert assignment == results[0][1]
+        if expected_result_code == ResultCode.SAT:
+            assert verify_unabstracted_assignment(formula, assignment)
+
+
+def test_solve_text_without_cache():
+    solver = DPLLT(UFTheory())
+    assert solver.solve_text(UF_FORMULAS[1]) == (ResultCode.UNSAT, None)
+    with pytest.raises(ValueError, match="Empty formula"):
+        solver.solve_text("")
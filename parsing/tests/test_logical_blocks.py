@@ -1,4 +1,9 @@
+import pickle
+
+import numpy as np
 import pytest
+
+from parsing.logical_blocks import And, Func, Geq, Less, Or, Var, flatten
 from parsing.parse import Parser
 
 parser = Parser()
@@ -116,9 +121,88 @@ def test_to_basic(formula_text, basic_form_text):
         ("(!(x1 & x2)) | (!x3)", "(!(x1 & x2)) | (!x3)"),
         ("(!x3) | (!(x1 & x2))", "(!x3) | (!(x1 & x2))"),
         ("(x1 & x2) | (x3 & x4)", "(x1 | x3) & ((x1 | x4) & ((x2 | x3) & (x2 | x4)))"),
+        ("x1 | (x2 & x3) | x4", "(x1 | x2 | x4) & (x1 | x3 | x4)"),
     ],
 )
 def test_cnf_distribute(formula_text, cnf_distribute_text):
     formula = parser.parse(formula_text)
     cnf_distribute_form = parser.parse(cnf_distribute_text)
     assert formula.cnf_distribute() == cnf_distribute_form
+
+
+@pytest.mark.parametrize(
+    "formula_text, attribute",
+    [
+        ("x1", "name"),
+        ("f(a, b)", "args"),
+        ("a = b", "left"),
+        ("[1, 2] < 3", "right"),
+        ("!x1", "item"),
+        ("x1 & x2", "items"),
+    ],
+)
+def test_atoms_are_immutable(formula_text, attribute):
+    formula = parser.parse(formula_text)
+    with pytest.raises(AttributeError):
+        setattr(formula, attribute, None)
+    assert not hasattr(formula, "__dict__")
+
+
+def test_num_array_is_read_only():
+    formula = parser.parse("[1, 2] < 3")
+    with pytest.raises(ValueError):
+        formula.left[0] = 5
+
+
+@pytest.mark.parametrize(
+    "formula_text",
+    ["f(g(a), b) = c", "([1, 2] >= 3) | !([2, 1] < 4)", "(x1 -> x2) <-> !x3"],
+)
+def test_equal_atoms_are_shared(formula_text):
+    formula, same_formula = parser.parse(formula_text), parser.parse(formula_text)
+    assert formula is same_formula
+    assert hash(formula) == formula.atom_id
+    assert pickle.loads(pickle.dumps(formula)) is formula
+
+
+def test_shared_subformulas():
+    formula = parser.parse("(f(a) = b) | ((f(a) = b) & ([1, 2] < 3))")
+    assert formula.items[0] is formula.items[1].items[0]
+    assert formula.items[0].left is Func("f", [Var("a")])
+    assert Geq(np.array([1, 2]), 3) is Geq(np.array([1.0, 2.0]), 3)
+    assert Geq(np.array([1, 2]), 3) is not Less(np.array([1, 2]), 3)
+
+
+def test_rebuild():
+    formula = parser.parse("(x1 & x2) | (a = b)")
+    assert formula.rebuild(*formula.items) is formula
+
+    rebuilt = formula.rebuild(*reversed(formula.items))
+    assert rebuilt == parser.parse("(a = b) | (x1 & x2)")
+    assert formula == parser.parse("(x1 & x2) | (a = b)")
+
+
+def test_nary_ops():
+    x1, x2, x3 = Var("x1"), Var("x2"), Var("x3")
+    assert And(x1, x2, x3).items == (x1, x2, x3)
+    assert And(x1, x2, x3) is not And(And(x1, x2), x3)
+    assert And.from_items([x1]) is x1
+    assert Or.from_items([x1, x2]) is Or(x1, x2)
+    with pytest.raises(ValueError):
+        And(x1)
+    with pytest.raises(ValueError):
+        Or.from_items([])
+
+
+def test_flatten():
+    x = [Var(f"x{i}") for i in range(4)]
+    formula = Or(And(And(x[0], x[1]), Or(x[2], And(x[1], x[3]))), Or(x[0], x[3]))
+    assert flatten(formula) == Or(
+        And(x[0], x[1], Or(x[2], And(x[1], x[3]))), x[0], x[3]
+    )
+    assert flatten(flatten(formula)) is flatten(formula)
+
+    deep = x[0]
+    for i in range(3000):
+        deep = And(deep, Var(f"y{i}"))
+    assert flatten(deep) == And(x[0], *[Var(f"y{i}") for i in range(3000)])
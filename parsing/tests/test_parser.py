@@ -3,7 +3,6 @@ import pytest
 from parsing.logical_blocks import *
 from parsing.parse import Parser
 
-
 a = Var("a")
 neg_a = Negate(a)
 b = Var("b")
@@ -66,8 +65,9 @@ expected_complex_formulas = [
     Negate(neg_b),
     Or(And(a, b), And(neg_a, Imply(c, b))),
     And(
-        And(Or(Or(a, neg_b), And(r, neg_a)), Or(And(c, r), Imply(c, And(neg_r, b)))),
-        Imply(And(Imply(n, a), Or(neg_r, n)), And(And(r, n), Or(a, neg_n))),
+        Or(a, neg_b, And(r, neg_a)),
+        Or(And(c, r), Imply(c, And(neg_r, b))),
+        Imply(And(Imply(n, a), Or(neg_r, n)), And(r, n, Or(a, neg_n))),
     ),
 ]
 
@@ -115,7 +115,14 @@ def test_invalid_arrays(invalid_array_str):
 
 @pytest.mark.parametrize(
     "ambiguous_formula_str",
-    ["a & b & c", "(!a & b)", "(a & b) -> (!(c) | f)", "(a & ()) | d"],
+    [
+        "a & b | c",
+        "a -> b -> c",
+        "a & b & !c & d",
+        "(!a & b)",
+        "(a & b) -> (!(c) | f)",
+        "(a & ()) | d",
+    ],
 )
 def test_ambiguous_formulas(ambiguous_formula_str):
     with pytest.raises(ValueError):
@@ -142,3 +149,82 @@ def test_function_in_function():
     q = Var("q")
     expected_result = And(p, Func("f", [Func("f", [q, neg_r]), neg_r]))
     assert parser.parse(text) == expected_result
+
+
+def test_deeply_nested_formula():
+    depth = 3000
+    ops = ["&", "|"]
+    text = "".join(f"(x0 {ops[i % 2]} " for i in range(depth - 1))
+    text += "x0" + ")" * (depth - 1)
+    formula = parser.parse(text)
+    for i in range(depth - 1):
+        assert isinstance(formula, (And, Or)[i % 2])
+        formula = formula.items[1]
+    assert formula == Var("x0")
+
+
+@pytest.mark.parametrize(
+    "formula_str, expected_parsed",
+    [
+        ("a & b & c", And(a, b, c)),
+        ("(a | b) | ((c | !a) | b)", Or(a, b, c, neg_a, b)),
+        (
+            "f(a & b & c, x) | (a & (b & c))",
+            Or(Func("f", [And(a, b, c), x]), And(a, b, c)),
+        ),
+        ("(a & b) -> (b & (c & d))", Imply(And(a, b), And(b, c, Var("d")))),
+    ],
+    ids=repr,
+)
+def test_flattened_chains(formula_str, expected_parsed):
+    assert parser.parse(formula_str) == expected_parsed
+
+
+def test_long_chain_is_flat():
+    names = [f"x{i}" for i in range(3000)]
+    formula = parser.parse(" | ".join(names))
+    assert formula == Or(*[Var(name) for name in names])
+
+
+@pytest.mark.parametrize(
+    "formula_str, expected_parsed",
+    [
+        ("a & b & c", And(a, b, c)),
+        ("!a & b", And(neg_a, b)),
+        ("a | b & c", Or(a, And(b, c))),
+        ("a -> b -> c", Imply(a, Imply(b, c))),
+        ("a <-> b -> c | !e", Equiv(a, Imply(b, Or(c, neg_e)))),
+        ("a = b & f(a, b) != c", And(Equal(a, b), NEqual(Func("f", [a, b]), c))),
+        ("(a | b) & c", And(Or(a, b), c)),
+    ],
+    ids=repr,
+)
+def test_non_strict_precedence(formula_str, expected_parsed):
+    assert Parser(strict=False).parse(formula_str) == expected_parsed
+
+
+@pytest.mark.parametrize(
+    "invalid_str, position",
+    [("a & (b | c", 4), ("a & | b", 4), ("f(a, ) & b", 5), ("a & #", 4)],
+    ids=repr,
+)
+def test_error_position(invalid_str, position):
+    with pytest.raises(ValueError, match=f"at position {position}$"):
+        parser.parse(invalid_str)
+
+
+def test_parse_assertions(tmp_path):
+    lines = ["a & b\n", "\n", "# a comment\n", "  f(a) != c\n"]
+    expected_assertions = [And(a, b), NEqual(Func("f", [a]), c)]
+    assert list(parser.parse_assertions(lines)) == expected_assertions
+
+    path = tmp_path / "assertions.txt"
+    path.write_text("".join(lines))
+    assert list(parser.parse_assertions(path)) == expected_assertions
+
+
+def test_parse_assertions_error_line():
+    assertions = parser.parse_assertions(["a", "b & (c"])
+    assert next(assertions) == a
+    with pytest.raises(ValueError, match="^Line 2: "):
+        next(assertions)
@@ -0,0 +1,199 @@
+import pytest
+
+from parsing.smtlib import SMTLibInterpreter, read_sexprs
+
+
+UF_HEADER = """
+(set-logic QF_UF)
+(declare-sort U 0)
+(declare-fun a () U)
+(declare-fun b () U)
+(declare-fun f (U) U)
+(declare-fun p (U) Bool)
+(declare-const q Bool)
+"""
+
+LRA_HEADER = """
+(set-logic QF_LRA)
+(declare-fun x () Real)
+(declare-fun y () Real)
+(declare-const c Bool)
+"""
+
+
+def run(script):
+    return list(SMTLibInterpreter().run(script.splitlines(keepends=True)))
+
+
+def test_read_sexprs():
+    lines = [
+        "(assert (and a ; a comment\n",
+        ' |quoted sym|)) (echo "multi\n',
+        'line ""string""")\n',
+    ]
+    assert list(read_sexprs(lines)) == [
+        ["assert", ["and", "a", "quoted sym"]],
+        ["echo", '"multi\nline ""string"""'],
+    ]
+
+    with pytest.raises(ValueError):
+        list(read_sexprs(["(assert a"]))
+    with pytest.raises(ValueError):
+        list(read_sexprs(["a)"]))
+
+
+@pytest.mark.parametrize(
+    "assertions, expected_output",
+    [
+        ("(assert (= a b)) (assert (distinct (f a) (f b)))", "unsat"),
+        ("(assert (= a b)) (assert (p a)) (assert (not (p b)))", "unsat"),
+        ("(assert (= (f a) a)) (assert (not (= (f (f a)) a)))", "unsat"),
+        ("(assert (= (f a) a)) (assert (not (= (f b) b)))", "sat"),
+        ("(assert (xor q (p a))) (assert (= q (p a)))", "unsat"),
+        ("(assert (ite q (= a b) (distinct a b))) (assert (= a b))", "sat"),
+        ("(assert (=> q false)) (assert (or q (= (f a) b)))", "sat"),
+    ],
+)
+def test_qf_uf(assertions, expected_output):
+    assert run(UF_HEADER + assertions + "(check-sat)") == [expected_output]
+
+
+def test_push_pop():
+    script = UF_HEADER + """
+    (assert (= a b))
+    (push 1)
+    (declare-const d U)
+    (assert (distinct (f a) (f b) d))
+    (check-sat)
+    (pop 1)
+    (check-sat)
+    (assert (distinct a b))
+    (check-sat)
+    """
+    assert run(script) == ["unsat", "sat", "unsat"]
+
+    with pytest.raises(ValueError, match="Unknown symbol d"):
+        run(UF_HEADER + "(push) (declare-const d U) (pop) (assert (= a d))")
+    with pytest.raises(ValueError, match="Can't pop"):
+        run(UF_HEADER + "(push) (pop 2)")
+
+
+def test_uf_model():
+    script = UF_HEADER + """
+    (assert (= a b))
+    (assert (p a))
+    (assert (distinct (f a) a))
+    (check-sat)
+    (get-model)
+    """
+    output, model = run(script)
+    assert output == "sat"
+    assert model.splitlines() == [
+        "(",
+        "  (define-fun a () U @U_0)",
+        "  (define-fun b () U @U_0)",
+        "  (define-fun f ((x!0 U)) U (ite (= x!0 @U_0) @U_1 @U_0))",
+        "  (define-fun p ((x!0 U)) Bool (ite (= x!0 @U_0) true false))",
+        "  (define-fun q () Bool false)",
+        ")",
+    ]
+
+
+@pytest.mark.parametrize(
+    "assertions, expected_output",
+    [
+        ("(assert (< x 1)) (assert (> x (/ 1 2)))", "sat"),
+        ("(assert (< x 1)) (assert (>= x 1))", "unsat"),
+        ("(assert (= (+ x y) 2)) (assert (= (- x y) 4)) (assert (> y 0))", "unsat"),
+        ("(assert (=> c (<= (* 2 x) (- 3)))) (assert c) (assert (> x (- 2)))", "sat"),
+        ("(assert (distinct x y)) (assert (<= x y)) (assert (>= x y))", "unsat"),
+        ("(assert (< 1 2 3)) (assert (not (>= 1 2)))", "sat"),
+        ("(assert (< 2 1))", "unsat"),
+    ],
+)
+def test_qf_lra(assertions, expected_output):
+    assert run(LRA_HEADER + assertions + "(check-sat)") == [expected_output]
+
+
+def test_lra_model():
+    script = LRA_HEADER + """
+    (assert (= (+ x y) 3))
+    (assert (= (- x (* 2 y)) (/ 3 2)))
+    (assert (not c))
+    (check-sat)
+    (get-model)
+    """
+    output, model = run(script)
+    assert output == "sat"
+    assert model.splitlines() == [
+        "(",
+        "  (define-fun x () Real (/ 5 2))",
+        "  (define-fun y () Real (/ 1 2))",
+        "  (define-fun c () Bool false)",
+        ")",
+    ]
+
+
+def test_reals_declared_after_assertions():
+    script = LRA_HEADER + """
+    (assert (> x 0))
+    (push)
+    (declare-const z Real)
+    (assert (< z (- x)))
+    (assert (> z 0))
+    (check-sat)
+    (pop)
+    (declare-const w Real)
+    (assert (= w x))
+    (check-sat)
+    """
+    assert run(script) == ["unsat", "sat"]
+
+
+def test_let_and_define_fun():
+    script = LRA_HEADER + """
+    (define-fun positive ((v Real)) Bool (> v 0))
+    (assert (let ((s (+ x y)) (x y)) (and (positive s) (= x 1))))
+    (assert (let ((x 5)) (< y x)))
+    (assert (! (< (+ x y) 0) :named negative))
+    (check-sat)
+    """
+    assert run(script) == ["unsat"]
+
+
+def test_deep_let_chain():
+    depth = 3000
+    term = "(> v0 1)"
+    for i in range(1, depth + 1):
+        term = f"(let ((v{i - 1} (+ v{i} 1))) {term})"
+    script = LRA_HEADER + f"(assert (let ((v{depth} x)) {term})) (check-sat)"
+    assert run(script + f"(assert (< x (- {depth - 1}))) (check-sat)") == [
+        "sat",
+        "unsat",
+    ]
+
+
+def test_echo_and_exit():
+    script = '(echo "a ""quoted"" string") (exit) (echo "unreachable")'
+    assert run(script) == ['a "quoted" string']
+
+
+@pytest.mark.parametrize(
+    "script, error_match",
+    [
+        ("(set-logic QF_BV)", "Unsupported logic"),
+        ("(get-value (a))", "Unsupported command"),
+        (UF_HEADER + "(declare-const a U)", "already declared"),
+        (UF_HEADER + "(declare-const r Real)", "QF_UF"),
+        (LRA_HEADER + "(declare-fun g (Real) Real)", "Functions over Real"),
+        (LRA_HEADER + "(assert (> (* x y) 0))", "Non linear"),
+        (LRA_HEADER + "(assert (= (ite c x y) 0))", "expects Bool args"),
+        (UF_HEADER + "(assert (f q))", "expects U args"),
+        (UF_HEADER + "(assert (forall ((z U)) (= z a)))", "forall"),
+        (UF_HEADER + "(get-model)", "No model"),
+        (UF_HEADER + "(assert a)", "Bool"),
+    ],
+)
+def test_errors(script, error_match):
+    with pytest.raises(ValueError, match=error_match):
+        run(script)
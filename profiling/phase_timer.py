@@ -0,0 +1,311 @@
+"""
+General Notes
+-------------
+An opt-in wall-clock phase timer for the DPLLT pipeline.
+
+A PhaseTimer attributes monotonic time (time.perf_counter_ns) to named phases.
+Phases can be nested, so every phase is identified by its path from the root
+(for example solve/abstraction/tseitin_transform). For every path the timer
+keeps the number of calls, the total time and the self time (total time minus
+the time of the nested phases).
+
+The recorded phases are accessible programmatically (summary, report) and can
+be exported either as a Chrome trace (chrome://tracing, Perfetto) or as a
+speedscope profile (https://www.speedscope.app).
+
+Components which support profiling (Parser, DPLLT, to_abstract_cnf_conjunction)
+accept a timer argument and default to NULL_TIMER, a timer which doesn't record
+anything, so profiling costs almost nothing when it isn't requested.
+
+Example
+---------
+    timer = PhaseTimer()
+    parser = Parser(timer=timer)
+    solver = DPLLT(UFTheory(), timer=timer)
+    solver.solve(parser.parse("(a = b) & (f(a) != f(b))"))
+    print(timer.report())
+    timer.export_chrome_trace("trace.json")
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+PATH_SEPARATOR = "/"
+
+
+class PhaseNode:
+    """
+    Accumulated measurements of a single phase path
+    """
+
+    __slots__ = ("name", "calls", "total_ns", "children")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.total_ns = 0
+        self.children = dict()
+
+    def get_child(self, name: str) -> PhaseNode:
+        child = self.children.get(name)
+        if child is None:
+            child = PhaseNode(name)
+            self.children[name] = child
+        return child
+
+    @property
+    def self_ns(self) -> int:
+        return self.total_ns - sum(child.total_ns for child in self.children.values())
+
+
+class _Phase:
+    """
+    Context manager measuring a single entrance to a phase
+    """
+
+    __slots__ = ("timer", "name", "node", "start_ns")
+
+    def __init__(self, timer: PhaseTimer, name: str) -> None:
+        self.timer = timer
+        self.name = name
+        self.node = None
+        self.start_ns = 0
+
+    def __enter__(self) -> _Phase:
+        timer = self.timer
+        self.node = timer._stack[-1].get_child(self.name)
+        timer._stack.append(self.node)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        end_ns = time.perf_counter_ns()
+        timer = self.timer
+        timer._stack.pop()
+
+        node = self.node
+        node.calls += 1
+        node.total_ns += end_ns - self.start_ns
+
+        if timer.keep_events:
+            timer.events.append(
+                (self.name, self.start_ns, end_ns - self.start_ns, len(timer._stack))
+            )
+
+
+class PhaseTimer:
+    def __init__(self, keep_events: bool = True) -> None:
+        """
+        :param keep_events: Boolean of whether to keep every single phase
+        entrance (required for the trace exports). The aggregated measurements
+        are kept either way.
+        """
+        self.keep_events = keep_events
+        self.root = None
+        self.events = None
+        self._stack = None
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    def reset(self) -> None:
+        self.root = PhaseNode("")
+        self.events = []
+        self._stack = [self.root]
+
+    def phase(self, name: str) -> _Phase:
+        """
+        Get a context manager attributing the time spent in it to the phase
+        name (nested in the currently open phase)
+        :param name: The name of the phase
+        :return: A context manager measuring the phase
+        """
+        return _Phase(self, name)
+
+    def _iter_nodes(self) -> List[Tuple[str, PhaseNode]]:
+        nodes = []
+        stack = [(name, child) for name, child in reversed(self.root.children.items())]
+        while stack:
+            path, node = stack.pop()
+            nodes.append((path, node))
+            for name, child in reversed(node.children.items()):
+                stack.append((path + PATH_SEPARATOR + name, child))
+        return nodes
+
+    def summary(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """
+        Get the aggregated measurements of all the phases
+        :return: A dictionary (ordered depth first) mapping each phase path to
+        a dictionary with its calls, total time and self time (in seconds)
+        """
+        return {
+            path: {
+                "calls": node.calls,
+                "total_time": node.total_ns / 1e9,
+                "self_time": node.self_ns / 1e9,
+            }
+            for path, node in self._iter_nodes()
+        }
+
+    def get_total_time(self, path: str) -> float:
+        """
+        Get the total time (in seconds) spent in the phase of the given path
+        :param path: The phase path (phases names joined by "/")
+        :return: The total time of the phase, 0 if the phase never ran
+        """
+        node = self.root
+        for name in path.split(PATH_SEPARATOR):
+            node = node.children.get(name)
+            if node is None:
+                return 0.0
+        return node.total_ns / 1e9
+
+    def report(self) -> str:
+        """
+        Get a human readable table of the aggregated measurements
+        :return: The table as a string
+        """
+        lines = [f"{'phase':<60} {'calls':>8} {'total[s]':>10} {'self[s]':>10}"]
+        for path, node in self._iter_nodes():
+            depth = path.count(PATH_SEPARATOR)
+            name = "  " * depth + node.name
+            lines.append(
+                f"{name:<60} {node.calls:>8} {node.total_ns / 1e9:>10.6f}"
+                f" {node.self_ns / 1e9:>10.6f}"
+            )
+        return "\n".join(lines)
+
+    def _sorted_events(self) -> List[Tuple[str, int, int, int]]:
+        # events are recorded on exit, sort them by start (outer phases first)
+        if not self.keep_events:
+            raise ValueError("The timer was created with keep_events=False")
+        return sorted(self.events, key=lambda event: (event[1], event[3]))
+
+    def to_chrome_trace(self) -> Dict:
+        """
+        Get the recorded phases in the Chrome trace event format
+        :return: A json serializable dictionary
+        """
+        events = self._sorted_events()
+        origin_ns = events[0][1] if events else 0
+        trace_events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start_ns - origin_ns) / 1e3,
+                "dur": duration_ns / 1e3,
+                "pid": 0,
+                "tid": 0,
+            }
+            for name, start_ns, duration_ns, _ in events
+        ]
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def to_speedscope(self, profile_name: str = "DPLLT") -> Dict:
+        """
+        Get the recorded phases in the speedscope evented profile format
+        :param profile_name: The name of the profile shown by speedscope
+        :return: A json serializable dictionary
+        """
+        events = self._sorted_events()
+        origin_ns = events[0][1] if events else 0
+        frames_ids = dict()
+        opens_closes = []
+        for name, start_ns, duration_ns, _ in events:
+            frame_id = frames_ids.setdefault(name, len(frames_ids))
+            opens_closes.append((start_ns - origin_ns, 1, frame_id, duration_ns))
+
+        speedscope_events = []
+        close_stack = []
+        for at, _, frame_id, duration_ns in opens_closes:
+            while close_stack and close_stack[-1][0] <= at:
+                close_at, close_frame = close_stack.pop()
+                speedscope_events.append(
+                    {"type": "C", "frame": close_frame, "at": close_at}
+                )
+            speedscope_events.append({"type": "O", "frame": frame_id, "at": at})
+            close_stack.append((at + duration_ns, frame_id))
+        while close_stack:
+            close_at, close_frame = close_stack.pop()
+            speedscope_events.append(
+                {"type": "C", "frame": close_frame, "at": close_at}
+            )
+
+        end_value = speedscope_events[-1]["at"] if speedscope_events else 0
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": name} for name in frames_ids]},
+            "profiles": [
+                {
+                    "type": "evented",
+                    "name": profile_name,
+                    "unit": "nanoseconds",
+                    "startValue": 0,
+                    "endValue": end_value,
+                    "events": speedscope_events,
+                }
+            ],
+            "name": profile_name,
+        }
+
+    def export_chrome_trace(self, path: str) -> None:
+        """
+        Export the recorded phases to a Chrome trace json file
+        :param path: The path of the file to write
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def export_speedscope(self, path: str, profile_name: str = "DPLLT") -> None:
+        """
+        Export the recorded phases to a speedscope json file
+        :param path: The path of the file to write
+        :param profile_name: The name of the profile shown by speedscope
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_speedscope(profile_name), f)
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullPhase:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullPhaseTimer:
+    """
+    A timer with the PhaseTimer interface which doesn't record anything.
+    Used as the default timer so the profiling hooks cost almost nothing
+    when profiling isn't requested.
+    """
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def phase(self, name: str) -> _NullPhase:
+        return _NULL_PHASE
+
+
+NULL_TIMER = NullPhaseTimer()
+
+
+def get_timer(timer: Optional[PhaseTimer]) -> Union[PhaseTimer, NullPhaseTimer]:
+    """
+    Get the given timer or NULL_TIMER if no timer was given
+    :param timer: A PhaseTimer or None
+    :return: The timer to use
+    """
+    return NULL_TIMER if timer is None else timer
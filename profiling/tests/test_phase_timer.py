@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from DPLLT import DPLLT
+from parsing.parse import Parser
+from profiling.phase_timer import PhaseTimer, NULL_TIMER, get_timer
+from solvers.theories.UFTheory import UFTheory
+
+
+def test_nested_phases_calls_and_times():
+    timer = PhaseTimer()
+    for _ in range(3):
+        with timer.phase("outer"):
+            with timer.phase("inner"):
+                pass
+
+    summary = timer.summary()
+    assert list(summary.keys()) == ["outer", "outer/inner"]
+    assert summary["outer"]["calls"] == 3
+    assert summary["outer/inner"]["calls"] == 3
+    assert summary["outer"]["total_time"] >= summary["outer/inner"]["total_time"]
+    assert summary["outer"]["self_time"] == pytest.approx(
+        summary["outer"]["total_time"] - summary["outer/inner"]["total_time"]
+    )
+    assert timer.get_total_time("outer/inner") > 0
+    assert timer.get_total_time("outer/missing") == 0.0
+
+
+def test_pipeline_phases():
+    timer = PhaseTimer()
+    parser = Parser(timer=timer)
+    solver = DPLLT(UFTheory(), timer=timer)
+    formula = parser.parse("(g(a) = c) & (((f(g(a)) != f(c)) | (g(a) = d)) & (c != d))")
+    solver.solve(formula)
+
+    summary = timer.summary()
+    for path in [
+        "parse/tokenize",
+        "parse/build_tree",
+        "solve/theory_preprocess",
+        "solve/abstraction/tseitin_transform",
+        "solve/register_clauses",
+        "solve/bcp",
+        "solve/theory_check",
+    ]:
+        assert summary[path]["calls"] >= 1
+
+
+def test_trace_exports(tmp_path):
+    timer = PhaseTimer()
+    with timer.phase("a"):
+        with timer.phase("b"):
+            pass
+        with timer.phase("c"):
+            pass
+
+    chrome_path = tmp_path / "trace.json"
+    timer.export_chrome_trace(str(chrome_path))
+    trace = json.loads(chrome_path.read_text())
+    assert [event["name"] for event in trace["traceEvents"]] == ["a", "b", "c"]
+    assert all(event["ph"] == "X" for event in trace["traceEvents"])
+
+    speedscope_path = tmp_path / "profile.speedscope.json"
+    timer.export_speedscope(str(speedscope_path))
+    profile = json.loads(speedscope_path.read_text())
+    events = profile["profiles"][0]["events"]
+    frames = [frame["name"] for frame in profile["shared"]["frames"]]
+    assert [(e["type"], frames[e["frame"]]) for e in events] == [
+        ("O", "a"),
+        ("O", "b"),
+        ("C", "b"),
+        ("O", "c"),
+        ("C", "c"),
+        ("C", "a"),
+    ]
+
+
+def test_null_timer():
+    assert get_timer(None) is NULL_TIMER
+    assert not NULL_TIMER.enabled
+    with NULL_TIMER.phase("anything"):
+        pass
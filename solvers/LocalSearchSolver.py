@@ -0,0 +1,291 @@
+"""
+General Notes
+-------------
+A stochastic local search (SLS) SAT solver for formulas in the abstracted
+form (a list of sets of ints, where -i represent the negation of i).
+
+Unlike the CDCL solver (SATSolver.Solver) which extends a partial assignment
+and backtracks, local search starts from a complete random assignment and
+repeatedly flips the value of a single variable of an unsatisfied clause until
+no clause is left unsatisfied or the flips budget is exhausted. Local search
+can't prove unsatisfiability, but on large satisfiable random-like instances
+it usually finds a model much faster than CDCL. The best assignment found
+(the one with the fewest unsatisfied clauses) can be used as saved phases for
+the CDCL solver (see the local_search argument of DPLL).
+
+Two variable selection strategies are implemented:
+* ProbSAT - pick a variable of a random unsatisfied clause with a probability
+  proportional to (eps + break(v)) ^ -cb (the polynomial break-only scheme).
+* WalkSAT (SKC) - flip a variable with a zero break score if there is one,
+  otherwise with probability noise flip a random variable of the clause, and
+  else a variable with a minimal break score (ties broken by the make score).
+
+The break score of a variable is the number of clauses which become
+unsatisfied by flipping it, and the make score is the number of unsatisfied
+clauses which become satisfied by flipping it.
+
+The state is kept in NumPy arrays: the number of true literals of every
+clause, the sum of the variables of the true literals of every clause (when a
+clause has a single true literal, this sum is its critical variable) and the
+break score of every variable. A flip updates only the clauses containing the
+flipped variable using vectorized operations over the literals occurrence
+lists.
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from constants import ResultCode
+from solvers.OccurrenceIndex import literal_to_column
+
+PROBSAT = "probsat"
+WALKSAT = "walksat"
+LOCAL_SEARCH_ALGORITHMS = (PROBSAT, WALKSAT)
+
+
+class LocalSearchSolver:
+    def __init__(
+        self,
+        algorithm: str = PROBSAT,
+        max_flips: int = 100000,
+        seed: Optional[int] = None,
+        cb: float = 2.3,
+        eps: float = 1.0,
+        noise: float = 0.567,
+    ) -> None:
+        """
+        :param algorithm: The variable selection strategy. One of
+        LOCAL_SEARCH_ALGORITHMS (probsat, walksat)
+        :param max_flips: The maximal number of flips before giving up
+        :param seed: Seed of the random generator
+        :param cb: The ProbSAT break base exponent
+        :param eps: The ProbSAT break score offset
+        :param noise: The WalkSAT probability of a random walk step
+        """
+        if algorithm not in LOCAL_SEARCH_ALGORITHMS:
+            raise ValueError(
+                f"Unknown local search algorithm {algorithm},"
+                f" expected one of {LOCAL_SEARCH_ALGORITHMS}"
+            )
+        if max_flips < 0:
+            raise ValueError(f"max_flips must be non negative, got {max_flips}")
+
+        self.algorithm = algorithm
+        self.max_flips = max_flips
+        self.seed = seed
+        self.cb = cb
+        self.eps = eps
+        self.noise = noise
+
+        self.flips = 0
+        self.best_num_unsat = None
+        self._best_values = None
+
+    def _build(self, formula: List[Set[int]]) -> None:
+        """
+        Build the clauses and the literals occurrence arrays of the formula
+        :param formula: A list of sets of ints representing a conjunction
+        of clauses
+        """
+        lengths = np.fromiter(
+            (len(clause) for clause in formula), dtype=np.intp, count=len(formula)
+        )
+        self.lits = np.fromiter(
+            (lit for clause in formula for lit in clause),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        self.indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.intp)
+        self.clause_of = np.repeat(np.arange(len(formula), dtype=np.intp), lengths)
+        self.lit_vars = np.abs(self.lits)
+        self.num_vars = int(self.lit_vars.max()) if len(self.lits) else 0
+        self.num_clauses = len(formula)
+
+        # CSR layout - the clauses containing literal column c are
+        # occ_clauses[occ_indptr[c]:occ_indptr[c+1]]
+        columns = 2 * (self.lit_vars - 1) + (self.lits < 0)
+        order = np.argsort(columns, kind="stable")
+        self.occ_clauses = self.clause_of[order]
+        self.occ_indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(columns, minlength=2 * self.num_vars)))
+        ).astype(np.intp)
+
+    def _occurrences(self, int_lit: int) -> np.ndarray:
+        column = literal_to_column(int_lit)
+        return self.occ_clauses[self.occ_indptr[column] : self.occ_indptr[column + 1]]
+
+    def _init_state(self, values: np.ndarray) -> None:
+        """
+        Compute the true literals counts, the critical variables sums,
+        the break scores and the unsatisfied clauses of an assignment
+        :param values: A bool array mapping every variable to its value
+        (index 0 is unused)
+        """
+        self.values = values
+        lit_true = values[self.lit_vars] == (self.lits > 0)
+        self.true_count = np.bincount(
+            self.clause_of, weights=lit_true, minlength=self.num_clauses
+        ).astype(np.int64)
+        self.crit_sum = np.bincount(
+            self.clause_of,
+            weights=lit_true * self.lit_vars,
+            minlength=self.num_clauses,
+        ).astype(np.int64)
+        self.break_count = np.bincount(
+            self.crit_sum[self.true_count == 1], minlength=self.num_vars + 1
+        ).astype(np.int64)
+
+        self.unsat_list = [int(c) for c in np.flatnonzero(self.true_count == 0)]
+        self.unsat_pos = np.full(self.num_clauses, -1, dtype=np.intp)
+        self.unsat_pos[self.unsat_list] = np.arange(len(self.unsat_list))
+
+    def _add_unsat(self, clause_ids: np.ndarray) -> None:
+        for clause_id in clause_ids.tolist():
+            self.unsat_pos[clause_id] = len(self.unsat_list)
+            self.unsat_list.append(clause_id)
+
+    def _remove_unsat(self, clause_ids: np.ndarray) -> None:
+        unsat_list, unsat_pos = self.unsat_list, self.unsat_pos
+        for clause_id in clause_ids.tolist():
+            pos = unsat_pos[clause_id]
+            last = unsat_list.pop()
+            if last != clause_id:
+                unsat_list[pos] = last
+                unsat_pos[last] = pos
+            unsat_pos[clause_id] = -1
+
+    def flip(self, var: int) -> None:
+        """
+        Flip the value of a variable and update the counters of the clauses
+        containing it
+        :param var: The variable to flip
+        """
+        new_true_lit = -var if self.values[var] else var
+        self.values[var] = not self.values[var]
+        true_count, crit_sum, break_count = (
+            self.true_count,
+            self.crit_sum,
+            self.break_count,
+        )
+
+        made = self._occurrences(new_true_lit)
+        made_counts = true_count[made]
+        true_count[made] += 1
+        crit_sum[made] += var
+        newly_sat = made[made_counts == 0]
+        self._remove_unsat(newly_sat)
+        # the previously critical variables of these clauses are not critical
+        # anymore - flipping them won't break the clause
+        np.subtract.at(break_count, crit_sum[made[made_counts == 1]] - var, 1)
+
+        broken = self._occurrences(-new_true_lit)
+        broken_counts = true_count[broken]
+        true_count[broken] -= 1
+        crit_sum[broken] -= var
+        newly_unsat = broken[broken_counts == 1]
+        self._add_unsat(newly_unsat)
+        # the remaining true literal of these clauses is now critical
+        np.add.at(break_count, crit_sum[broken[broken_counts == 2]], 1)
+
+        break_count[var] += len(newly_sat) - len(newly_unsat)
+        self.flips += 1
+
+    def make_counts(self, variables: np.ndarray) -> np.ndarray:
+        """
+        Get the make scores of the given variables
+        :param variables: An array of variables
+        :return: An array of the number of unsatisfied clauses each variable
+        satisfies if flipped
+        """
+        return np.array(
+            [
+                np.count_nonzero(
+                    self.true_count[
+                        self._occurrences(-var if self.values[var] else var)
+                    ]
+                    == 0
+                )
+                for var in variables.tolist()
+            ],
+            dtype=np.int64,
+        )
+
+    def _pick_probsat(self, variables: np.ndarray) -> int:
+        cumulative_weights = np.cumsum(self._break_weights[self.break_count[variables]])
+        threshold = self._rng.random() * cumulative_weights[-1]
+        return int(variables[np.searchsorted(cumulative_weights, threshold)])
+
+    def _pick_walksat(self, variables: np.ndarray) -> int:
+        breaks = self.break_count[variables]
+        free_moves = variables[breaks == 0]
+        if len(free_moves):
+            return int(free_moves[self._rng.integers(len(free_moves))])
+        if self._rng.random() < self.noise:
+            return int(variables[self._rng.integers(len(variables))])
+
+        candidates = variables[breaks == breaks.min()]
+        makes = self.make_counts(candidates)
+        best = candidates[makes == makes.max()]
+        return int(best[self._rng.integers(len(best))])
+
+    @property
+    def best_assignment(self) -> Optional[Dict[int, bool]]:
+        """
+        The assignment with the fewest unsatisfied clauses seen in the
+        last solve
+        """
+        if self._best_values is None:
+            return None
+        return {
+            var: bool(self._best_values[var]) for var in range(1, self.num_vars + 1)
+        }
+
+    def solve(
+        self,
+        formula: List[Set[int]],
+        initial_phases: Optional[Dict[int, bool]] = None,
+    ) -> Tuple[ResultCode, Optional[Dict[int, bool]]]:
+        """
+        Search for a satisfying assignment of the formula
+        :param formula: A list of sets of ints representing a conjunction
+        of clauses (CNF form)
+        :param initial_phases: Optional values of variables to start the search
+        from. The rest of the variables are initialized randomly
+        :return: A tuple of ResultCode.SAT and the satisfying assignment if one
+        was found, (ResultCode.UNDECIDED, None) if the flips budget was exhausted
+        """
+        self._rng = np.random.default_rng(self.seed)
+        self._build(formula)
+        self.flips = 0
+
+        values = self._rng.random(self.num_vars + 1) < 0.5
+        if initial_phases:
+            for var, value in initial_phases.items():
+                if 0 < var <= self.num_vars:
+                    values[var] = value
+        self._init_state(values)
+
+        # a break score can't exceed the number of clauses
+        self._break_weights = (self.eps + np.arange(self.num_clauses + 1)) ** -self.cb
+        pick = self._pick_probsat if self.algorithm == PROBSAT else self._pick_walksat
+        self.best_num_unsat = len(self.unsat_list)
+        self._best_values = values.copy()
+
+        while self.unsat_list and self.flips < self.max_flips:
+            clause_id = self.unsat_list[self._rng.integers(len(self.unsat_list))]
+            variables = self.lit_vars[
+                self.indptr[clause_id] : self.indptr[clause_id + 1]
+            ]
+            if not len(variables):
+                # an empty clause can't be satisfied
+                break
+
+            self.flip(pick(variables))
+            if len(self.unsat_list) < self.best_num_unsat:
+                self.best_num_unsat = len(self.unsat_list)
+                self._best_values = self.values.copy()
+
+        if not self.unsat_list:
+            return ResultCode.SAT, self.best_assignment
+        return ResultCode.UNDECIDED, None
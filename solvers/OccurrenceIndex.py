@@ -0,0 +1,211 @@
+"""
+General Notes
+-------------
+A literals occurrence index of the clauses database, used to compute the
+literal-count decision heuristics with a few vectorized NumPy operations per
+decision instead of Python loops over the unsatisfied clauses.
+
+The index is a sparse CSR matrix of clauses x literals. Every literal l is
+mapped to a column: 2 * (|l| - 1) for a positive literal and
+2 * (|l| - 1) + 1 for a negative one, so the variable of a column is col >> 1.
+Instead of a matrix-vector product the scores are computed with np.bincount
+over the non-zero entries that are alive - entries of an unsatisfied clause
+whose variable is unassigned. The live masks are built at every decision from
+the solver's unsat_clauses and assignment sets.
+
+Clauses added by the solver (original and learned) are buffered in Python lists
+and appended to the arrays lazily, on the next scoring. Clauses shortened by the
+solver are replaced in a single batch which rebuilds the arrays once.
+
+The supported heuristics:
+* DLIS (dynamic largest individual sum) - the literal appearing in the largest
+  number of unsatisfied clauses.
+* JW (Jeroslow-Wang) - the literal with the largest sum of 2^-|c| over the
+  unsatisfied clauses c containing it (|c| is the clause length).
+* MOMS (maximum occurrences in clauses of minimum size) - the variable x
+  maximizing (f(x) + f(!x)) * 2^k + f(x) * f(!x) where f counts the
+  occurrences in the unsatisfied clauses with the minimal number k of
+  unassigned literals. The polarity with more occurrences is chosen.
+"""
+
+from typing import Dict, Iterable, Set
+
+import numpy as np
+
+DLIS = "dlis"
+JEROSLOW_WANG = "jw"
+MOMS = "moms"
+DECISION_HEURISTICS = (DLIS, JEROSLOW_WANG, MOMS)
+
+
+def literal_to_column(int_lit: int) -> int:
+    return 2 * (abs(int_lit) - 1) + (int_lit < 0)
+
+
+def column_to_literal(column: int) -> int:
+    var = (column >> 1) + 1
+    return -var if column & 1 else var
+
+
+class OccurrenceIndex:
+    def __init__(self) -> None:
+        # CSR layout - clause i literals' columns are indices[indptr[i]:indptr[i+1]]
+        self.indptr = np.zeros(1, dtype=np.intp)
+        self.indices = np.zeros(0, dtype=np.intp)
+        # the row (clause id) of every non-zero entry, used for the bincounts
+        self.rows = np.zeros(0, dtype=np.intp)
+        self.clauses_weights = np.zeros(0, dtype=np.float64)
+        self.num_vars = 0
+
+        self._pending_clauses = []
+
+    @property
+    def num_clauses(self) -> int:
+        return len(self.indptr) - 1 + len(self._pending_clauses)
+
+    def add_clause(self, set_clause: Iterable[int]) -> None:
+        """
+        Add a clause as the next row of the index (the rows must be added
+        in the order of the clauses ids)
+        :param set_clause: The clause represented as a set of ints
+        """
+        self._pending_clauses.append([literal_to_column(lit) for lit in set_clause])
+
+    def flush_pending(self) -> None:
+        """
+        Append the buffered clauses to the arrays
+        """
+        if not self._pending_clauses:
+            return
+
+        lengths = np.fromiter(
+            (len(clause) for clause in self._pending_clauses),
+            dtype=np.intp,
+            count=len(self._pending_clauses),
+        )
+        new_indices = np.fromiter(
+            (column for clause in self._pending_clauses for column in clause),
+            dtype=np.intp,
+            count=int(lengths.sum()),
+        )
+        first_row = len(self.indptr) - 1
+        new_rows = np.repeat(
+            np.arange(first_row, first_row + len(lengths), dtype=np.intp), lengths
+        )
+
+        self.indptr = np.concatenate(
+            (self.indptr, self.indptr[-1] + np.cumsum(lengths))
+        )
+        self.indices = np.concatenate((self.indices, new_indices))
+        self.rows = np.concatenate((self.rows, new_rows))
+        self.clauses_weights = np.concatenate(
+            (self.clauses_weights, np.ldexp(1.0, -lengths))
+        )
+        if len(new_indices):
+            self.num_vars = max(self.num_vars, int(new_indices.max() >> 1) + 1)
+        self._pending_clauses = []
+
+    def replace_clauses(self, new_set_clauses: Dict[int, Set[int]]) -> None:
+        """
+        Replace the literals of existing clauses with a subset of them
+        :param new_set_clauses: A dictionary mapping clause ids to the new
+        (shorter) clauses represented as sets of ints
+        """
+        if not new_set_clauses:
+            return
+        self.flush_pending()
+
+        keep = np.ones(len(self.indices), dtype=bool)
+        for clause_id, set_clause in new_set_clauses.items():
+            start, end = self.indptr[clause_id], self.indptr[clause_id + 1]
+            new_columns = [literal_to_column(lit) for lit in set_clause]
+            keep[start:end] = np.isin(self.indices[start:end], new_columns)
+            self.clauses_weights[clause_id] = np.ldexp(1.0, -len(set_clause))
+
+        self.indices = self.indices[keep]
+        self.rows = self.rows[keep]
+        lengths = np.bincount(self.rows, minlength=len(self.indptr) - 1)
+        self.indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.intp)
+
+    def _get_live_entries(self, unsat_clauses: Set[int], assignment: Set[int]):
+        """
+        Get a mask of the alive non-zero entries - entries of unsatisfied
+        clauses whose variable is unassigned
+        """
+        self.flush_pending()
+
+        unsat_mask = np.zeros(len(self.indptr) - 1, dtype=bool)
+        unsat_mask[
+            np.fromiter(unsat_clauses, dtype=np.intp, count=len(unsat_clauses))
+        ] = True
+
+        free_vars = np.ones(self.num_vars, dtype=bool)
+        assigned_vars = np.abs(
+            np.fromiter(assignment, dtype=np.intp, count=len(assignment))
+        )
+        assigned_vars = assigned_vars[assigned_vars <= self.num_vars]
+        free_vars[assigned_vars - 1] = False
+
+        return unsat_mask[self.rows] & free_vars[self.indices >> 1]
+
+    def _best_literal(self, scores: np.ndarray) -> int:
+        if not scores.any():
+            raise ValueError("No unassigned literal in the unsatisfied clauses")
+        return column_to_literal(int(np.argmax(scores)))
+
+    def dlis_scores(self, unsat_clauses: Set[int], assignment: Set[int]) -> np.ndarray:
+        live = self._get_live_entries(unsat_clauses, assignment)
+        return np.bincount(self.indices[live], minlength=2 * self.num_vars)
+
+    def jeroslow_wang_scores(
+        self, unsat_clauses: Set[int], assignment: Set[int]
+    ) -> np.ndarray:
+        live = self._get_live_entries(unsat_clauses, assignment)
+        return np.bincount(
+            self.indices[live],
+            weights=self.clauses_weights[self.rows[live]],
+            minlength=2 * self.num_vars,
+        )
+
+    def pick_moms(self, unsat_clauses: Set[int], assignment: Set[int]) -> int:
+        live = self._get_live_entries(unsat_clauses, assignment)
+        live_rows = self.rows[live]
+        if not len(live_rows):
+            raise ValueError("No unassigned literal in the unsatisfied clauses")
+
+        free_sizes = np.bincount(live_rows, minlength=len(self.indptr) - 1)
+        min_size = int(free_sizes[live_rows].min())
+        in_min_clause = free_sizes[live_rows] == min_size
+
+        occurrences = np.bincount(
+            self.indices[live][in_min_clause], minlength=2 * self.num_vars
+        ).astype(np.float64)
+        positive, negative = occurrences[0::2], occurrences[1::2]
+        scores = (positive + negative) * np.ldexp(1.0, min_size) + positive * negative
+
+        var_idx = int(np.argmax(scores))
+        var = var_idx + 1
+        return var if positive[var_idx] >= negative[var_idx] else -var
+
+    def pick_literal(
+        self, heuristic: str, unsat_clauses: Set[int], assignment: Set[int]
+    ) -> int:
+        """
+        Pick the next literal to assign using the given heuristic
+        :param heuristic: One of DECISION_HEURISTICS
+        :param unsat_clauses: The ids of the currently unsatisfied clauses
+        :param assignment: The current assignment (a set of int literals)
+        :return: The int literal suggested to be assigned to True
+        """
+        if heuristic == DLIS:
+            return self._best_literal(self.dlis_scores(unsat_clauses, assignment))
+        elif heuristic == JEROSLOW_WANG:
+            return self._best_literal(
+                self.jeroslow_wang_scores(unsat_clauses, assignment)
+            )
+        elif heuristic == MOMS:
+            return self.pick_moms(unsat_clauses, assignment)
+        raise ValueError(
+            f"Unknown decision heuristic {heuristic},"
+            f" expected one of {DECISION_HEURISTICS}"
+        )
@@ -0,0 +1,330 @@
+"""
+General Notes
+-------------
+A cache of solve results, for workloads asking the same problem repeatedly
+(modulo the names of the variables and functions and the order of the
+clauses and of the literals).
+
+The key of a problem is a fingerprint of a canonical form of its abstracted
+CNF and of the theory atoms of its literals:
+* The variables (ints) are ordered by a color refinement - the initial color
+  of a variable is the shape of its atom without the names (its type, the
+  functions arities, the coefficients of a linear constraint...), and every
+  round the color of a variable is refined by the colors of the clauses it
+  occurs in (with its sign), until the number of colors stops growing. The
+  ties left are broken by the original ints.
+* The canonical CNF is the clauses of the variables renamed to their
+  canonical ints, sorted.
+* The atoms of the variables are encoded, in the canonical order, to a
+  TermTable (see parsing.batch) whose names are numbered by their first
+  occurrence - so the names of the variables and functions are renamed too.
+The fingerprint is a sha256 of the whole canonical form, so two problems with
+the same fingerprint are the same problem up to a renaming, and a model of
+one (over the canonical ints) is a model of the other. A renamed problem
+whose refinement leaves ties may get another fingerprint (a cache miss),
+but never a wrong result.
+
+A cached result is the result code and, for SAT, the SAT assignment over the
+canonical ints, which the solver maps back to its own ints and literals.
+
+The backends (ResultCache implementations) are bounded LRUs:
+* MemoryResultCache - an in-process LRU bounded by the size of the models.
+* FileResultCache - a directory of result files shared between processes,
+  bounded by their total size. The modification time of a file is updated
+  on every hit and the least recently used files are removed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import zlib
+from abc import abstractmethod
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from constants import ResultCode
+from parsing.batch import TermTableBuilder, _KINDS
+from parsing.logical_blocks import Atom, BinaryOp, Func, Var
+
+DEFAULT_MAX_BYTES = 64 * 2**20
+RESULT_FILE_SUFFIX = ".result.npy"
+
+# a model over the canonical ints, or None for UNSAT
+CachedResult = Tuple[ResultCode, Optional[np.ndarray]]
+
+
+def _atom_shape(atom: Atom) -> str:
+    # the atom without the names of its variables and functions
+    if isinstance(atom, Var):
+        return f"Var/{atom.name.startswith('#')}/{atom.bool_val}"
+    if isinstance(atom, Func):
+        return f"Func/{len(atom.args)}"
+    if isinstance(atom, BinaryOp):
+        left, right = atom.left, atom.right
+        if isinstance(left, np.ndarray):
+            return f"{type(atom).__name__}/{left.tolist()}/{right}"
+        return f"{type(atom).__name__}/{_atom_shape(left)}/{_atom_shape(right)}"
+    return type(atom).__name__
+
+
+def _refine_colors(clauses: List[Set[int]], colors: Dict[int, int]) -> Dict[int, int]:
+    occurrences = defaultdict(list)
+    for clause_id, clause in enumerate(clauses):
+        for lit in clause:
+            occurrences[abs(lit)].append((clause_id, lit < 0))
+
+    num_colors = len(set(colors.values()))
+    while True:
+        clauses_colors = [
+            hash(tuple(sorted(2 * colors[abs(lit)] + (lit < 0) for lit in clause)))
+            for clause in clauses
+        ]
+        refined = {
+            var: hash(
+                (
+                    color,
+                    tuple(
+                        sorted(
+                            (clauses_colors[clause_id], is_negative)
+                            for clause_id, is_negative in occurrences[var]
+                        )
+                    ),
+                )
+            )
+            for var, color in colors.items()
+        }
+        num_refined = len(set(refined.values()))
+        if num_refined <= num_colors:
+            return colors
+        colors, num_colors = refined, num_refined
+
+
+def canonical_form(
+    clauses: List[Set[int]],
+    abstraction_map: Optional[Dict[int, Atom]] = None,
+    context: str = "",
+) -> Tuple[str, Dict[int, int]]:
+    """
+    Compute the fingerprint of a problem (see the General Notes)
+    :param clauses: The clauses of the abstracted CNF
+    :param abstraction_map: The abstraction map of the CNF. None for a CNF
+    which isn't an abstraction
+    :param context: Anything else the result depends on (e.g. the theory)
+    :return: The fingerprint and the mapping of the variables to their
+    canonical ints
+    """
+    variables = {abs(lit) for clause in clauses for lit in clause}
+    if abstraction_map is not None:
+        variables.update(lit_int for lit_int in abstraction_map if lit_int > 0)
+        colors = {
+            var: zlib.crc32(_atom_shape(abstraction_map[var]).encode())
+            for var in variables
+        }
+    else:
+        colors = dict.fromkeys(variables, 0)
+    colors = _refine_colors(clauses, colors)
+    order = sorted(variables, key=lambda var: (colors[var], var))
+    canonical = {var: idx for idx, var in enumerate(order, 1)}
+
+    canonical_clauses = sorted(
+        sorted(canonical[lit] if lit > 0 else -canonical[-lit] for lit in clause)
+        for clause in clauses
+    )
+    digest = hashlib.sha256(context.encode())
+    digest.update(np.array([len(order), len(clauses)], dtype=np.int64).tobytes())
+    digest.update(np.array([len(c) for c in canonical_clauses], np.int64).tobytes())
+    digest.update(
+        np.array([lit for c in canonical_clauses for lit in c], np.int64).tobytes()
+    )
+
+    if abstraction_map is not None:
+        builder = TermTableBuilder()
+        roots = [builder.add(abstraction_map[var]) for var in order]
+        table = builder.build()
+        # the values of the constants aren't renamed
+        operands, indptr = table.operands.tolist(), table.indptr.tolist()
+        bool_vals = [
+            table.names[operands[indptr[idx] + 1]]
+            for idx, kind in enumerate(table.kinds.tolist())
+            if kind == _KINDS[Var] and operands[indptr[idx] + 1] >= 0
+        ]
+        digest.update(np.array(roots, dtype=np.int64).tobytes())
+        digest.update(table.kinds.astype(np.int64).tobytes())
+        digest.update(table.operands.astype(np.int64).tobytes())
+        digest.update(table.indptr.astype(np.int64).tobytes())
+        digest.update("\0".join(bool_vals).encode())
+    return digest.hexdigest(), canonical
+
+
+def _model_array(model: List[int]) -> np.ndarray:
+    if model and max(abs(lit) for lit in model) > np.iinfo(np.int32).max:
+        return np.array(model, dtype=np.int64)
+    return np.array(model, dtype=np.int32)
+
+
+class ResultCache:
+    """
+    A backend of cached results, keyed by the problems fingerprints
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint: str) -> Optional[CachedResult]:
+        """
+        :param fingerprint: The fingerprint of the problem (see canonical_form)
+        :return: The cached result code and model, or None if it's not cached
+        """
+        result = self._load(fingerprint)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(
+        self, fingerprint: str, result_code: ResultCode, model: Optional[List[int]]
+    ) -> None:
+        """
+        Cache the result of a problem
+        :param fingerprint: The fingerprint of the problem (see canonical_form)
+        :param result_code: The result code, SAT or UNSAT
+        :param model: The SAT assignment over the canonical ints, None for UNSAT
+        """
+        if result_code not in (ResultCode.SAT, ResultCode.UNSAT):
+            raise ValueError(f"Can't cache a result of {result_code}")
+        self._store(
+            fingerprint, (result_code, None if model is None else _model_array(model))
+        )
+
+    @abstractmethod
+    def _load(self, fingerprint: str) -> Optional[CachedResult]:
+        pass
+
+    @abstractmethod
+    def _store(self, fingerprint: str, result: CachedResult) -> None:
+        pass
+
+
+class MemoryResultCache(ResultCache):
+    """
+    An in-process LRU of results bounded by their total size
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        :param max_bytes: The maximal total size of the cached results
+        """
+        super().__init__()
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be non negative, got {max_bytes}")
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._results = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @staticmethod
+    def _size(fingerprint: str, result: CachedResult) -> int:
+        model = result[1]
+        return len(fingerprint) + (0 if model is None else model.nbytes)
+
+    def _load(self, fingerprint: str) -> Optional[CachedResult]:
+        result = self._results.get(fingerprint)
+        if result is not None:
+            self._results.move_to_end(fingerprint)
+        return result
+
+    def _store(self, fingerprint: str, result: CachedResult) -> None:
+        previous = self._results.pop(fingerprint, None)
+        if previous is not None:
+            self.nbytes -= self._size(fingerprint, previous)
+        size = self._size(fingerprint, result)
+        if size > self.max_bytes:
+            return
+        self._results[fingerprint] = result
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            evicted, evicted_result = self._results.popitem(last=False)
+            self.nbytes -= self._size(evicted, evicted_result)
+
+
+class FileResultCache(ResultCache):
+    """
+    A directory of result files bounded by their total size, which can be
+    shared by several processes
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        :param directory: The directory of the result files
+        :param max_bytes: The maximal total size of the result files
+        """
+        super().__init__()
+        if max_bytes < 0:
+            raise ValueError(f"max_bytes must be non negative, got {max_bytes}")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.nbytes = sum(size for _, _, size in self._scan())
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, fingerprint + RESULT_FILE_SUFFIX)
+
+    def _scan(self) -> List[Tuple[float, str, int]]:
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(RESULT_FILE_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime_ns, entry.path, stat.st_size))
+        return files
+
+    def _load(self, fingerprint: str) -> Optional[CachedResult]:
+        path = self._path(fingerprint)
+        try:
+            array = np.load(path, allow_pickle=False)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        result_code = ResultCode(int(array[0]))
+        return result_code, array[1:] if result_code == ResultCode.SAT else None
+
+    def _store(self, fingerprint: str, result: CachedResult) -> None:
+        result_code, model = result
+        array = np.concatenate(
+            [
+                np.array([result_code.value], dtype=np.int64),
+                [] if model is None else model,
+            ]
+        ).astype(np.int64 if model is None else model.dtype)
+        path = self._path(fingerprint)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+
+        self.nbytes += os.path.getsize(path)
+        if self.nbytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        # the files of other processes are counted too
+        files = sorted(self._scan())
+        self.nbytes = sum(size for _, _, size in files)
+        for _, path, size in files:
+            if self.nbytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.nbytes -= size
@@ -53,12 +53,75 @@ Main techniques used by the solver:
 
     For more decision heuristics see
     http://fmv.jku.at/papers/BiereFroehlich-SAT15.pdf
+
+    The polarity of the decided literal can be overridden by saved phases -
+    a preferred value per variable. Phases can be seeded from outside (e.g. by
+    the best assignment of a local search) and, when phase_saving is on, every
+    unassigned literal saves its value as the preferred phase of its variable.
+
+    The scores are computed with vectorized NumPy operations over a sparse
+    occurrence index of the clauses (see OccurrenceIndex). The index also
+    provides the Jeroslow-Wang and MOMS heuristics which can be chosen by the
+    decision_heuristic argument of the solver.
+
+4) Chronological backtracking -
+    After learning a clause the solver usually backjumps non-chronologically to
+    the second highest decision level of the learned clause, undoing all the
+    assignments (and the theory state) of the levels in between, most of which
+    are redone right after. With a chrono_threshold, when the backjump distance
+    exceeds the threshold the solver backtracks only a single level instead,
+    and the learned clause asserts its literal at a level lower than the
+    current one. In this mode the trail allows out-of-order literal levels:
+    the level of a propagated literal is the highest level of the other
+    literals of its antecedent rather than the current decision level, and a
+    conflict is analyzed at its conflict level - the highest level of the
+    conflicting clause literals.
+
+    More on that subject can be found in "Chronological Backtracking"
+    (Nadel & Ryvchin, SAT 2018).
+
+5) Vivification -
+    An inprocessing technique which shortens clauses at decision level 0.
+    For a clause (l1 | ... | lk) the solver assigns !l1, !l2, ... one by one
+    (as probing decisions) and propagates, with the clause itself detached:
+    * If li is implied False it can be removed from the clause.
+    * If li is implied True, the clause is subsumed by (l1 | ... | li).
+    * If the propagation ends in a conflict, (l1 | ... | li) is implied.
+    The probing assignments are undone afterwards and the shortened clauses
+    replace the original ones. A pass stops when its propagation budget is
+    exhausted.
+
+    More on that subject can be found here:
+    https://www.ijcai.org/proceedings/2017/0098.pdf
+
+Checkpoints:
+The solver state can be exported to flat NumPy arrays (see
+get_checkpoint_arrays) and loaded back into a solver. The checkpoint holds the
+clauses database (including the learned clauses) in a CSR layout taken
+directly from the occurrence index, the trail at decision level 0 with the
+antecedents, the saved phases, the vivified clauses and the statistics. The
+assignments of higher decision levels are dropped, so loading a checkpoint
+is equivalent to a restart.
 """
 
+import logging
 from collections import defaultdict, deque
-from typing import Optional, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
 
 from constants import ResultCode, CONFLICT_ID
+from solvers.SolverStatistics import SolverStatistics
+from solvers.OccurrenceIndex import OccurrenceIndex, DECISION_HEURISTICS, DLIS
+
+CHECKPOINT_FORMAT_VERSION = 1
+# the antecedent of decided (and theory propagated) literals in checkpoints
+NO_ANTECEDENT = -1
+
+# the minimal length of a clause to be vivified
+MIN_VIVIFY_CLAUSE_LEN = 2
+
+logger = logging.getLogger(__name__)
 
 
 class Clause:
@@ -83,7 +146,7 @@ class Clause:
             if int_lit in assignment:
                 # Found one True int_lit, since a clause is a Disjunction
                 # the clause is SAT
-                print("int_lit in assignment:", int_lit)
+                logger.debug("int_lit in assignment: %s", int_lit)
                 return ResultCode.SAT
             elif -int_lit not in assignment:
                 undecided_flag = True
@@ -174,7 +237,34 @@ class ImplicationGraph:
 
 
 class Solver:
-    def __init__(self):
+    def __init__(
+        self,
+        decision_heuristic: str = DLIS,
+        phase_saving: bool = False,
+        chrono_threshold: Optional[int] = None,
+    ):
+        """
+        :param decision_heuristic: The decision heuristic to use. One of
+        DECISION_HEURISTICS (dlis, jw, moms)
+        :param phase_saving: Whether to save the value of unassigned literals
+        as the preferred polarity of their variable in later decisions
+        :param chrono_threshold: The backjump distance above which the solver
+        backtracks chronologically (a single level). None to always backjump
+        non-chronologically
+        """
+        if decision_heuristic not in DECISION_HEURISTICS:
+            raise ValueError(
+                f"Unknown decision heuristic {decision_heuristic},"
+                f" expected one of {DECISION_HEURISTICS}"
+            )
+        if chrono_threshold is not None and chrono_threshold < 0:
+            raise ValueError(
+                f"chrono_threshold must be non negative, got {chrono_threshold}"
+            )
+        self.decision_heuristic = decision_heuristic
+        self.phase_saving = phase_saving
+        self.chrono_threshold = chrono_threshold
+
         self.assignment = None
         self.unsat_clauses = None
         self.int_lits_to_clauses_ids = None
@@ -184,6 +274,10 @@ class Solver:
         self.clauses = None
         self.d_level = None
         self.Igraph = None
+        self.stats = None
+        self.occurrences = None
+        self.saved_phases = None
+        self.vivified_clauses_ids = None
 
         self.reset()
 
@@ -197,6 +291,10 @@ class Solver:
         self.clauses = []
         self.d_level = 0
         self.Igraph = ImplicationGraph()
+        self.stats = SolverStatistics()
+        self.occurrences = OccurrenceIndex()
+        self.saved_phases = dict()
+        self.vivified_clauses_ids = set()
 
     def _len_clause_absolute_lits_at_d_level(
         self, set_clause: Set[int], decision_level: int
@@ -215,22 +313,24 @@ class Solver:
 
         return len(absolute_d_level_lits.intersection(absolute_clause_lits))
 
-    def _get_last_assigned_literal(self, set_clause: Set[int]) -> int:
+    def _get_last_assigned_literal(
+        self, set_clause: Set[int], decision_level: int
+    ) -> int:
         """
         Gets the last assigned literal in a clause
         :param set_clause: The clause to be evaluated (represented
         as a set of ints)
+        :param decision_level: The decision level of the conflict
         :return: The int representing the last assigned literal in the clause
         """
-        print("get_last_assigned_literal for clause:", set_clause)
-        int_lits_at_last_d_level = self.Igraph.d_level_to_int_lits[self.d_level]
+        logger.debug("get_last_assigned_literal for clause: %s", set_clause)
+        int_lits_at_last_d_level = self.Igraph.d_level_to_int_lits[decision_level]
 
-        print(int_lits_at_last_d_level)
-        print(set_clause)
+        logger.debug("int lits at last d_level: %s", int_lits_at_last_d_level)
 
         for int_lit in reversed(int_lits_at_last_d_level):
             if (int_lit in set_clause) or (-int_lit in set_clause):
-                print("returning:", int_lit)
+                logger.debug("returning: %s", int_lit)
                 return int_lit
 
     def _resolve_around_literal(
@@ -247,13 +347,13 @@ class Solver:
         :return: A set of ints representing a resolution clause of the 2 input
         clauses, removing the conflict on the given literal and its negation.
         """
-        print("resolving:", set_clause1, set_clause2)
+        logger.debug("resolving: %s %s", set_clause1, set_clause2)
 
         temp_clause = set_clause1.union(set_clause2)
         temp_clause.discard(int_lit)
         temp_clause.discard(-int_lit)
 
-        print("resolved:", temp_clause)
+        logger.debug("resolved: %s", temp_clause)
         return temp_clause
 
     def _resolve_clauses(
@@ -316,7 +416,7 @@ class Solver:
         :param set_clause: The added clause represented as set of ints
         :return: The id of the new clause
         """
-        print("Adding clause:", set_clause)
+        logger.debug("Adding clause: %s", set_clause)
 
         new_clause_id = len(self.clauses)
         clause = Clause(set_clause, new_clause_id)
@@ -326,6 +426,7 @@ class Solver:
             self.unsat_clauses.add(new_clause_id)
         for int_lit in clause.set_clause:
             self.int_lits_to_clauses_ids[int_lit].add(new_clause_id)
+        self.occurrences.add_clause(clause.set_clause)
         return new_clause_id
 
     def assign_literal(self, int_lit: int, antecedent_id: Optional[int]) -> None:
@@ -336,27 +437,110 @@ class Solver:
         assignment was deduced by. If This assignment was decided and not
         deduced, expects None value.
         """
-        print("Assigning literal:", int_lit)
+        logger.debug("Assigning literal: %s", int_lit)
+
+        stats = self.stats
+        stats.assignments += 1
+        if antecedent_id is not None:
+            stats.propagations += 1
+        if self.d_level > stats.max_decision_level:
+            stats.max_decision_level = self.d_level
+
+        d_level = self.d_level
+        if self.chrono_threshold is not None and antecedent_id is not None:
+            # out-of-order trail - an implied literal is assigned at the level
+            # of its antecedent which may be lower than the current level
+            d_level = max(
+                (
+                    self.Igraph.get_absolute_lit_d_level(antecedent_lit)
+                    for antecedent_lit in self.clauses[antecedent_id].set_clause
+                    if antecedent_lit != int_lit
+                ),
+                default=0,
+            )
+        self._add_assignment(int_lit, d_level, antecedent_id)
 
+    def _add_assignment(
+        self, int_lit: int, d_level: int, antecedent_id: Optional[int]
+    ) -> None:
         self.assignment.add(int_lit)
         self.bcp_int_lits_queue.append(int_lit)
-
         self.unsat_clauses.difference_update(self.int_lits_to_clauses_ids[int_lit])
-        self.Igraph.add_node(int_lit, self.d_level, antecedent_id)
+        self.Igraph.add_node(int_lit, d_level, antecedent_id)
 
-    def unassign_literal(self, int_lit: int) -> None:
+    def unassign_literal(self, int_lit: int, save_phase: bool = True) -> None:
         """
         Unassign a literal
         :param int_lit: int representing the literal to unassign
+        :param save_phase: Whether to save the literal value as the phase
+        of its variable (if phase_saving is on)
         """
-        print("Unassigning literal:", int_lit)
+        logger.debug("Unassigning literal: %s", int_lit)
         self.assignment.remove(int_lit)
+        if self.phase_saving and save_phase:
+            self.saved_phases[abs(int_lit)] = int_lit > 0
 
         for clause_id in self.int_lits_to_clauses_ids.get(int_lit):
             clause = self.clauses[clause_id]
 
             if clause.evaluate(self.assignment) == ResultCode.UNDECIDED:
                 self.unsat_clauses.add(clause_id)
+                if self.chrono_threshold is not None:
+                    # literals of lower levels stay assigned after a
+                    # chronological backtrack, so the clause might be unit and
+                    # its watch literals might be assigned - re-deduce it
+                    self.bcp_clauses_queue.append(clause_id)
+
+    def get_conflict_clause(self, initial_set_clause: Optional[Set[int]]) -> Set[int]:
+        """
+        Get the clause a conflict appeared in
+        :param initial_set_clause: The clause causing the conflict if known
+        (a theory conflict), None for a conflict found by the BCP
+        :return: The conflicting clause (represented as a set of ints)
+        """
+        if initial_set_clause is None:
+            cur_clause_id = self.Igraph.int_lit_to_node[CONFLICT_ID].antecedent
+            return self.clauses[cur_clause_id].set_clause
+        return initial_set_clause
+
+    def get_conflict_level(self, set_clause: Set[int]) -> int:
+        """
+        Get the conflict level of a conflicting clause - the highest decision
+        level of its literals
+        :param set_clause: The conflicting clause (represented as a set of ints)
+        :return: The conflict level
+        """
+        return max(
+            (self.Igraph.get_absolute_lit_d_level(int_lit) for int_lit in set_clause),
+            default=0,
+        )
+
+    def get_backtrack_level(self, backjump_level: int) -> int:
+        """
+        Get the decision level to backtrack to after a conflict was resolved
+        at the current decision level
+        :param backjump_level: The second highest decision level of the
+        learned clause
+        :return: backjump_level, or the previous decision level if the solver
+        backtracks chronologically and the backjump distance exceeds
+        the threshold
+        """
+        if (
+            self.chrono_threshold is not None
+            and self.d_level - backjump_level > self.chrono_threshold
+        ):
+            self.stats.chrono_backtracks += 1
+            return self.d_level - 1
+        return backjump_level
+
+    def get_trail(self) -> List[int]:
+        """
+        Get the assigned literals in the order of their assignment
+        :return: A list of the assigned int literals
+        """
+        return [
+            int_lit for int_lit in self.Igraph.int_lit_to_node if int_lit != CONFLICT_ID
+        ]
 
     def resolve_conflict(self, initial_set_clause: Set[int]) -> Tuple[Set[int], int]:
         """
@@ -366,52 +550,267 @@ class Solver:
         :return: Tuple of a new clause to learn from the
         resolution and decision level to backjump to.
         """
-        print("resolve_conflict - Igraph:", self.Igraph)
-        if initial_set_clause is None:
-            cur_clause_id = self.Igraph.int_lit_to_node[CONFLICT_ID].antecedent
-            cur_set_clause = self.clauses[cur_clause_id].set_clause
-        else:
-            cur_set_clause = initial_set_clause
+        logger.debug("resolve_conflict - Igraph: %s", self.Igraph)
+        cur_set_clause = self.get_conflict_clause(initial_set_clause)
 
         cur_d_level = self.d_level
         while (
             self._len_clause_absolute_lits_at_d_level(cur_set_clause, cur_d_level) > 1
         ):
-            last_assigned_int_lit = self._get_last_assigned_literal(cur_set_clause)
+            last_assigned_int_lit = self._get_last_assigned_literal(
+                cur_set_clause, cur_d_level
+            )
             last_assigned_node = self.Igraph.int_lit_to_node[last_assigned_int_lit]
 
-            print("last_assigned_node:", last_assigned_node)
+            logger.debug("last_assigned_node: %s", last_assigned_node)
             antecedent_id = last_assigned_node.antecedent
             antecedent_set_clause = self.clauses[antecedent_id].set_clause
             cur_set_clause = self._resolve_clauses(
                 cur_set_clause, antecedent_set_clause
             )
 
+        clause_levels = {
+            self.Igraph.get_absolute_lit_d_level(int_lit) for int_lit in cur_set_clause
+        }
+        self.stats.record_learned_clause(len(cur_set_clause), len(clause_levels))
+
         return cur_set_clause, self._get_second_highest_d_level(cur_set_clause)
 
-    def backjump(self, new_decision_level: int) -> Set[int]:
+    def backjump(self, new_decision_level: int, count: bool = True) -> Set[int]:
         """
         Backjump the solver to a previous decision level. It restores the solver
         to the given decision level unassign later assignments from
         both the assignment set and the implication graph
         :param new_decision_level: The decision level to backjump to
+        :param count: Whether to count the backjump in the statistics (False
+        for a backjump which is a part of another one)
         :return: The new assignment after the backjump
         """
-        print("Backjumping to level:", new_decision_level)
+        logger.debug("Backjumping to level: %s", new_decision_level)
+        if count:
+            self.stats.backjumps += 1
+        self._backtrack(new_decision_level)
+        return self.assignment
 
+    def _backtrack(self, new_decision_level: int, save_phases: bool = True) -> None:
         while self.d_level > new_decision_level:
             int_lits_to_unassign = self.Igraph.d_level_to_int_lits[self.d_level]
 
             for int_lit in int_lits_to_unassign:
                 if int_lit in self.assignment:
-                    self.unassign_literal(int_lit)
+                    self.unassign_literal(int_lit, save_phases)
 
                 elif -int_lit in self.assignment:
-                    self.unassign_literal(-int_lit)
+                    self.unassign_literal(-int_lit, save_phases)
 
             self.d_level = self.d_level - 1
         self.Igraph.backjump(new_decision_level)
-        return self.assignment
+
+    def _probe_propagate(self) -> Tuple[bool, int]:
+        """
+        Exhaust BCP steps at the current (probing) decision level
+        :return: A tuple of whether a conflict was found and the number
+        of propagations made
+        """
+        num_propagations = 0
+        while True:
+            res_code, suggested_literal, clause_id = self.bcp_step()
+            if res_code is None:
+                return False, num_propagations
+            if res_code == ResultCode.CONFLICT:
+                return True, num_propagations
+            if res_code == ResultCode.SAT and suggested_literal is not None:
+                self._add_assignment(suggested_literal, self.d_level, clause_id)
+                num_propagations += 1
+
+    def _vivify_clause(self, clause: Clause) -> Tuple[Set[int], int]:
+        """
+        Probe the negations of the clause literals to find a shorter implied
+        sub-clause (see the general notes at the beginning of the file)
+        :param clause: The clause to vivify, unsatisfied at decision level 0
+        :return: A tuple of the vivified clause and the number of
+        propagations made
+        """
+        # literals with more occurrences propagate more when assigned False
+        int_lits = sorted(
+            (lit for lit in clause.set_clause if -lit not in self.assignment),
+            key=lambda lit: len(self.int_lits_to_clauses_ids[lit]),
+            reverse=True,
+        )
+
+        vivified_clause = set()
+        num_propagations = 0
+        for int_lit in int_lits:
+            if int_lit in self.assignment:
+                vivified_clause.add(int_lit)
+                break
+            if -int_lit in self.assignment:
+                continue
+
+            vivified_clause.add(int_lit)
+            self.d_level += 1
+            self._add_assignment(-int_lit, self.d_level, None)
+            is_conflict, cur_propagations = self._probe_propagate()
+            num_propagations += cur_propagations
+            if is_conflict:
+                break
+
+        self._backtrack(0, save_phases=False)
+        self.bcp_int_lits_queue.clear()
+        self.bcp_clauses_queue.clear()
+        return vivified_clause, num_propagations
+
+    def _replace_clause_literals(
+        self, clause: Clause, new_set_clause: Set[int]
+    ) -> None:
+        for int_lit in clause.set_clause - new_set_clause:
+            self.int_lits_to_clauses_ids[int_lit].discard(clause.index)
+        # the clause sets might be shared with the caller, so don't modify them
+        clause.set_clause = set(new_set_clause)
+
+    def vivify(self, propagation_budget: int) -> int:
+        """
+        Run a vivification pass over the unsatisfied clauses which weren't
+        vivified yet, newest (learned) clauses first. Must be called at decision
+        level 0 after the BCP reached a fixpoint. Shortened unit clauses are
+        queued for the next BCP.
+        :param propagation_budget: The number of probing propagations after
+        which the pass stops
+        :return: The number of clauses that were shortened
+        """
+        if self.d_level != 0:
+            raise ValueError(
+                f"Vivification runs at decision level 0, not {self.d_level}"
+            )
+        stats = self.stats
+        stats.vivification_passes += 1
+
+        candidates = sorted(
+            (
+                clause_id
+                for clause_id in self.unsat_clauses
+                if clause_id not in self.vivified_clauses_ids
+                and len(self.clauses[clause_id].set_clause) >= MIN_VIVIFY_CLAUSE_LEN
+            ),
+            reverse=True,
+        )
+
+        shortened_clauses = dict()
+        used_budget = 0
+        for clause_id in candidates:
+            if used_budget >= propagation_budget:
+                break
+            clause = self.clauses[clause_id]
+            self.vivified_clauses_ids.add(clause_id)
+
+            old_watch_literals = clause.watch_literals
+            self._set_watch_literals_for_clause(clause, set())
+            vivified_clause, num_propagations = self._vivify_clause(clause)
+            used_budget += num_propagations
+
+            if len(vivified_clause) < len(clause.set_clause):
+                stats.vivified_clauses += 1
+                stats.vivified_literals += len(clause.set_clause) - len(vivified_clause)
+                self._replace_clause_literals(clause, vivified_clause)
+                shortened_clauses[clause_id] = clause.set_clause
+                new_watch_literals = clause.suggest_watch_literals(self.assignment)
+                if len(new_watch_literals) < 2:
+                    self.bcp_clauses_queue.append(clause_id)
+            else:
+                new_watch_literals = old_watch_literals
+            self._set_watch_literals_for_clause(clause, new_watch_literals)
+
+        self.occurrences.replace_clauses(shortened_clauses)
+        return len(shortened_clauses)
+
+    def get_checkpoint_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Export the solver state at decision level 0 into flat arrays
+        (see the general notes at the beginning of the file)
+        :return: A dictionary mapping the arrays names to the arrays
+        """
+        occurrences = self.occurrences
+        occurrences.flush_pending()
+        columns = occurrences.indices
+        clauses_lits = np.where(columns & 1, -((columns >> 1) + 1), (columns >> 1) + 1)
+
+        level_0_trail = self.Igraph.d_level_to_int_lits.get(0, [])
+        trail = [int_lit for int_lit in level_0_trail if int_lit != CONFLICT_ID]
+        antecedents = [
+            self.Igraph.int_lit_to_node[int_lit].antecedent for int_lit in trail
+        ]
+
+        stats = self.stats.as_dict()
+        return {
+            "format_version": np.array(CHECKPOINT_FORMAT_VERSION),
+            "clauses_indptr": occurrences.indptr.astype(np.int64),
+            "clauses_lits": clauses_lits.astype(np.int64),
+            "trail": np.array(trail, dtype=np.int64),
+            "trail_antecedents": np.array(
+                [
+                    NO_ANTECEDENT if antecedent is None else antecedent
+                    for antecedent in antecedents
+                ],
+                dtype=np.int64,
+            ),
+            "phases_vars": np.fromiter(self.saved_phases.keys(), dtype=np.int64),
+            "phases_values": np.fromiter(self.saved_phases.values(), dtype=bool),
+            "vivified_clauses_ids": np.fromiter(
+                self.vivified_clauses_ids, dtype=np.int64
+            ),
+            "stats_names": np.array(SolverStatistics.__slots__),
+            "stats_values": np.array(
+                [stats[name] for name in SolverStatistics.__slots__], dtype=np.float64
+            ),
+        }
+
+    def load_checkpoint_arrays(self, arrays: Dict[str, np.ndarray]) -> None:
+        """
+        Reset the solver and load a state exported by get_checkpoint_arrays.
+        The level 0 trail is queued for the BCP, which the caller should run
+        before the next decision.
+        :param arrays: A dictionary mapping the arrays names to the arrays
+        """
+        format_version = int(arrays["format_version"])
+        if format_version != CHECKPOINT_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported checkpoint format version {format_version},"
+                f" expected {CHECKPOINT_FORMAT_VERSION}"
+            )
+        self.reset()
+
+        clauses_lits = arrays["clauses_lits"].tolist()
+        clauses_indptr = arrays["clauses_indptr"].tolist()
+        for start, end in zip(clauses_indptr, clauses_indptr[1:]):
+            self.add_clause(set(clauses_lits[start:end]))
+
+        for int_lit, antecedent_id in zip(
+            arrays["trail"].tolist(), arrays["trail_antecedents"].tolist()
+        ):
+            if antecedent_id == NO_ANTECEDENT:
+                antecedent_id = None
+            self._add_assignment(int_lit, 0, antecedent_id)
+
+        # the watch literals are set by deducing the clauses in the next BCP
+        self.bcp_clauses_queue.extend(sorted(self.unsat_clauses))
+
+        self.saved_phases = dict(
+            zip(arrays["phases_vars"].tolist(), arrays["phases_values"].tolist())
+        )
+        self.vivified_clauses_ids = set(arrays["vivified_clauses_ids"].tolist())
+        for name, value in zip(
+            arrays["stats_names"].tolist(), arrays["stats_values"].tolist()
+        ):
+            if name in SolverStatistics.__slots__ and name != "solve_time":
+                setattr(self.stats, name, int(value))
+
+    def set_phases(self, phases: Dict[int, bool]) -> None:
+        """
+        Seed the preferred polarities of variables for later decisions
+        :param phases: A dictionary mapping variables (positive ints) to the
+        value they should be decided to
+        """
+        self.saved_phases.update(phases)
 
     def has_unsat_clauses(self) -> bool:
         """
@@ -428,9 +827,9 @@ class Solver:
                  else return tuple of the clause current ResultCode, None
         """
         clause = self.clauses[clause_id]
-        print("clause being deduced is:", clause_id, clause)
+        logger.debug("clause being deduced is: %s %s", clause_id, clause)
         if clause.evaluate(self.assignment) == ResultCode.SAT:
-            print("evaluated clause as true")
+            logger.debug("evaluated clause as true")
             return ResultCode.SAT, None
 
         suggested_wl = clause.suggest_watch_literals(self.assignment)
@@ -438,7 +837,7 @@ class Solver:
             self.Igraph.add_node(CONFLICT_ID, self.d_level, clause_id)
             return ResultCode.CONFLICT, None
         if len(suggested_wl) == 1:
-            print("deduce literal:", suggested_wl)
+            logger.debug("deduce literal: %s", suggested_wl)
             return ResultCode.SAT, suggested_wl.pop()
 
         self._set_watch_literals_for_clause(clause, suggested_wl)
@@ -456,7 +855,7 @@ class Solver:
                 * clause id of the antecedent clause for the suggested
                  assignment. None if there is no such.
         """
-        print("Starting BCP with queue:", self.bcp_int_lits_queue)
+        logger.debug("Starting BCP with queue: %s", self.bcp_int_lits_queue)
 
         if self.bcp_clauses_queue:
             clause_id = self.bcp_clauses_queue.popleft()
@@ -479,16 +878,12 @@ class Solver:
         when there is no assignments applied from the current assignment
         :return: The int value representing the assignment suggested
         """
-        print("DSIL picking int literal")
-        int_lit_unsat_clause_count = defaultdict(int)
-        assignment = self.assignment
-        for clause_id in self.unsat_clauses:
-            clause = self.clauses[clause_id]
-
-            for int_lit in clause.set_clause:
-                if (int_lit not in assignment) and (-int_lit not in assignment):
-                    int_lit_unsat_clause_count[int_lit] += 1
-
-        return max(
-            int_lit_unsat_clause_count, key=lambda k: int_lit_unsat_clause_count[k]
+        logger.debug("%s picking int literal", self.decision_heuristic)
+        self.stats.decisions += 1
+        int_lit = self.occurrences.pick_literal(
+            self.decision_heuristic, self.unsat_clauses, self.assignment
         )
+        phase = self.saved_phases.get(abs(int_lit))
+        if phase is not None:
+            int_lit = abs(int_lit) if phase else -abs(int_lit)
+        return int_lit
@@ -0,0 +1,118 @@
+"""
+General Notes
+-------------
+Search statistics collected by the SAT solver and the DPLLT solver during a
+single solve.
+
+The object only holds plain int counters which are incremented on the hot path
+of the solver, so collecting them is always on and costs a few int additions.
+Derived measurements (averages, rates and the share of assignments made by
+BCP) are computed on demand from the counters.
+"""
+
+from typing import Dict, Union
+
+
+class SolverStatistics:
+    __slots__ = (
+        "decisions",
+        "propagations",
+        "theory_propagations",
+        "assignments",
+        "conflicts",
+        "theory_conflicts",
+        "theory_checks",
+        "learned_clauses",
+        "learned_literals",
+        "learned_lbd_sum",
+        "backjumps",
+        "chrono_backtracks",
+        "vivification_passes",
+        "vivified_clauses",
+        "vivified_literals",
+        "max_decision_level",
+        "solve_time",
+    )
+
+    def __init__(self) -> None:
+        self.decisions = 0
+        self.propagations = 0
+        self.theory_propagations = 0
+        self.assignments = 0
+        self.conflicts = 0
+        self.theory_conflicts = 0
+        self.theory_checks = 0
+        self.learned_clauses = 0
+        self.learned_literals = 0
+        self.learned_lbd_sum = 0
+        self.backjumps = 0
+        self.chrono_backtracks = 0
+        self.vivification_passes = 0
+        self.vivified_clauses = 0
+        self.vivified_literals = 0
+        self.max_decision_level = 0
+        self.solve_time = 0.0
+
+    def __repr__(self) -> str:
+        return f"SolverStatistics({self.as_dict()})"
+
+    @staticmethod
+    def _ratio(numerator: Union[int, float], denominator: Union[int, float]) -> float:
+        return numerator / denominator if denominator else 0.0
+
+    @property
+    def avg_learned_clause_length(self) -> float:
+        return self._ratio(self.learned_literals, self.learned_clauses)
+
+    @property
+    def avg_learned_clause_lbd(self) -> float:
+        """
+        Average LBD (literal block distance - the number of distinct decision
+        levels in a clause) of the learned clauses.
+        """
+        return self._ratio(self.learned_lbd_sum, self.learned_clauses)
+
+    @property
+    def bcp_share(self) -> float:
+        """
+        The fraction of the assignments that were deduced by BCP
+        """
+        return self._ratio(self.propagations, self.assignments)
+
+    @property
+    def decisions_per_second(self) -> float:
+        return self._ratio(self.decisions, self.solve_time)
+
+    @property
+    def propagations_per_second(self) -> float:
+        return self._ratio(self.propagations, self.solve_time)
+
+    @property
+    def conflicts_per_second(self) -> float:
+        return self._ratio(self.conflicts, self.solve_time)
+
+    def record_learned_clause(self, clause_length: int, lbd: int) -> None:
+        """
+        Update the learned clauses counters with a newly learned clause
+        :param clause_length: The number of literals in the learned clause
+        :param lbd: The number of distinct decision levels in the learned clause
+        """
+        self.learned_clauses += 1
+        self.learned_literals += clause_length
+        self.learned_lbd_sum += lbd
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        """
+        Export both the raw counters and the derived measurements
+        :return: A dictionary mapping the statistic name to its value
+        """
+        stats = {name: getattr(self, name) for name in self.__slots__}
+        stats.update(
+            avg_learned_clause_length=self.avg_learned_clause_length,
+            avg_learned_clause_lbd=self.avg_learned_clause_lbd,
+            bcp_share=self.bcp_share,
+            decisions_per_second=self.decisions_per_second,
+            propagations_per_second=self.propagations_per_second,
+            conflicts_per_second=self.conflicts_per_second,
+        )
+        return stats
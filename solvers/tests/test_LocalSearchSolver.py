@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+
+from benchmarks import generators
+from constants import ResultCode
+from DPLLT import DPLL
+from solvers.LocalSearchSolver import (
+    LOCAL_SEARCH_ALGORITHMS,
+    PROBSAT,
+    WALKSAT,
+    LocalSearchSolver,
+)
+from solvers.SATSolver import Solver
+
+
+def _satisfies(formula, assignment):
+    true_lits = {var if value else -var for var, value in assignment.items()}
+    return all(clause & true_lits for clause in formula)
+
+
+def _naive_break_counts(formula, values):
+    break_counts = np.zeros(len(values), dtype=np.int64)
+    for clause in formula:
+        true_lits = [lit for lit in clause if values[abs(lit)] == (lit > 0)]
+        if len(true_lits) == 1:
+            break_counts[abs(true_lits[0])] += 1
+    return break_counts
+
+
+@pytest.mark.parametrize("algorithm", LOCAL_SEARCH_ALGORITHMS)
+def test_finds_model_of_satisfiable_formula(algorithm):
+    formula = generators.random_k_sat(100, 400, k=3, seed=4)
+    solver = LocalSearchSolver(algorithm, max_flips=50000, seed=1)
+    result_code, assignment = solver.solve(formula)
+
+    assert result_code == ResultCode.SAT
+    assert set(assignment) == set(range(1, 101))
+    assert _satisfies(formula, assignment)
+    assert solver.best_num_unsat == 0
+
+
+@pytest.mark.parametrize("algorithm", LOCAL_SEARCH_ALGORITHMS)
+def test_flips_budget_on_unsatisfiable_formula(algorithm):
+    formula = generators.pigeonhole(3)
+    solver = LocalSearchSolver(algorithm, max_flips=300, seed=0)
+    result_code, assignment = solver.solve(formula)
+
+    assert result_code == ResultCode.UNDECIDED
+    assert assignment is None
+    assert solver.flips == 300
+    assert solver.best_num_unsat >= 1
+    best = solver.best_assignment
+    num_unsat = sum(
+        1
+        for clause in formula
+        if not any(best[abs(lit)] == (lit > 0) for lit in clause)
+    )
+    assert num_unsat == solver.best_num_unsat
+
+
+def test_incremental_counters_match_naive():
+    formula = generators.random_k_sat(30, 120, k=4, seed=2)
+    formula.append({5, -5, 7})
+    solver = LocalSearchSolver(max_flips=0, seed=3)
+    solver.solve(formula)
+
+    rng = np.random.default_rng(0)
+    for var in rng.integers(1, 31, size=200):
+        solver.flip(int(var))
+        assert (solver.break_count == _naive_break_counts(formula, solver.values)).all()
+        num_unsat = sum(
+            1
+            for clause in formula
+            if not any(solver.values[abs(lit)] == (lit > 0) for lit in clause)
+        )
+        assert len(solver.unsat_list) == num_unsat
+        assert (solver.true_count[solver.unsat_list] == 0).all()
+
+
+def test_make_counts():
+    formula = [{1, 2}, {1, -3}, {-1, 3}]
+    solver = LocalSearchSolver(max_flips=0, seed=0)
+    solver.solve(formula, initial_phases={1: False, 2: False, 3: True})
+
+    assert sorted(solver.unsat_list) == [0, 1]
+    assert solver.make_counts(np.array([1, 2, 3])).tolist() == [2, 1, 1]
+
+
+def test_seed_is_deterministic():
+    formula = generators.random_k_sat(60, 250, k=3, seed=8)
+    runs = [LocalSearchSolver(WALKSAT, seed=5).solve(formula) for _ in range(2)]
+    assert runs[0] == runs[1]
+
+
+def test_invalid_arguments_raise():
+    with pytest.raises(ValueError):
+        LocalSearchSolver("gsat")
+    with pytest.raises(ValueError):
+        LocalSearchSolver(PROBSAT, max_flips=-1)
+
+
+def test_saved_phases_override_polarity():
+    solver = Solver()
+    solver.add_clause({1, 2})
+    solver.set_phases({1: False, 2: False})
+    assert solver.decide() in (-1, -2)
+
+
+def test_phase_saving_on_unassign():
+    solver = Solver(phase_saving=True)
+    solver.add_clause({1, 2})
+    solver.d_level = 1
+    solver.assign_literal(-1, None)
+    solver.backjump(0)
+    assert solver.saved_phases == {1: False}
+
+
+def test_hybrid_follows_local_search_model():
+    formula = generators.random_k_sat(150, 600, k=3, seed=6)
+    original = [set(clause) for clause in formula]
+    local_search = LocalSearchSolver(max_flips=50000, seed=0)
+    result_code, assignment, stats = DPLL(local_search=local_search).solve(
+        formula, to_abstract=False, return_statistics=True
+    )
+
+    assert result_code == ResultCode.SAT
+    assert stats.conflicts == 0
+    assert _satisfies(original, assignment)
+
+
+@pytest.mark.parametrize("algorithm", LOCAL_SEARCH_ALGORITHMS)
+def test_hybrid_keeps_results(algorithm):
+    instances = [
+        (generators.pigeonhole(4), ResultCode.UNSAT),
+        (generators.parity_chains(6, seed=1), ResultCode.UNSAT),
+        (generators.parity_chains(6, seed=1, satisfiable=True), ResultCode.SAT),
+        (generators.graph_coloring(12, 0.3, 3, seed=2), None),
+    ]
+    for formula, expected in instances:
+        original = [set(clause) for clause in formula]
+        cdcl_result, _ = DPLL().solve([set(c) for c in formula], to_abstract=False)
+        local_search = LocalSearchSolver(algorithm, max_flips=500, seed=0)
+        result_code, assignment = DPLL(
+            phase_saving=True, local_search=local_search
+        ).solve(formula, to_abstract=False)
+
+        assert result_code == cdcl_result
+        if expected is not None:
+            assert result_code == expected
+        if result_code == ResultCode.SAT:
+            assert _satisfies(original, assignment)
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from benchmarks import generators
+from constants import ResultCode
+from DPLLT import DPLL
+from solvers.OccurrenceIndex import (
+    DECISION_HEURISTICS,
+    DLIS,
+    JEROSLOW_WANG,
+    MOMS,
+    OccurrenceIndex,
+    column_to_literal,
+    literal_to_column,
+)
+from solvers.SATSolver import Solver
+
+
+def _build_index(formula):
+    index = OccurrenceIndex()
+    for clause in formula:
+        index.add_clause(clause)
+    return index
+
+
+def _naive_dlis_scores(formula, unsat_clauses, assignment):
+    assigned_vars = {abs(lit) for lit in assignment}
+    scores = {}
+    for clause_id in unsat_clauses:
+        for lit in formula[clause_id]:
+            if abs(lit) not in assigned_vars:
+                scores[lit] = scores.get(lit, 0) + 1
+    return scores
+
+
+def test_literal_column_mapping():
+    for lit in (1, -1, 2, -2, 17, -17):
+        assert column_to_literal(literal_to_column(lit)) == lit
+    assert literal_to_column(1) == 0
+    assert literal_to_column(-1) == 1
+    assert literal_to_column(3) == 4
+
+
+def test_dlis_scores_match_naive_count():
+    formula = generators.random_k_sat(20, 80, k=3, seed=3)
+    index = _build_index(formula)
+    unsat_clauses = set(range(0, len(formula), 2))
+    assignment = {1, -4, 7}
+
+    scores = index.dlis_scores(unsat_clauses, assignment)
+    expected = _naive_dlis_scores(formula, unsat_clauses, assignment)
+    for column, score in enumerate(scores):
+        assert score == expected.get(column_to_literal(column), 0)
+
+
+def test_clauses_added_after_scoring_are_indexed():
+    index = _build_index([{1, 2}])
+    assert index.pick_literal(DLIS, {0}, set()) in (1, 2)
+
+    index.add_clause({-3, 2})
+    index.add_clause({2, 4})
+    assert index.num_clauses == 3
+    assert index.pick_literal(DLIS, {0, 1, 2}, set()) == 2
+    assert index.pick_literal(DLIS, {1}, {2}) == -3
+
+
+def test_jeroslow_wang_prefers_short_clauses():
+    # 1 appears in two long clauses, -2 in a single binary clause
+    formula = [{1, 3, 4, 5}, {1, 6, 7, 8}, {-2, 9}]
+    index = _build_index(formula)
+    unsat_clauses = set(range(len(formula)))
+
+    assert index.pick_literal(DLIS, unsat_clauses, set()) == 1
+    scores = index.jeroslow_wang_scores(unsat_clauses, set())
+    assert scores[literal_to_column(1)] == pytest.approx(2 * 2**-4)
+    assert scores[literal_to_column(-2)] == pytest.approx(2**-2)
+    assert index.pick_literal(JEROSLOW_WANG, unsat_clauses, set()) == -2
+
+
+def test_moms_counts_only_minimal_clauses():
+    # after assigning 5, the first clause has two free literals left
+    formula = [{-3, 4, 5}, {1, 2, 6}, {1, 2, 7}, {1, 8, 9}]
+    index = _build_index(formula)
+    unsat_clauses = set(range(len(formula)))
+
+    assert index.pick_literal(MOMS, unsat_clauses, set()) == 1
+    assert index.pick_literal(MOMS, unsat_clauses, {-5}) in (-3, 4)
+
+
+def test_no_free_literal_raises():
+    index = _build_index([{1, 2}])
+    for heuristic in DECISION_HEURISTICS:
+        with pytest.raises(ValueError):
+            index.pick_literal(heuristic, {0}, {1, -2})
+
+
+def test_unknown_heuristic_raises():
+    with pytest.raises(ValueError):
+        Solver(decision_heuristic="vsids")
+    with pytest.raises(ValueError):
+        _build_index([{1}]).pick_literal("vsids", {0}, set())
+
+
+@pytest.mark.parametrize("heuristic", DECISION_HEURISTICS)
+def test_heuristics_solve_correctly(heuristic):
+    instances = [
+        (generators.random_k_sat(30, 90, k=3, seed=1), ResultCode.SAT),
+        (generators.pigeonhole(4), ResultCode.UNSAT),
+        (generators.parity_chains(8, seed=2), ResultCode.UNSAT),
+        (generators.parity_chains(8, seed=2, satisfiable=True), ResultCode.SAT),
+    ]
+    for formula, expected in instances:
+        original = [set(clause) for clause in formula]
+        result_code, assignment = DPLL(decision_heuristic=heuristic).solve(
+            formula, to_abstract=False
+        )
+        assert result_code == expected
+        if result_code == ResultCode.SAT:
+            true_lits = {lit if value else -lit for lit, value in assignment.items()}
+            assert all(clause & true_lits for clause in original)
+
+
+def test_scores_are_numpy_arrays():
+    index = _build_index([{1, -2}, {2, 3}])
+    assert isinstance(index.dlis_scores({0, 1}, set()), np.ndarray)
@@ -0,0 +1,144 @@
+import os
+import time
+
+import pytest
+
+from DPLLT import DPLL, DPLLT
+from bool_transforms.process_cnf import to_abstract_cnf_conjunction
+from constants import ResultCode
+from parsing.parse import Parser
+from solvers.ResultCache import (
+    FileResultCache,
+    MemoryResultCache,
+    canonical_form,
+)
+from solvers.theories.UFTheory import UFTheory
+from tests.test_utils import verify_unabstracted_assignment
+
+
+parser = Parser()
+
+
+def fingerprint(formula_text):
+    clauses, abstraction_map, _ = to_abstract_cnf_conjunction(
+        parser.parse(formula_text)
+    )
+    return canonical_form(clauses, abstraction_map, "UFTheory")[0]
+
+
+@pytest.mark.parametrize(
+    "formula_text, renamed_text",
+    [
+        ("a & (b | (!c))", "(y | (!z)) & x"),
+        ("a & (b | (!c))", "a & ((!b) | c)"),
+        (
+            "(a = b) & ((f(a) != f(b)) | (g(c) = a))",
+            "((h(x) != h(y)) | (k(z) = x)) & (x = y)",
+        ),
+    ],
+)
+def test_fingerprint_invariant_to_renaming(formula_text, renamed_text):
+    assert fingerprint(formula_text) == fingerprint(renamed_text)
+
+
+@pytest.mark.parametrize(
+    "formula_text, other_text",
+    [
+        ("a & (b | (!c))", "a & (b | c)"),
+        (
+            "(a = b) & ((f(a) != f(b)) | (g(c) = a))",
+            "(a = b) & ((f(a) != f(b)) | (g(c) = b))",
+        ),
+        ("f(a) = b", "f(a, a) = b"),
+        ("a & b", "a & (b = c)"),
+    ],
+)
+def test_fingerprint_distinguishes_problems(formula_text, other_text):
+    assert fingerprint(formula_text) != fingerprint(other_text)
+
+
+def test_fingerprint_of_cnf():
+    fingerprint, canonical = canonical_form([{1, 2}, {-1, 3}])
+    assert canonical_form([{-2, 1}, {3, 2}])[0] == fingerprint
+    assert canonical_form([{1, 2}, {-1, 3}], context="other")[0] != fingerprint
+    assert sorted(canonical) == [1, 2, 3]
+    assert sorted(canonical.values()) == [1, 2, 3]
+
+
+def test_memory_cache_lru_eviction_by_size():
+    cache = MemoryResultCache(max_bytes=2 * (64 + 4 * 3))
+    cache.put("a" * 64, ResultCode.SAT, [1, -2, 3])
+    cache.put("b" * 64, ResultCode.SAT, [1, 2, -3])
+    assert cache.get("a" * 64)[0] == ResultCode.SAT
+    cache.put("c" * 64, ResultCode.UNSAT, None)
+
+    assert cache.get("b" * 64) is None
+    assert cache.get("c" * 64) == (ResultCode.UNSAT, None)
+    assert cache.get("a" * 64)[1].tolist() == [1, -2, 3]
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    with pytest.raises(ValueError, match="Can't cache"):
+        cache.put("d" * 64, ResultCode.UNDECIDED, None)
+    with pytest.raises(ValueError, match="max_bytes"):
+        MemoryResultCache(max_bytes=-1)
+
+
+def test_file_cache(tmp_path):
+    directory = str(tmp_path)
+    FileResultCache(directory).put("first", ResultCode.SAT, [1, -2, 3])
+    FileResultCache(directory).put("second", ResultCode.UNSAT, None)
+
+    cache = FileResultCache(directory)
+    result_code, model = cache.get("first")
+    assert result_code == ResultCode.SAT
+    assert model.tolist() == [1, -2, 3]
+    assert cache.get("second") == (ResultCode.UNSAT, None)
+    assert cache.get("third") is None
+
+    # the least recently used files are removed
+    first_path = os.path.join(directory, "first.result.npy")
+    file_size = os.path.getsize(first_path)
+    old = time.time() - 100
+    os.utime(os.path.join(directory, "second.result.npy"), (old, old))
+    small_cache = FileResultCache(directory, max_bytes=2 * file_size)
+    small_cache.put("third", ResultCode.SAT, [-1, 2, 3])
+    assert sorted(os.listdir(directory)) == ["first.result.npy", "third.result.npy"]
+    assert small_cache.nbytes <= small_cache.max_bytes
+
+
+@pytest.mark.parametrize("make_cache", [MemoryResultCache, FileResultCache])
+def test_dpllt_with_result_cache(tmp_path, make_cache):
+    if make_cache is MemoryResultCache:
+        cache = MemoryResultCache()
+    else:
+        cache = FileResultCache(str(tmp_path))
+    solver = DPLLT(UFTheory(), result_cache=cache)
+    formulas = [
+        ("(a = b) & ((f(a) != f(b)) | (g(c) = a))", ResultCode.SAT),
+        ("((h(x) != h(y)) | (k(z) = x)) & (x = y)", ResultCode.SAT),
+        ("(f(a) = a) & (f(f(a)) != a)", ResultCode.UNSAT),
+        ("(f(x) != x) & (x = f(x))", ResultCode.UNSAT),
+    ]
+    for formula_text, expected_result_code in formulas:
+        formula = parser.parse(formula_text)
+        result_code, assignment = solver.solve(formula)
+        assert result_code == expected_result_code
+        if expected_result_code == ResultCode.SAT:
+            # the cached model is translated to the atoms of the formula
+            assert verify_unabstracted_assignment(formula, assignment)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_dpll_with_result_cache():
+    solver = DPLL(result_cache=MemoryResultCache())
+    formula = [{1, 2}, {-1, 3}, {-3, -2}]
+    result_code, assignment = solver.solve(formula, to_abstract=False)
+    renamed = [{5, 4}, {-5, 6}, {-6, -4}]
+    renamed_result_code, renamed_assignment = solver.solve(renamed, to_abstract=False)
+
+    assert result_code == renamed_result_code == ResultCode.SAT
+    assert solver.result_cache.hits == 1
+    assert set(renamed_assignment) == {4, 5, 6}
+    for clause in renamed:
+        assert any(renamed_assignment[abs(lit)] == (lit > 0) for lit in clause)
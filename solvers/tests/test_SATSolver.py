@@ -0,0 +1,98 @@
+import pytest
+
+from benchmarks import generators
+from constants import ResultCode
+from DPLLT import DPLL
+from solvers.OccurrenceIndex import column_to_literal
+from solvers.SATSolver import Solver
+
+
+def _register(solver, formula):
+    for set_clause in formula:
+        clause_id = solver.add_clause(set_clause)
+        solver.deduce(clause_id)
+
+
+def test_vivify_removes_implied_false_literal():
+    formula = [{1, 2, 3}, {1, -2}, {4, 5}]
+    clause = formula[0]
+    solver = Solver()
+    _register(solver, formula)
+
+    assert solver.vivify(propagation_budget=100) == 1
+    assert solver.clauses[0].set_clause == {1, 3}
+    # the caller's clause isn't modified
+    assert clause == {1, 2, 3}
+    assert 0 not in solver.int_lits_to_clauses_ids[2]
+    assert solver.d_level == 0
+    assert solver.assignment == set()
+    assert solver.clauses[0].watch_literals == {1, 3}
+
+    stats = solver.stats
+    assert stats.vivification_passes == 1
+    assert stats.vivified_clauses == 1
+    assert stats.vivified_literals == 1
+
+    scores = solver.occurrences.dlis_scores(solver.unsat_clauses, solver.assignment)
+    assert {
+        column_to_literal(column): int(score)
+        for column, score in enumerate(scores)
+        if score
+    } == {1: 2, 3: 1, -2: 1, 4: 1, 5: 1}
+
+
+def test_vivify_conflict_shortens_to_unit():
+    formula = [{1, 2, 3}, {1, 4}, {1, -4}]
+    solver = Solver()
+    _register(solver, formula)
+
+    solver.vivify(propagation_budget=100)
+    assert solver.clauses[0].set_clause == {1}
+    assert 0 in solver.bcp_clauses_queue
+    assert solver.deduce(0) == (ResultCode.SAT, 1)
+
+
+def test_vivify_skips_vivified_clauses():
+    solver = Solver()
+    _register(solver, [{1, 2, 3}, {1, -2}])
+    solver.vivify(propagation_budget=100)
+    assert solver.vivify(propagation_budget=100) == 0
+    assert solver.stats.vivification_passes == 2
+
+
+def test_vivify_requires_level_0():
+    solver = Solver()
+    _register(solver, [{1, 2}])
+    solver.d_level = 1
+    solver.assign_literal(1, None)
+    with pytest.raises(ValueError):
+        solver.vivify(propagation_budget=100)
+
+
+@pytest.mark.parametrize(
+    "formula, expected_result_code",
+    [
+        (generators.pigeonhole(5), ResultCode.UNSAT),
+        (generators.parity_chains(8, seed=3), ResultCode.UNSAT),
+        (generators.random_k_sat(50, 213, seed=2), None),
+        (generators.tseitin_expander(10, 3, seed=1), None),
+    ],
+)
+def test_dpll_with_vivification(formula, expected_result_code):
+    expected, _ = DPLL().solve([set(c) for c in formula], to_abstract=False)
+    if expected_result_code is not None:
+        assert expected == expected_result_code
+
+    solver = DPLL(vivify_interval=5, vivify_budget=500)
+    result_code, assignment = solver.solve([set(c) for c in formula], to_abstract=False)
+    assert result_code == expected
+    if result_code == ResultCode.SAT:
+        true_lits = {var if value else -var for var, value in assignment.items()}
+        assert all(clause & true_lits for clause in formula)
+    if solver.statistics.conflicts >= 5:
+        assert solver.statistics.vivification_passes >= 1
+
+
+def test_invalid_vivify_interval():
+    with pytest.raises(ValueError):
+        DPLL(vivify_interval=0)
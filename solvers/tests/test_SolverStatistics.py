@@ -0,0 +1,100 @@
+import pytest
+
+from benchmarks.generators import pigeonhole
+from constants import ResultCode
+from DPLLT import DPLL, DPLLT
+from parsing.parse import Parser
+from solvers.SolverStatistics import SolverStatistics
+from solvers.theories.UFTheory import UFTheory
+
+parser = Parser()
+
+
+def test_statistics_returned_alongside_result():
+    solver = DPLL()
+    formula = [{1, 2}, {-1, 2}, {1, -2}, {-1, -2}]
+    result_code, assignment, stats = solver.solve(
+        formula, to_abstract=False, return_statistics=True
+    )
+
+    assert result_code == ResultCode.UNSAT
+    assert assignment is None
+    assert stats is solver.statistics
+    assert stats.decisions >= 1
+    assert stats.conflicts >= 1
+    assert stats.learned_clauses >= 1
+    assert stats.backjumps == stats.learned_clauses
+    assert stats.solve_time > 0
+
+
+def test_statistics_bcp_share():
+    solver = DPLL()
+    formula = [{1}, {-1, 2}, {-2, 3}, {-3, 4}]
+    result_code, _ = solver.solve(formula, to_abstract=False)
+    stats = solver.statistics
+
+    assert result_code == ResultCode.SAT
+    assert stats.decisions == 0
+    assert stats.assignments == stats.propagations == 4
+    assert stats.bcp_share == pytest.approx(1.0)
+    assert stats.max_decision_level == 0
+
+
+def test_statistics_reset_between_solves():
+    solver = DPLL()
+    solver.solve([{1, 2}, {-1, 2}, {1, -2}, {-1, -2}], to_abstract=False)
+    first_stats = solver.statistics
+    solver.solve([{1}], to_abstract=False)
+
+    assert solver.statistics is not first_stats
+    assert solver.statistics.conflicts == 0
+
+
+def test_theory_statistics():
+    solver = DPLLT(UFTheory())
+    formula = parser.parse("(f(a) = a) & ((f(f(a)) != a) | (b = c))")
+    solver.solve(formula)
+    stats = solver.statistics
+
+    assert stats.theory_checks >= 1
+    assert stats.theory_conflicts <= stats.conflicts
+
+
+def test_derived_statistics_of_empty_statistics():
+    stats = SolverStatistics()
+    assert stats.avg_learned_clause_length == 0.0
+    assert stats.avg_learned_clause_lbd == 0.0
+    assert stats.bcp_share == 0.0
+    assert stats.conflicts_per_second == 0.0
+
+    stats.record_learned_clause(clause_length=3, lbd=2)
+    stats.record_learned_clause(clause_length=1, lbd=1)
+    as_dict = stats.as_dict()
+    assert as_dict["avg_learned_clause_length"] == pytest.approx(2.0)
+    assert as_dict["avg_learned_clause_lbd"] == pytest.approx(1.5)
+
+
+def test_chrono_backtracks_counted():
+    formula = [{1, 2, 3}, {1, 2, -3}, {1, -2, 3}, {1, -2, -3}, {-1, 4}, {-1, -4}]
+    solver = DPLL(chrono_threshold=0)
+    result_code, _ = solver.solve([set(c) for c in formula], to_abstract=False)
+    stats = solver.statistics
+
+    assert result_code == ResultCode.UNSAT
+    assert DPLL().solve(formula, to_abstract=False)[0] == ResultCode.UNSAT
+    assert 0 < stats.chrono_backtracks <= stats.learned_clauses
+
+
+def test_chrono_backjumps_counted_once_per_conflict():
+    # the conflicts of the out-of-order trail involve a lower decision level
+    solver = DPLL(chrono_threshold=0)
+    result_code, _ = solver.solve(pigeonhole(4), to_abstract=False)
+    stats = solver.statistics
+
+    assert result_code == ResultCode.UNSAT
+    assert stats.backjumps == stats.learned_clauses
+
+
+def test_invalid_chrono_threshold():
+    with pytest.raises(ValueError):
+        DPLL(chrono_threshold=-1)
@@ -359,3 +359,34 @@ def test_invalid_atom_types_check(formula_str):
     formula = parser.parse(formula_str)
     with pytest.raises(ValueError):
         uf_theory.preprocess(formula)
+
+
+def test_conflict_recovery_non_prefix_assignment():
+    abs_literals_to_ints = {
+        Equal(f_3a, a): 1,
+        NEqual(f_3a, a): -1,
+        Equal(f_5a, a): 2,
+        NEqual(f_5a, a): -2,
+        Equal(f_a, a): 3,
+        NEqual(f_a, a): -3,
+    }
+
+    uf_theory.reset()
+    uf_theory.register_abstraction_map(
+        {v: k for (k, v) in abs_literals_to_ints.items()}
+    )
+
+    uf_theory.process_assignment(1)
+    uf_theory.process_assignment(-3)
+    uf_theory.process_assignment(2)
+    assert uf_theory.is_t_conflict()
+
+    # a chronological backtrack may keep later assignments while dropping
+    # earlier ones - the assignment isn't a prefix of the current one
+    uf_theory.conflict_recovery([1, 2])
+    assert uf_theory.cur_assignment == [1, 2]
+    assert not uf_theory.is_t_conflict()
+    assert uf_theory.pop_t_propagation() == 3
+
+    uf_theory.process_assignment(-3)
+    assert uf_theory.analyze_satisfiability() == (ResultCode.UNSAT, {-1, -2, 3})
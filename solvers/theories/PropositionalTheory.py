@@ -10,8 +10,6 @@ from abc import abstractmethod
 from typing import Union, Set, Tuple, Dict
 from constants import ResultCode
 from parsing.logical_blocks import (
-    UnaryOp,
-    BinaryOp,
     Atom,
     Var,
     And,
@@ -19,6 +17,7 @@ from parsing.logical_blocks import (
     Imply,
     Equiv,
     Negate,
+    iter_subformulas,
 )
 
 PROPOSITIONAL_SUPPORTED_TYPES = (Var, And, Or, Imply, Equiv, Negate)
@@ -40,14 +39,22 @@ class PropositionalTheory:
         self._check_atom_types_validity(formula)
         return formula
 
+    @abstractmethod
+    def preprocess_assertion(self, assertion: Atom) -> Atom:
+        """
+        Called by the DPLLT solver to adapt a single assertion of a formula
+        given as a stream of assertions (whose conjunction is the formula).
+        Unlike preprocess, the information gathered from the previous
+        assertions since the last reset is kept.
+        :param assertion: assertion to adapt
+        :return: the adapted assertion after preprocess
+        """
+        return self.preprocess(assertion)
+
     def _check_atom_types_validity(self, formula: Atom):
-        if not isinstance(formula, self.allowed_atoms_types):
-            raise ValueError(f"{type(formula)} is not supported by theory")
-        elif isinstance(formula, BinaryOp):
-            self._check_atom_types_validity(formula.left)
-            self._check_atom_types_validity(formula.right)
-        elif isinstance(formula, UnaryOp):
-            self._check_atom_types_validity(formula.item)
+        for sub_formula in iter_subformulas(formula):
+            if not isinstance(sub_formula, self.allowed_atoms_types):
+                raise ValueError(f"{type(sub_formula)} is not supported by theory")
 
     @abstractmethod
     def register_abstraction_map(self, abstraction_map: Dict[int, Atom]) -> None:
@@ -94,6 +101,29 @@ class PropositionalTheory:
         """
         pass
 
+    @abstractmethod
+    def get_checkpoint_state(self) -> Dict:
+        """
+        Get the theory state which can't be derived from the abstraction map
+        (e.g. information gathered during the preprocess), to be saved in a
+        solver checkpoint. The assignments are not included since they are
+        replayed by the DPLLT solver.
+        :return: A picklable dictionary of the state
+        """
+        return dict()
+
+    @abstractmethod
+    def load_checkpoint_state(
+        self, state: Dict, abstraction_map: Dict[int, Atom]
+    ) -> None:
+        """
+        Reset the theory and load a state saved by get_checkpoint_state
+        :param state: The state to load
+        :param abstraction_map: The abstraction map of the checkpoint
+        """
+        self.reset()
+        self.register_abstraction_map(abstraction_map)
+
     @abstractmethod
     def reset(self) -> None:
         """
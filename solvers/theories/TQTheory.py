@@ -28,10 +28,10 @@ from parsing.logical_blocks import (
     And,
     Geq,
     NEqual,
-    BinaryOp,
-    UnaryOp,
     Negate,
     Less,
+    iter_subformulas,
+    rewrite,
 )
 from solvers.theories.PropositionalTheory import (
     PropositionalTheory,
@@ -40,7 +40,6 @@ from solvers.theories.PropositionalTheory import (
 import numpy as np
 from scipy.optimize import linprog
 
-
 TQ_SUPPORTED_TYPES = PROPOSITIONAL_SUPPORTED_TYPES + (Equal, NEqual, Less, Geq)
 
 UNBOUNDED_STATUS = 3
@@ -76,7 +75,7 @@ class TQTheory(PropositionalTheory):
         self.simplex = scipy_max_simplex
         self.abstraction_map = None
         self.support_negative_vars = support_negative_vars
-        self.original_formula = None
+        self.is_preprocessed = False
         self.positive_literals_in_original = set()
         self.reset()
 
@@ -90,7 +89,7 @@ class TQTheory(PropositionalTheory):
         self.simplex = scipy_max_simplex
         self.abstraction_map = None
         self.support_negative_vars = self.support_negative_vars
-        self.original_formula = None
+        self.is_preprocessed = False
         self.positive_literals_in_original = set()
 
     def register_abstraction_map(self, abstraction_map):
@@ -103,6 +102,10 @@ class TQTheory(PropositionalTheory):
         self.abstraction_map = abstraction_map
 
     def _preprocess_helper(self, tq_formula: Atom):
+        return rewrite(tq_formula, leaf=self._preprocess_literal)
+
+    @staticmethod
+    def _preprocess_literal(tq_formula: Atom):
         if isinstance(tq_formula, Equal):
             # ax=b <-> [(ax >= b) & (-ax >= -b)]
             return _convert_equality(tq_formula)
@@ -115,50 +118,34 @@ class TQTheory(PropositionalTheory):
 
         elif isinstance(tq_formula, Negate) and isinstance(tq_formula.item, NEqual):
             return _convert_equality(tq_formula.item.negate())
-
-        if not tq_formula.is_literal():
-            if isinstance(tq_formula, BinaryOp):
-                tq_formula.left = self._preprocess_helper(tq_formula.left)
-                tq_formula.right = self._preprocess_helper(tq_formula.right)
-
-            elif isinstance(tq_formula, UnaryOp):
-                tq_formula.item = self._preprocess_helper(tq_formula.item)
-
         return tq_formula
 
     def _check_args_validity(self, formula: Atom):
-        if isinstance(formula, BinaryOp):
-            self._check_args_validity(formula.left)
-            self._check_args_validity(formula.right)
-
-        elif isinstance(formula, UnaryOp):
-            self._check_args_validity(formula.item)
-
-        elif isinstance(formula, (Less, Geq, Equal, NEqual)):
-            if not isinstance(formula.left, np.ndarray) or not isinstance(
-                formula.right, int
-            ):
-                left_type, right_type = type(formula.left), type(formula.right)
-                error_msg = (
-                    f"Types or atom arguments should be np.ndarray,"
-                    f" int. Got {left_type}, {right_type} instead"
-                )
-                raise ValueError(error_msg)
+        for sub_formula in iter_subformulas(formula):
+            if isinstance(sub_formula, (Less, Geq, Equal, NEqual)):
+                if not isinstance(sub_formula.left, np.ndarray) or not isinstance(
+                    sub_formula.right, int
+                ):
+                    left_type = type(sub_formula.left)
+                    right_type = type(sub_formula.right)
+                    error_msg = (
+                        f"Types or atom arguments should be np.ndarray,"
+                        f" int. Got {left_type}, {right_type} instead"
+                    )
+                    raise ValueError(error_msg)
 
     def _register_original_positive_literals(self, formula: Atom):
-        if isinstance(formula, (Equal, Geq)):
-            self.positive_literals_in_original.add(formula)
-        elif isinstance(formula, NEqual):
-            self.positive_literals_in_original.add(Equal(formula.left, formula.right))
-        elif isinstance(formula, Less):
-            self.positive_literals_in_original.add(Geq(formula.left, formula.right))
-
-        elif isinstance(formula, UnaryOp):
-            self._register_original_positive_literals(formula.item)
-
-        elif isinstance(formula, BinaryOp):
-            self._register_original_positive_literals(formula.left)
-            self._register_original_positive_literals(formula.right)
+        for sub_formula in iter_subformulas(formula):
+            if isinstance(sub_formula, (Equal, Geq)):
+                self.positive_literals_in_original.add(sub_formula)
+            elif isinstance(sub_formula, NEqual):
+                self.positive_literals_in_original.add(
+                    Equal(sub_formula.left, sub_formula.right)
+                )
+            elif isinstance(sub_formula, Less):
+                self.positive_literals_in_original.add(
+                    Geq(sub_formula.left, sub_formula.right)
+                )
 
     def preprocess(self, formula: Atom):
         """
@@ -167,10 +154,45 @@ class TQTheory(PropositionalTheory):
         :return: the adapted formula after preprocess
         """
         self.reset()
-        super().preprocess(formula)
-        self._check_args_validity(formula)
-        self._register_original_positive_literals(formula)
-        return self._preprocess_helper(formula)
+        return self.preprocess_assertion(formula)
+
+    def preprocess_assertion(self, assertion: Atom):
+        """
+        Called by the DPLLT solver to adapt a single assertion of a formula
+        given as a stream of assertions, keeping the literals registered from
+        the previous assertions.
+        :param assertion: assertion to adapt
+        :return: the adapted assertion after preprocess
+        """
+        super().preprocess(assertion)
+        self._check_args_validity(assertion)
+        self._register_original_positive_literals(assertion)
+        self.is_preprocessed = True
+        return self._preprocess_helper(assertion)
+
+    def get_checkpoint_state(self) -> Dict:
+        """
+        Get the theory state which can't be derived from the abstraction map,
+        to be saved in a solver checkpoint.
+        :return: A picklable dictionary of the state
+        """
+        return {
+            "is_preprocessed": self.is_preprocessed,
+            "positive_literals_in_original": self.positive_literals_in_original,
+        }
+
+    def load_checkpoint_state(
+        self, state: Dict, abstraction_map: Dict[int, Atom]
+    ) -> None:
+        """
+        Reset the theory and load a state saved by get_checkpoint_state
+        :param state: The state to load
+        :param abstraction_map: The abstraction map of the checkpoint
+        """
+        self.reset()
+        self.is_preprocessed = state["is_preprocessed"]
+        self.positive_literals_in_original = state["positive_literals_in_original"]
+        self.register_abstraction_map(abstraction_map)
 
     def _translate_unconstrained_to_standard(self, a):
         # if so each x_i will be represented as x_i+ - x_i-
@@ -262,6 +284,34 @@ class TQTheory(PropositionalTheory):
                 conflict_clause.add(-literal)
             return ResultCode.UNSAT, conflict_clause
 
+    def get_model_values(self) -> Union[None, np.ndarray]:
+        """
+        Finds values of the variables satisfying the linear constraints of the
+        current assignment. The strict inequalities are satisfied by
+        maximizing their common slack y (bounded by 1).
+        :return: an array of the variables values, None if there are no
+                 active constraints or the LP solver failed
+        """
+        if self.A is None:
+            return None
+
+        y_bound = np.zeros((1, self.A.shape[1]))
+        y_bound[0, -1] = 1
+        a = np.vstack((self.A, y_bound))
+        b = np.vstack((self.b, [[1]])).flatten()
+        c = np.zeros(self.A.shape[1])
+        c[-1] = 1
+
+        res = self.simplex(a, b, c)
+        if not res.success:
+            return None
+
+        values = res.x[:-1]
+        if self.support_negative_vars:
+            # x_i is represented as x_i+ - x_i-
+            values = values[0::2] - values[1::2]
+        return values
+
     def pop_t_propagation(self):
         """
         Pops theory propagation suggestion if one exists for the current state.
@@ -281,7 +331,7 @@ class TQTheory(PropositionalTheory):
         :param assignment_map: assignment map (atom -> bool) to convert
         :return: the converted assignment map
         """
-        if not self.original_formula:
+        if not self.is_preprocessed:
             return assignment_map
 
         # adds =, != which were removed during preprocessing
@@ -291,13 +341,15 @@ class TQTheory(PropositionalTheory):
 
         for eq in eqs_in_original_formula:
             converted_eq = _convert_equality(eq)
-            eq_equivs = (converted_eq.left, converted_eq.right)
-            if all([e in assignment_map.keys() for e in eq_equivs]):
-                num_true_equivs = sum(assignment_map[e] for e in eq_equivs)
-                if num_true_equivs == 2:
-                    assignment_map[eq] = True
-                else:
-                    assignment_map[eq] = False
+            eq_equivs = converted_eq.items
+            equivs_values = [
+                assignment_map[e] for e in eq_equivs if e in assignment_map
+            ]
+            # a single assigned False half is enough to determine the eq
+            if not all(equivs_values):
+                assignment_map[eq] = False
+            elif len(equivs_values) == len(eq_equivs):
+                assignment_map[eq] = True
 
         # removes >=, < that were added in preprocessing and not existed before
         geqs_in_assignment_map = [
@@ -40,8 +40,7 @@ from parsing.logical_blocks import (
     Equal,
     NEqual,
     Atom,
-    UnaryOp,
-    BinaryOp,
+    iter_subformulas,
 )
 from copy import deepcopy
 from solvers.theories.PropositionalTheory import (
@@ -71,12 +70,16 @@ class TheoryState(object):
 def _unique_expressions_helper(
     expressions_set: Set[LiteralExpression], cur_expr: LiteralExpression
 ):
-    if isinstance(cur_expr, Negate):
-        cur_expr = cur_expr.item
-    expressions_set.add(cur_expr)
-    if isinstance(cur_expr, Func):
-        for arg in cur_expr.args:
-            _unique_expressions_helper(expressions_set, arg)
+    stack = [cur_expr]
+    while stack:
+        cur_expr = stack.pop()
+        if isinstance(cur_expr, Negate):
+            cur_expr = cur_expr.item
+        if cur_expr in expressions_set:
+            continue
+        expressions_set.add(cur_expr)
+        if isinstance(cur_expr, Func):
+            stack.extend(cur_expr.args)
 
 
 def get_unique_terms(
@@ -104,12 +107,19 @@ class CongruenceGraph:
         self._init_graph(unique_terms)
 
     def _add_edges(self, edge_origin: LiteralExpression):
-        if isinstance(edge_origin, Func):
-            for arg in edge_origin.args:
-                if arg in self.graph:
-                    self.graph.add_edge(edge_origin, arg)
-                    self.graph.nodes[arg]["parents"].add(edge_origin)
-                    self._add_edges(arg)
+        visited = set()
+        stack = [edge_origin]
+        while stack:
+            edge_origin = stack.pop()
+            if edge_origin in visited:
+                continue
+            visited.add(edge_origin)
+            if isinstance(edge_origin, Func):
+                for arg in edge_origin.args:
+                    if arg in self.graph:
+                        self.graph.add_edge(edge_origin, arg)
+                        self.graph.nodes[arg]["parents"].add(edge_origin)
+                        stack.append(arg)
 
     def _set_node_rep(self, node_atom, node_rep):
         nx.set_node_attributes(self.graph, {node_atom: node_rep}, "rep")
@@ -129,10 +139,11 @@ class CongruenceGraph:
                 f"node with {node_atom} label doesn't exists" f" in the graph"
             )
 
-        if self.graph.nodes[node_atom]["rep"] == node_atom:
-            return node_atom
-        else:
-            return self.get_rep(self.graph.nodes[node_atom]["rep"])
+        nodes = self.graph.nodes
+        rep = nodes[node_atom]["rep"]
+        while rep != node_atom:
+            node_atom, rep = rep, nodes[rep]["rep"]
+        return node_atom
 
     def _merge_terms_classes(
         self, t1_elem: LiteralExpression, t2_elem: LiteralExpression
@@ -209,12 +220,14 @@ class UFTheory(PropositionalTheory):
         self.assignments_log = None
 
     def _check_eqs_neqs_args_validity(self, formula):
-        if isinstance(formula, (Equal, NEqual)):
-            left_arg, right_arg = formula.left, formula.right
+        for sub_formula in iter_subformulas(formula):
+            if not isinstance(sub_formula, (Equal, NEqual)):
+                continue
+            left_arg, right_arg = sub_formula.left, sub_formula.right
             if not isinstance(left_arg, Atom) or not isinstance(right_arg, Atom):
 
                 error_msg = (
-                    f"In UFTheory both {type(formula)} args must"
+                    f"In UFTheory both {type(sub_formula)} args must"
                     f" be atoms. Got "
                     f"{type(left_arg)}, {type(right_arg)} instead"
                 )
@@ -227,23 +240,26 @@ class UFTheory(PropositionalTheory):
 
             if (not all_args_literals) or any_args_eqs_neqs:
                 error_msg = (
-                    f"In UFTheory both {type(formula)} args must"
+                    f"In UFTheory both {type(sub_formula)} args must"
                     f" be literals. Got "
                     f"{type(left_arg)}, {type(right_arg)} instead."
                 )
 
                 raise ValueError(error_msg)
 
-        elif isinstance(formula, UnaryOp):
-            self._check_eqs_neqs_args_validity(formula.item)
-
-        elif isinstance(formula, BinaryOp):
-            self._check_eqs_neqs_args_validity(formula.left)
-            self._check_eqs_neqs_args_validity(formula.right)
-
     def _check_funcs_args_validity(self, formula):
-        if isinstance(formula, Func):
-            for arg in formula.args:
+        funcs = [
+            sub_formula
+            for sub_formula in iter_subformulas(formula)
+            if isinstance(sub_formula, Func)
+        ]
+        checked = set()
+        while funcs:
+            func = funcs.pop()
+            if func in checked:
+                continue
+            checked.add(func)
+            for arg in func.args:
                 if not arg.is_literal():
                     error_msg = f"Functions args must be literals." f" Got {type(arg)}"
                     raise ValueError(error_msg)
@@ -252,14 +268,7 @@ class UFTheory(PropositionalTheory):
                     raise ValueError(f"Functions args can't be {type(arg)}")
 
                 elif isinstance(arg, Func):
-                    self._check_funcs_args_validity(arg)
-
-        elif isinstance(formula, UnaryOp):
-            self._check_funcs_args_validity(formula.item)
-
-        elif isinstance(formula, BinaryOp):
-            self._check_funcs_args_validity(formula.left)
-            self._check_funcs_args_validity(formula.right)
+                    funcs.append(arg)
 
     def _check_formula_validity(self, formula):
         self._check_eqs_neqs_args_validity(formula)
@@ -340,9 +349,9 @@ class UFTheory(PropositionalTheory):
         self.t_propagations_queue = state.t_propagations_queue
         self.active_neqs = state.active_neqs
         self.cur_assignment = new_assignment
-        self.assignment_to_state[
-            tuple(self.cur_assignment)
-        ] = self._get_cur_state_copy()
+        self.assignment_to_state[tuple(self.cur_assignment)] = (
+            self._get_cur_state_copy()
+        )
 
     def _remove_states_after(self, new_assignment: Tuple[int]):
         remove_from_idx = self.assignments_log.index(new_assignment)
@@ -440,15 +449,28 @@ class UFTheory(PropositionalTheory):
     def conflict_recovery(self, assignment: Union[List[int], Set[int]]):
         """
         Recovers the theory to the state where its assignment is the given
-        assignment
+        assignment. A list assignment (ordered by the assignment order) doesn't
+        have to be a prefix of the current assignment (the SAT solver may keep
+        later assignments when backtracking chronologically) - the state is
+        restored to the longest common prefix and the rest is replayed.
         :param assignment: an assignment to recover the state to
         """
         if isinstance(assignment, set):
             assignment = self.cur_assignment[: len(assignment)]
-        state_to_revert = self.assignment_to_state[tuple(assignment)]
 
-        self._restore_properties(state_to_revert, assignment)
-        self._remove_states_after(tuple(assignment))
+        common_prefix_len = 0
+        for cur_lit, lit in zip(self.cur_assignment, assignment):
+            if cur_lit != lit:
+                break
+            common_prefix_len += 1
+
+        common_prefix = list(assignment[:common_prefix_len])
+        state_to_revert = self.assignment_to_state[tuple(common_prefix)]
+        self._restore_properties(state_to_revert, common_prefix)
+        self._remove_states_after(tuple(common_prefix))
+
+        for int_literal in assignment[common_prefix_len:]:
+            self.process_assignment(int_literal)
 
     def check_t_propagations(self) -> bool:
         return bool(self.t_propagations_queue)
@@ -490,12 +512,3 @@ class UFTheory(PropositionalTheory):
             self._remove_states_after(tuple(cur_assignment))
 
             return ResultCode.UNSAT, conflict_core
-
-    def to_pre_theory_assignment(self, assignment_map: Dict[Atom, bool]):
-        """
-        Converts the assignment map given into an assignment map which its
-        literals are in their pre theory processing form.
-        :param assignment_map: assignment map (atom -> bool) to convert
-        :return: the converted assignment map
-        """
-        return super().to_pre_theory_assignment(assignment_map)
@@ -1,10 +1,12 @@
 import pytest
 from constants import ResultCode
 from DPLLT import DPLL
+from parsing.logical_blocks import And, Var
 from tests.test_utils import verify_abstracted_assignment
 
 
 dpll = DPLL()
+chrono_dpll = DPLL(chrono_threshold=0)
 
 f1 = [{1, 2, -3}, {1, 3}, {1, -1}, {1, -1, 2}]
 f2 = [{1, 2, -3}, {2, 3, 4}, {1, 3, -5}, {-1, 2, -4, 5}]
@@ -1135,3 +1137,44 @@ def test_sat_solver(formula_ints, expected_result_code):
 
     if expected_result_code == ResultCode.SAT:
         assert verify_abstracted_assignment(formula_ints, satisfying_assignment)
+
+
+@pytest.mark.parametrize(
+    "formula_ints, expected_result_code",
+    [
+        (f1, ResultCode.SAT),
+        (f2, ResultCode.SAT),
+        (f3, ResultCode.SAT),
+        (f4, ResultCode.UNSAT),
+        (f5, ResultCode.UNSAT),
+        (f6, ResultCode.SAT),
+        (f7, ResultCode.SAT),
+        (f8, ResultCode.SAT),
+        (f9, ResultCode.SAT),
+        (f10, ResultCode.SAT),
+        (f11, ResultCode.UNSAT),
+        (f12, ResultCode.UNSAT),
+        (f13, ResultCode.SAT),
+        (f14, ResultCode.SAT),
+        (f15, ResultCode.SAT),
+    ],
+    ids=[f"case{i + 1}" for i in range(15)],
+)
+def test_sat_solver_chronological_backtracking(formula_ints, expected_result_code):
+    result_code, satisfying_assignment = chrono_dpll.solve(
+        [set(clause) for clause in formula_ints], to_abstract=False
+    )
+    assert result_code == expected_result_code
+
+    if expected_result_code == ResultCode.SAT:
+        assert verify_abstracted_assignment(formula_ints, satisfying_assignment)
+
+
+def test_deep_formula():
+    depth = 3000
+    formula = Var("x0")
+    for i in range(1, depth):
+        formula = And(Var(f"x{i}"), formula)
+    result, assignment = DPLL().solve(formula)
+    assert result == ResultCode.SAT
+    assert all(assignment[Var(f"x{i}")] for i in range(depth))
@@ -105,3 +105,29 @@ def test_big_case():
 
     assert verify_unabstracted_assignment(formula, with_negatives_assignment)
     assert verify_unabstracted_assignment(formula, without_negatives_assignment)
+
+
+def test_assertions_stream():
+    assertions_strs = ["[1, -1, 0] = 3", "([2, 1, 0] < 1) | ([1, 1, 1] >= 7)"]
+    result_code, assignment = solver_with_negatives.solve_assertions(
+        parser.parse_assertions(assertions_strs)
+    )
+
+    assert result_code == ResultCode.SAT
+    for assertion_str in assertions_strs:
+        assert verify_unabstracted_assignment(parser.parse(assertion_str), assignment)
+
+
+def test_equality_with_a_single_false_half():
+    # only [1, 1] >= 3 of the halves of [1, 1] = 3 is assigned (False), which
+    # determines the equality
+    formula_str = (
+        "((([0, -2] < -3) | ([2, 2] >= 1)) -> "
+        "(([1, 1] = 3) <-> (([0, -1] >= -1) & ([-1, -1] < -1))))"
+    )
+    formula = parser.parse(formula_str)
+    result_code, assignment = DPLLT(TQTheory()).solve(formula)
+
+    assert result_code == ResultCode.SAT
+    assert parser.parse("[1, 1] = 3") in assignment
+    assert verify_unabstracted_assignment(formula, assignment)
@@ -1,7 +1,8 @@
 import pytest
 
-from DPLLT import DPLLT
+from DPLLT import DPLLT, LazyModel
 from constants import ResultCode
+from parsing.logical_blocks import Var
 from parsing.parse import Parser
 from tests.test_utils import verify_unabstracted_assignment
 from solvers.theories.UFTheory import UFTheory
@@ -52,6 +53,11 @@ str_uf4 = (
 
 uf_theory = UFTheory()
 solver = DPLLT(uf_theory)
+chrono_solver = DPLLT(UFTheory(), chrono_threshold=0)
+polarity_solver = DPLLT(UFTheory(), tseitin_encoding="polarity")
+simplify_solver = DPLLT(UFTheory(), simplify=True)
+incremental_solver = DPLLT(UFTheory(), incremental_abstraction=True)
+lazy_solver = DPLLT(UFTheory(), lazy_model=True)
 parser = Parser()
 
 
@@ -73,6 +79,132 @@ def test_dpllt_with_uf(formula_text, expected_result_code):
         assert verify_unabstracted_assignment(formula, assignment)
 
 
+@pytest.mark.parametrize(
+    "formula_text, expected_result_code",
+    [
+        (str_uf1, ResultCode.UNSAT),
+        (str_uf2, ResultCode.SAT),
+        (str_uf3, ResultCode.UNSAT),
+        (str_uf4, ResultCode.SAT),
+    ],
+)
+def test_dpllt_with_uf_chronological_backtracking(formula_text, expected_result_code):
+    formula = parser.parse(formula_text)
+    result_code, assignment = chrono_solver.solve(formula)
+
+    assert result_code == expected_result_code
+    if expected_result_code == ResultCode.SAT:
+        assert verify_unabstracted_assignment(formula, assignment)
+
+
+@pytest.mark.parametrize(
+    "formula_text, expected_result_code",
+    [
+        (str_uf1, ResultCode.UNSAT),
+        (str_uf2, ResultCode.SAT),
+        (str_uf3, ResultCode.UNSAT),
+        (str_uf4, ResultCode.SAT),
+    ],
+)
+def test_dpllt_with_uf_polarity_encoding(formula_text, expected_result_code):
+    formula = parser.parse(formula_text)
+    result_code, assignment = polarity_solver.solve(formula)
+
+    assert result_code == expected_result_code
+    if expected_result_code == ResultCode.SAT:
+        assert verify_unabstracted_assignment(formula, assignment)
+
+
+@pytest.mark.parametrize(
+    "formula_text, expected_result_code",
+    [
+        (str_uf1, ResultCode.UNSAT),
+        (str_uf2, ResultCode.SAT),
+        (str_uf3, ResultCode.UNSAT),
+        (str_uf4, ResultCode.SAT),
+    ],
+)
+def test_dpllt_with_uf_simplify(formula_text, expected_result_code):
+    formula = parser.parse(formula_text)
+    result_code, assignment = simplify_solver.solve(formula)
+
+    assert result_code == expected_result_code
+    if expected_result_code == ResultCode.SAT:
+        assert verify_unabstracted_assignment(formula, assignment)
+
+
+@pytest.mark.parametrize(
+    "assertions_texts, expected_result_code",
+    [
+        (["a = b", "(a != b) | (f(a) = c)", "f(b) != c"], ResultCode.UNSAT),
+        (["a = b", "(a != b) | (a = b)", "f(a) = c"], ResultCode.SAT),
+        (["a = b", "(a != b) & (f(a) = c)"], ResultCode.UNSAT),
+    ],
+)
+def test_dpllt_with_uf_simplify_assertions(assertions_texts, expected_result_code):
+    assertions = [parser.parse(text) for text in assertions_texts]
+    result_code, assignment = simplify_solver.solve_assertions(iter(assertions))
+
+    assert result_code == expected_result_code
+    if expected_result_code == ResultCode.SAT:
+        for assertion in assertions:
+            assert verify_unabstracted_assignment(assertion, assignment)
+
+
+def test_dpllt_with_uf_incremental_abstraction():
+    # the formulas share literals and subformulas, solved by the same solver
+    a_eq_b = parser.parse("a = b")
+    a_eq_b_ints = set()
+    for formula_text, expected_result_code in [
+        (str_uf2, ResultCode.SAT),
+        (str_uf1, ResultCode.UNSAT),
+        (str_uf4, ResultCode.SAT),
+        (str_uf2, ResultCode.SAT),
+    ]:
+        formula = parser.parse(formula_text)
+        result_code, assignment = incremental_solver.solve(formula)
+
+        assert result_code == expected_result_code
+        if expected_result_code == ResultCode.SAT:
+            assert verify_unabstracted_assignment(formula, assignment)
+            a_eq_b_ints.update(
+                lit_int
+                for lit_int, lit in incremental_solver.abstraction_map.items()
+                if lit == a_eq_b
+            )
+    assert len(a_eq_b_ints) == 1
+
+
+@pytest.mark.parametrize(
+    "formula_text",
+    [
+        str_uf2,
+        str_uf4,
+        "((a = b) | (f(!c) = d)) & ((a != b) & (f(!c) != e))",
+        "(f(!a, g(!b)) = c) & ((c != d) | (f(!a) = a))",
+    ],
+)
+def test_dpllt_with_uf_lazy_model(formula_text):
+    formula = parser.parse(formula_text)
+    result_code, assignment = lazy_solver.solve(formula)
+
+    assert result_code == ResultCode.SAT
+    assert isinstance(assignment, LazyModel)
+    assert verify_unabstracted_assignment(formula, assignment)
+    assert not any(
+        isinstance(lit, Var) and lit.name.startswith("#") for lit in assignment
+    )
+    with pytest.raises(KeyError):
+        assignment[parser.parse("x = y")]
+
+    # the view has the same items as the eager translation
+    lazy_solver.lazy_model = False
+    try:
+        assert lazy_solver._assignment_to_original_form() == dict(assignment)
+    finally:
+        lazy_solver.lazy_model = True
+
+
 def test_eqs_neqs_args_no_errors():
     formula_text = "(a = b) & (y -> (x | (a != c)))"
     formula = parser.parse(formula_text)
@@ -106,3 +238,27 @@ def test_func_args_errors(formula_text):
     with pytest.raises(ValueError):
         formula = parser.parse(formula_text)
         solver.solve(formula)
+
+
+@pytest.mark.parametrize(
+    "clauses_strs, expected_result_code",
+    [
+        (clauses_strs_uf2, ResultCode.SAT),
+        (clauses_strs_uf4, ResultCode.SAT),
+        (
+            ["f(f(f(a))) = a", "f(f(f(f(f(a))))) = a", "f(a) != a"],
+            ResultCode.UNSAT,
+        ),
+        (["(a = b) | (f(!c) = d)", "a != b", "f(!c) != e"], ResultCode.SAT),
+    ],
+)
+def test_dpllt_with_uf_assertions_stream(clauses_strs, expected_result_code):
+    result_code, assignment = solver.solve_assertions(
+        parser.parse_assertions(clauses_strs)
+    )
+
+    assert result_code == expected_result_code
+    if expected_result_code == ResultCode.SAT:
+        for clause_str in clauses_strs:
+            formula = parser.parse(clause_str)
+            assert verify_unabstracted_assignment(formula, assignment)
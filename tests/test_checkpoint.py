@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from DPLLT import DPLL, DPLLT
+from benchmarks.generators import pigeonhole, random_k_sat
+from constants import ResultCode
+from parsing.parse import Parser
+from solvers.SATSolver import Solver
+from solvers.theories.TQTheory import TQTheory
+from solvers.theories.UFTheory import UFTheory
+from tests.test_utils import verify_unabstracted_assignment
+
+parser = Parser()
+
+
+class Preempted(Exception):
+    pass
+
+
+def _is_satisfied(formula, assignment):
+    true_lits = {var if value else -var for var, value in assignment.items()}
+    return all(clause & true_lits for clause in formula)
+
+
+def test_sat_solver_checkpoint_arrays_round_trip():
+    formula = random_k_sat(30, 120, seed=1)
+    solver = Solver()
+    for clause in formula:
+        solver.add_clause(set(clause))
+    solver.assign_literal(3, 0)
+    solver.saved_phases = {1: True, 2: False}
+    solver.stats.conflicts = 7
+
+    arrays = solver.get_checkpoint_arrays()
+    loaded = Solver()
+    loaded.load_checkpoint_arrays(arrays)
+
+    assert [clause.set_clause for clause in loaded.clauses] == [
+        clause.set_clause for clause in solver.clauses
+    ]
+    assert loaded.get_trail() == solver.get_trail()
+    assert loaded.saved_phases == solver.saved_phases
+    assert loaded.stats.conflicts == 7
+
+
+def test_sat_solver_checkpoint_bad_version():
+    arrays = Solver().get_checkpoint_arrays()
+    arrays["format_version"] = np.array(-1)
+    with pytest.raises(ValueError):
+        Solver().load_checkpoint_arrays(arrays)
+
+
+def test_periodic_checkpoint_resume_after_preemption(tmp_path, monkeypatch):
+    path = str(tmp_path / "php.npz")
+    formula = pigeonhole(5)
+
+    preempted_solver = DPLL(checkpoint_path=path, checkpoint_interval=20)
+    save_checkpoint = preempted_solver.save_checkpoint
+
+    def save_and_preempt(checkpoint_path):
+        save_checkpoint(checkpoint_path)
+        raise Preempted()
+
+    monkeypatch.setattr(preempted_solver, "save_checkpoint", save_and_preempt)
+    with pytest.raises(Preempted):
+        preempted_solver.solve([set(clause) for clause in formula], to_abstract=False)
+    checkpoint_conflicts = preempted_solver.sat_solver.stats.conflicts
+
+    result_code, _, stats = DPLL().resume(path, return_statistics=True)
+    assert result_code == ResultCode.UNSAT
+    assert stats.conflicts >= checkpoint_conflicts
+
+
+def test_checkpoint_resume_sat(tmp_path):
+    path = str(tmp_path / "sat.npz")
+    formula = random_k_sat(40, 150, seed=2)
+    solver = DPLL(phase_saving=True)
+    result_code, _ = solver.solve(
+        [set(clause) for clause in formula], to_abstract=False
+    )
+    assert result_code == ResultCode.SAT
+    solver.save_checkpoint(path)
+
+    result_code, assignment = DPLL().resume(path)
+    assert result_code == ResultCode.SAT
+    assert _is_satisfied(formula, assignment)
+
+
+@pytest.mark.parametrize(
+    "make_theory, formula_text, expected_result_code",
+    [
+        (
+            UFTheory,
+            "(g(a) = c) & (((f(g(a)) != f(c)) | (g(a) = d)) & (c != d))",
+            ResultCode.UNSAT,
+        ),
+        (UFTheory, "(f(a) = b) & ((a = c) & ((f(c) = d) | (b != d)))", ResultCode.SAT),
+        (TQTheory, "([1, -1, 0] = 3) & ([2, 1, 0] < 1)", ResultCode.SAT),
+        (TQTheory, "([1, 1] >= 1) & ([1, 1] < -1)", ResultCode.UNSAT),
+    ],
+)
+def test_theory_checkpoint_resume(
+    tmp_path, make_theory, formula_text, expected_result_code
+):
+    path = str(tmp_path / "theory.npz")
+    formula = parser.parse(formula_text)
+    solver = DPLLT(make_theory())
+    result_code, _ = solver.solve(formula)
+    assert result_code == expected_result_code
+    solver.save_checkpoint(path)
+
+    result_code, assignment = DPLLT(make_theory()).resume(path)
+    assert result_code == expected_result_code
+    if expected_result_code == ResultCode.SAT:
+        assert verify_unabstracted_assignment(formula, assignment)
+
+
+def test_invalid_checkpoint_interval():
+    with pytest.raises(ValueError):
+        DPLL(checkpoint_interval=0)
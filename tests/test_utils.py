@@ -3,6 +3,7 @@ from parsing.logical_blocks import (
     Or,
     And,
     BinaryOp,
+    NaryOp,
     NEqual,
     Less,
     Equiv,
@@ -36,26 +37,39 @@ def verify_abstracted_assignment(formula, solution):
 
 
 def _verify_unabstracted_assignment_helper(original_formula, assignment_map):
-    if isinstance(original_formula, BinaryOp):
-        left, right = original_formula.left, original_formula.right
-        left_bool_val = _verify_unabstracted_assignment_helper(left, assignment_map)
-        right_bool_val = _verify_unabstracted_assignment_helper(right, assignment_map)
+    if isinstance(original_formula, NaryOp):
+        bool_vals = [
+            _verify_unabstracted_assignment_helper(item, assignment_map)
+            for item in original_formula.items
+        ]
 
         if isinstance(original_formula, And):
-            if left_bool_val is None or right_bool_val is None:
+            if False in bool_vals:
+                return False
+            elif None in bool_vals:
                 return None
             else:
-                return left_bool_val and right_bool_val
+                return True
 
         elif isinstance(original_formula, Or):
-            if left_bool_val or right_bool_val:
+            if any(bool_vals):
                 return True
-            elif left_bool_val is None or right_bool_val is None:
+            elif None in bool_vals:
                 return None
             else:
                 return False
 
-        elif isinstance(original_formula, Imply):
+        else:
+            raise NotImplementedError(
+                f"Handling type {type(original_formula)}" f" wasn't implemented"
+            )
+
+    elif isinstance(original_formula, BinaryOp):
+        left, right = original_formula.left, original_formula.right
+        left_bool_val = _verify_unabstracted_assignment_helper(left, assignment_map)
+        right_bool_val = _verify_unabstracted_assignment_helper(right, assignment_map)
+
+        if isinstance(original_formula, Imply):
             if (right_bool_val is True) or (left_bool_val is False):
                 return True
             elif left_bool_val is None or right_bool_val is None:
@@ -100,18 +114,29 @@ def _verify_unabstracted_assignment_helper(original_formula, assignment_map):
 
 
 def verify_unabstracted_assignment(original_formula, assignment_map):
-    if isinstance(original_formula, BinaryOp):
-        left, right = original_formula.left, original_formula.right
-        left_bool_val = _verify_unabstracted_assignment_helper(left, assignment_map)
-        right_bool_val = _verify_unabstracted_assignment_helper(right, assignment_map)
+    if isinstance(original_formula, NaryOp):
+        bool_vals = [
+            _verify_unabstracted_assignment_helper(item, assignment_map)
+            for item in original_formula.items
+        ]
 
         if isinstance(original_formula, And):
-            return left_bool_val and right_bool_val
+            return all(bool_vals)
 
         elif isinstance(original_formula, Or):
-            return left_bool_val or right_bool_val
+            return any(bool_vals)
+
+        else:
+            raise NotImplementedError(
+                f"Handling type {type(original_formula)}" f" wasn't implemented"
+            )
+
+    elif isinstance(original_formula, BinaryOp):
+        left, right = original_formula.left, original_formula.right
+        left_bool_val = _verify_unabstracted_assignment_helper(left, assignment_map)
+        right_bool_val = _verify_unabstracted_assignment_helper(right, assignment_map)
 
-        elif isinstance(original_formula, Imply):
+        if isinstance(original_formula, Imply):
             return (right_bool_val is True) or (left_bool_val is False)
 
         elif isinstance(original_formula, Equiv):